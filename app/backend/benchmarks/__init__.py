@@ -0,0 +1,3 @@
+"""
+Benchmarks de código CPU-bound do backend (formatador markdown -> Notion).
+"""
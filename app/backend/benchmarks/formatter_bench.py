@@ -0,0 +1,233 @@
+"""
+Benchmark do formatador markdown -> blocos do Notion.
+
+Mede cada função pública de `backend.services.formatter` sobre o corpus em
+`benchmarks/corpus` (saídas típicas de LLM: código, tabelas, prosa longa e casos
+patológicos), escalado para tamanhos de 1 KB a 5 MB repetindo o documento.
+Para cada caso são reportados ops/s e as alocações de uma execução (pico e
+memória retida, via tracemalloc).
+
+Os resultados podem ser gravados como baseline (`--save-baseline`) e comparados
+com a baseline versionada (`--compare`); a saída é 1 quando algum caso fica mais
+lento ou aloca mais que a tolerância permitida, para que o CI acuse regressões.
+
+Uso:
+    python -m backend.benchmarks.formatter_bench                 # 1 KB, 64 KB e 1 MB
+    python -m backend.benchmarks.formatter_bench --sizes 1kb,5mb
+    python -m backend.benchmarks.formatter_bench --compare --tolerance 0.3
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from backend.services import formatter
+
+BENCH_DIR = Path(__file__).parent
+CORPUS_DIR = BENCH_DIR / "corpus"
+BASELINE_PATH = BENCH_DIR / "baselines" / "formatter.json"
+
+SIZES = {
+    "1kb": 1024,
+    "64kb": 64 * 1024,
+    "1mb": 1024 * 1024,
+    "5mb": 5 * 1024 * 1024,
+}
+DEFAULT_SIZES = ["1kb", "64kb", "1mb"]
+
+# Mesmo tamanho de chunk usado por notion_service.write_to_notion
+SPLIT_MAX_LENGTH = 4000
+
+# Rótulos de linguagem vistos em respostas de LLM (aliases, variações e desconhecidos)
+LANGUAGE_TAGS = [
+    "python", "py", "Python3", "js", "jsx", "typescript", "tsx", "bash", "sh", "zsh",
+    "yaml", "yml", "json", "jsonc", "sql", "rust", "go", "c++", "cpp", "csharp", "C#",
+    "dockerfile", "Docker", "vue", "text", "plain_text", "", "toml", "javascriptreact",
+    "objective-c", "vb.net", "mermaid", "kotlin", "pyspark", "unknown-lang", "Makefile",
+]
+
+
+def load_corpus() -> Dict[str, str]:
+    """Carrega os documentos do corpus versionado ({nome: markdown})."""
+    return {path.stem: path.read_text(encoding="utf-8") for path in sorted(CORPUS_DIR.glob("*.md"))}
+
+
+def scale(text: str, size: int) -> str:
+    """Repete o documento até atingir `size` caracteres."""
+    return (text * (size // len(text) + 1))[:size]
+
+
+def _rich_text_lines(text: str) -> None:
+    for line in text.split("\n"):
+        if line:
+            formatter.process_rich_text(line)
+
+
+def _language_tags(_text: str) -> None:
+    for tag in LANGUAGE_TAGS:
+        formatter.get_valid_notion_language(tag)
+
+
+# Função medida -> operação sobre um documento do corpus
+BENCHMARKS: Dict[str, Callable[[str], object]] = {
+    "format_for_notion": formatter.format_for_notion,
+    "process_rich_text": _rich_text_lines,
+    "split_content": lambda text: formatter.split_content(text, max_length=SPLIT_MAX_LENGTH),
+    "_simple_split": lambda text: formatter._simple_split(text, SPLIT_MAX_LENGTH),
+    "get_valid_notion_language": _language_tags,
+}
+
+# Funções cujo custo não depende do documento (medidas uma única vez)
+SIZE_INDEPENDENT = {"get_valid_notion_language"}
+
+
+def measure(operation: Callable[[str], object], text: str, min_time: float = 0.2,
+            min_runs: int = 3) -> dict:
+    """Mede ops/s (após aquecimento) e as alocações de uma execução."""
+    operation(text)
+
+    runs = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while runs < min_runs or elapsed < min_time:
+        operation(text)
+        runs += 1
+        elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        result = operation(text)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    return {
+        "ops_per_sec": round(runs / elapsed, 3),
+        "peak_kb": round(peak / 1024, 1),
+        "retained_kb": round(retained / 1024, 1),
+    }
+
+
+def run_benchmarks(sizes: List[str], functions: Optional[List[str]] = None,
+                   corpora: Optional[List[str]] = None, min_time: float = 0.2) -> Dict[str, dict]:
+    """Executa os benchmarks e retorna {"função/corpus/tamanho": métricas}."""
+    corpus = load_corpus()
+    results = {}
+    for name, operation in BENCHMARKS.items():
+        if functions and name not in functions:
+            continue
+        if name in SIZE_INDEPENDENT:
+            results[f"{name}/tags/-"] = measure(operation, "", min_time=min_time)
+            continue
+        for doc_name, text in corpus.items():
+            if corpora and doc_name not in corpora:
+                continue
+            for size_name in sizes:
+                # Documentos grandes são medidos com menos repetições
+                runs = 3 if SIZES[size_name] <= SIZES["64kb"] else 1
+                results[f"{name}/{doc_name}/{size_name}"] = measure(
+                    operation, scale(text, SIZES[size_name]), min_time=min_time, min_runs=runs
+                )
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Lista os casos que ficaram mais lentos ou passaram a alocar mais que a baseline."""
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        if current["ops_per_sec"] < reference["ops_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{key}: {current['ops_per_sec']:.2f} ops/s (baseline {reference['ops_per_sec']:.2f})"
+            )
+        if current["peak_kb"] > reference["peak_kb"] * (1 + tolerance) + 1:
+            regressions.append(
+                f"{key}: pico de {current['peak_kb']:.1f} KB (baseline {reference['peak_kb']:.1f} KB)"
+            )
+    return regressions
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Dict[str, dict]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8")).get("results", {})
+
+
+def save_baseline(results: Dict[str, dict], path: Path = BASELINE_PATH) -> None:
+    document = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": dict(sorted({**load_baseline(path), **results}.items())),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def format_table(results: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None) -> str:
+    baseline = baseline or {}
+    lines = [f"{'caso':<48}{'ops/s':>12}{'pico KB':>12}{'retido KB':>12}{'vs baseline':>14}"]
+    for key, metrics in results.items():
+        reference = baseline.get(key)
+        delta = ""
+        if reference and reference["ops_per_sec"]:
+            delta = f"{(metrics['ops_per_sec'] / reference['ops_per_sec'] - 1) * 100:+.1f}%"
+        lines.append(
+            f"{key:<48}{metrics['ops_per_sec']:>12.2f}{metrics['peak_kb']:>12.1f}"
+            f"{metrics['retained_kb']:>12.1f}{delta:>14}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do formatador markdown -> Notion")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES),
+                        help=f"Tamanhos separados por vírgula ({', '.join(SIZES)})")
+    parser.add_argument("--functions", help="Restringe às funções informadas (separadas por vírgula)")
+    parser.add_argument("--corpus", help="Restringe aos documentos informados (separados por vírgula)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Tempo mínimo de medição por caso (s)")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados como baseline")
+    parser.add_argument("--compare", action="store_true", help="Falha se houver regressão frente à baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Regressão tolerada (fração)")
+    parser.add_argument("--json", dest="json_path", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args(argv)
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"Tamanhos desconhecidos: {', '.join(unknown)}")
+
+    results = run_benchmarks(
+        sizes,
+        functions=args.functions.split(",") if args.functions else None,
+        corpora=args.corpus.split(",") if args.corpus else None,
+        min_time=args.min_time,
+    )
+    baseline = load_baseline()
+    print(format_table(results, baseline))
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    if args.save_baseline:
+        save_baseline(results)
+        print(f"\nBaseline gravada em {BASELINE_PATH}")
+    if args.compare:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressões detectadas:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print("\nNenhuma regressão em relação à baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -102,10 +102,110 @@ class Settings(BaseSettings):
     notion_api_key: Optional[str] = get_secret("notion_api_key", "NOTION_API_KEY", required=False)
     notion_page_id: Optional[str] = os.environ.get("NOTION_PAGE_ID", "")
     
+    # Continuação automática de respostas truncadas pelo max_tokens
+    provider_max_continuations: int = int(os.environ.get("PROVIDER_MAX_CONTINUATIONS", "3"))
+    provider_continuation_token_budget: int = int(os.environ.get("PROVIDER_CONTINUATION_TOKEN_BUDGET", "16000"))
+    provider_prompt_cache_enabled: bool = os.environ.get("PROVIDER_PROMPT_CACHE_ENABLED", "true").lower() == "true"
+    
+    # Modo de documento longo (sumário + seções geradas em paralelo)
+    long_document_max_sections: int = int(os.environ.get("LONG_DOCUMENT_MAX_SECTIONS", "20"))
+    long_document_concurrency: int = int(os.environ.get("LONG_DOCUMENT_CONCURRENCY", "4"))
+    
+    # URLs base dos upstreams (vazias = endpoints oficiais; usadas para apontar para stubs locais)
+    openai_base_url: Optional[str] = os.environ.get("OPENAI_BASE_URL") or None
+    anthropic_base_url: Optional[str] = os.environ.get("ANTHROPIC_BASE_URL") or None
+    deepseek_base_url: Optional[str] = os.environ.get("DEEPSEEK_BASE_URL") or None
+    notion_base_url: Optional[str] = os.environ.get("NOTION_BASE_URL") or None
+    
+    # Servidor de inferência compatível com a API da OpenAI (vLLM, llama.cpp): URL base e modelo servido
+    openai_compatible_base_url: Optional[str] = os.environ.get("OPENAI_COMPATIBLE_BASE_URL") or None
+    openai_compatible_model: str = os.environ.get("OPENAI_COMPATIBLE_MODEL", "")
+    # Provedores de pacotes instalados, registrados no grupo de entry points "notion_ai_assistant.providers"
+    provider_plugins_enabled: bool = os.environ.get("PROVIDER_PLUGINS_ENABLED", "true").lower() == "true"
+    
+    # Roteamento automático de modelos (configuração "routing": "auto" do provedor): prompts acima
+    # deste tamanho estimado ou com pontuação de complexidade a partir do limite vão para o modelo forte
+    model_routing_enabled: bool = os.environ.get("MODEL_ROUTING_ENABLED", "true").lower() == "true"
+    model_routing_fast_max_tokens: int = int(os.environ.get("MODEL_ROUTING_FAST_MAX_TOKENS", "400"))
+    model_routing_strong_score: int = int(os.environ.get("MODEL_ROUTING_STRONG_SCORE", "2"))
+    # Gerações idênticas simultâneas (mesmo prompt, provedores, configurações e chaves) compartilham uma chamada
+    generation_coalescing_enabled: bool = os.environ.get("GENERATION_COALESCING_ENABLED", "true").lower() == "true"
+    
     # Configurações de modelos AI
     openai_model: str = "gpt-4-turbo-preview"
     openai_max_tokens: int = 4096
     
+    # Roteamento entre provedores (failover, hedging e circuit breaker)
+    provider_failover_enabled: bool = os.environ.get("PROVIDER_FAILOVER_ENABLED", "true").lower() == "true"
+    provider_hedging_enabled: bool = os.environ.get("PROVIDER_HEDGING_ENABLED", "false").lower() == "true"
+    provider_hedge_min_delay: float = float(os.environ.get("PROVIDER_HEDGE_MIN_DELAY", "2.0"))
+    provider_hedge_max_delay: float = float(os.environ.get("PROVIDER_HEDGE_MAX_DELAY", "30.0"))
+    provider_breaker_failure_threshold: int = int(os.environ.get("PROVIDER_BREAKER_FAILURE_THRESHOLD", "5"))
+    provider_breaker_cooldown: float = float(os.environ.get("PROVIDER_BREAKER_COOLDOWN", "30.0"))
+    provider_breaker_error_rate: float = float(os.environ.get("PROVIDER_BREAKER_ERROR_RATE", "0.5"))
+    provider_breaker_min_requests: int = int(os.environ.get("PROVIDER_BREAKER_MIN_REQUESTS", "10"))
+    provider_health_window: float = float(os.environ.get("PROVIDER_HEALTH_WINDOW", "60.0"))
+    # Intervalo mínimo entre leituras do estado dos circuitos no backend compartilhado
+    provider_breaker_sync_interval: float = float(os.environ.get("PROVIDER_BREAKER_SYNC_INTERVAL", "1.0"))
+    
+    # Política de requisições de saída (prazos em segundos)
+    provider_connect_timeout: float = float(os.environ.get("PROVIDER_CONNECT_TIMEOUT", "10.0"))
+    provider_read_timeout: float = float(os.environ.get("PROVIDER_READ_TIMEOUT", "90.0"))
+    provider_total_timeout: float = float(os.environ.get("PROVIDER_TOTAL_TIMEOUT", "120.0"))
+    provider_max_retries: int = int(os.environ.get("PROVIDER_MAX_RETRIES", "2"))
+    notion_connect_timeout: float = float(os.environ.get("NOTION_CONNECT_TIMEOUT", "10.0"))
+    notion_read_timeout: float = float(os.environ.get("NOTION_READ_TIMEOUT", "60.0"))
+    notion_total_timeout: float = float(os.environ.get("NOTION_TOTAL_TIMEOUT", "90.0"))
+    notion_max_retries: int = int(os.environ.get("NOTION_MAX_RETRIES", "3"))
+    
+    # Limite de requisições ao Notion por integração (compartilhado pelo processo ou, com o
+    # backend postgres do rate limiting, pelas réplicas) e concorrência da publicação em lote
+    notion_requests_per_second: float = float(os.environ.get("NOTION_REQUESTS_PER_SECOND", "3.0"))
+    notion_bulk_concurrency: int = int(os.environ.get("NOTION_BULK_CONCURRENCY", "6"))
+    
+    # Layout por seções (toggle/child_page): tamanho mínimo do documento, em blocos, e
+    # quantas seções são enviadas ao mesmo tempo
+    notion_section_min_blocks: int = int(os.environ.get("NOTION_SECTION_MIN_BLOCKS", "300"))
+    notion_section_concurrency: int = int(os.environ.get("NOTION_SECTION_CONCURRENCY", "4"))
+    
+    # Estado compartilhado entre processos e réplicas (rate limiting e circuit breakers):
+    # memory (um único processo) ou postgres
+    state_backend: str = os.environ.get("STATE_BACKEND", "memory")
+    
+    # Rate limiting por usuário em /api/generate (backend: memory ou postgres; padrão: STATE_BACKEND)
+    rate_limit_enabled: bool = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    rate_limit_backend: str = os.environ.get("RATE_LIMIT_BACKEND", os.environ.get("STATE_BACKEND", "memory"))
+    rate_limit_max_concurrent: int = int(os.environ.get("RATE_LIMIT_MAX_CONCURRENT", "2"))
+    rate_limit_requests_per_minute: int = int(os.environ.get("RATE_LIMIT_REQUESTS_PER_MINUTE", "10"))
+    rate_limit_tokens_per_minute: int = int(os.environ.get("RATE_LIMIT_TOKENS_PER_MINUTE", "200000"))
+    rate_limit_lease_ttl: float = float(os.environ.get("RATE_LIMIT_LEASE_TTL", "600"))
+    
+    # Contabilização de uso (agregada por dia e gravada em lotes)
+    usage_accounting_enabled: bool = os.environ.get("USAGE_ACCOUNTING_ENABLED", "true").lower() == "true"
+    usage_flush_interval: float = float(os.environ.get("USAGE_FLUSH_INTERVAL", "10.0"))
+    usage_flush_max_pending: int = int(os.environ.get("USAGE_FLUSH_MAX_PENDING", "500"))
+    
+    # Servidor de produção (python -m backend.server); SERVER_WORKERS=0 usa um processo por CPU
+    server_host: str = os.environ.get("SERVER_HOST", "0.0.0.0")
+    server_port: int = int(os.environ.get("SERVER_PORT", "8080"))
+    server_workers: int = int(os.environ.get("SERVER_WORKERS", "1"))
+    server_graceful_timeout: int = int(os.environ.get("SERVER_GRACEFUL_TIMEOUT", "30"))
+    # Depois do prazo acima, quanto os envios ao Notion já iniciados ainda têm para terminar
+    server_drain_timeout: float = float(os.environ.get("SERVER_DRAIN_TIMEOUT", "5"))
+    server_keepalive_timeout: int = int(os.environ.get("SERVER_KEEPALIVE_TIMEOUT", "5"))
+    server_max_requests: int = int(os.environ.get("SERVER_MAX_REQUESTS", "0"))
+    server_forwarded_allow_ips: str = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+    # Definido pelo servidor depois de preparar o banco, para os processos não repetirem
+    skip_db_init: bool = os.environ.get("SKIP_DB_INIT", "false").lower() == "true"
+    
+    # Compressão das respostas (brotli ou gzip, negociada pelo Accept-Encoding) a partir deste tamanho
+    response_compression_enabled: bool = os.environ.get("RESPONSE_COMPRESSION_ENABLED", "true").lower() == "true"
+    response_compression_min_size: int = int(os.environ.get("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+    
+    # Readiness (/readyz): por quanto tempo o resultado das verificações é reaproveitado e o prazo de cada uma
+    health_cache_ttl: float = float(os.environ.get("HEALTH_CACHE_TTL", "5"))
+    health_check_timeout: float = float(os.environ.get("HEALTH_CHECK_TIMEOUT", "2"))
+    
     # Configurações gerais
     environment: str = os.environ.get("ENVIRONMENT", "development")
     debug: bool = os.environ.get("DEBUG", "False").lower() == "true"
@@ -22,11 +22,8 @@ async def get_first_item(agen):
     return None
 
 async def create_admin_user():
-    """Create a default admin user if not exists"""
+    """Create a default admin user if not exists (as tabelas já devem existir)"""
     try:
-        logger.info("Creating database tables...")
-        await create_db_and_tables()
-        
         logger.info("Checking if admin user exists...")
         
         async for session in get_async_session():
@@ -77,7 +74,13 @@ async def create_admin_user():
         logger.error(f"Error creating admin user: {str(e)}")
         raise
 
+async def main():
+    """Cria as tabelas e o usuário admin (execução direta do script)"""
+    logger.info("Creating database tables...")
+    await create_db_and_tables()
+    await create_admin_user()
+
 # Executar a função quando o script é executado diretamente
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    asyncio.run(create_admin_user())
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,4 @@
+"""
+Ferramentas de teste de carga: servidores stub dos upstreams (OpenAI, Anthropic,
+DeepSeek e Notion) e o harness que exercita o backend de ponta a ponta.
+"""
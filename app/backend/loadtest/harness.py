@@ -0,0 +1,193 @@
+"""
+Harness de carga de ponta a ponta para o endpoint /api/generate.
+
+Cria (ou reutiliza) usuários de teste, configura chaves fictícias apontando para
+os stubs (backend.loadtest.stubs) e dispara requisições com concorrência fixa.
+O relatório traz a vazão, os percentis p50/p95/p99 da latência total e de cada
+etapa informada pelo backend no cabeçalho Server-Timing (provedor, Notion), além
+do overhead restante (fila, rate limiting, formatação, serialização).
+
+Uso (com os stubs rodando e o backend configurado com as *_BASE_URL dos stubs):
+    python -m backend.loadtest.harness --base-url http://localhost:8080 \\
+        --users 4 --concurrency 16 --requests 200 --provider openai
+
+Para medir apenas o pipeline, desative o rate limiting do backend
+(RATE_LIMIT_ENABLED=false) ou use um número de usuários compatível com os limites.
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+DEFAULT_PASSWORD = "loadtest-password"
+
+
+@dataclass
+class Sample:
+    status: int
+    latency_ms: float
+    stages: Dict[str, float] = field(default_factory=dict)
+
+
+def parse_server_timing(value: str) -> Dict[str, float]:
+    """Converte um cabeçalho Server-Timing em {etapa: duração em ms}."""
+    durations = {}
+    for entry in (value or "").split(","):
+        parts = [part.strip() for part in entry.split(";")]
+        if not parts[0]:
+            continue
+        for param in parts[1:]:
+            if param.startswith("dur="):
+                try:
+                    durations[parts[0]] = float(param[4:])
+                except ValueError:
+                    pass
+    return durations
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil pelo método nearest-rank (0 para listas vazias)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def summarize(samples: List[Sample], elapsed: float) -> dict:
+    """Agrega as amostras em vazão, percentis e distribuição de status."""
+    ok = [sample for sample in samples if sample.status == 200]
+    stage_names = sorted({name for sample in ok for name in sample.stages})
+    stages = {}
+    for name in stage_names + ["overhead"]:
+        if name == "overhead":
+            values = [max(0.0, s.latency_ms - sum(s.stages.values())) for s in ok]
+        else:
+            values = [s.stages.get(name, 0.0) for s in ok]
+        stages[name] = {f"p{p}": round(percentile(values, p), 1) for p in (50, 95, 99)}
+
+    latencies = [sample.latency_ms for sample in ok]
+    return {
+        "requests": len(samples),
+        "succeeded": len(ok),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed > 0 else 0.0,
+        "status_codes": dict(Counter(sample.status for sample in samples)),
+        "latency_ms": {f"p{p}": round(percentile(latencies, p), 1) for p in (50, 95, 99)},
+        "stages_ms": stages,
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"Requisições: {report['requests']} ({report['succeeded']} com sucesso) em {report['elapsed_s']}s",
+        f"Vazão: {report['throughput_rps']} req/s",
+        f"Status: {report['status_codes']}",
+        "",
+        f"{'etapa':<12}{'p50':>10}{'p95':>10}{'p99':>10}",
+    ]
+    rows = [("total", report["latency_ms"])] + list(report["stages_ms"].items())
+    for name, values in rows:
+        lines.append(f"{name:<12}{values['p50']:>10.1f}{values['p95']:>10.1f}{values['p99']:>10.1f}")
+    return "\n".join(lines)
+
+
+async def prepare_user(client: httpx.AsyncClient, index: int, provider: str, run_id: str) -> str:
+    """Registra e autentica um usuário de teste; retorna o token JWT."""
+    email = f"loadtest-{run_id}-{index}@example.com"
+    response = await client.post("/auth/register", json={"email": email, "password": DEFAULT_PASSWORD})
+    if response.status_code not in (201, 400):
+        response.raise_for_status()
+
+    response = await client.post(
+        "/auth/jwt/login", data={"username": email, "password": DEFAULT_PASSWORD}
+    )
+    response.raise_for_status()
+    token = response.json()["access_token"]
+
+    response = await client.post(
+        "/api/settings/update",
+        headers={"Authorization": f"Bearer {token}"},
+        json={
+            "notion_api_key": "secret_stub",
+            "notion_page_id": str(uuid.uuid4()),
+            "ai_provider": provider,
+            f"{provider}_api_key": "stub-key",
+        }
+    )
+    response.raise_for_status()
+    return token
+
+
+async def run_load(base_url: str, users: int, concurrency: int, requests: int, provider: str,
+                   prompt: str, timeout: float = 300.0, run_id: Optional[str] = None,
+                   mode: str = "standard") -> dict:
+    """Executa o teste de carga e retorna o relatório agregado."""
+    run_id = run_id or uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=concurrency + users, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        tokens = [await prepare_user(client, index, provider, run_id) for index in range(users)]
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for index in range(requests):
+            queue.put_nowait(index)
+        samples: List[Sample] = []
+
+        async def worker():
+            while True:
+                try:
+                    index = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                token = tokens[index % len(tokens)]
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/api/generate",
+                        headers={"Authorization": f"Bearer {token}"},
+                        json={"prompt": f"{prompt} #{index}", "mode": mode}
+                    )
+                    status = response.status_code
+                    stages = parse_server_timing(response.headers.get("server-timing", ""))
+                except httpx.HTTPError:
+                    status, stages = 0, {}
+                samples.append(Sample(status, (time.perf_counter() - started) * 1000, stages))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(samples, elapsed)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Teste de carga de ponta a ponta do /api/generate")
+    parser.add_argument("--base-url", default="http://localhost:8080")
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--provider", default="openai", choices=["openai", "anthropic", "deepseek"])
+    parser.add_argument("--prompt", default="Escreva um guia técnico detalhado")
+    parser.add_argument("--mode", default="standard", choices=["standard", "long"])
+    parser.add_argument("--json", dest="json_path", help="Grava o relatório em JSON neste arquivo")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load(
+        args.base_url, args.users, args.concurrency, args.requests, args.provider, args.prompt,
+        mode=args.mode
+    ))
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
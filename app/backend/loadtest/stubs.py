@@ -0,0 +1,660 @@
+"""
+Servidores stub locais que imitam os upstreams usados pelo backend.
+
+Um único app ASGI expõe, sob prefixos distintos:
+
+- /openai/v1/chat/completions     (OPENAI_BASE_URL=http://host:porta/openai/v1)
+- /deepseek/v1/chat/completions   (DEEPSEEK_BASE_URL=http://host:porta/deepseek/v1)
+- /anthropic/v1/messages          (ANTHROPIC_BASE_URL=http://host:porta/anthropic)
+- /notion/v1/pages, /notion/v1/blocks/{id}, /notion/v1/blocks/{id}/children,
+  /notion/v1/databases/{id}, /notion/v1/data_sources/{id},
+  /notion/v1/users/me             (NOTION_BASE_URL=http://host:porta/notion)
+
+A latência, a velocidade de geração (tokens/s), o tamanho das respostas e a
+proporção de respostas 429 e 5xx são configuráveis por variáveis de ambiente
+(STUB_LLM_* e STUB_NOTION_*) ou em tempo de execução via PUT /_stub/config.
+Os limites reais da API do Notion (100 filhos por lista, 1000 blocos e 2 níveis
+de aninhamento por requisição, 100 itens de rich_text por bloco e 2000 caracteres
+por item) são validados, para que problemas de empacotamento apareçam nos
+testes de carga.
+
+Uso:
+    python -m backend.loadtest.stubs --port 9100
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Limites documentados da API do Notion
+NOTION_MAX_CHILDREN = 100
+NOTION_MAX_RICH_TEXT = 2000
+NOTION_MAX_PAGE_SIZE = 100
+NOTION_MAX_RICH_TEXT_ITEMS = 100
+NOTION_MAX_NESTING_DEPTH = 2
+NOTION_MAX_BLOCKS_PER_REQUEST = 1000
+
+# Aproximação usada para converter caracteres em tokens
+CHARS_PER_TOKEN = 4
+
+# Banco de dados disponível em todo stub (uma fonte de dados com as propriedades do catálogo)
+STUB_DATABASE_ID = "stub-database"
+STUB_DATA_SOURCE_ID = "stub-data-source"
+STUB_DATA_SOURCE_PROPERTIES = {
+    "Name": "title",
+    "Tags": "multi_select",
+    "Provider": "select",
+    "Model": "rich_text",
+    "Tokens": "number",
+}
+
+
+@dataclass
+class StubProfile:
+    """Comportamento simulado de um upstream."""
+    latency_ms: float = 200.0        # tempo até o início da resposta
+    jitter_ms: float = 50.0          # variação uniforme somada à latência
+    tokens_per_second: float = 0.0   # velocidade de geração (0 = instantâneo)
+    output_tokens: int = 0           # tamanho das respostas geradas
+    rate_limit_ratio: float = 0.0    # fração de respostas 429
+    error_ratio: float = 0.0         # fração de respostas 500
+    retry_after: float = 1.0         # Retry-After enviado nos 429
+
+    @classmethod
+    def from_env(cls, prefix: str, **defaults) -> "StubProfile":
+        profile = cls(**defaults)
+        for field in fields(cls):
+            value = os.environ.get(f"{prefix}{field.name.upper()}")
+            if value:
+                setattr(profile, field.name, type(getattr(profile, field.name))(value))
+        return profile
+
+    def update(self, values: Dict[str, Any]) -> None:
+        for field in fields(self):
+            if field.name in values:
+                setattr(self, field.name, type(getattr(self, field.name))(values[field.name]))
+
+    async def wait(self, output_tokens: int = 0) -> None:
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if self.tokens_per_second > 0:
+            delay += output_tokens * 1000 / self.tokens_per_second
+        await asyncio.sleep(delay / 1000)
+
+    def injected_fault(self) -> Optional[int]:
+        """Sorteia uma falha: 429, 500 ou None."""
+        roll = random.random()
+        if roll < self.rate_limit_ratio:
+            return 429
+        if roll < self.rate_limit_ratio + self.error_ratio:
+            return 500
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+_SAMPLE_SECTION = """## Seção {n}: visão geral
+
+Este parágrafo simula o texto produzido por um modelo, com **negrito**, *itálico*,
+`código inline` e um [link](https://example.com/doc/{n}) para exercitar o formatador.
+
+- Primeiro item da lista da seção {n}
+- Segundo item com **ênfase**
+  - Subitem aninhado
+
+1. Passo numerado
+2. Outro passo
+
+```python
+def secao_{n}(valor):
+    return valor * {n}
+```
+
+| Coluna A | Coluna B | Coluna C |
+|----------|----------|----------|
+| {n}      | texto    | mais texto |
+
+> Uma citação curta para a seção {n}.
+
+"""
+
+
+def sample_markdown(tokens: int) -> str:
+    """Gera markdown determinístico com aproximadamente `tokens` tokens."""
+    target = max(1, tokens) * CHARS_PER_TOKEN
+    parts = ["# Documento gerado pelo stub\n\n"]
+    size = len(parts[0])
+    n = 1
+    while size < target:
+        section = _SAMPLE_SECTION.format(n=n)
+        parts.append(section)
+        size += len(section)
+        n += 1
+    return "".join(parts)[:target]
+
+
+class StubState:
+    """Configuração e estado em memória compartilhados pelas rotas."""
+
+    def __init__(self, llm: Optional[StubProfile] = None, notion: Optional[StubProfile] = None):
+        self.llm = llm or StubProfile.from_env(
+            "STUB_LLM_", latency_ms=300.0, tokens_per_second=500.0, output_tokens=800
+        )
+        self.notion = notion or StubProfile.from_env("STUB_NOTION_", latency_ms=120.0, jitter_ms=40.0)
+        self.requests: Counter = Counter()
+        self.blocks: Dict[str, List[dict]] = {}
+        self.parents: Dict[str, str] = {}
+        # Propriedades das páginas criadas, por id
+        self.pages: Dict[str, dict] = {}
+        self.data_sources: Dict[str, Dict[str, str]] = {STUB_DATA_SOURCE_ID: dict(STUB_DATA_SOURCE_PROPERTIES)}
+        # Prefixos (system prompts) já vistos, para simular o cache de prompt dos provedores
+        self.cached_prefixes: set = set()
+        # Requisições ao Notion em andamento (e o pico observado) e anexações por bloco pai
+        self.notion_in_flight = 0
+        self.notion_max_in_flight = 0
+        self.appends: Counter = Counter()
+
+    def reset(self) -> None:
+        self.requests.clear()
+        self.blocks.clear()
+        self.parents.clear()
+        self.pages.clear()
+        self.cached_prefixes.clear()
+        self.notion_max_in_flight = 0
+        self.appends.clear()
+
+    def prompt_cache_hit(self, provider: str, prefix: str) -> bool:
+        """Retorna True se o prefixo já estava em cache e o grava para as próximas chamadas."""
+        key = (provider, prefix)
+        hit = key in self.cached_prefixes
+        self.cached_prefixes.add(key)
+        return hit
+
+
+def _messages_text(messages: List[dict]) -> str:
+    parts = []
+    for message in messages or []:
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(str(content))
+    return "\n".join(parts)
+
+
+def _notion_error(status: int, code: str, message: str, retry_after: Optional[float] = None) -> JSONResponse:
+    headers = {"Retry-After": str(int(retry_after))} if retry_after is not None else None
+    return JSONResponse(
+        status_code=status,
+        content={"object": "error", "status": status, "code": code, "message": message},
+        headers=headers
+    )
+
+
+# Tipos de bloco de texto que o Notion devolve com "color": "default"
+_COLORED_BLOCK_TYPES = {
+    "paragraph", "heading_1", "heading_2", "heading_3", "bulleted_list_item",
+    "numbered_list_item", "quote", "to_do", "toggle", "callout",
+}
+
+_DEFAULT_ANNOTATIONS = {
+    "bold": False, "italic": False, "strikethrough": False,
+    "underline": False, "code": False, "color": "default",
+}
+
+
+def _as_notion_body(block_type: str, body: dict) -> dict:
+    """Completa o corpo do bloco com os campos que a API do Notion acrescenta nas respostas."""
+    body = dict(body)
+    rich_text = []
+    for item in body.get("rich_text") or []:
+        text = item.get("text") or {}
+        rich_text.append(dict(
+            item,
+            annotations={**_DEFAULT_ANNOTATIONS, **(item.get("annotations") or {})},
+            plain_text=text.get("content", ""),
+            href=(text.get("link") or {}).get("url"),
+        ))
+    if "rich_text" in body:
+        body["rich_text"] = rich_text
+    if block_type in _COLORED_BLOCK_TYPES:
+        body.setdefault("color", "default")
+    return body
+
+
+def _canonical_id(block_id: str) -> str:
+    """O Notion aceita ids com ou sem hífens (como aparecem nas URLs)."""
+    try:
+        return str(uuid.UUID(block_id))
+    except ValueError:
+        return block_id
+
+
+def _validate_properties(schema: Dict[str, str], properties: Dict[str, Any]) -> Optional[str]:
+    """Valida as propriedades de uma página de banco contra o esquema da fonte de dados."""
+    if not any(kind == "title" and name in properties for name, kind in schema.items()):
+        return "Title property is required."
+    for name, value in properties.items():
+        if name not in schema:
+            return f"{name} is not a property that exists."
+        if schema[name] not in value:
+            return f"{name} is expected to be {schema[name]}."
+        options = value[schema[name]]
+        if schema[name] in ("select", "multi_select"):
+            for option in options if isinstance(options, list) else [options]:
+                if "," in option.get("name", ""):
+                    return f"Invalid select option, commas not allowed: {option['name']}"
+    return None
+
+
+def _validate_rich_text(path: str, rich_text: List[dict]) -> Optional[str]:
+    if len(rich_text) > NOTION_MAX_RICH_TEXT_ITEMS:
+        return f"{path}.length should be ≤ `{NOTION_MAX_RICH_TEXT_ITEMS}`, instead was `{len(rich_text)}`."
+    for item in rich_text:
+        content = (item.get("text") or {}).get("content", "")
+        if len(content) > NOTION_MAX_RICH_TEXT:
+            return (
+                f"{path}.text.content.length should be "
+                f"≤ `{NOTION_MAX_RICH_TEXT}`, instead was `{len(content)}`."
+            )
+    return None
+
+
+def _count_blocks(children: List[dict]) -> int:
+    return sum(
+        1 + _count_blocks((block.get(block.get("type", ""), {}) or {}).get("children") or [])
+        for block in children
+    )
+
+
+def _validate_notion_children(children: List[dict], depth: int = 1, path: str = "body.children") -> Optional[str]:
+    """Aplica os limites da API do Notion a uma lista de blocos."""
+    if len(children) > NOTION_MAX_CHILDREN:
+        return f"{path}.length should be ≤ `{NOTION_MAX_CHILDREN}`, instead was `{len(children)}`."
+    if depth > NOTION_MAX_NESTING_DEPTH:
+        return f"{path} exceeds the maximum nesting depth of {NOTION_MAX_NESTING_DEPTH} levels per request."
+    if depth == 1 and _count_blocks(children) > NOTION_MAX_BLOCKS_PER_REQUEST:
+        return f"{path} should contain ≤ `{NOTION_MAX_BLOCKS_PER_REQUEST}` blocks including nested children."
+    for index, block in enumerate(children):
+        body = block.get(block.get("type", ""), {}) or {}
+        error = _validate_rich_text(f"{path}[{index}].rich_text", body.get("rich_text", []) or [])
+        for cell_index, cell in enumerate(body.get("cells", []) or []):
+            error = error or _validate_rich_text(f"{path}[{index}].cells[{cell_index}]", cell)
+        if error:
+            return error
+        nested = body.get("children")
+        if nested:
+            error = _validate_notion_children(nested, depth + 1, f"{path}[{index}].children")
+            if error:
+                return error
+    return None
+
+
+def create_stub_app(state: Optional[StubState] = None) -> FastAPI:
+    """Cria o app ASGI com os stubs de todos os upstreams."""
+    state = state or StubState()
+    app = FastAPI(title="Upstream stubs")
+    app.state.stub = state
+
+    async def chat_completion(request: Request, provider: str):
+        state.requests[f"{provider}.chat"] += 1
+        body = await request.json()
+        profile = state.llm
+        fault = profile.injected_fault()
+        if fault:
+            await profile.wait()
+            return JSONResponse(
+                status_code=fault,
+                content={"error": {"message": f"Stub injected {fault}", "type": "stub_error"}},
+                headers={"Retry-After": str(int(profile.retry_after))} if fault == 429 else None
+            )
+
+        output_tokens = profile.output_tokens
+        finish_reason = "stop"
+        max_tokens = body.get("max_tokens")
+        if max_tokens and max_tokens < output_tokens:
+            output_tokens, finish_reason = max_tokens, "length"
+        await profile.wait(output_tokens)
+
+        messages = body.get("messages") or []
+        prompt_tokens = estimate_tokens(_messages_text(messages))
+        system = _messages_text([m for m in messages[:1] if m.get("role") == "system"])
+        cached_tokens = estimate_tokens(system) if system and state.prompt_cache_hit(provider, system) else 0
+        if provider == "deepseek":
+            cache_usage = {
+                "prompt_cache_hit_tokens": cached_tokens,
+                "prompt_cache_miss_tokens": prompt_tokens - cached_tokens,
+            }
+        else:
+            cache_usage = {"prompt_tokens_details": {"cached_tokens": cached_tokens}}
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": sample_markdown(output_tokens)},
+                "finish_reason": finish_reason,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": output_tokens,
+                "total_tokens": prompt_tokens + output_tokens,
+                **cache_usage,
+            },
+        }
+
+    @app.post("/openai/v1/chat/completions")
+    async def openai_chat(request: Request):
+        return await chat_completion(request, "openai")
+
+    @app.post("/deepseek/v1/chat/completions")
+    async def deepseek_chat(request: Request):
+        return await chat_completion(request, "deepseek")
+
+    @app.post("/anthropic/v1/messages")
+    async def anthropic_messages(request: Request):
+        state.requests["anthropic.messages"] += 1
+        body = await request.json()
+        profile = state.llm
+        fault = profile.injected_fault()
+        if fault:
+            await profile.wait()
+            error_type = "rate_limit_error" if fault == 429 else "api_error"
+            return JSONResponse(
+                status_code=fault,
+                content={"type": "error", "error": {"type": error_type, "message": f"Stub injected {fault}"}},
+                headers={"Retry-After": str(int(profile.retry_after))} if fault == 429 else None
+            )
+
+        output_tokens = profile.output_tokens
+        stop_reason = "end_turn"
+        max_tokens = body.get("max_tokens")
+        if max_tokens and max_tokens < output_tokens:
+            output_tokens, stop_reason = max_tokens, "max_tokens"
+        await profile.wait(output_tokens)
+
+        prompt = _messages_text(body.get("messages"))
+        system = body.get("system") or ""
+        cache_read = cache_write = 0
+        if isinstance(system, list):
+            cacheable = any(part.get("cache_control") for part in system if isinstance(part, dict))
+            system = _messages_text([{"content": system}])
+            # Só o system prompt marcado com cache_control entra no cache
+            if cacheable:
+                if state.prompt_cache_hit("anthropic", system):
+                    cache_read = estimate_tokens(system)
+                else:
+                    cache_write = estimate_tokens(system)
+        return {
+            "id": f"msg_{uuid.uuid4().hex}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "stub-model"),
+            "content": [{"type": "text", "text": sample_markdown(output_tokens)}],
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": estimate_tokens(system + prompt) - cache_read - cache_write,
+                "output_tokens": output_tokens,
+                "cache_read_input_tokens": cache_read,
+                "cache_creation_input_tokens": cache_write,
+            },
+        }
+
+    async def simulate_notion() -> Optional[JSONResponse]:
+        profile = state.notion
+        fault = profile.injected_fault()
+        state.notion_in_flight += 1
+        state.notion_max_in_flight = max(state.notion_max_in_flight, state.notion_in_flight)
+        try:
+            await profile.wait()
+        finally:
+            state.notion_in_flight -= 1
+        if fault == 429:
+            return _notion_error(429, "rate_limited", "Stub injected rate limit", profile.retry_after)
+        if fault:
+            return _notion_error(500, "internal_server_error", "Stub injected error")
+        return None
+
+    def store_children(parent_id: str, children: List[dict], after: Optional[str] = None) -> List[dict]:
+        """Grava os blocos como o Notion devolve: filhos aninhados separados e rich_text completo."""
+        stored = []
+        for child in children:
+            block_type = child.get("type", "")
+            body = dict(child.get(block_type) or {})
+            nested = body.pop("children", None) or []
+            block = dict(child, id=str(uuid.uuid4()), object="block", has_children=bool(nested))
+            block[block_type] = _as_notion_body(block_type, body)
+            state.blocks[block["id"]] = []
+            state.parents[block["id"]] = parent_id
+            if nested:
+                store_children(block["id"], nested)
+            stored.append(block)
+        siblings = state.blocks.setdefault(parent_id, [])
+        position = len(siblings)
+        if after is not None:
+            position = next(i for i, sibling in enumerate(siblings) if sibling["id"] == after) + 1
+        siblings[position:position] = stored
+        return stored
+
+    @app.post("/notion/v1/pages")
+    async def notion_create_page(request: Request):
+        state.requests["notion.pages.create"] += 1
+        body = await request.json()
+        children = body.get("children") or []
+        error = _validate_notion_children(children)
+        if error:
+            return _notion_error(400, "validation_error", error)
+        failure = await simulate_notion()
+        if failure:
+            return failure
+
+        parent = body.get("parent") or {}
+        properties = body.get("properties", {})
+        if "data_source_id" in parent:
+            schema = state.data_sources.get(parent["data_source_id"])
+            if schema is None:
+                return _notion_error(404, "object_not_found",
+                                     f"Could not find data_source with ID: {parent['data_source_id']}.")
+            error = _validate_properties(schema, properties)
+            if error:
+                return _notion_error(400, "validation_error", error)
+
+        page_id = str(uuid.uuid4())
+        store_children(page_id, children)
+        state.pages[page_id] = {"parent": parent, "properties": properties}
+        parent_page_id = _canonical_id(parent.get("page_id") or "")
+        if parent_page_id in state.blocks:
+            # Como no Notion, a subpágina aparece no final da página pai como um bloco child_page
+            title = "".join(
+                (item.get("text") or {}).get("content", "")
+                for prop in properties.values() for item in prop.get("title", [])
+            )
+            state.blocks[parent_page_id].append({
+                "object": "block", "id": page_id, "type": "child_page",
+                "child_page": {"title": title}, "has_children": bool(children),
+            })
+            state.parents[page_id] = parent_page_id
+        return {
+            "object": "page",
+            "id": page_id,
+            "created_time": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+            "parent": body.get("parent"),
+            "properties": body.get("properties", {}),
+            "url": f"https://www.notion.so/{page_id.replace('-', '')}",
+        }
+
+    @app.patch("/notion/v1/blocks/{block_id}/children")
+    async def notion_append_children(block_id: str, request: Request):
+        block_id = _canonical_id(block_id)
+        state.requests["notion.blocks.children.append"] += 1
+        state.appends[block_id] += 1
+        body = await request.json()
+        children = body.get("children") or []
+        error = _validate_notion_children(children)
+        if error:
+            return _notion_error(400, "validation_error", error)
+        failure = await simulate_notion()
+        if failure:
+            return failure
+        if block_id not in state.blocks:
+            return _notion_error(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+        after = body.get("after")
+        if after is not None and not any(sibling["id"] == after for sibling in state.blocks[block_id]):
+            return _notion_error(400, "validation_error", f"Block {after} is not a child of {block_id}.")
+        stored = store_children(block_id, children, after)
+        parent = find_block(block_id)
+        if parent is not None and stored:
+            parent["has_children"] = True
+        return {"object": "list", "results": stored, "has_more": False}
+
+    def find_block(block_id: str) -> Optional[dict]:
+        parent_id = state.parents.get(block_id)
+        for block in state.blocks.get(parent_id, []):
+            if block["id"] == block_id:
+                return block
+        return None
+
+    @app.patch("/notion/v1/blocks/{block_id}")
+    async def notion_update_block(block_id: str, request: Request):
+        block_id = _canonical_id(block_id)
+        state.requests["notion.blocks.update"] += 1
+        body = await request.json()
+        failure = await simulate_notion()
+        if failure:
+            return failure
+        block = find_block(block_id)
+        if block is None:
+            return _notion_error(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+        block_type = block["type"]
+        if set(body) - {block_type, "type", "archived", "in_trash"}:
+            return _notion_error(400, "validation_error", f"Block type can not be changed from {block_type}.")
+        if block_type in body:
+            error = _validate_notion_children([{"type": block_type, block_type: body[block_type]}])
+            if error:
+                return _notion_error(400, "validation_error", error)
+            block[block_type] = _as_notion_body(block_type, body[block_type])
+        return block
+
+    @app.delete("/notion/v1/blocks/{block_id}")
+    async def notion_delete_block(block_id: str):
+        block_id = _canonical_id(block_id)
+        state.requests["notion.blocks.delete"] += 1
+        failure = await simulate_notion()
+        if failure:
+            return failure
+        block = find_block(block_id)
+        if block is None:
+            return _notion_error(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+        state.blocks[state.parents.pop(block_id)].remove(block)
+        return dict(block, archived=True, in_trash=True)
+
+    @app.get("/notion/v1/blocks/{block_id}/children")
+    async def notion_list_children(block_id: str, start_cursor: Optional[str] = None, page_size: int = 100):
+        block_id = _canonical_id(block_id)
+        state.requests["notion.blocks.children.list"] += 1
+        failure = await simulate_notion()
+        if failure:
+            return failure
+        if block_id not in state.blocks:
+            return _notion_error(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+        children = state.blocks[block_id]
+        start = int(start_cursor or 0)
+        end = start + min(page_size, NOTION_MAX_PAGE_SIZE)
+        has_more = end < len(children)
+        return {
+            "object": "list",
+            "results": children[start:end],
+            "has_more": has_more,
+            "next_cursor": str(end) if has_more else None,
+        }
+
+    @app.get("/notion/v1/databases/{database_id}")
+    async def notion_retrieve_database(database_id: str):
+        state.requests["notion.databases.retrieve"] += 1
+        failure = await simulate_notion()
+        if failure:
+            return failure
+        if database_id != STUB_DATABASE_ID:
+            return _notion_error(404, "object_not_found", f"Could not find database with ID: {database_id}.")
+        return {
+            "object": "database",
+            "id": database_id,
+            "data_sources": [{"id": data_source_id, "name": "Docs"} for data_source_id in state.data_sources],
+        }
+
+    @app.get("/notion/v1/data_sources/{data_source_id}")
+    async def notion_retrieve_data_source(data_source_id: str):
+        state.requests["notion.data_sources.retrieve"] += 1
+        failure = await simulate_notion()
+        if failure:
+            return failure
+        schema = state.data_sources.get(data_source_id)
+        if schema is None:
+            return _notion_error(404, "object_not_found", f"Could not find data_source with ID: {data_source_id}.")
+        return {
+            "object": "data_source",
+            "id": data_source_id,
+            "properties": {
+                name: {"id": name.lower(), "name": name, "type": kind, kind: {}}
+                for name, kind in schema.items()
+            },
+        }
+
+    @app.get("/notion/v1/users/me")
+    async def notion_users_me():
+        state.requests["notion.users.me"] += 1
+        return {"object": "user", "id": str(uuid.uuid4()), "type": "bot", "name": "Stub integration"}
+
+    @app.get("/_stub/config")
+    async def get_config():
+        return {"llm": asdict(state.llm), "notion": asdict(state.notion)}
+
+    @app.put("/_stub/config")
+    async def update_config(request: Request):
+        body = await request.json()
+        state.llm.update(body.get("llm", {}))
+        state.notion.update(body.get("notion", {}))
+        return {"llm": asdict(state.llm), "notion": asdict(state.notion)}
+
+    @app.get("/_stub/stats")
+    async def get_stats():
+        return {"requests": dict(state.requests), "stored_blocks": len(state.blocks)}
+
+    @app.post("/_stub/reset")
+    async def reset():
+        state.reset()
+        return {"status": "reset"}
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Stubs locais de OpenAI, Anthropic, DeepSeek e Notion")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args(argv)
+
+    base = f"http://{args.host}:{args.port}"
+    print("Configure o backend com:")
+    print(f"  OPENAI_BASE_URL={base}/openai/v1")
+    print(f"  ANTHROPIC_BASE_URL={base}/anthropic")
+    print(f"  DEEPSEEK_BASE_URL={base}/deepseek/v1")
+    print(f"  NOTION_BASE_URL={base}/notion")
+    uvicorn.run(create_stub_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,20 @@
 import logging
-from fastapi import FastAPI, HTTPException, Depends
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 import sys
 import os
 import json
+import hashlib
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend.auth import auth_backend, fastapi_users, current_active_user
 from backend.models import User, create_db_and_tables, get_async_session
+from backend.config import get_settings
+from backend.responses import CompressionMiddleware, FastJSONResponse
 from backend.schemas import UserRead, UserCreate, UserSettingsUpdate
-from backend.create_admin import create_admin_user
 import traceback
 
 # Configuração básica de logging
@@ -24,65 +28,133 @@ logger = logging.getLogger(__name__)
 # Importar configuração de ambiente
 from backend.environment import configure_environment
 
-# Criar a aplicação FastAPI
-app = FastAPI(title="AI Notion Assistant API")
-
-# Configurar ambiente (desenvolvimento ou produção)
-is_dev_mode = configure_environment(app)
-logger.info(f"Modo de desenvolvimento: {'Ativado' if is_dev_mode else 'Desativado'}")
-
-# Se o ambiente não foi configurado como desenvolvimento, usar configuração padrão de CORS
-if not is_dev_mode:
-    logger.info("Configurando CORS middleware padrão")
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
-
-# Auth routes
-logger.info("Setting up authentication routes")
-app.include_router(
-    fastapi_users.get_auth_router(auth_backend),
-    prefix="/auth/jwt",
-    tags=["auth"],
-)
-
-app.include_router(
-    fastapi_users.get_register_router(UserRead, UserCreate),
-    prefix="/auth",
-    tags=["auth"],
-)
+# Rotas da API; a aplicação é montada por create_app()
+router = APIRouter()
 
 class PromptRequest(BaseModel):
     prompt: str
+    # "long": sumário + seções geradas em paralelo e publicadas em ordem
+    mode: Literal["standard", "long"] = "standard"
+    # Página existente a atualizar in-place (só os blocos alterados são enviados)
+    target_page_id: Optional[str] = None
+    # Banco de dados do Notion onde o documento vira uma linha (com título, tags, provedor...)
+    target_database_id: Optional[str] = None
+    tags: List[str] = []
+    # Página nova dividida pelos cabeçalhos em seções recolhíveis ou subpáginas, enviadas em paralelo
+    layout: Literal["flat", "toggle", "child_page"] = "flat"
+    # false: a resposta traz só a URL do Notion e o endereço do conteúdo no histórico (content_url)
+    include_content: bool = True
+
+class PublishGenerationsRequest(BaseModel):
+    database_id: str
+    generation_ids: List[int] = Field(min_length=1, max_length=500)
+    tags: List[str] = []
 
 class NotionResponse(BaseModel):
-    content: str
+    # Ausente com include_content=false: o documento fica em content_url
+    content: Optional[str] = None
     notion_url: Optional[str]
+    # Entrada correspondente no histórico (/api/generations), se a gravação funcionou
+    generation_id: Optional[int] = None
+    content_url: Optional[str] = None
 
-@app.on_event("startup")
-async def startup_event():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicialização e encerramento da aplicação (banco, admin, gravação do uso e recursos compartilhados)"""
     logger.info("Starting up FastAPI application")
+    from backend.models import dispose_engine
+    from backend.services.resources import resources
+    from backend.services.usage_accounting import usage_recorder
+    resources.reset()
+    # Fechados no encerramento em ordem inversa: gravação do uso antes da engine
+    resources.register("database", dispose_engine)
     try:
-        await create_db_and_tables()
-        logger.info("Database tables created successfully")
-        
-        # Create admin user if doesn't exist
-        await create_admin_user()
+        # Com vários processos o banco é preparado uma única vez pelo servidor (backend/server.py)
+        if not get_settings().skip_db_init:
+            from backend.create_admin import create_admin_user
+            await create_db_and_tables()
+            logger.info("Database tables created successfully")
+            
+            # Create admin user if doesn't exist
+            await create_admin_user()
+
+        # Catálogo de provedores e modelos montado uma vez, antes da primeira requisição
+        from backend.services.provider_catalog import provider_catalog  # noqa: F401
+
+        # Gravação periódica dos agregados de uso (grava o que restar no buffer ao encerrar)
+        usage_recorder.start()
+        resources.register("usage recorder", usage_recorder.stop)
     except Exception as e:
         logger.error(f"Error during startup: {str(e)}")
         raise
+    resources.install_signal_handlers()
+
+    yield
+
+    logger.info("Shutting down FastAPI application")
+    # Envios ao Notion em andamento terminam antes de fechar os pools e o banco
+    await resources.shutdown(get_settings().server_drain_timeout)
+
+PROVIDER_SETTINGS_FIELDS = ("openai_settings", "anthropic_settings", "deepseek_settings")
 
-@app.post("/api/settings/update")
+def serialize_user_settings(user: User, stored_credentials: Optional[dict] = None) -> dict:
+    """Monta o documento de configurações do usuário retornado pela API"""
+    from backend.services.provider_credentials import parse_settings
+
+    settings_doc = {
+        "openai_api_key": user.openai_api_key,
+        "anthropic_api_key": user.anthropic_api_key,
+        "deepseek_api_key": user.deepseek_api_key,
+        "notion_api_key": user.notion_api_key,
+        "notion_page_id": user.notion_page_id,
+        "ai_provider": user.ai_provider,
+    }
+    for field in PROVIDER_SETTINGS_FIELDS:
+        # Mesma conversão usada na geração; configurações ausentes ou inválidas viram None
+        settings_doc[field] = parse_settings(getattr(user, field)) or None
+    # Provedores guardados na tabela provider_credentials
+    settings_doc["providers"] = {
+        name: {"api_key": credential.api_key, "settings": credential.settings}
+        for name, credential in sorted((stored_credentials or {}).items())
+    }
+    return settings_doc
+
+def settings_etag(settings_doc: dict) -> str:
+    """Calcula um ETag forte e estável para o documento de configurações"""
+    payload = json.dumps(settings_doc, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32] + '"'
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Verifica se o cabeçalho If-None-Match do cliente corresponde ao ETag atual"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+@router.post("/api/settings/update")
 async def update_settings(
     settings: UserSettingsUpdate,
     session: AsyncSession = Depends(get_async_session),
     user: User = Depends(current_active_user)
 ):
-    """Update user API settings"""
+    """Update user API settings and return the normalized settings document"""
+    from backend.services.provider_catalog import InvalidSettingsError, provider_catalog
+    from backend.services.provider_credentials import USER_COLUMNS, credential_store
+    try:
+        if settings.ai_provider is not None:
+            provider_catalog.validate_provider(settings.ai_provider)
+        for field in PROVIDER_SETTINGS_FIELDS:
+            provider_settings = getattr(settings, field)
+            if provider_settings is not None:
+                provider_catalog.validate_settings(field[:-len("_settings")], provider_settings)
+        for name, update in (settings.providers or {}).items():
+            if name in USER_COLUMNS:
+                raise InvalidSettingsError(f"Use {name}_api_key and {name}_settings for provider '{name}'")
+            provider_catalog.validate_settings(name, update.settings or {})
+    except InvalidSettingsError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
     try:
         logger.info(f"Updating settings for user {user.id}")
 
@@ -113,16 +185,28 @@ async def update_settings(
         if settings.deepseek_settings is not None:
             fresh_user.deepseek_settings = json.dumps(settings.deepseek_settings)
 
+        # Demais provedores: uma linha por provedor na tabela provider_credentials
+        for name, update in (settings.providers or {}).items():
+            await credential_store.save(session, user.id, name, update.api_key, update.settings)
+        stored_credentials = await credential_store.load(user.id, session=session)
+
+        # Serializar antes do commit para evitar um novo SELECT por atributos expirados
+        settings_doc = serialize_user_settings(fresh_user, stored_credentials)
         await session.commit()
         logger.info("Settings updated successfully")
-        return {"status": "success"}
+        return JSONResponse(
+            content={"status": "success", "settings": settings_doc},
+            headers={"ETag": settings_etag(settings_doc)}
+        )
     except Exception as e:
         logger.error(f"Error updating settings: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/generate")
+@router.post("/api/generate")
 async def generate_and_save(
     request: PromptRequest,
+    http_request: Request,
+    response: Response,
     user: User = Depends(current_active_user)
 ):
     """Generate content and save to Notion"""
@@ -135,115 +219,368 @@ async def generate_and_save(
             detail="Por favor, configure as chaves da API Notion primeiro"
         )
     
-    # Verificar apenas o provedor selecionado pelo usuário
-    provider = user.ai_provider
-    logger.info(f"Using provider: {provider}")
-    
-    if provider == "openai":
-        if not user.openai_api_key:
-            logger.error("OpenAI API key not configured")
-            raise HTTPException(status_code=400, detail="OpenAI API key não configurada")
-    elif provider == "anthropic":
-        if not user.anthropic_api_key:
-            logger.error("Anthropic API key not configured")
-            raise HTTPException(status_code=400, detail="Anthropic API key não configurada")
-    elif provider == "deepseek":
-        if not user.deepseek_api_key:
-            logger.error("DeepSeek API key not configured")
-            raise HTTPException(status_code=400, detail="DeepSeek API key não configurada")
-    else:
-        logger.error(f"Invalid provider: {provider}")
-        raise HTTPException(status_code=400, detail=f"Provedor inválido: {provider}")
+    logger.info(f"Using provider: {user.ai_provider}")
 
-    try:
-        # Importar serviços
-        from backend.services import content_generation_service, notion_service
-        
-        # Configurar o serviço de geração para o usuário
-        logger.info(f"Initializing provider {provider} for user {user.id}")
-        await content_generation_service.initialize_provider_for_user(user)
-        
-        # Configurar o serviço Notion usando o método atualizado
-        logger.info(f"Configuring Notion service with key: {user.notion_api_key[:5]}*** and page ID: {user.notion_page_id}")
-        notion_service.update_notion_client(user.notion_api_key)
+    # Importar serviços
+    from backend.services import notion_service
+    from backend.services.content_generation_service import ProviderNotConfiguredError, content_generation_service
+    from backend.services.provider_health import ProviderUnavailableError
+    from backend.services.request_policy import ClientDisconnectedError, cancel_on_disconnect
+    from backend.services.rate_limiter import RateLimitExceeded, rate_limiter
+    from backend.services.timings import StageTimings
+    from backend.services.generation_history import generation_store
+    from backend.services.notion_sync import TargetPageNotFoundError, sync_page
+    from backend.services.notion_database import DatabaseRow, create_row
+    from backend.services.notion_sections import publish_document
+    from backend.services.resources import ShuttingDownError, resources
 
-        # Gerar conteúdo
+    timings = StageTimings()
+    # Credenciais de todos os provedores, carregadas uma vez (após a verificação de encerramento)
+    credentials = {}
+
+    def build_response(content: str, notion_url: str, generation_id: Optional[int]) -> NotionResponse:
+        # Sem o documento no corpo, ele é lido depois do histórico (se a gravação funcionou)
+        if not request.include_content and generation_id is not None:
+            return NotionResponse(
+                notion_url=notion_url, generation_id=generation_id,
+                content_url=f"/api/generations/{generation_id}/content"
+            )
+        return NotionResponse(content=content, notion_url=notion_url, generation_id=generation_id)
+
+    def record_provider_time() -> None:
+        # A publicação no Notion acontece durante a geração; o tempo do provedor é o restante
+        generation = timings.durations.pop("generation", 0.0)
+        timings.record("provider", generation - timings.durations.get("notion", 0.0))
+
+    async def record_generation(result, page, title=None) -> Optional[int]:
+        # O histórico é auxiliar: uma falha ao gravar não invalida o conteúdo já publicado
+        try:
+            with timings.stage("history"):
+                return await generation_store.record(
+                    user.id, request.prompt, result, mode=request.mode, notion_page=page,
+                    timings={name: round(duration, 1) for name, duration in timings.durations.items()},
+                    title=title
+                )
+        except Exception as e:
+            logger.warning(f"Failed to record generation history for user {user.id}: {str(e)}")
+            return None
+
+    async def generate_and_publish(charge) -> NotionResponse:
+        logger.info(f"Publishing to Notion page ID: {user.notion_page_id}")
+
+        if request.target_page_id:
+            return await generate_then_publish(
+                charge, lambda result: sync_page(request.target_page_id, result.content)
+            )
+
+        if request.target_database_id:
+            return await generate_then_publish(charge, lambda result: create_row(
+                request.target_database_id,
+                DatabaseRow(
+                    content=result.content, tags=request.tags, provider=result.provider,
+                    model=result.model, tokens=result.usage.total_tokens
+                )
+            ))
+
+        if request.layout != "flat":
+            return await generate_then_publish(charge, lambda result: publish_document(
+                result.content, user.notion_page_id, request.layout
+            ))
+
+        if request.mode == "long":
+            return await generate_long_document(charge)
+
+        # Gerar conteúdo (com failover/hedging entre os provedores configurados); o texto,
+        # incluindo continuações de respostas truncadas, é publicado no Notion conforme chega
         logger.info(f"Generating content using provider: {user.ai_provider}")
-        content = await content_generation_service.generate_content(request.prompt)
-        logger.info(f"Generated content length: {len(content)} characters")
+        writer = notion_service.NotionStreamWriter(page_id_override=user.notion_page_id)
+
+        async def publish_segment(segment):
+            with timings.stage("notion"):
+                await writer.write(segment)
+
+        with timings.stage("generation"):
+            result = await content_generation_service.generate_content_for_user(
+                user, request.prompt, on_segment=publish_segment, credentials=credentials
+            )
+        record_provider_time()
+        content = result.content
+        charge.add_tokens(result.usage.total_tokens)
+        logger.info(
+            f"Generated content length: {len(content)} characters ({result.usage.total_tokens} tokens, "
+            f"{result.usage.cache_read_tokens} cached, {result.continuations} continuations)"
+        )
 
-        # Salvar para Notion
         logger.info("Saving content to Notion")
-        notion_response = await notion_service.write_to_notion(content, user.notion_page_id)
+        with timings.stage("notion"):
+            notion_response = await writer.close()
         logger.info(f"Content saved to Notion: {notion_response}")
+        generation_id = await record_generation(result, notion_response)
+
+        # Tempo por etapa, consumido pelo harness de carga (backend/loadtest)
+        response.headers["Server-Timing"] = timings.header()
+        return build_response(content, notion_response["url"], generation_id)
 
-        return NotionResponse(
-            content=content,
-            notion_url=notion_response["url"]
+    async def generate_then_publish(charge, publish) -> NotionResponse:
+        # Atualização de página, linhas de banco e seções dependem do documento completo (sem publicação parcial)
+        target = request.target_page_id or request.target_database_id or f"a new page ({request.layout} layout)"
+        logger.info(f"Generating content to publish to {target}")
+        with timings.stage("provider"):
+            if request.mode == "long":
+                result = await content_generation_service.generate_long_document_for_user(
+                    user, request.prompt, credentials=credentials
+                )
+            else:
+                result = await content_generation_service.generate_content_for_user(
+                    user, request.prompt, credentials=credentials
+                )
+        charge.add_tokens(result.usage.total_tokens)
+
+        with timings.stage("notion"):
+            page = await publish(result)
+        generation_id = await record_generation(result, page, title=page.get("title"))
+
+        # Tempo por etapa, consumido pelo harness de carga (backend/loadtest)
+        response.headers["Server-Timing"] = timings.header()
+        return build_response(result.content, page["url"], generation_id)
+
+    async def generate_long_document(charge) -> NotionResponse:
+        page = {}
+
+        async def publish_outline(title, sections):
+            page["title"] = title
+            with timings.stage("notion"):
+                page.update(await notion_service.start_page(title, user.notion_page_id))
+
+        async def publish_section(index, section, content):
+            # Seções chegam em ordem e são anexadas enquanto as seguintes ainda são geradas
+            with timings.stage("notion"):
+                await notion_service.append_content(page["id"], content)
+            logger.info(f"Section {index + 1} '{section.title}' appended to Notion")
+
+        logger.info(f"Generating long document using provider: {user.ai_provider}")
+        with timings.stage("generation"):
+            result = await content_generation_service.generate_long_document_for_user(
+                user, request.prompt, on_outline=publish_outline, on_section=publish_section,
+                credentials=credentials
+            )
+        record_provider_time()
+        charge.add_tokens(result.usage.total_tokens)
+        logger.info(f"Generated long document: {len(result.content)} characters ({result.usage.total_tokens} tokens, "
+                    f"{result.usage.cache_read_tokens} cached)")
+        generation_id = await record_generation(result, page, title=page.get("title"))
+
+        # Tempo por etapa, consumido pelo harness de carga (backend/loadtest)
+        response.headers["Server-Timing"] = timings.header()
+        return build_response(result.content, page["url"], generation_id)
+
+    try:
+        # Durante o encerramento (deploy), novas gerações vão para outro processo ou réplica
+        resources.check_accepting()
+        # Provedor preferido registrado e configurado (colunas do usuário ou tabela de credenciais)
+        credentials.update(await content_generation_service.load_credentials(user))
+        content_generation_service.check_configured(user, credentials)
+        # Limites por usuário: concorrência, requisições e tokens por minuto
+        async with rate_limiter.limit(user.id) as charge:
+            # Se o cliente desconectar, as chamadas ao provedor e ao Notion são canceladas.
+            # O cliente do Notion é o do usuário, só nesta requisição (sem trocar o global)
+            with notion_service.user_client(user.notion_api_key):
+                return await cancel_on_disconnect(http_request, generate_and_publish(charge))
+    except RateLimitExceeded as e:
+        logger.warning(f"Rate limit '{e.limit}' exceeded for user {user.id}")
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_after) + 1)}
+        )
+    except ShuttingDownError as e:
+        logger.warning(f"Refusing generation for user {user.id}: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ProviderNotConfiguredError as e:
+        logger.error(f"Provider not configured for user {user.id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except TargetPageNotFoundError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=404, detail=str(e))
+    except ClientDisconnectedError:
+        logger.warning(f"Generation for user {user.id} abandoned by client")
+        raise HTTPException(status_code=499, detail="Client closed request")
+    except ProviderUnavailableError as e:
+        logger.warning(f"Provider unavailable: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_after) + 1)}
         )
     except Exception as e:
         logger.error(f"Error in generate_and_save: {str(e)}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/providers")
-async def get_available_providers(
+@router.get("/api/generations")
+async def list_generations(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     user: User = Depends(current_active_user)
 ):
-    """Get available AI providers"""
+    """Lista o histórico de gerações do usuário (mais recentes primeiro, paginação por cursor)"""
+    from backend.services.generation_history import InvalidCursorError, generation_store
     try:
-        from backend.services import AIProviderFactory
-        providers = AIProviderFactory.list_available_providers()
-        return {"providers": providers}
+        items, next_cursor = await generation_store.list_generations(user.id, limit=limit, cursor=cursor)
+        return {"items": items, "next_cursor": next_cursor}
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error getting providers: {str(e)}")
+        logger.error(f"Error listing generations: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/settings")
+@router.get("/api/generations/{generation_id}")
+async def get_generation(
+    generation_id: int,
+    user: User = Depends(current_active_user)
+):
+    """Retorna uma geração do histórico com o prompt e o conteúdo completos"""
+    from backend.services.generation_history import generation_store
+    try:
+        generation = await generation_store.get_generation(user.id, generation_id)
+    except Exception as e:
+        logger.error(f"Error getting generation {generation_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if generation is None:
+        raise HTTPException(status_code=404, detail="Geração não encontrada")
+    return generation
+
+@router.get("/api/generations/{generation_id}/content")
+async def get_generation_content(
+    generation_id: int,
+    request: Request,
+    user: User = Depends(current_active_user)
+):
+    """
+    Conteúdo (markdown) de uma geração do histórico, referenciado por content_url em /api/generate.
+
+    O texto é gravado comprimido com zlib, que é o formato "deflate" do HTTP: clientes que
+    aceitam deflate recebem os bytes gravados, sem descomprimir nem comprimir de novo.
+    """
+    from backend.responses import accepted_encodings
+    from backend.services.generation_history import decompress_text, generation_store
+    try:
+        compressed = await generation_store.get_content_compressed(user.id, generation_id)
+    except Exception as e:
+        logger.error(f"Error getting content of generation {generation_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if compressed is None:
+        raise HTTPException(status_code=404, detail="Geração não encontrada")
+
+    # O conteúdo de uma geração não muda
+    headers = {"Cache-Control": "private, max-age=86400, immutable", "Vary": "Accept-Encoding"}
+    if accepted_encodings(request.headers.get("accept-encoding", "")).get("deflate", 0.0) > 0:
+        headers["Content-Encoding"] = "deflate"
+        return Response(content=compressed, media_type="text/markdown; charset=utf-8", headers=headers)
+    return Response(content=decompress_text(compressed), media_type="text/markdown; charset=utf-8", headers=headers)
+
+@router.post("/api/generations/publish")
+async def publish_generations(
+    request: PublishGenerationsRequest,
+    user: User = Depends(current_active_user)
+):
+    """Publica gerações do histórico como linhas de um banco de dados do Notion, em paralelo"""
+    from backend.services import notion_service
+    from backend.services.generation_history import generation_store
+    from backend.services.notion_database import DatabaseRow, create_rows
+    from backend.services.resources import ShuttingDownError, resources
+
+    if not user.notion_api_key:
+        raise HTTPException(status_code=400, detail="Por favor, configure as chaves da API Notion primeiro")
+    try:
+        resources.check_accepting()
+    except ShuttingDownError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    try:
+        generations = await generation_store.get_generations(user.id, request.generation_ids)
+        with notion_service.user_client(user.notion_api_key):
+            results = await create_rows(request.database_id, [
+                DatabaseRow(
+                    content=generation["content"], title=generation["title"], tags=request.tags,
+                    provider=generation["provider"], model=generation["model"],
+                    tokens=generation["usage"]["input_tokens"] + generation["usage"]["output_tokens"]
+                )
+                for generation in generations
+            ])
+    except Exception as e:
+        logger.error(f"Error publishing generations to Notion database: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    items = [
+        dict(result, generation_id=generation["id"])
+        for generation, result in zip(generations, results)
+    ]
+    found = {generation["id"] for generation in generations}
+    items += [
+        {"generation_id": generation_id, "error": "Geração não encontrada"}
+        for generation_id in dict.fromkeys(request.generation_ids) if generation_id not in found
+    ]
+    return {
+        "created": sum(1 for item in items if "error" not in item),
+        "failed": sum(1 for item in items if "error" in item),
+        "items": items,
+    }
+
+@router.get("/api/usage")
+async def get_usage(
+    days: int = Query(30, ge=1, le=366),
+    all_users: bool = False,
+    user: User = Depends(current_active_user)
+):
+    """Uso diário de tokens e custo estimado por provedor e modelo (agregados pré-calculados)"""
+    if all_users and not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Apenas administradores podem ver o uso de todos os usuários")
+    from datetime import datetime, timedelta
+    from backend.services.usage_accounting import usage_recorder
+    end = datetime.utcnow().date()
+    start = end - timedelta(days=days - 1)
+    try:
+        rows = await usage_recorder.daily_usage(start, end, user_id=None if all_users else user.id)
+    except Exception as e:
+        logger.error(f"Error getting usage: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    totals = {
+        name: sum(row[name] for row in rows)
+        for name in ("requests", "input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens")
+    }
+    totals["cost_usd"] = round(sum(row["cost_usd"] for row in rows), 6)
+    return {"start": start.isoformat(), "end": end.isoformat(), "days": rows, "totals": totals}
+
+@router.get("/api/providers")
+async def get_available_providers(
+    request: Request,
+    user: User = Depends(current_active_user)
+):
+    """Catálogo de provedores e modelos com capacidades e preços (suporta If-None-Match)"""
+    from backend.services.provider_catalog import provider_catalog
+    headers = {"ETag": provider_catalog.etag, "Cache-Control": "private, max-age=3600"}
+    if _etag_matches(request, provider_catalog.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=provider_catalog.body, media_type="application/json", headers=headers)
+
+@router.get("/api/settings")
 async def get_user_settings(
+    request: Request,
     user: User = Depends(current_active_user)
 ):
-    """Get current user settings"""
+    """Get current user settings (supports conditional requests via If-None-Match)"""
+    from backend.services.provider_credentials import credential_store
     try:
-        # Convertemos as configurações salvas de volta para dicionários se necessário
-        openai_settings = None
-        anthropic_settings = None
-        deepseek_settings = None
-        
-        if user.openai_settings:
-            try:
-                openai_settings = json.loads(user.openai_settings)
-            except:
-                logger.warning(f"Failed to parse openai_settings for user {user.id}")
-                
-        if user.anthropic_settings:
-            try:
-                anthropic_settings = json.loads(user.anthropic_settings)
-            except:
-                logger.warning(f"Failed to parse anthropic_settings for user {user.id}")
-                
-        if user.deepseek_settings:
-            try:
-                deepseek_settings = json.loads(user.deepseek_settings)
-            except:
-                logger.warning(f"Failed to parse deepseek_settings for user {user.id}")
-                
-        return {
-            "openai_api_key": user.openai_api_key,
-            "anthropic_api_key": user.anthropic_api_key,
-            "deepseek_api_key": user.deepseek_api_key,
-            "notion_api_key": user.notion_api_key,
-            "notion_page_id": user.notion_page_id,
-            "ai_provider": user.ai_provider,
-            "openai_settings": openai_settings,
-            "anthropic_settings": anthropic_settings,
-            "deepseek_settings": deepseek_settings
-        }
+        settings_doc = serialize_user_settings(user, await credential_store.load(user.id))
+        etag = settings_etag(settings_doc)
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return JSONResponse(content=settings_doc, headers={"ETag": etag})
     except Exception as e:
         logger.error(f"Error getting user settings: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/health")
+@router.get("/api/health")
 async def health_check():
     """Health check endpoint with dependency verification"""
     try:
@@ -262,12 +599,31 @@ async def health_check():
         logger.error(f"Health check failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Service unhealthy")
 
-@app.get("/api/provider-status")
+@router.get("/livez")
+async def liveness():
+    """Liveness: o processo está de pé (não consulta banco nem provedores)"""
+    return {"status": "ok"}
+
+@router.get("/readyz")
+async def readiness():
+    """Readiness: banco, esquema e circuit breakers, com resultado em cache por HEALTH_CACHE_TTL segundos"""
+    from backend.services.health import readiness_probe
+    result = await readiness_probe.check()
+    return FastJSONResponse(
+        content=result,
+        status_code=200 if result["status"] == "ready" else 503,
+        headers={"Cache-Control": "no-store"},
+    )
+
+@router.get("/api/provider-status")
 async def check_provider_status(
     user: User = Depends(current_active_user)
 ):
-    """Verifica o status de configuração de cada provedor"""
+    """Verifica o status de configuração e a saúde (circuit breaker) de cada provedor"""
     try:
+        from backend.services.model_routing import model_router
+        from backend.services.provider_health import provider_health
+        from backend.services.request_coalescing import generation_coalescer
         result = {
             "openai": {
                 "configured": bool(user.openai_api_key),
@@ -284,9 +640,62 @@ async def check_provider_status(
             "notion": {
                 "configured": bool(user.notion_api_key and user.notion_page_id)
             },
-            "active_provider": user.ai_provider
+            "active_provider": user.ai_provider,
+            "health": provider_health.snapshot(),
+            "routing": model_router.snapshot(),
+            "coalescing": generation_coalescer.snapshot()
         }
+        for provider_name in ("openai", "anthropic", "deepseek"):
+            result[provider_name]["circuit_state"] = provider_health.provider_state(provider_name)
         return result
     except Exception as e:
         logger.error(f"Error checking provider status: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+def create_app() -> FastAPI:
+    """
+    Monta a aplicação FastAPI: ambiente, CORS, rotas de autenticação e da API.
+
+    Não conecta ao banco nem cria clientes externos; isso acontece no lifespan
+    (banco e admin) ou sob demanda, na primeira requisição que precisar.
+    """
+    settings = get_settings()
+    app = FastAPI(title="AI Notion Assistant API", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+    # Documentos gerados passam de 100 KB: respostas grandes vão comprimidas (brotli ou gzip)
+    if settings.response_compression_enabled:
+        app.add_middleware(CompressionMiddleware, minimum_size=settings.response_compression_min_size)
+
+    # Configurar ambiente (desenvolvimento ou produção)
+    is_dev_mode = configure_environment(app)
+    logger.info(f"Modo de desenvolvimento: {'Ativado' if is_dev_mode else 'Desativado'}")
+
+    # Se o ambiente não foi configurado como desenvolvimento, usar configuração padrão de CORS
+    if not is_dev_mode:
+        logger.info("Configurando CORS middleware padrão")
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+    # Auth routes
+    logger.info("Setting up authentication routes")
+    app.include_router(
+        fastapi_users.get_auth_router(auth_backend),
+        prefix="/auth/jwt",
+        tags=["auth"],
+    )
+
+    app.include_router(
+        fastapi_users.get_register_router(UserRead, UserCreate),
+        prefix="/auth",
+        tags=["auth"],
+    )
+
+    app.include_router(router)
+    return app
+
+app = create_app()
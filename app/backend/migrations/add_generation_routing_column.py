@@ -0,0 +1,40 @@
+"""
+Este script executa uma migração para adicionar a coluna com a decisão do roteamento automático de modelos ao histórico de gerações.
+"""
+
+import asyncio
+import logging
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.models import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def add_generation_routing_column():
+    """Adiciona a coluna routing (JSON) à tabela generations"""
+    try:
+        async with AsyncSession(engine) as session:
+            query = """
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'generations' AND column_name = 'routing';
+            """
+            result = await session.execute(text(query))
+            exists = result.fetchone() is not None
+
+            if not exists:
+                await session.execute(text(
+                    "ALTER TABLE generations ADD COLUMN IF NOT EXISTS routing JSON;"
+                ))
+                await session.commit()
+                logger.info("Coluna routing adicionada à tabela generations")
+            else:
+                logger.info("Coluna routing já existe na tabela generations")
+
+    except Exception as e:
+        logger.error(f"Erro ao adicionar a coluna routing: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(add_generation_routing_column())
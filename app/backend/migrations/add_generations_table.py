@@ -0,0 +1,30 @@
+"""
+Este script executa uma migração para criar a tabela de histórico de gerações e seus índices.
+"""
+
+import asyncio
+import logging
+from backend.models import engine, Generation
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def add_generations_table():
+    """Cria a tabela generations (e os índices) se ainda não existir"""
+    try:
+        async with engine.begin() as conn:
+            exists = await conn.run_sync(
+                lambda sync_conn: sync_conn.dialect.has_table(sync_conn, Generation.__tablename__)
+            )
+            if not exists:
+                await conn.run_sync(lambda sync_conn: Generation.__table__.create(sync_conn))
+                logger.info("Tabela generations criada com sucesso")
+            else:
+                logger.info("Tabela generations já existe")
+
+    except Exception as e:
+        logger.error(f"Erro ao criar a tabela generations: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(add_generations_table())
@@ -0,0 +1,30 @@
+"""
+Este script executa uma migração para criar a tabela de chaves e configurações de provedores por usuário.
+"""
+
+import asyncio
+import logging
+from backend.models import engine, ProviderCredential
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def add_provider_credentials_table():
+    """Cria a tabela provider_credentials se ainda não existir"""
+    try:
+        async with engine.begin() as conn:
+            exists = await conn.run_sync(
+                lambda sync_conn: sync_conn.dialect.has_table(sync_conn, ProviderCredential.__tablename__)
+            )
+            if not exists:
+                await conn.run_sync(lambda sync_conn: ProviderCredential.__table__.create(sync_conn))
+                logger.info("Tabela provider_credentials criada com sucesso")
+            else:
+                logger.info("Tabela provider_credentials já existe")
+
+    except Exception as e:
+        logger.error(f"Erro ao criar a tabela provider_credentials: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(add_provider_credentials_table())
@@ -0,0 +1,32 @@
+"""
+Este script executa uma migração para criar as tabelas do rate limiting compartilhado (RATE_LIMIT_BACKEND=postgres).
+"""
+
+import asyncio
+import logging
+from backend.models import engine, RateLimitBucket, RateLimitLease
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def add_rate_limit_tables():
+    """Cria as tabelas rate_limit_buckets e rate_limit_leases se ainda não existirem"""
+    try:
+        async with engine.begin() as conn:
+            for model in (RateLimitBucket, RateLimitLease):
+                table = model.__table__
+                exists = await conn.run_sync(
+                    lambda sync_conn: sync_conn.dialect.has_table(sync_conn, table.name)
+                )
+                if not exists:
+                    await conn.run_sync(lambda sync_conn: table.create(sync_conn))
+                    logger.info(f"Tabela {table.name} criada com sucesso")
+                else:
+                    logger.info(f"Tabela {table.name} já existe")
+
+    except Exception as e:
+        logger.error(f"Erro ao criar as tabelas de rate limiting: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(add_rate_limit_tables())
@@ -0,0 +1,30 @@
+"""
+Este script executa uma migração para criar a tabela de agregados diários de uso de tokens e custo.
+"""
+
+import asyncio
+import logging
+from backend.models import engine, UsageDaily
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def add_usage_daily_table():
+    """Cria a tabela usage_daily se ainda não existir"""
+    try:
+        async with engine.begin() as conn:
+            exists = await conn.run_sync(
+                lambda sync_conn: sync_conn.dialect.has_table(sync_conn, UsageDaily.__tablename__)
+            )
+            if not exists:
+                await conn.run_sync(lambda sync_conn: UsageDaily.__table__.create(sync_conn))
+                logger.info("Tabela usage_daily criada com sucesso")
+            else:
+                logger.info("Tabela usage_daily já existe")
+
+    except Exception as e:
+        logger.error(f"Erro ao criar a tabela usage_daily: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(add_usage_daily_table())
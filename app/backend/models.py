@@ -1,10 +1,10 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import AsyncGenerator
 from fastapi import Depends
 from fastapi_users.db import SQLAlchemyBaseUserTable, SQLAlchemyUserDatabase
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Mapped, mapped_column, declarative_base
-from sqlalchemy import text
+from sqlalchemy import JSON, BigInteger, Date, DateTime, ForeignKey, Index, Integer, LargeBinary, String, text
 import os
 import logging
 import traceback
@@ -15,8 +15,6 @@ from .config import get_settings
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-settings = get_settings()
-
 Base = declarative_base()
 
 class User(SQLAlchemyBaseUserTable[int], Base):
@@ -45,57 +43,163 @@ class User(SQLAlchemyBaseUserTable[int], Base):
     anthropic_settings: Mapped[str] = mapped_column(nullable=True)
     deepseek_settings: Mapped[str] = mapped_column(nullable=True)
 
-# Create async database URL
-database_url = settings.database_url
-logger.info(f"Configurando conexão com: {database_url}")
+class RateLimitBucket(Base):
+    """Token bucket compartilhado entre réplicas (backend Postgres do rate limiter)"""
+    __tablename__ = "rate_limit_buckets"
 
-# Add asyncpg driver if not already present
-if 'postgresql+asyncpg://' not in database_url:
-    database_url = database_url.replace('postgresql://', 'postgresql+asyncpg://')
-    logger.info(f"URL ajustada para driver asyncpg: {database_url}")
+    key: Mapped[str] = mapped_column(primary_key=True)
+    tokens: Mapped[float] = mapped_column(nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
 
-async_url = database_url
+class RateLimitLease(Base):
+    """Vaga de concorrência ocupada por uma requisição em andamento"""
+    __tablename__ = "rate_limit_leases"
 
-# Validate URL before creating engine
-try:
-    parsed_url = urlparse(async_url)
-    if not all([parsed_url.scheme, parsed_url.netloc]):
-        raise ValueError(f"URL inválida: {async_url}")
-    logger.info(f"Hostname: {parsed_url.hostname}, Porta: {parsed_url.port}")
-except Exception as e:
-    logger.error(f"Erro ao validar URL do banco de dados: {str(e)}")
-    logger.error(traceback.format_exc())
-    raise
-
-# Create async engine
-try:
-    engine = create_async_engine(
-        async_url,
-        echo=True,
-        pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20
+    lease_id: Mapped[str] = mapped_column(primary_key=True)
+    key: Mapped[str] = mapped_column(index=True, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+class ProviderCircuit(Base):
+    """Estado do circuit breaker de um provedor/modelo compartilhado entre processos e réplicas"""
+    __tablename__ = "provider_circuits"
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    state: Mapped[str] = mapped_column(nullable=False)
+    # Fim do cooldown (epoch em segundos) enquanto o circuito está aberto
+    open_until: Mapped[float] = mapped_column(nullable=False, default=0.0)
+    # Incrementada a cada mudança, para cada processo aplicar só o que ainda não viu
+    version: Mapped[int] = mapped_column(nullable=False, default=1)
+
+class Generation(Base):
+    """
+    Histórico de gerações do usuário.
+
+    O conteúdo e o prompt completo ficam comprimidos (zlib) em colunas adiadas:
+    a listagem lê apenas os metadados e o corpo só é carregado ao abrir um item.
+    """
+    __tablename__ = "generations"
+    __table_args__ = (
+        # Paginação por keyset: (created_at, id) decrescente por usuário
+        Index("ix_generations_user_created", "user_id", "created_at", "id"),
+        Index("ix_generations_user_prompt_hash", "user_id", "prompt_hash"),
     )
-    logger.info("Engine do SQLAlchemy criada com sucesso")
-except Exception as e:
-    logger.error(f"Erro ao criar engine do SQLAlchemy: {str(e)}")
-    logger.error(traceback.format_exc())
-    raise
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, nullable=False)
+    mode: Mapped[str] = mapped_column(String(16), default="standard", nullable=False)
+    provider: Mapped[str] = mapped_column(String(32), nullable=False)
+    model: Mapped[str] = mapped_column(String(128), nullable=True)
+    prompt_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    prompt_preview: Mapped[str] = mapped_column(String(200), nullable=False)
+    title: Mapped[str] = mapped_column(String(200), nullable=True)
+    notion_page_id: Mapped[str] = mapped_column(nullable=True)
+    notion_url: Mapped[str] = mapped_column(nullable=True)
+    content_size: Mapped[int] = mapped_column(default=0, nullable=False)
+    input_tokens: Mapped[int] = mapped_column(default=0, nullable=False)
+    output_tokens: Mapped[int] = mapped_column(default=0, nullable=False)
+    cache_read_tokens: Mapped[int] = mapped_column(default=0, nullable=False)
+    cache_write_tokens: Mapped[int] = mapped_column(default=0, nullable=False)
+    # Duração de cada etapa em ms (mesmos nomes do cabeçalho Server-Timing)
+    timings: Mapped[dict] = mapped_column(JSON, nullable=True)
+    # Decisão do roteamento automático de modelos (nível, pontuação, motivos, latência e custo)
+    routing: Mapped[dict] = mapped_column(JSON, nullable=True)
+    prompt_compressed: Mapped[bytes] = mapped_column(LargeBinary, deferred=True, nullable=False)
+    content_compressed: Mapped[bytes] = mapped_column(LargeBinary, deferred=True, nullable=False)
+
+class UsageDaily(Base):
+    """
+    Uso de tokens e custo agregados por dia, usuário, provedor e modelo.
+
+    Preenchida em lotes pelo UsageRecorder (upsert somando aos totais do dia),
+    para que /api/usage leia os agregados sem varrer o histórico de gerações.
+    """
+    __tablename__ = "usage_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    provider: Mapped[str] = mapped_column(String(32), primary_key=True)
+    model: Mapped[str] = mapped_column(String(128), primary_key=True)
+    requests: Mapped[int] = mapped_column(default=0, nullable=False)
+    input_tokens: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    output_tokens: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    cache_read_tokens: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    cache_write_tokens: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    cost_usd: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, nullable=False)
+
+class ProviderCredential(Base):
+    """
+    Chave de API e configurações de um provedor para um usuário.
+
+    Usada pelos provedores sem colunas próprias em `users` (plugins e o servidor
+    compatível com a OpenAI), para que um novo provedor não exija uma migração.
+    """
+    __tablename__ = "provider_credentials"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    provider: Mapped[str] = mapped_column(String(64), primary_key=True)
+    api_key: Mapped[str] = mapped_column(nullable=True)
+    # JSON com as configurações do provedor (modelo, temperatura, max_tokens...)
+    settings: Mapped[str] = mapped_column(nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, nullable=False)
+
+# Engine criada na primeira conexão (get_engine), não na importação do módulo
+_engine = None
+
+def _async_database_url() -> str:
+    """URL do banco com o driver assíncrono (asyncpg para PostgreSQL)"""
+    database_url = get_settings().database_url
+
+    # Add asyncpg driver if not already present
+    if 'postgresql+asyncpg://' not in database_url:
+        database_url = database_url.replace('postgresql://', 'postgresql+asyncpg://')
+
+    # Validate URL before creating engine
+    parsed_url = urlparse(database_url)
+    if not all([parsed_url.scheme, parsed_url.netloc]):
+        raise ValueError("URL inválida para o banco de dados")
+    logger.info(f"Database host: {parsed_url.hostname}, port: {parsed_url.port}")
+    return database_url
+
+def get_engine():
+    """Engine assíncrona do SQLAlchemy, criada na primeira chamada"""
+    global _engine
+    if _engine is None:
+        try:
+            _engine = create_async_engine(
+                _async_database_url(),
+                echo=True,
+                pool_pre_ping=True,
+                pool_size=10,
+                max_overflow=20
+            )
+            logger.info("Engine do SQLAlchemy criada com sucesso")
+        except Exception as e:
+            logger.error(f"Erro ao criar engine do SQLAlchemy: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise
+    return _engine
+
+async def dispose_engine() -> None:
+    """Fecha as conexões da engine, se ela foi criada (a próxima chamada a get_engine cria outra)"""
+    global _engine
+    if _engine is not None:
+        engine, _engine = _engine, None
+        await engine.dispose()
+
+def __getattr__(name):
+    # `from backend.models import engine` continua funcionando, criando a engine nesse momento
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 async def create_db_and_tables():
     """Initialize database and create tables"""
     try:
-        logger.info(f"Tentando conectar ao banco de dados: {async_url}")
-        async with engine.begin() as conn:
-            # Check if tables exist already
-            exists = await conn.run_sync(lambda sync_conn: sync_conn.dialect.has_table(sync_conn, 'users'))
-            
-            # If tables exist and we need to recreate them, drop them first
-            if exists:
-                logger.info("Dropping existing tables")
-                await conn.run_sync(Base.metadata.drop_all)
-            
-            # Create tables
+        async with get_engine().begin() as conn:
+            # Create missing tables only: existing tables and their data are kept
+            # (new columns in existing tables come from the scripts in backend/migrations)
             await conn.run_sync(Base.metadata.create_all)
             logger.info("Database tables created successfully")
     except Exception as e:
@@ -105,7 +209,7 @@ async def create_db_and_tables():
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     """Get async database session"""
-    async with AsyncSession(engine) as session:
+    async with AsyncSession(get_engine()) as session:
         try:
             yield session
         except Exception as e:
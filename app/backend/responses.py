@@ -0,0 +1,141 @@
+"""
+Serialização e compressão das respostas da API.
+
+- FastJSONResponse: JSON com orjson (quando instalado), várias vezes mais rápido
+  que o json da biblioteca padrão em documentos grandes
+- CompressionMiddleware: comprime respostas grandes com brotli (se instalado) ou
+  gzip, conforme o Accept-Encoding do cliente. Respostas em streaming, já
+  codificadas ou de tipos não compressíveis passam sem alteração
+"""
+import asyncio
+import gzip
+import json
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+# Codificações suportadas, em ordem de preferência quando o cliente aceita ambas com o mesmo peso
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+# Corpos maiores que isto são comprimidos fora do event loop
+THREAD_MINIMUM_SIZE = 512 * 1024
+
+GZIP_LEVEL = 6
+# Qualidade 5 fica próxima da taxa do nível 9 do gzip com tempo semelhante ao nível 6
+BROTLI_QUALITY = 5
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serializada com orjson (ou json compacto, se orjson não estiver instalado)."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Codificações do cabeçalho Accept-Encoding com seus pesos (q)."""
+    encodings = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        encodings[name.strip().lower()] = weight
+    return encodings
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Melhor codificação suportada aceita pelo cliente (ou None para enviar sem compressão)."""
+    encodings = accepted_encodings(accept_encoding)
+    wildcard = encodings.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for name in SUPPORTED_ENCODINGS:
+        weight = encodings.get(name, wildcard)
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """Comprime respostas completas a partir de `minimum_size` bytes com a codificação negociada."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = None
+        if scope["type"] == "http":
+            encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if start is not None:
+                initial, start = start, None
+                headers = MutableHeaders(raw=initial["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                # Streaming (mais de uma parte) e corpos pequenos seguem sem compressão
+                if not message.get("more_body", False) and len(body) >= self.minimum_size:
+                    if len(body) >= THREAD_MINIMUM_SIZE:
+                        body = await asyncio.to_thread(compress, body, encoding)
+                    else:
+                        body = compress(body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+                await send(initial)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -19,6 +19,11 @@ class UserCreate(schemas.BaseUserCreate):
     is_superuser: Optional[bool] = False
     is_verified: Optional[bool] = False
 
+class ProviderCredentialsUpdate(BaseModel):
+    # None mantém o valor salvo; uma chave vazia remove a chave
+    api_key: Optional[str] = None
+    settings: Optional[Dict[str, Any]] = None
+
 class UserSettingsUpdate(BaseModel):
     # API keys para diferentes provedores
     openai_api_key: Optional[str] = None 
@@ -34,3 +39,6 @@ class UserSettingsUpdate(BaseModel):
     openai_settings: Optional[Dict[str, Any]] = None
     anthropic_settings: Optional[Dict[str, Any]] = None
     deepseek_settings: Optional[Dict[str, Any]] = None
+    
+    # Provedores sem colunas próprias (plugins, servidor compatível com a OpenAI): nome -> credenciais
+    providers: Optional[Dict[str, ProviderCredentialsUpdate]] = None
@@ -0,0 +1,133 @@
+"""
+Servidor de produção da API (python -m backend.server).
+
+Sobe o uvicorn com SERVER_WORKERS processos (0 = um por CPU). Com o extra
+`uvicorn[standard]` instalado, o loop é o uvloop e o parser HTTP o httptools.
+
+Os processos sempre rodam sob o supervisor do uvicorn, inclusive com um único
+processo: é ele que trata o SIGHUP e recria os processos que saem. Com
+`uvicorn.run` e um processo, o SIGHUP derrubaria a API e SERVER_MAX_REQUESTS
+apenas encerraria o servidor.
+
+- SIGTERM/SIGINT: os processos param de aceitar conexões e têm até
+  SERVER_GRACEFUL_TIMEOUT segundos para concluir as requisições em andamento
+- SIGHUP: reinicia os processos um a um (novo código ou configuração sem
+  derrubar o serviço)
+- SIGTTIN/SIGTTOU: adiciona ou remove um processo
+- SERVER_MAX_REQUESTS: recicla cada processo depois de N requisições (0 desativa)
+
+O banco (tabelas e usuário admin) é preparado uma única vez, antes de iniciar
+os processos: eles sobem com SKIP_DB_INIT e não repetem a inicialização, nem ao
+serem reiniciados.
+
+Cada processo tem sua própria memória. Com mais de um processo, o rate limiting
+e os circuit breakers precisam do backend compartilhado (STATE_BACKEND=postgres),
+escolhido automaticamente quando STATE_BACKEND não está definido.
+"""
+import asyncio
+import importlib.util
+import logging
+import os
+from typing import Any, Dict, List
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from backend.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+APP = "backend.main:app"
+
+
+def resolve_workers(configured: int) -> int:
+    """Número de processos: o configurado ou, com 0, um por CPU."""
+    return configured if configured > 0 else (os.cpu_count() or 1)
+
+
+def server_options(settings) -> Dict[str, Any]:
+    """Argumentos do uvicorn.run a partir das configurações."""
+    return {
+        "host": settings.server_host,
+        "port": settings.server_port,
+        "workers": resolve_workers(settings.server_workers),
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools") else "h11",
+        "timeout_graceful_shutdown": settings.server_graceful_timeout,
+        "timeout_keep_alive": settings.server_keepalive_timeout,
+        "limit_max_requests": settings.server_max_requests or None,
+        "limit_max_requests_jitter": settings.server_max_requests // 10,
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.server_forwarded_allow_ips,
+        "log_level": settings.log_level.lower(),
+    }
+
+
+def shared_state_warnings(settings, workers: int) -> List[str]:
+    """Estado que deixa de ser compartilhado com mais de um processo."""
+    if workers <= 1:
+        return []
+    warnings = []
+    if settings.rate_limit_enabled and settings.rate_limit_backend.lower() != "postgres":
+        warnings.append(
+            f"RATE_LIMIT_BACKEND={settings.rate_limit_backend} with {workers} workers: "
+            f"each worker enforces its own limits (up to {workers}x the configured values)"
+        )
+    if settings.state_backend.lower() != "postgres":
+        warnings.append(
+            f"STATE_BACKEND={settings.state_backend} with {workers} workers: "
+            "provider circuit breakers are not shared between workers"
+        )
+    return warnings
+
+
+async def initialize_database() -> None:
+    """Cria as tabelas e o usuário admin (o que o startup de cada processo faria)."""
+    from backend.create_admin import create_admin_user
+    from backend.models import create_db_and_tables, dispose_engine
+    try:
+        await create_db_and_tables()
+        await create_admin_user()
+    finally:
+        await dispose_engine()
+
+
+def main() -> None:
+    settings = get_settings()
+    workers = resolve_workers(settings.server_workers)
+    if workers > 1 and "STATE_BACKEND" not in os.environ:
+        # Os processos são iniciados do zero e leem a configuração do ambiente
+        os.environ["STATE_BACKEND"] = "postgres"
+        settings.state_backend = "postgres"
+        if "RATE_LIMIT_BACKEND" not in os.environ:
+            settings.rate_limit_backend = "postgres"
+        logger.info(f"Using postgres state backend for {workers} workers")
+    for warning in shared_state_warnings(settings, workers):
+        logger.warning(warning)
+
+    if not settings.skip_db_init:
+        asyncio.run(initialize_database())
+        os.environ["SKIP_DB_INIT"] = "true"
+
+    options = server_options(settings)
+    logger.info(
+        f"Starting API server on {options['host']}:{options['port']} with {workers} workers "
+        f"(loop={options['loop']}, http={options['http']})"
+    )
+    run_supervised(options)
+
+
+def run_supervised(options: Dict[str, Any]) -> None:
+    """Como uvicorn.run com vários processos, mas usando o supervisor também com um só."""
+    config = uvicorn.Config(APP, **options)
+    sock = config.bind_socket()
+    try:
+        Multiprocess(config, sockets=[sock]).run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    main()
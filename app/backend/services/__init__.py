@@ -1,20 +1,52 @@
 # Initialize services package
-from .openai_service import OpenAIProvider
-from .anthropic_service import AnthropicProvider
-from .notion_service import write_to_notion, notion, settings
-from .formatter import format_for_notion, split_content
-from .ai_provider_factory import AIProviderFactory
-from .content_generation_service import content_generation_service
+#
+# Os serviços são importados sob demanda (PEP 562): importar um submódulo, como
+# `backend.services.formatter`, não carrega os SDKs dos provedores nem o cliente do Notion.
+import importlib
+import sys
+import types
+
+_EXPORTS = {
+    'OpenAIProvider': '.openai_service',
+    'AnthropicProvider': '.anthropic_service',
+    'write_to_notion': '.notion_service',
+    'get_client': '.notion_service',
+    'format_for_notion': '.formatter',
+    'split_content': '.formatter',
+    'AIProviderFactory': '.ai_provider_factory',
+    'content_generation_service': '.content_generation_service',
+}
+
+# Exportados antes pelo notion_service: `notion` é o cliente global do Notion (criado no
+# primeiro acesso) e `settings`, as configurações da aplicação
+_RESOLVERS = {
+    'notion': lambda: importlib.import_module('.notion_service', __name__).get_client(),
+    'settings': lambda: importlib.import_module('backend.config').get_settings(),
+}
 
 # Exportar todos os serviços
-__all__ = [
-    'OpenAIProvider',
-    'AnthropicProvider',
-    'write_to_notion',
-    'notion',
-    'settings',
-    'format_for_notion',
-    'split_content',
-    'AIProviderFactory',
-    'content_generation_service'
-]
+__all__ = list(_EXPORTS) + list(_RESOLVERS)
+
+
+def __getattr__(name):
+    if name in _RESOLVERS:
+        return _RESOLVERS[name]()
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_EXPORTS[name], __name__)
+    return getattr(module, name)
+
+
+class _ServicesPackage(types.ModuleType):
+    """Impede que o import de um submódulo homônimo substitua a instância exportada."""
+
+    def __setattr__(self, name, value):
+        # O import de backend.services.content_generation_service definiria o atributo
+        # como o submódulo; `from backend.services import content_generation_service`
+        # continua devolvendo a instância do serviço
+        if name in _EXPORTS and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _ServicesPackage
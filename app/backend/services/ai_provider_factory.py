@@ -1,33 +1,97 @@
-from typing import Dict, Type
+from importlib.metadata import EntryPoint, entry_points
+from typing import Any, Dict, Tuple, Type
 from .provider_interface import AIProvider
-from .openai_service import OpenAIProvider
-from .anthropic_service import AnthropicProvider
-from .deepseek_service import DeepSeekProvider
+from backend.config import get_settings
+import importlib
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Grupo de entry points em que pacotes instalados registram provedores, por exemplo:
+# [project.entry-points."notion_ai_assistant.providers"]
+# vllm = "meu_pacote.provider:VLLMProvider"
+ENTRY_POINT_GROUP = "notion_ai_assistant.providers"
+
 class AIProviderFactory:
-    _providers: Dict[str, Type[AIProvider]] = {
-        "openai": OpenAIProvider,
-        "anthropic": AnthropicProvider,
-        "deepseek": DeepSeekProvider,
+    # Nome -> (módulo, classe, nome para exibição). O módulo de cada provedor (e o SDK
+    # que ele usa) só é importado quando o provedor é usado pela primeira vez
+    _providers: Dict[str, Tuple[str, str, str]] = {
+        "openai": (".openai_service", "OpenAIProvider", "OpenAI"),
+        "anthropic": (".anthropic_service", "AnthropicProvider", "Anthropic Claude"),
+        "deepseek": (".deepseek_service", "DeepSeekProvider", "DeepSeek"),
+        "openai_compatible": (".openai_compatible_service", "OpenAICompatibleProvider", "OpenAI-compatible"),
     }
+    # Provedores de plugins: nome -> classe ou entry point (carregado no primeiro uso)
+    _plugins: Dict[str, Any] = {}
+    _plugins_discovered = False
+
+    @classmethod
+    def register(cls, provider_name: str, provider: Any) -> None:
+        """Registra um provedor de plugin (classe ou entry point) sob o nome dado"""
+        name = provider_name.lower()
+        if name in cls._providers:
+            raise ValueError(f"Provedor '{name}' já é um provedor embutido")
+        cls._plugins[name] = provider
+
+    @classmethod
+    def discover_plugins(cls) -> None:
+        """Registra os provedores anunciados por pacotes instalados (uma vez por processo)"""
+        if cls._plugins_discovered:
+            return
+        cls._plugins_discovered = True
+        if not get_settings().provider_plugins_enabled:
+            return
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                cls.register(entry_point.name, entry_point)
+                logger.info(f"Provider plugin '{entry_point.name}' registered from {entry_point.value}")
+            except ValueError as e:
+                logger.warning(f"Ignoring provider plugin '{entry_point.name}': {str(e)}")
+
+    @classmethod
+    def is_registered(cls, provider_name: str) -> bool:
+        cls.discover_plugins()
+        name = (provider_name or "").lower()
+        return name in cls._providers or name in cls._plugins
     
     @classmethod
-    def get_provider(cls, provider_name: str) -> AIProvider:
-        """Retorna uma instância do provedor com o nome especificado"""
-        provider_class = cls._providers.get(provider_name.lower())
-        if not provider_class:
+    def get_provider_class(cls, provider_name: str) -> Type[AIProvider]:
+        """Retorna a classe do provedor, importando o módulo dele se necessário"""
+        name = provider_name.lower()
+        entry = cls._providers.get(name)
+        if entry:
+            module_name, class_name, _ = entry
+            return getattr(importlib.import_module(module_name, __package__), class_name)
+        cls.discover_plugins()
+        plugin = cls._plugins.get(name)
+        if plugin is None:
             logger.error(f"Provedor desconhecido: {provider_name}")
             raise ValueError(f"Provedor desconhecido: {provider_name}")
-        return provider_class()
+        if isinstance(plugin, EntryPoint):
+            plugin = cls._plugins[name] = plugin.load()
+        return plugin
     
+    @classmethod
+    def get_provider(cls, provider_name: str) -> AIProvider:
+        """Retorna uma instância do provedor com o nome especificado"""
+        return cls.get_provider_class(provider_name)()
+    
+    @classmethod
+    def get_display_name(cls, provider_name: str) -> str:
+        """Nome para exibição; o de um plugin vem do atributo DISPLAY_NAME da classe (se houver)"""
+        name = provider_name.lower()
+        if name in cls._providers:
+            return cls._providers[name][2]
+        return getattr(cls.get_provider_class(name), "DISPLAY_NAME", provider_name)
+
     @classmethod
     def list_available_providers(cls) -> Dict[str, str]:
-        """Retorna um dicionário com os nomes dos provedores disponíveis"""
-        result = {}
-        for name, provider_class in cls._providers.items():
-            provider_instance = provider_class()
-            result[name] = provider_instance.get_provider_name()
-        return result
+        """Retorna um dicionário com os nomes dos provedores disponíveis (embutidos e plugins)"""
+        cls.discover_plugins()
+        providers = {name: display_name for name, (_, _, display_name) in cls._providers.items()}
+        for name in cls._plugins:
+            try:
+                providers[name] = cls.get_display_name(name)
+            except Exception as e:
+                logger.warning(f"Failed to load provider plugin '{name}': {str(e)}")
+        return providers
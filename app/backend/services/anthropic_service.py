@@ -1,38 +1,113 @@
-from anthropic import AsyncAnthropic
+from anthropic import AsyncAnthropic, APIConnectionError, APIStatusError
 from typing import Dict, Any, Optional
-from .provider_interface import AIProvider
+from .provider_interface import AIProvider, GenerationResult, ProviderError, TokenUsage, is_retryable_status, parse_retry_after
+from .request_policy import get_request_policy
+from .resources import resources
+from backend.config import get_settings
 from .prompts import ENHANCED_SYSTEM_PROMPT
+import httpx
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Cache de prompt da Anthropic (TTL padrão de 5 minutos, renovado a cada leitura)
+CACHE_CONTROL = {"type": "ephemeral"}
+
 class AnthropicProvider(AIProvider):
+    SUPPORTS_CONTINUATION = True
+
     def __init__(self):
         self.client = None
         self.settings = None
+        self.request_policy = None
         
     async def initialize(self, api_key: str, settings: Optional[Dict[str, Any]] = None) -> None:
         """Inicializa o cliente Anthropic"""
-        self.client = AsyncAnthropic(api_key=api_key)
+        # Retries ficam a cargo da política unificada, não do SDK
+        self.request_policy = get_request_policy("provider")
+        self.client = AsyncAnthropic(
+            api_key=api_key,
+            base_url=get_settings().anthropic_base_url,
+            timeout=self.request_policy.httpx_timeout(),
+            max_retries=0,
+            # Conexões do pool compartilhado entre provedores e requisições
+            http_client=httpx.AsyncClient(transport=resources.transport("providers"))
+        )
         self.settings = settings or self.get_default_settings()
         logger.info(f"Anthropic provider initialized with model: {self.settings.get('model')}")
         
     async def generate_content(self, prompt: str) -> str:
         """Gera conteúdo usando o modelo Claude da Anthropic"""
+        return (await self.generate(prompt)).content
+
+    async def complete(self, prompt: str, partial: Optional[str] = None) -> GenerationResult:
+        """Executa uma chamada aplicando a política de timeout e retry dos provedores"""
+        return await self.request_policy.run(
+            lambda: self._create_completion(prompt, partial),
+            "Anthropic messages request"
+        )
+
+    async def _create_completion(self, prompt: str, partial: Optional[str] = None) -> GenerationResult:
+        """Executa uma única chamada à Messages API da Anthropic"""
+        model = self.settings.get("model", "claude-3-opus-20240229")
+        system_prompt = self.settings.get("system_prompt", ENHANCED_SYSTEM_PROMPT)
+        cache = get_settings().provider_prompt_cache_enabled
+        user_content: Any = prompt
+        if cache:
+            # Breakpoint no system prompt, compartilhado por todas as requisições
+            system: Any = [{"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}]
+        else:
+            system = system_prompt
+        if partial is not None and cache:
+            # Continuações repetem o mesmo prompt do usuário: um segundo breakpoint cobre esse trecho
+            user_content = [{"type": "text", "text": prompt, "cache_control": CACHE_CONTROL}]
+        messages = [{"role": "user", "content": user_content}]
+        if partial is not None:
+            # Prefill: o modelo continua diretamente o texto truncado (sem espaços finais, exigência da API)
+            messages.append({"role": "assistant", "content": partial.rstrip()})
         try:
             response = await self.client.messages.create(
-                model=self.settings.get("model", "claude-3-opus-20240229"),
+                model=model,
                 max_tokens=self.settings.get("max_tokens", 1500),
-                system=self.settings.get("system_prompt", ENHANCED_SYSTEM_PROMPT),
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
+                system=system,
+                messages=messages,
                 temperature=self.settings.get("temperature", 0.7),
             )
-            return response.content[0].text
+            usage = response.usage
+            cache_read = (getattr(usage, "cache_read_input_tokens", None) or 0) if usage else 0
+            cache_write = (getattr(usage, "cache_creation_input_tokens", None) or 0) if usage else 0
+            return GenerationResult(
+                content=response.content[0].text,
+                provider="anthropic",
+                model=response.model or model,
+                # input_tokens da Anthropic exclui os tokens lidos e gravados no cache
+                usage=TokenUsage(
+                    input_tokens=(usage.input_tokens if usage else 0) + cache_read + cache_write,
+                    output_tokens=usage.output_tokens if usage else 0,
+                    cache_read_tokens=cache_read,
+                    cache_write_tokens=cache_write
+                ),
+                finish_reason=response.stop_reason
+            )
+        except APIStatusError as e:
+            logger.error(f"Error generating content with Anthropic: {str(e)}")
+            raise ProviderError(
+                f"Error generating content with Anthropic: {str(e)}",
+                provider="anthropic",
+                retryable=is_retryable_status(e.status_code),
+                status_code=e.status_code,
+                retry_after=parse_retry_after(e.response.headers)
+            ) from e
+        except APIConnectionError as e:
+            logger.error(f"Error generating content with Anthropic: {str(e)}")
+            raise ProviderError(
+                f"Error generating content with Anthropic: {str(e)}",
+                provider="anthropic",
+                retryable=True
+            ) from e
         except Exception as e:
             logger.error(f"Error generating content with Anthropic: {str(e)}")
-            raise Exception(f"Error generating content with Anthropic: {str(e)}")
+            raise ProviderError(f"Error generating content with Anthropic: {str(e)}", provider="anthropic") from e
         
     def get_provider_name(self) -> str:
         """Retorna o nome do provedor"""
@@ -0,0 +1,190 @@
+"""
+Adequação dos blocos gerados pelo formatter aos limites da API do Notion.
+
+Limites documentados da API:
+
+- 2000 caracteres por item de rich_text e no máximo 100 itens por bloco
+- 100 blocos por lista de filhos (na página ou dentro de um bloco)
+- 2 níveis de aninhamento e 1000 blocos no total por requisição
+- cerca de 500 KB por requisição
+
+Em duas etapas:
+
+1. `fit_block` (aplicado em `build_blocks`): junta itens de rich_text vizinhos
+   com a mesma formatação (o formatter cria um item por linha de código), divide
+   textos acima de 2000 caracteres em quebras de linha ou espaços e, se um bloco
+   ainda tiver mais de 100 itens, divide o próprio bloco em vários do mesmo tipo.
+2. `pack_blocks` (no envio): agrupa os blocos em lotes válidos e separa os filhos
+   que não cabem na mesma requisição (linhas de tabela além de 100, netos além
+   do segundo nível), que são anexados ao bloco pai depois que ele é criado.
+
+Nenhum conteúdo é descartado: tudo que não cabe em uma requisição vai para outra.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+NOTION_MAX_TEXT_LENGTH = 2000
+NOTION_MAX_RICH_TEXT_ITEMS = 100
+NOTION_MAX_CHILDREN = 100
+NOTION_MAX_BLOCKS_PER_REQUEST = 1000
+# Abaixo do limite de 500 KB, com folga para o restante do corpo da requisição
+NOTION_MAX_PAYLOAD_BYTES = 450_000
+
+# Continuações de um cabeçalho dividido viram parágrafos (evita cabeçalhos repetidos)
+_CONTINUATION_TYPES = {"heading_1": "paragraph", "heading_2": "paragraph", "heading_3": "paragraph"}
+
+
+@dataclass
+class BlockBatch:
+    """Blocos de uma requisição e os filhos que seguem depois que eles forem criados."""
+    blocks: List[Dict[str, Any]] = field(default_factory=list)
+    # Posição do bloco no lote -> filhos a anexar a ele em requisições seguintes
+    deferred: Dict[int, List[Dict[str, Any]]] = field(default_factory=dict)
+
+
+def split_text(content: str, limit: int = NOTION_MAX_TEXT_LENGTH) -> List[str]:
+    """Divide o texto em trechos de até `limit` caracteres, preferindo quebras de linha e espaços."""
+    pieces = []
+    while len(content) > limit:
+        cut = content.rfind("\n", 0, limit) + 1
+        if cut < limit // 2:
+            cut = content.rfind(" ", 0, limit) + 1
+        if cut < limit // 2:
+            cut = limit
+        pieces.append(content[:cut])
+        content = content[cut:]
+    if content or not pieces:
+        pieces.append(content)
+    return pieces
+
+
+def _style(item: Dict[str, Any]) -> Tuple[str, str]:
+    return (
+        json.dumps(item.get("annotations") or {}, sort_keys=True),
+        json.dumps((item.get("text") or {}).get("link"), sort_keys=True),
+    )
+
+
+def fit_rich_text(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Junta itens vizinhos com a mesma formatação e divide os que passam de 2000 caracteres."""
+    merged: List[Dict[str, Any]] = []
+    for item in items:
+        if "text" not in item:
+            merged.append(item)
+            continue
+        previous = merged[-1] if merged else None
+        if (previous is not None and "text" in previous and _style(previous) == _style(item)
+                and len(previous["text"]["content"]) + len(item["text"]["content"]) <= NOTION_MAX_TEXT_LENGTH):
+            previous["text"] = dict(previous["text"], content=previous["text"]["content"] + item["text"]["content"])
+            continue
+        merged.append(dict(item, text=dict(item["text"])))
+
+    fitted = []
+    for item in merged:
+        text = item.get("text")
+        if text is None or len(text.get("content", "")) <= NOTION_MAX_TEXT_LENGTH:
+            fitted.append(item)
+            continue
+        for piece in split_text(text["content"]):
+            fitted.append(dict(item, text=dict(text, content=piece)))
+    return fitted
+
+
+def _fit_cell(cell: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    fitted = fit_rich_text(cell)
+    if len(fitted) <= NOTION_MAX_RICH_TEXT_ITEMS:
+        return fitted
+    # Células não podem ser divididas: o texto é mantido, sem a formatação
+    plain = "".join((item.get("text") or {}).get("content", "") for item in fitted)
+    return [{"text": {"content": piece}} for piece in split_text(plain)]
+
+
+def fit_block(block: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Ajusta um bloco (e seus filhos) aos limites de texto da API.
+
+    Retorna um ou mais blocos: se o rich_text ainda passar de 100 itens depois
+    de ajustado, o bloco é dividido em vários consecutivos.
+    """
+    block_type = block.get("type", "")
+    body = block.get(block_type)
+    if not isinstance(body, dict):
+        return [block]
+    body = dict(body)
+    if "cells" in body:
+        body["cells"] = [_fit_cell(cell) for cell in body["cells"]]
+    if body.get("children"):
+        body["children"] = [fitted for child in body["children"] for fitted in fit_block(child)]
+    if "rich_text" not in body:
+        return [dict(block, **{block_type: body})]
+
+    rich_text = fit_rich_text(body["rich_text"])
+    if len(rich_text) <= NOTION_MAX_RICH_TEXT_ITEMS:
+        return [dict(block, **{block_type: dict(body, rich_text=rich_text)})]
+
+    # Os filhos ficam com o último bloco, logo antes do conteúdo que vinha depois
+    children = body.pop("children", None)
+    parts = []
+    for start in range(0, len(rich_text), NOTION_MAX_RICH_TEXT_ITEMS):
+        part_type = block_type if start == 0 else _CONTINUATION_TYPES.get(block_type, block_type)
+        part_body = dict(body) if part_type == block_type else {}
+        part_body["rich_text"] = rich_text[start:start + NOTION_MAX_RICH_TEXT_ITEMS]
+        parts.append({"type": part_type, part_type: part_body})
+    if children:
+        parts[-1][parts[-1]["type"]]["children"] = children
+    return parts
+
+
+def _children(block: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return (block.get(block.get("type", "")) or {}).get("children") or []
+
+
+def count_blocks(blocks: List[Dict[str, Any]]) -> int:
+    """Número de blocos incluindo todos os filhos aninhados."""
+    return sum(1 + count_blocks(_children(block)) for block in blocks)
+
+
+def _split_children(block: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Separa os filhos que não podem ir na mesma requisição que o bloco."""
+    children = _children(block)
+    if not children:
+        return block, []
+    if any(_children(child) for child in children):
+        # Netos passariam de 2 níveis: os filhos seguem em outra requisição, onde ficam no 1º nível
+        inline, deferred = [], children
+    else:
+        inline, deferred = children[:NOTION_MAX_CHILDREN], children[NOTION_MAX_CHILDREN:]
+    block_type = block["type"]
+    body = {name: value for name, value in block[block_type].items() if name != "children"}
+    if inline:
+        body["children"] = inline
+    return dict(block, **{block_type: body}), deferred
+
+
+def pack_blocks(blocks: List[Dict[str, Any]]) -> List[BlockBatch]:
+    """Agrupa os blocos (já ajustados por `fit_block`) no menor número de requisições válidas, em ordem."""
+    batches: List[BlockBatch] = []
+    current = BlockBatch()
+    total = size = 0
+    for block in blocks:
+        prepared, deferred = _split_children(block)
+        block_total = count_blocks([prepared])
+        block_size = len(json.dumps(prepared, ensure_ascii=False).encode("utf-8"))
+        if current.blocks and (
+            len(current.blocks) >= NOTION_MAX_CHILDREN
+            or total + block_total > NOTION_MAX_BLOCKS_PER_REQUEST
+            or size + block_size > NOTION_MAX_PAYLOAD_BYTES
+        ):
+            batches.append(current)
+            current = BlockBatch()
+            total = size = 0
+        if deferred:
+            current.deferred[len(current.blocks)] = deferred
+        current.blocks.append(prepared)
+        total += block_total
+        size += block_size
+    if current.blocks:
+        batches.append(current)
+    return batches
+
@@ -1,92 +1,197 @@
 from .ai_provider_factory import AIProviderFactory
+from .provider_interface import AIProvider, GenerationResult, SegmentCallback
+from .provider_router import ProviderRouter
+from .provider_health import provider_health
+from .provider_credentials import Credential, credential_store, merge_credentials, parse_settings
+from .long_document import LongDocumentGenerator, OutlineSection
+from .model_routing import model_router
+from .provider_catalog import provider_catalog
+from .request_coalescing import coalescing_key, generation_coalescer
+from .usage_accounting import usage_recorder
+from backend.config import get_settings
 from backend.models import User
-import json
+from typing import Awaitable, Callable, Dict, List, Optional
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+Credentials = Dict[str, Credential]
+
+class ProviderNotConfiguredError(ValueError):
+    """O provedor não está registrado ou o usuário não configurou as credenciais dele."""
+
 class ContentGenerationService:
-    def __init__(self):
+    def __init__(self, store=credential_store):
         self.provider = None
-        
-    async def initialize_provider_for_user(self, user: User):
-        """Inicializa o provedor apropriado para o usuário"""
+        self.provider_name = None
+        self.credential_store = store
+
+    async def load_credentials(self, user: User) -> Credentials:
+        """Credenciais de todos os provedores do usuário (colunas de users e tabela provider_credentials)"""
+        return merge_credentials(user, await self.credential_store.load(user.id))
+
+    def is_configured(self, provider_name: str, credential: Optional[Credential]) -> bool:
+        """Provedor registrado, com modelo definido e com chave (ou que dispensa chave, como servidores locais)"""
+        if credential is None or not AIProviderFactory.is_registered(provider_name):
+            return False
+        if self._missing_model(provider_name, credential):
+            return False
+        return bool(credential.api_key) or not AIProviderFactory.get_provider_class(provider_name).REQUIRES_API_KEY
+
+    def _missing_model(self, provider_name: str, credential: Credential) -> bool:
+        # Servidores compatíveis sem modelo nas configurações nem em OPENAI_COMPATIBLE_MODEL
+        return provider_catalog.provider(provider_name) is not None and \
+            not provider_catalog.resolve_model(provider_name, credential.settings)
+
+    def get_configured_providers(self, user: User, credentials: Optional[Credentials] = None) -> List[str]:
+        """Retorna os provedores com chave configurada, começando pelo preferido do usuário"""
+        credentials = credentials if credentials is not None else merge_credentials(user)
+        configured = [
+            name for name, credential in credentials.items() if self.is_configured(name, credential)
+        ]
+        if user.ai_provider in configured:
+            configured.remove(user.ai_provider)
+            configured.insert(0, user.ai_provider)
+        return configured
+
+    def check_configured(self, user: User, credentials: Credentials) -> None:
+        """Verifica o provedor preferido do usuário antes de iniciar a geração"""
         provider_name = user.ai_provider
+        if not AIProviderFactory.is_registered(provider_name):
+            raise ProviderNotConfiguredError(f"Provedor inválido: {provider_name}")
+        credential = credentials.get(provider_name)
+        if credential is not None and self._missing_model(provider_name, credential):
+            raise ProviderNotConfiguredError(
+                f"{AIProviderFactory.get_display_name(provider_name)}: modelo não configurado"
+            )
+        if not self.is_configured(provider_name, credential):
+            raise ProviderNotConfiguredError(
+                f"{AIProviderFactory.get_display_name(provider_name)} API key não configurada"
+            )
+
+    async def create_provider_for_user(self, user: User, provider_name: Optional[str] = None,
+                                       credentials: Optional[Credentials] = None) -> AIProvider:
+        """Cria e inicializa uma instância de provedor para o usuário sem alterar o estado do serviço"""
+        provider_name = (provider_name or user.ai_provider or "").lower()
         logger.info(f"Initializing provider '{provider_name}' for user {user.id}")
-        
+
+        if not AIProviderFactory.is_registered(provider_name):
+            logger.error(f"Unsupported provider: {provider_name}")
+            raise ProviderNotConfiguredError(f"Unsupported provider: {provider_name}")
+
+        credentials = credentials if credentials is not None else merge_credentials(user)
+        credential = credentials.get(provider_name) or Credential()
+        provider_class = AIProviderFactory.get_provider_class(provider_name)
+        if provider_class.REQUIRES_API_KEY and not credential.api_key:
+            raise ProviderNotConfiguredError(
+                f"{AIProviderFactory.get_display_name(provider_name)} API key não configurada"
+            )
+
+        provider = provider_class()
+        logger.debug(f"{provider.get_provider_name()} settings: {credential.settings}")
+        await provider.initialize(credential.api_key, credential.settings)
+        return provider
+
+    async def initialize_provider_for_user(self, user: User):
+        """Inicializa o provedor apropriado para o usuário"""
         try:
-            self.provider = AIProviderFactory.get_provider(provider_name)
-            
-            # Verificar e configurar o provedor específico
-            if provider_name == "openai":
-                if not user.openai_api_key:
-                    raise ValueError("OpenAI API key não configurada")
-                    
-                settings = self._parse_settings(user.openai_settings)
-                logger.debug(f"OpenAI settings: {settings}")
-                await self.provider.initialize(user.openai_api_key, settings)
-                
-            elif provider_name == "anthropic":
-                if not user.anthropic_api_key:
-                    raise ValueError("Anthropic API key não configurada")
-                    
-                settings = self._parse_settings(user.anthropic_settings)
-                logger.debug(f"Anthropic settings: {settings}")
-                await self.provider.initialize(user.anthropic_api_key, settings)
-                
-            elif provider_name == "deepseek":
-                if not user.deepseek_api_key:
-                    raise ValueError("DeepSeek API key não configurada")
-                    
-                settings = self._parse_settings(user.deepseek_settings)
-                logger.debug(f"DeepSeek settings: {settings}")
-                await self.provider.initialize(user.deepseek_api_key, settings)
-                
-            else:
-                logger.error(f"Unsupported provider: {provider_name}")
-                raise ValueError(f"Unsupported provider: {provider_name}")
-            
-            logger.info(f"Provider '{provider_name}' initialized successfully")
+            self.provider = await self.create_provider_for_user(user, credentials=await self.load_credentials(user))
+            self.provider_name = user.ai_provider
+            logger.info(f"Provider '{user.ai_provider}' initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing provider: {str(e)}")
             raise
-    
+
     def _parse_settings(self, settings_json):
         """Converte as configurações de JSON para dicionário se necessário"""
-        if not settings_json:
-            logger.debug("No settings provided, using defaults")
-            return {}
-            
-        if isinstance(settings_json, dict):
-            return settings_json
-            
-        try:
-            settings = json.loads(settings_json)
-            # Certificar-se de que os valores numéricos são do tipo certo
-            for key, value in settings.items():
-                if key in ["temperature", "top_p", "presence_penalty", "frequency_penalty"]:
-                    if value is not None:
-                        settings[key] = float(value)
-                elif key in ["max_tokens"]:
-                    if value is not None:
-                        settings[key] = int(value)
-            return settings
-        except (json.JSONDecodeError, TypeError) as e:
-            logger.error(f"Error parsing settings JSON: {str(e)}")
-            return {}
-    
+        return parse_settings(settings_json)
+
     async def generate_content(self, prompt: str) -> str:
         """Gera conteúdo usando o provedor inicializado"""
         if not self.provider:
             logger.error("Provider not initialized. Call initialize_provider_for_user first")
             raise ValueError("Provider not initialized. Call initialize_provider_for_user first")
-        
+
         try:
             logger.info(f"Generating content with provider: {self.provider.get_provider_name()}")
-            return await self.provider.generate_content(prompt)
+            model = (self.provider.settings or {}).get("model")
+            async with provider_health.track(self.provider_name, model):
+                return await self.provider.generate_content(prompt)
+        except Exception as e:
+            logger.error(f"Error generating content: {str(e)}")
+            raise
+
+    def _router(self, credentials: Credentials) -> ProviderRouter:
+        """Roteador que cria os provedores com as credenciais já carregadas do usuário"""
+        return ProviderRouter(
+            lambda user, provider_name: self.create_provider_for_user(user, provider_name, credentials)
+        )
+
+    async def _route(self, user: User, prompt: str, credentials: Credentials,
+                     on_segment: Optional[SegmentCallback] = None) -> GenerationResult:
+        """Executa uma geração pelo roteador e contabiliza o uso do provedor que respondeu"""
+        result = await self._router(credentials).generate(
+            user, prompt, self.get_configured_providers(user, credentials), on_segment=on_segment
+        )
+        usage_recorder.record(user.id, result.provider, result.model, result.usage)
+        return result
+
+    async def generate_content_for_user(self, user: User, prompt: str,
+                                        on_segment: Optional[SegmentCallback] = None,
+                                        credentials: Optional[Credentials] = None) -> GenerationResult:
+        """Gera conteúdo para o usuário com failover/hedging entre os provedores configurados"""
+        try:
+            if credentials is None:
+                credentials = await self.load_credentials(user)
+            credentials, decision = model_router.route(prompt, credentials)
+
+            async def generate(segment_callback: Optional[SegmentCallback]) -> GenerationResult:
+                started = time.perf_counter()
+                result = await self._route(user, prompt, credentials, on_segment=segment_callback)
+                if decision is not None:
+                    model_router.record(decision, result, (time.perf_counter() - started) * 1000)
+                return result
+
+            if not get_settings().generation_coalescing_enabled:
+                return await generate(on_segment)
+            # Pedidos idênticos em andamento (duplo clique, vários usuários com as mesmas
+            # configurações e chaves) compartilham a chamada ao provedor e o uso contabilizado
+            providers = [user.ai_provider] + self.get_configured_providers(user, credentials)
+            key = coalescing_key(prompt, providers, credentials, streaming=on_segment is not None)
+            return await generation_coalescer.run(key, generate, on_segment)
         except Exception as e:
             logger.error(f"Error generating content: {str(e)}")
             raise
 
+    async def generate_long_document_for_user(
+        self,
+        user: User,
+        prompt: str,
+        on_outline: Optional[Callable[[str, List[OutlineSection]], Awaitable[None]]] = None,
+        on_section: Optional[Callable[[int, OutlineSection, str], Awaitable[None]]] = None,
+        credentials: Optional[Credentials] = None,
+    ) -> GenerationResult:
+        """Gera um documento longo: sumário primeiro e seções em paralelo, entregues em ordem"""
+        settings = get_settings()
+        if credentials is None:
+            credentials = await self.load_credentials(user)
+        # O documento inteiro usa o nível escolhido para o pedido original, não um por seção
+        credentials, decision = model_router.route(prompt, credentials)
+        generator = LongDocumentGenerator(
+            lambda section_prompt: self._route(user, section_prompt, credentials),
+            max_sections=settings.long_document_max_sections,
+            concurrency=settings.long_document_concurrency,
+        )
+        started = time.perf_counter()
+        try:
+            result = await generator.run(prompt, on_outline=on_outline, on_section=on_section)
+        except Exception as e:
+            logger.error(f"Error generating long document: {str(e)}")
+            raise
+        if decision is not None:
+            model_router.record(decision, result, (time.perf_counter() - started) * 1000)
+        return result
+
 # Instância global do serviço
 content_generation_service = ContentGenerationService()
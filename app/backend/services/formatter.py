@@ -1,3 +1,4 @@
+import bisect
 import re
 from typing import List, Dict, Any
 
@@ -417,45 +418,29 @@ def split_content(text: str, max_length: int = 2000) -> List[str]:
     header_pattern = re.compile(r'^(#{1,3}\s.+)$', re.MULTILINE)
     parts = []
     
-    # Find all headers as potential split points
-    headers = list(header_pattern.finditer(text))
+    # Find all headers as potential split points (comments inside code blocks are not headers)
+    fences = [match.start() for match in re.finditer(r'^\s*```', text, re.MULTILINE)]
+    headers = [
+        match for match in header_pattern.finditer(text)
+        if bisect.bisect_left(fences, match.start()) % 2 == 0
+    ]
     
     if not headers:
         # No headers to split on, fall back to simpler method
         return _simple_split(text, max_length)
     
-    last_pos = 0
-    current_chunk = ""
+    # Each header starts a section; text before the first header is a section too
+    starts = [0] + [match.start() for match in headers if match.start() > 0]
+    sections = [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
     
-    # Process headers as split points
-    for i, match in enumerate(headers):
-        # Get content from last position to current header
-        if i > 0:
-            header_content = text[last_pos:match.start()]
-            
-            # If adding this header section would exceed max length, start a new chunk
-            if len(current_chunk) + len(header_content) > max_length:
-                parts.append(current_chunk)
-                current_chunk = header_content
-            else:
-                current_chunk += header_content
-        
-        # First header or after a split
-        if not current_chunk:
-            current_chunk = text[match.start():]
-        
-        last_pos = match.start()
-    
-    # Add final chunk
-    if last_pos < len(text):
-        final_content = text[last_pos:]
-        if len(current_chunk) + len(final_content) > max_length:
-            parts.append(current_chunk)
-            parts.append(final_content)
-        else:
-            current_chunk += final_content
+    # Group whole sections into chunks up to max_length
+    current_chunk = ""
+    for section in sections:
+        if current_chunk and len(current_chunk) + len(section) > max_length:
             parts.append(current_chunk)
-    elif current_chunk:
+            current_chunk = ""
+        current_chunk += section
+    if current_chunk:
         parts.append(current_chunk)
     
     # If any chunk is still too long, split it further
@@ -497,7 +482,7 @@ def _simple_split(text: str, max_length: int) -> List[str]:
                     chunks.append(code_block_content)
                     current_chunk = ""
                 else:
-                    current_chunk += code_block_content
+                    current_chunk = current_chunk + "\n" + code_block_content if current_chunk else code_block_content
                 code_block_content = ""
                 continue
         
@@ -524,7 +509,7 @@ def _simple_split(text: str, max_length: int) -> List[str]:
                     chunks.append(table_content)
                     current_chunk = ""
                 else:
-                    current_chunk += table_content
+                    current_chunk = current_chunk + "\n" + table_content if current_chunk else table_content
                 table_content = ""
         
         # For regular lines
@@ -542,7 +527,7 @@ def _simple_split(text: str, max_length: int) -> List[str]:
                 chunks.append(current_chunk)
             chunks.append(code_block_content)
         else:
-            current_chunk += code_block_content
+            current_chunk = current_chunk + "\n" + code_block_content if current_chunk else code_block_content
             
     if table_content:
         if len(current_chunk) + len(table_content) > max_length:
@@ -550,7 +535,7 @@ def _simple_split(text: str, max_length: int) -> List[str]:
                 chunks.append(current_chunk)
             chunks.append(table_content)
         else:
-            current_chunk += table_content
+            current_chunk = current_chunk + "\n" + table_content if current_chunk else table_content
     
     if current_chunk:
         chunks.append(current_chunk)
@@ -0,0 +1,215 @@
+"""
+Histórico de gerações por usuário.
+
+Cada geração concluída é gravada na tabela `generations` com os metadados da
+resposta (provedor, modelo, uso de tokens, tempos por etapa e página do Notion).
+Prompt e conteúdo são comprimidos com zlib e ficam em colunas adiadas, para que
+a listagem continue rápida mesmo com milhares de entradas.
+
+A listagem usa paginação por keyset sobre `(created_at, id)`, atendida pelo
+índice `ix_generations_user_created`: o custo de cada página independe de
+quantas páginas vieram antes, ao contrário de OFFSET.
+"""
+import base64
+import hashlib
+import logging
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+
+from backend.models import Generation
+from .provider_interface import GenerationResult
+
+logger = logging.getLogger(__name__)
+
+# Nível de compressão: bom ganho em Markdown sem custo perceptível na gravação
+COMPRESSION_LEVEL = 6
+
+PREVIEW_LENGTH = 200
+
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursorError(ValueError):
+    """Cursor de paginação malformado ou adulterado."""
+
+
+def compress_text(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def decompress_text(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def prompt_hash(prompt: str) -> str:
+    """Hash do prompt normalizado, para localizar gerações repetidas do mesmo pedido."""
+    return hashlib.sha256(" ".join(prompt.split()).encode("utf-8")).hexdigest()
+
+
+def encode_cursor(created_at: datetime, generation_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{generation_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, generation_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(generation_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+def serialize_generation(generation: Generation, include_content: bool = False) -> Dict[str, Any]:
+    """Documento de uma geração retornado pela API (o corpo só quando solicitado)."""
+    document = {
+        "id": generation.id,
+        "created_at": generation.created_at.isoformat(),
+        "mode": generation.mode,
+        "provider": generation.provider,
+        "model": generation.model,
+        "title": generation.title,
+        "prompt_preview": generation.prompt_preview,
+        "prompt_hash": generation.prompt_hash,
+        "notion_page_id": generation.notion_page_id,
+        "notion_url": generation.notion_url,
+        "content_size": generation.content_size,
+        "usage": {
+            "input_tokens": generation.input_tokens,
+            "output_tokens": generation.output_tokens,
+            "cache_read_tokens": generation.cache_read_tokens,
+            "cache_write_tokens": generation.cache_write_tokens,
+        },
+        "timings": generation.timings or {},
+        "routing": generation.routing,
+    }
+    if include_content:
+        document["prompt"] = decompress_text(generation.prompt_compressed)
+        document["content"] = decompress_text(generation.content_compressed)
+    return document
+
+
+class GenerationStore:
+    """Grava e consulta o histórico de gerações."""
+
+    def __init__(self, engine=None):
+        self._engine = engine
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from backend.models import engine
+            self._engine = engine
+        return self._engine
+
+    async def record(
+        self,
+        user_id: int,
+        prompt: str,
+        result: GenerationResult,
+        mode: str = "standard",
+        notion_page: Optional[Dict[str, Any]] = None,
+        timings: Optional[Dict[str, float]] = None,
+        title: Optional[str] = None,
+    ) -> int:
+        """Grava uma geração concluída e retorna o id da entrada."""
+        notion_page = notion_page or {}
+        content = result.content or ""
+        generation = Generation(
+            user_id=user_id,
+            mode=mode,
+            provider=result.provider,
+            model=result.model or None,
+            prompt_hash=prompt_hash(prompt),
+            prompt_preview=prompt[:PREVIEW_LENGTH],
+            title=title[:PREVIEW_LENGTH] if title else None,
+            notion_page_id=notion_page.get("id"),
+            notion_url=notion_page.get("url"),
+            content_size=len(content),
+            input_tokens=result.usage.input_tokens,
+            output_tokens=result.usage.output_tokens,
+            cache_read_tokens=result.usage.cache_read_tokens,
+            cache_write_tokens=result.usage.cache_write_tokens,
+            timings=timings,
+            routing=result.routing,
+            prompt_compressed=compress_text(prompt),
+            content_compressed=compress_text(content),
+        )
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            session.add(generation)
+            await session.commit()
+        logger.info(
+            f"Generation {generation.id} recorded for user {user_id} "
+            f"({len(content)} chars, {len(generation.content_compressed)} bytes compressed)"
+        )
+        return generation.id
+
+    async def list_generations(self, user_id: int, limit: int = 20,
+                               cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Lista as gerações do usuário da mais recente para a mais antiga.
+
+        Returns:
+            Entradas da página (sem o corpo) e o cursor da próxima página, ou None no fim
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = select(Generation).where(Generation.user_id == user_id)
+        if cursor:
+            created_at, generation_id = decode_cursor(cursor)
+            query = query.where(tuple_(Generation.created_at, Generation.id) < (created_at, generation_id))
+        # Uma linha extra indica se existe próxima página sem um COUNT
+        query = query.order_by(Generation.created_at.desc(), Generation.id.desc()).limit(limit + 1)
+
+        async with AsyncSession(self.engine) as session:
+            rows = (await session.execute(query)).scalars().all()
+
+        items = [serialize_generation(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+        return items, next_cursor
+
+    async def get_generation(self, user_id: int, generation_id: int) -> Optional[Dict[str, Any]]:
+        """Retorna uma geração completa (com prompt e conteúdo) ou None se não pertencer ao usuário."""
+        query = (
+            select(Generation)
+            .where(Generation.id == generation_id, Generation.user_id == user_id)
+            .options(undefer(Generation.prompt_compressed), undefer(Generation.content_compressed))
+        )
+        async with AsyncSession(self.engine) as session:
+            generation = (await session.execute(query)).scalar_one_or_none()
+        if generation is None:
+            return None
+        return serialize_generation(generation, include_content=True)
+
+    async def get_content_compressed(self, user_id: int, generation_id: int) -> Optional[bytes]:
+        """Conteúdo de uma geração como gravado (zlib), sem descomprimir; None se não pertencer ao usuário."""
+        query = select(Generation.content_compressed).where(
+            Generation.id == generation_id, Generation.user_id == user_id
+        )
+        async with AsyncSession(self.engine) as session:
+            return (await session.execute(query)).scalar_one_or_none()
+
+    async def get_generations(self, user_id: int, generation_ids: List[int]) -> List[Dict[str, Any]]:
+        """Gerações completas do usuário entre `generation_ids`, na ordem pedida (ids alheios são omitidos)."""
+        query = (
+            select(Generation)
+            .where(Generation.id.in_(generation_ids), Generation.user_id == user_id)
+            .options(undefer(Generation.prompt_compressed), undefer(Generation.content_compressed))
+        )
+        async with AsyncSession(self.engine) as session:
+            rows = {row.id: row for row in (await session.execute(query)).scalars().all()}
+        return [
+            serialize_generation(rows[generation_id], include_content=True)
+            for generation_id in dict.fromkeys(generation_ids) if generation_id in rows
+        ]
+
+
+# Instância global do serviço
+generation_store = GenerationStore()
@@ -0,0 +1,163 @@
+"""
+Verificações de saúde da API para orquestradores, nginx e o monitor.
+
+- liveness (/livez): o processo está de pé e o event loop responde. Não consulta
+  dependências, para que uma queda do banco ou de um provedor não faça o
+  orquestrador reiniciar processos que estão saudáveis
+- readiness (/readyz): a réplica pode receber tráfego. O banco responde, o esquema
+  tem todas as tabelas e colunas dos modelos (migrações aplicadas) e a aplicação
+  não está encerrando. Circuitos abertos aparecem como "degraded" sem tirar a
+  réplica do balanceamento: todas as réplicas dependem dos mesmos provedores
+
+O resultado fica em cache por HEALTH_CACHE_TTL segundos e verificações simultâneas
+esperam a mesma execução, então probes frequentes não geram carga no Postgres.
+Depois que o esquema é encontrado em dia, ele não é mais inspecionado no processo.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import inspect, text
+
+from backend.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+DEGRADED = "degraded"
+FAIL = "fail"
+
+
+def missing_schema(sync_connection) -> List[str]:
+    """Tabelas e colunas dos modelos que não existem no banco (migrações pendentes)."""
+    from backend.models import Base
+
+    inspector = inspect(sync_connection)
+    existing = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            missing.append(table.name)
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(f"{table.name}.{column.name}" for column in table.columns if column.name not in columns)
+    return missing
+
+
+def pool_status(engine) -> Dict[str, Any]:
+    """Ocupação do pool de conexões (quando o pool expõe esses números)."""
+    pool = engine.pool
+    status = {}
+    for name, attribute in (("size", "size"), ("checked_out", "checkedout"), ("overflow", "overflow")):
+        method = getattr(pool, attribute, None)
+        if callable(method):
+            status[name] = method()
+    return status
+
+
+class ReadinessProbe:
+    """Verificações de readiness com cache e execução única entre probes simultâneos."""
+
+    def __init__(self, engine=None):
+        self._engine = engine
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._pending: Optional[asyncio.Future] = None
+        self._schema_ok = False
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from backend.models import get_engine
+            self._engine = get_engine()
+        return self._engine
+
+    async def check(self) -> Dict[str, Any]:
+        """Resultado das verificações: do cache, de uma execução em andamento ou de uma nova."""
+        from backend.services.resources import resources
+
+        if resources.draining:
+            # Não vem do cache: o balanceador precisa parar de enviar tráfego imediatamente
+            return {"status": "not_ready", "reason": "shutting down", "checks": {}}
+
+        now = time.monotonic()
+        if self._result is not None and now - self._checked_at < get_settings().health_cache_ttl:
+            return {**self._result, "age_seconds": round(now - self._checked_at, 2)}
+
+        loop = asyncio.get_running_loop()
+        if self._pending is None or self._pending.done() or self._pending.get_loop() is not loop:
+            self._pending = asyncio.ensure_future(self._run())
+        # O shield impede que um probe desconectado cancele a execução dos demais
+        result = await asyncio.shield(self._pending)
+        return {**result, "age_seconds": round(time.monotonic() - self._checked_at, 2)}
+
+    async def _run(self) -> Dict[str, Any]:
+        timeout = get_settings().health_check_timeout
+        database = await self._bounded("database", self.check_database(), timeout)
+        if database["status"] == OK:
+            schema = await self._bounded("schema", self.check_schema(), timeout)
+        else:
+            schema = {"status": FAIL, "error": "database unavailable"}
+        circuits = self.check_circuits()
+
+        checks = {"database": database, "schema": schema, "circuits": circuits}
+        ready = all(check["status"] != FAIL for check in checks.values())
+        result = {"status": "ready" if ready else "not_ready", "checks": checks}
+        if not ready:
+            logger.warning(f"Readiness check failed: {checks}")
+        self._result, self._checked_at = result, time.monotonic()
+        return result
+
+    async def _bounded(self, name: str, check, timeout: float) -> Dict[str, Any]:
+        try:
+            return await asyncio.wait_for(check, timeout=timeout)
+        except asyncio.TimeoutError:
+            return {"status": FAIL, "error": f"timed out after {timeout}s"}
+        except Exception as e:
+            logger.warning(f"Health check '{name}' failed: {str(e)}")
+            return {"status": FAIL, "error": str(e)}
+
+    async def check_database(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        async with self.engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        return {
+            "status": OK,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "pool": pool_status(self.engine),
+        }
+
+    async def check_schema(self) -> Dict[str, Any]:
+        if self._schema_ok:
+            return {"status": OK}
+        async with self.engine.connect() as connection:
+            missing = await connection.run_sync(missing_schema)
+        if missing:
+            return {"status": FAIL, "missing": missing}
+        self._schema_ok = True
+        return {"status": OK}
+
+    def check_circuits(self) -> Dict[str, Any]:
+        """Estado dos circuit breakers conhecidos pelo processo (sem chamar os serviços externos)."""
+        from backend.services.provider_health import HALF_OPEN, OPEN, provider_health
+
+        circuits = provider_health.snapshot()
+        opened = [f"{c['provider']}/{c['model']}" for c in circuits if c["state"] == OPEN]
+        half_open = [f"{c['provider']}/{c['model']}" for c in circuits if c["state"] == HALF_OPEN]
+        return {
+            "status": DEGRADED if opened else OK,
+            "open": opened,
+            "half_open": half_open,
+            "tracked": len(circuits),
+        }
+
+    def reset(self) -> None:
+        self._result = None
+        self._checked_at = 0.0
+        self._pending = None
+        self._schema_ok = False
+
+
+# Instância global do serviço
+readiness_probe = ReadinessProbe()
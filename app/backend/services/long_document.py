@@ -0,0 +1,156 @@
+"""
+Geração de documentos longos por sumário e seções paralelas.
+
+Uma única completion fica limitada ao max_tokens do provedor e leva a soma do
+tempo de todas as seções. Neste modo o provedor gera primeiro o sumário; depois
+cada seção é gerada em paralelo (com concorrência limitada por semáforo) e
+entregue ao chamador na ordem do documento assim que ela e as anteriores ficam
+prontas, permitindo publicar no Notion enquanto as seções seguintes são geradas.
+"""
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from .prompts import OUTLINE_PROMPT_TEMPLATE, SECTION_PROMPT_TEMPLATE
+from .provider_interface import GenerationResult, TokenUsage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TITLE = "AI Generated Content"
+
+_TITLE_RE = re.compile(r"^#\s+(.+)$")
+_SECTION_RE = re.compile(r"^(?:\d+[.)]|[-*]|##)\s+(.+)$")
+_SUMMARY_SEPARATORS = (" — ", " – ", " - ", ": ")
+
+
+@dataclass
+class OutlineSection:
+    title: str
+    summary: str = ""
+
+
+def parse_outline(text: str, max_sections: int) -> Tuple[str, List[OutlineSection]]:
+    """Extrai o título do documento e as seções do sumário gerado pelo provedor."""
+    title = None
+    sections = []
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        title_match = _TITLE_RE.match(line)
+        if title_match and title is None and not sections:
+            title = title_match.group(1).strip()
+            continue
+        section_match = _SECTION_RE.match(line)
+        if not section_match:
+            continue
+        entry = section_match.group(1).strip().replace("**", "")
+        summary = ""
+        for separator in _SUMMARY_SEPARATORS:
+            if separator in entry:
+                entry, summary = (part.strip() for part in entry.split(separator, 1))
+                break
+        if entry:
+            sections.append(OutlineSection(entry, summary))
+    return title or DEFAULT_TITLE, sections[:max_sections]
+
+
+def build_section_prompt(prompt: str, title: str, sections: List[OutlineSection], index: int) -> str:
+    outline = "\n".join(f"{number}. {section.title}" for number, section in enumerate(sections, 1))
+    section = sections[index]
+    return SECTION_PROMPT_TEMPLATE.format(
+        title=title,
+        prompt=prompt,
+        outline=outline,
+        number=index + 1,
+        section_title=section.title,
+        section_summary=f"A seção deve cobrir: {section.summary}" if section.summary else "",
+    )
+
+
+def _ensure_heading(content: str, section: OutlineSection) -> str:
+    content = content.strip()
+    if not content.startswith("#"):
+        content = f"## {section.title}\n\n{content}"
+    return content
+
+
+class LongDocumentGenerator:
+    """Orquestra sumário + seções paralelas sobre uma função de geração."""
+
+    def __init__(self, generate: Callable[[str], Awaitable[GenerationResult]],
+                 max_sections: int = 20, concurrency: int = 4):
+        self.generate = generate
+        self.max_sections = max_sections
+        self.concurrency = max(1, concurrency)
+
+    async def run(
+        self,
+        prompt: str,
+        on_outline: Optional[Callable[[str, List[OutlineSection]], Awaitable[None]]] = None,
+        on_section: Optional[Callable[[int, OutlineSection, str], Awaitable[None]]] = None,
+    ) -> GenerationResult:
+        """
+        Gera o documento completo.
+
+        Args:
+            prompt: Pedido do usuário
+            on_outline: Chamado com o título e as seções antes de gerar as seções
+            on_section: Chamado para cada seção, em ordem, assim que ela fica pronta
+
+        Returns:
+            GenerationResult com o documento montado e o uso somado de todas as chamadas
+        """
+        outline_result = await self.generate(
+            OUTLINE_PROMPT_TEMPLATE.format(prompt=prompt, max_sections=self.max_sections)
+        )
+        title, sections = parse_outline(outline_result.content, self.max_sections)
+        usage = TokenUsage()
+        usage.add(outline_result.usage)
+
+        if not sections:
+            # Sumário ilegível: cai para uma geração única
+            logger.warning("Could not parse outline, falling back to a single completion")
+            result = await self.generate(prompt)
+            if on_outline:
+                await on_outline(title, [])
+            if on_section:
+                await on_section(0, OutlineSection(title), result.content)
+            usage.add(result.usage)
+            return GenerationResult(result.content, result.provider, result.model, usage, result.finish_reason)
+
+        logger.info(f"Generating long document '{title}' with {len(sections)} sections")
+        if on_outline:
+            await on_outline(title, sections)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def generate_section(index: int) -> GenerationResult:
+            async with semaphore:
+                return await self.generate(build_section_prompt(prompt, title, sections, index))
+
+        tasks = [asyncio.ensure_future(generate_section(index)) for index in range(len(sections))]
+        parts = [f"# {title}"]
+        last_result = outline_result
+        try:
+            # Aguarda na ordem do documento; as seções seguintes continuam sendo geradas
+            for index, task in enumerate(tasks):
+                result = await task
+                content = _ensure_heading(result.content, sections[index])
+                usage.add(result.usage)
+                parts.append(content)
+                last_result = result
+                if on_section:
+                    await on_section(index, sections[index], content)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        return GenerationResult(
+            content="\n\n".join(parts),
+            provider=last_result.provider,
+            model=last_result.model,
+            usage=usage,
+            finish_reason=last_result.finish_reason,
+        )
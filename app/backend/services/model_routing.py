@@ -0,0 +1,174 @@
+"""
+Roteamento automático de modelos ("routing": "auto" nas configurações do provedor).
+
+Cada prompt é classificado por uma heurística local, sem chamada a modelo nem
+tokenizador: tamanho estimado em tokens e marcadores de complexidade (pedidos de
+guia completo, arquitetura, análise, várias partes, código, tamanho pedido). Prompts
+simples vão para o modelo rápido do provedor (catálogo); os demais, para o modelo
+configurado pelo usuário. Provedores sem modelo rápido ou com "routing" fixo não mudam.
+
+A decisão acompanha o resultado (GenerationResult.routing) com a latência e o custo
+estimado da geração e é gravada no histórico; os totais por nível ficam em memória
+(/api/provider-status) para ajustar os limites MODEL_ROUTING_*.
+"""
+import logging
+import re
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import get_settings
+from .provider_catalog import provider_catalog
+from .provider_interface import GenerationResult
+from .usage_accounting import estimate_cost
+
+logger = logging.getLogger(__name__)
+
+FAST = "fast"
+STRONG = "strong"
+
+# Trechos (em minúsculas) que indicam um pedido extenso ou de raciocínio mais profundo
+COMPLEXITY_MARKERS = (
+    "arquitetura", "architecture", "guia completo", "complete guide", "full guide",
+    "detalhad", "detailed", "in-depth", "aprofundad", "comprehensive", "abrangente",
+    "passo a passo", "step by step", "tutorial", "compar", "análise", "analis", "analy",
+    "estratégia", "strategy", "documentação", "documentation", "design", "trade-off",
+)
+
+# Tamanho pedido explicitamente ("2000 palavras", "10 pages", "5 seções")
+_REQUESTED_LENGTH = re.compile(r"\b\d{2,}\s*(palavras|words|páginas|paginas|pages|seções|secoes|sections)\b")
+_LIST_ITEM = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+", re.MULTILINE)
+
+# Aproximação de tokens por caractere usada também pelos provedores compatíveis com a OpenAI
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class RoutingDecision:
+    """Nível escolhido para um prompt e o modelo usado em cada provedor roteado."""
+    tier: str
+    score: int
+    estimated_tokens: int
+    reasons: List[str] = field(default_factory=list)
+    models: Dict[str, str] = field(default_factory=dict)
+
+    def as_dict(self, result: Optional[GenerationResult] = None, latency_ms: Optional[float] = None) -> Dict[str, Any]:
+        document = {
+            "tier": self.tier,
+            "score": self.score,
+            "estimated_tokens": self.estimated_tokens,
+            "reasons": self.reasons,
+            "models": self.models,
+        }
+        if result is not None:
+            document["latency_ms"] = round(latency_ms, 1) if latency_ms is not None else None
+            document["cost_usd"] = round(estimate_cost(result.provider, result.model, result.usage), 6)
+        return document
+
+
+def classify(prompt: str) -> RoutingDecision:
+    """Classifica o prompt em rápido ou forte pela heurística local."""
+    settings = get_settings()
+    text = prompt.lower()
+    estimated_tokens = max(1, len(prompt) // CHARS_PER_TOKEN)
+    score = 0
+    reasons = []
+
+    if estimated_tokens > settings.model_routing_fast_max_tokens:
+        score += settings.model_routing_strong_score
+        reasons.append(f"long prompt (~{estimated_tokens} tokens)")
+    markers = [marker for marker in COMPLEXITY_MARKERS if marker in text]
+    if markers:
+        score += len(markers)
+        reasons.append(f"complexity markers: {', '.join(markers)}")
+    if _REQUESTED_LENGTH.search(text):
+        score += 2
+        reasons.append("explicit length requested")
+    items = len(_LIST_ITEM.findall(prompt))
+    if items >= 3:
+        score += 1
+        reasons.append(f"{items} listed requirements")
+    if "```" in prompt:
+        score += 1
+        reasons.append("code block")
+
+    tier = STRONG if score >= settings.model_routing_strong_score else FAST
+    return RoutingDecision(tier=tier, score=score, estimated_tokens=estimated_tokens, reasons=reasons)
+
+
+@dataclass
+class TierStats:
+    requests: int = 0
+    latency_ms: float = 0.0
+    cost_usd: float = 0.0
+
+
+class ModelRouter:
+    """Aplica o roteamento às credenciais de uma geração e acumula latência e custo por nível."""
+
+    def __init__(self, catalog=provider_catalog):
+        self.catalog = catalog
+        self._stats: Dict[Tuple[str, str, str], TierStats] = {}
+
+    def route(self, prompt: str, credentials: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[RoutingDecision]]:
+        """
+        Credenciais com o modelo escolhido para os provedores em modo "auto".
+
+        Retorna as credenciais originais e None quando nenhum provedor usa o roteamento.
+        """
+        if not get_settings().model_routing_enabled:
+            return credentials, None
+        auto = {
+            name: credential for name, credential in credentials.items()
+            if credential.settings.get("routing") == "auto"
+        }
+        if not auto:
+            return credentials, None
+
+        decision = classify(prompt)
+        routed = dict(credentials)
+        for name, credential in auto.items():
+            provider = self.catalog.provider(name)
+            if provider is None:
+                continue
+            strong_model = credential.settings.get("model") or provider.default_model
+            model = provider.fast_model if decision.tier == FAST and provider.fast_model else strong_model
+            decision.models[name] = model
+            routed[name] = replace(credential, settings={**credential.settings, "model": model})
+        logger.info(
+            f"Model routing: tier={decision.tier} score={decision.score} "
+            f"~{decision.estimated_tokens} tokens models={decision.models}"
+        )
+        return routed, decision
+
+    def record(self, decision: RoutingDecision, result: GenerationResult, latency_ms: float) -> None:
+        """Anexa latência e custo à decisão (result.routing) e soma aos totais do nível."""
+        result.routing = decision.as_dict(result, latency_ms)
+        stats = self._stats.setdefault((decision.tier, result.provider, result.model or ""), TierStats())
+        stats.requests += 1
+        stats.latency_ms += latency_ms
+        stats.cost_usd += result.routing["cost_usd"]
+        logger.info(
+            f"Model routing result: tier={decision.tier} model={result.model} "
+            f"latency={latency_ms:.0f}ms cost=${result.routing['cost_usd']:.6f}"
+        )
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Totais por nível, provedor e modelo desde o início do processo."""
+        return [
+            {
+                "tier": tier,
+                "provider": provider,
+                "model": model,
+                "requests": stats.requests,
+                "avg_latency_ms": round(stats.latency_ms / stats.requests, 1),
+                "cost_usd": round(stats.cost_usd, 6),
+            }
+            for (tier, provider, model), stats in sorted(self._stats.items())
+        ]
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+
+# Instância global do serviço
+model_router = ModelRouter()
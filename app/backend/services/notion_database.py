@@ -0,0 +1,223 @@
+"""
+Publicação de conteúdo gerado como linhas de bancos de dados do Notion.
+
+Cada documento vira uma página do banco, com propriedades preenchidas a partir
+da geração: título (derivado do primeiro cabeçalho quando não informado), tags,
+provedor, modelo e número de tokens. Só são preenchidas as propriedades que
+existem no esquema do banco e têm tipo compatível; o esquema é lido uma vez e
+mantido em cache.
+
+A API 2025-09-03 do Notion separa o banco (`databases`) de suas fontes de dados
+(`data_sources`): as páginas são criadas na primeira fonte de dados do banco.
+
+No modo em lote, várias linhas são criadas em paralelo (NOTION_BULK_CONCURRENCY).
+O ritmo real é dado pelo limite de requisições por integração aplicado a todas
+as chamadas ao Notion (`notion_rate_limiter`), então a concorrência só preenche
+o bucket em vez de serializar a latência de cada chamada.
+"""
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import get_settings
+from . import notion_service
+from .notion_service import build_blocks
+from .request_policy import get_request_policy
+
+logger = logging.getLogger(__name__)
+
+# Versão da API com `data_sources` (notion-client >= 2.5 a envia por padrão)
+NOTION_API_VERSION = "2025-09-03"
+
+# Nomes aceitos (sem diferenciar maiúsculas) para cada propriedade preenchida
+PROPERTY_NAMES = {
+    "tags": ("tags", "tag", "etiquetas"),
+    "provider": ("provider", "provedor"),
+    "model": ("model", "modelo"),
+    "tokens": ("tokens", "token count", "total tokens"),
+}
+
+# Tempo de validade do esquema em cache (em segundos)
+SCHEMA_CACHE_TTL = 300.0
+
+# Limite do Notion para textos de propriedades e nomes de opções de select
+TITLE_MAX_LENGTH = 200
+OPTION_MAX_LENGTH = 100
+
+_HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+_MARKDOWN_RE = re.compile(r"[*_`~\[\]]|\(https?://[^)]*\)")
+
+_schema_cache: Dict[str, Tuple[float, "DatabaseSchema"]] = {}
+
+
+@dataclass
+class DatabaseSchema:
+    """Fonte de dados onde as páginas são criadas e o tipo de cada propriedade."""
+    data_source_id: str
+    properties: Dict[str, str]
+
+    @property
+    def title_property(self) -> str:
+        return next(name for name, kind in self.properties.items() if kind == "title")
+
+    def find(self, role: str) -> Optional[Tuple[str, str]]:
+        """Nome e tipo da propriedade usada para `role` (tags, provider...) ou None."""
+        for name, kind in self.properties.items():
+            if name.strip().lower() in PROPERTY_NAMES[role]:
+                return name, kind
+        return None
+
+
+@dataclass
+class DatabaseRow:
+    """Documento a ser publicado como uma linha do banco."""
+    content: str
+    title: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    tokens: Optional[int] = None
+
+
+def derive_title(content: str) -> str:
+    """Título do documento: primeiro cabeçalho ou, sem cabeçalhos, a primeira linha."""
+    match = _HEADING_RE.search(content)
+    if match:
+        title = match.group(1)
+    else:
+        title = next((line for line in content.splitlines() if line.strip()), "AI Generated Content")
+        title = title.lstrip("#>-*+ ").strip()
+    title = _MARKDOWN_RE.sub("", title).strip() or "AI Generated Content"
+    return title[:TITLE_MAX_LENGTH]
+
+
+def _option(value: str) -> Dict[str, str]:
+    # Vírgulas não são aceitas em nomes de opções de select
+    return {"name": value.replace(",", " ").strip()[:OPTION_MAX_LENGTH]}
+
+
+def _text_value(kind: str, values: List[str]) -> Optional[Dict[str, Any]]:
+    values = [value for value in values if value and value.strip()]
+    if not values:
+        return None
+    if kind == "multi_select":
+        return {"multi_select": [_option(value) for value in dict.fromkeys(values)]}
+    if kind == "select":
+        return {"select": _option(values[0])}
+    if kind == "rich_text":
+        return {"rich_text": [{"type": "text", "text": {"content": ", ".join(values)[:TITLE_MAX_LENGTH]}}]}
+    return None
+
+
+def build_properties(schema: DatabaseSchema, row: DatabaseRow) -> Dict[str, Any]:
+    """Propriedades da página conforme o esquema; papéis sem propriedade compatível são ignorados."""
+    properties = {
+        schema.title_property: {
+            "title": [{"type": "text", "text": {"content": row.title or derive_title(row.content)}}]
+        }
+    }
+    values = {
+        "tags": row.tags,
+        "provider": [row.provider] if row.provider else [],
+        "model": [row.model] if row.model else [],
+    }
+    for role, role_values in values.items():
+        target = schema.find(role)
+        if target is None:
+            continue
+        value = _text_value(target[1], role_values)
+        if value is not None:
+            properties[target[0]] = value
+    target = schema.find("tokens")
+    if target is not None and target[1] == "number" and row.tokens is not None:
+        properties[target[0]] = {"number": row.tokens}
+    return properties
+
+
+async def get_schema(database_id: str) -> DatabaseSchema:
+    """Esquema da primeira fonte de dados do banco (em cache por SCHEMA_CACHE_TTL)."""
+    cached = _schema_cache.get(database_id)
+    if cached and time.monotonic() - cached[0] < SCHEMA_CACHE_TTL:
+        return cached[1]
+
+    policy = get_request_policy("notion")
+    database = await policy.run(
+        lambda: notion_service.get_client().databases.retrieve(database_id=database_id),
+        "Notion databases.retrieve"
+    )
+    data_sources = database.get("data_sources") or []
+    if not data_sources:
+        raise ValueError(f"Notion database {database_id} has no data sources")
+    data_source_id = data_sources[0]["id"]
+    data_source = await policy.run(
+        lambda: notion_service.get_client().data_sources.retrieve(data_source_id=data_source_id),
+        "Notion data_sources.retrieve"
+    )
+    schema = DatabaseSchema(
+        data_source_id=data_source_id,
+        properties={name: prop["type"] for name, prop in data_source["properties"].items()},
+    )
+    _schema_cache[database_id] = (time.monotonic(), schema)
+    return schema
+
+
+async def create_row(database_id: str, row: DatabaseRow) -> Dict[str, Any]:
+    """
+    Cria uma página no banco com as propriedades e o conteúdo do documento.
+
+    Returns:
+        {"id", "url", "title"} da página criada
+    """
+    if not notion_service.get_api_key():
+        raise ValueError("Notion API key está vazia")
+    if not row.content.strip():
+        raise ValueError("Empty content")
+    blocks = build_blocks(row.content)
+
+    schema = await get_schema(database_id)
+    properties = build_properties(schema, row)
+    response = await notion_service.create_page_with_blocks(
+        parent={"type": "data_source_id", "data_source_id": schema.data_source_id},
+        properties=properties,
+        blocks=blocks
+    )
+    page_id = response["id"]
+    title = properties[schema.title_property]["title"][0]["text"]["content"]
+    logger.info(f"Created row {page_id} in Notion database {database_id} ({len(blocks)} blocks)")
+    return {
+        "id": page_id,
+        "url": f"https://notion.so/{page_id.replace('-', '')}",
+        "title": title,
+    }
+
+
+async def create_rows(database_id: str, rows: List[DatabaseRow]) -> List[Dict[str, Any]]:
+    """
+    Cria várias linhas em paralelo, limitado por NOTION_BULK_CONCURRENCY.
+
+    Uma falha não interrompe as demais: cada item do resultado (na ordem de
+    `rows`) traz a página criada ou o erro.
+    """
+    semaphore = asyncio.Semaphore(max(1, get_settings().notion_bulk_concurrency))
+    # O esquema é lido uma vez antes de disparar as linhas
+    await get_schema(database_id)
+
+    async def publish(row: DatabaseRow) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return await create_row(database_id, row)
+            except Exception as e:
+                logger.warning(f"Failed to create row in Notion database {database_id}: {str(e)}")
+                return {"error": str(e)}
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(publish(row) for row in rows))
+    failed = sum(1 for result in results if "error" in result)
+    logger.info(
+        f"Bulk publish to Notion database {database_id}: {len(rows) - failed} created, "
+        f"{failed} failed in {time.monotonic() - started:.1f}s"
+    )
+    return results
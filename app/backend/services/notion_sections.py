@@ -0,0 +1,189 @@
+"""
+Publicação de documentos grandes dividida em seções enviadas em paralelo.
+
+No layout padrão ("flat") todos os blocos são irmãos na página e cada lote só
+pode ser enviado depois do anterior (a ordem depende de anexar ao final), então
+o tempo de envio cresce com o número de lotes vezes a latência de cada chamada.
+
+Nos layouts por seção o documento é dividido pelo nível de cabeçalho mais alto
+que se repete (um título único no início fica fora das seções):
+
+- "toggle": cada cabeçalho vira um cabeçalho recolhível e o conteúdo da seção
+  fica dentro dele
+- "child_page": cada seção vira uma subpágina com o título do cabeçalho
+
+O esqueleto (blocos antes do primeiro cabeçalho e os contêineres das seções) é
+criado em ordem e o conteúdo de cada seção é anexado ao seu contêiner assim que
+ele existe.
+Como cada seção tem um pai diferente, as seções são enviadas em paralelo
+(NOTION_SECTION_CONCURRENCY) sem alterar a ordem do documento, e o ritmo fica
+limitado pelo orçamento de requisições da integração (`notion_rate_limiter`).
+
+Documentos pequenos (menos de NOTION_SECTION_MIN_BLOCKS blocos) ou com menos de
+duas seções continuam no layout flat.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from backend.config import get_settings
+from . import notion_service
+from .block_packer import count_blocks
+from .notion_service import build_blocks
+from .notion_sync import fetch_blocks
+from .request_policy import get_request_policy
+from .resources import resources
+
+logger = logging.getLogger(__name__)
+
+SECTION_LAYOUTS = ("flat", "toggle", "child_page")
+
+_HEADING_TYPES = ("heading_1", "heading_2", "heading_3")
+
+# Limite do Notion para o título de uma página
+TITLE_MAX_LENGTH = 2000
+
+
+@dataclass
+class Section:
+    """Cabeçalho de uma seção e os blocos que vêm depois dele, até o próximo do mesmo nível."""
+    heading: Dict[str, Any]
+    blocks: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def title(self) -> str:
+        rich_text = self.heading[self.heading["type"]].get("rich_text", [])
+        title = "".join((item.get("text") or {}).get("content", "") for item in rich_text).strip()
+        return title[:TITLE_MAX_LENGTH] or "Untitled"
+
+
+def shard_blocks(blocks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Section]]:
+    """Divide os blocos pelo nível de cabeçalho mais alto que se repete; retorna os blocos anteriores e as seções."""
+    levels = [block["type"] for block in blocks if block.get("type") in _HEADING_TYPES]
+    top = next((level for level in _HEADING_TYPES if levels.count(level) > 1), None)
+    if top is None:
+        return list(blocks), []
+    head: List[Dict[str, Any]] = []
+    sections: List[Section] = []
+    for block in blocks:
+        if block.get("type") == top:
+            sections.append(Section(block))
+        elif sections:
+            sections[-1].blocks.append(block)
+        else:
+            head.append(block)
+    return head, sections
+
+
+def _toggle_heading(section: Section) -> Dict[str, Any]:
+    block_type = section.heading["type"]
+    body = dict(section.heading[block_type], is_toggleable=bool(section.blocks))
+    body.pop("children", None)
+    return dict(section.heading, **{block_type: body})
+
+
+async def _section_containers(page_id: str, head_length: int,
+                              sections: List[Section], layout: str) -> AsyncIterator[Tuple[str, Section]]:
+    """Id do bloco ou da subpágina de cada seção, na ordem das seções."""
+    if layout == "toggle":
+        # Os cabeçalhos foram criados com a página, logo depois dos blocos iniciais
+        children = await fetch_blocks(page_id, with_children=False)
+        for block, section in zip(children[head_length:], sections):
+            yield block["id"], section
+        return
+
+    policy = get_request_policy("notion")
+    for section in sections:
+        # Subpáginas são criadas no final da página pai: uma de cada vez para manter a ordem
+        child = await policy.run(
+            lambda: notion_service.get_client().pages.create(
+                parent={"page_id": page_id},
+                properties={"title": {"title": [{"text": {"content": section.title}}]}},
+                children=[]
+            ),
+            "Notion pages.create",
+            idempotent=False
+        )
+        yield child["id"], section
+
+
+async def _upload_sections(containers: AsyncIterator[Tuple[str, Section]], concurrency: int) -> int:
+    """
+    Anexa o conteúdo de cada seção ao seu contêiner, em paralelo; retorna o número de requisições.
+
+    O envio de uma seção começa assim que o contêiner dela existe, enquanto os
+    seguintes ainda são criados.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def upload(container_id: str, section: Section) -> int:
+        async with semaphore:
+            return await notion_service.append_blocks(container_id, section.blocks)
+
+    tasks = []
+    try:
+        async for container_id, section in containers:
+            if section.blocks:
+                tasks.append(asyncio.ensure_future(upload(container_id, section)))
+        return sum(await asyncio.gather(*tasks))
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def _publish_sections(head: List[Dict[str, Any]], sections: List[Section], layout: str, title: str,
+                            page_id_override, concurrency: int) -> Tuple[str, int]:
+    """Cria a página com o esqueleto e envia as seções; retorna o id e o número de requisições"""
+    skeleton = head + [_toggle_heading(section) for section in sections] if layout == "toggle" else head
+    page = await notion_service.create_page_with_blocks(
+        parent={"page_id": notion_service._parent_page_id(page_id_override)},
+        properties={"title": {"title": [{"text": {"content": title}}]}},
+        blocks=skeleton
+    )
+    requests = await _upload_sections(
+        _section_containers(page["id"], len(head), sections, layout), concurrency
+    )
+    return page["id"], requests
+
+
+async def publish_document(content: str, page_id_override=None, layout: str = "toggle",
+                           title: str = "AI Generated Content") -> Dict[str, str]:
+    """
+    Cria uma página com o conteúdo no layout pedido (flat, toggle ou child_page).
+
+    Returns:
+        {"id", "url"} da página criada
+    """
+    if layout not in SECTION_LAYOUTS:
+        raise ValueError(f"Invalid Notion layout: {layout}")
+    settings = get_settings()
+    blocks = build_blocks(content)
+    if not blocks:
+        raise ValueError("No valid blocks after sanitization")
+
+    head, sections = shard_blocks(blocks)
+    if layout == "flat" or len(sections) < 2 or count_blocks(blocks) < settings.notion_section_min_blocks:
+        page_id = await notion_service.create_page(title, blocks, page_id_override)
+        return {
+            "id": page_id,
+            "url": f"https://notion.so/{page_id.replace('-', '')}"
+        }
+
+    if not notion_service.get_api_key():
+        raise ValueError("Notion API key está vazia")
+    started = time.monotonic()
+    # Página e seções formam um envio só: vai até o fim mesmo se a requisição for cancelada
+    page_id, requests = await resources.protect(
+        _publish_sections(head, sections, layout, title, page_id_override, settings.notion_section_concurrency)
+    )
+    logger.info(
+        f"Published Notion page {page_id} as {len(sections)} {layout} sections "
+        f"({count_blocks(blocks)} blocks, {requests} section requests) in {time.monotonic() - started:.1f}s"
+    )
+    return {
+        "id": page_id,
+        "url": f"https://notion.so/{page_id.replace('-', '')}"
+    }
@@ -1,32 +1,90 @@
 from notion_client import AsyncClient
 from backend.config import get_settings
+from backend.services.block_packer import BlockBatch, NOTION_MAX_CHILDREN, count_blocks, fit_block, pack_blocks
 from backend.services.formatter import format_for_notion, split_content
+from backend.services.rate_limiter import notion_rate_limiter
+from backend.services.request_policy import get_request_policy
+from backend.services.resources import resources
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Tuple
 import logging
 import asyncio
 import os
+import httpx
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-settings = get_settings()
+# Chave e cliente da integração: definidos sob demanda (get_api_key/get_client) ou
+# por update_notion_client, para que importar o módulo não leia credenciais nem abra conexões
+notion_api_key = None
+notion = None
 
-# Melhorar o log para depuração
-logger.info(f"Configurando Notion client com API key: {settings.notion_api_key[:4] if settings.notion_api_key else ''}...{settings.notion_api_key[-4:] if settings.notion_api_key else 'None'}")
-logger.info(f"Page ID configurado: {settings.notion_page_id}")
+# Chave e cliente da requisição atual (user_client). Têm precedência sobre os globais e valem
+# também para as tarefas criadas pela requisição, de modo que requisições simultâneas de
+# usuários diferentes (inclusive as gerações coalescidas, que publicam ao mesmo tempo)
+# nunca usam o token umas das outras
+_request_client: ContextVar[Optional[Tuple[str, AsyncClient]]] = ContextVar("notion_request_client", default=None)
 
-# Verificar variáveis de ambiente diretamente
-env_api_key = os.environ.get("NOTION_API_KEY", "")
-env_page_id = os.environ.get("NOTION_PAGE_ID", "")
-logger.info(f"Variável de ambiente NOTION_API_KEY: {env_api_key[:4] if env_api_key else ''}...{env_api_key[-4:] if env_api_key else 'None'}")
-logger.info(f"Variável de ambiente NOTION_PAGE_ID: {env_page_id}")
+def get_api_key() -> str:
+    """API key atual: a da requisição, a das configurações ou a variável de ambiente NOTION_API_KEY"""
+    global notion_api_key
+    current = _request_client.get()
+    if current is not None:
+        return current[0]
+    if notion_api_key is None:
+        notion_api_key = get_settings().notion_api_key or os.environ.get("NOTION_API_KEY", "")
+        logger.info(f"Notion API key configured: {'yes' if notion_api_key else 'no'}")
+    return notion_api_key
+
+def get_client() -> AsyncClient:
+    """Cliente do Notion da requisição ou, fora dela, o global criado na primeira chamada"""
+    global notion
+    current = _request_client.get()
+    if current is not None:
+        return current[1]
+    if notion is None:
+        notion = create_notion_client(get_api_key())
+    return notion
 
-# Se a chave no settings estiver vazia, tentar usar a variável de ambiente diretamente
-notion_api_key = settings.notion_api_key or env_api_key
+async def _throttle_request(request: httpx.Request) -> None:
+    """Espera a vez no bucket de requisições da integração antes de cada chamada ao Notion"""
+    waited = await notion_rate_limiter.acquire(request.headers.get("authorization", ""))
+    if waited:
+        logger.debug(f"Notion request {request.method} {request.url.path} throttled for {waited:.2f}s")
 
-# Aumentando timeout para lidar com documentos maiores
-notion = AsyncClient(auth=notion_api_key, timeout_ms=60000)  # 60 segundos
+def create_notion_client(api_key):
+    """Cria um AsyncClient do Notion com o timeout da política unificada de requisições"""
+    policy = get_request_policy("notion")
+    options = {"auth": api_key, "timeout_ms": int(policy.read_timeout * 1000)}
+    base_url = get_settings().notion_base_url
+    if base_url:
+        options["base_url"] = base_url
+    # O limite de requisições vale para todas as chamadas, inclusive as repetidas pela política.
+    # As conexões vêm do pool compartilhado; o cliente só guarda a chave e os cabeçalhos
+    options["client"] = httpx.AsyncClient(
+        transport=resources.transport("notion"),
+        event_hooks={"request": [_throttle_request]}
+    )
+    try:
+        # notion-client >= 3 tem retry próprio; desativado para não multiplicar as tentativas
+        return AsyncClient(retry=False, **options)
+    except TypeError:
+        return AsyncClient(**options)
+
+@contextmanager
+def user_client(api_key: str) -> Iterator[AsyncClient]:
+    """Usa o cliente do Notion do usuário durante o bloco (e nas tarefas criadas nele)"""
+    logger.info(f"Using Notion client for key {api_key[:4]}...{api_key[-4:]}")
+    client = create_notion_client(api_key)
+    token = _request_client.set((api_key, client))
+    try:
+        yield client
+    finally:
+        _request_client.reset(token)
 
-# Função para atualizar a API key do cliente Notion
+# Função para atualizar a API key do cliente Notion global (scripts e uso fora de requisições)
 def update_notion_client(api_key):
     global notion_api_key
     global notion
@@ -38,12 +96,27 @@ def update_notion_client(api_key):
     try:
         logger.info(f"Atualizando cliente Notion com nova API key: {api_key[:4]}...{api_key[-4:]}")
         notion_api_key = api_key
-        notion = AsyncClient(auth=api_key, timeout_ms=60000)
+        notion = create_notion_client(api_key)
         return True
     except Exception as e:
         logger.error(f"Erro ao atualizar cliente Notion: {str(e)}")
         return False
 
+def _parent_page_id(page_id_override=None) -> str:
+    """Page ID (sem hífens) da página pai: o do usuário ou o configurado no ambiente"""
+    if page_id_override:
+        page_id = page_id_override.replace("-", "")
+        logger.info(f"Usando page_id override: {page_id}")
+        return page_id
+
+    # Verificar se o Page ID está presente
+    settings = get_settings()
+    if not settings.notion_page_id:
+        raise ValueError("Notion Page ID está vazio")
+
+    # Garantir que o page_id esteja no formato correto (sem hífens)
+    return settings.notion_page_id.replace("-", "")
+
 async def create_page(title: str, formatted_blocks: list, page_id_override=None) -> str:
     """Create a new Notion page with formatted blocks"""
     try:
@@ -52,26 +125,14 @@ async def create_page(title: str, formatted_blocks: list, page_id_override=None)
         logger.info(f"Número de blocos a serem criados: {len(formatted_blocks)}")
         
         # Verificar se a API key está presente
-        if not notion_api_key:
+        if not get_api_key():
             raise ValueError("Notion API key está vazia")
         
         # Determinar qual page_id usar
-        if page_id_override:
-            page_id = page_id_override.replace("-", "")
-            logger.info(f"Usando page_id override: {page_id}")
-        else:
-            # Verificar se o Page ID está presente
-            if not settings.notion_page_id:
-                raise ValueError("Notion Page ID está vazio")
-            
-            # Garantir que o page_id esteja no formato correto (sem hífens)
-            page_id = settings.notion_page_id.replace("-", "")
+        page_id = _parent_page_id(page_id_override)
         
         logger.info(f"Usando page_id formatado: {page_id}")
         
-        # Adicionar blocos em tamanhos menores para evitar falhas
-        max_blocks_per_request = 50  # Reduzido de 100 para 50 para maior estabilidade
-        
         # Criar um bloco mínimo para teste se houver problemas
         if not formatted_blocks:
             formatted_blocks = [{
@@ -81,10 +142,10 @@ async def create_page(title: str, formatted_blocks: list, page_id_override=None)
                     "rich_text": [{"type": "text", "text": {"content": "Teste de conexão"}}]
                 }
             }]
-            
-        # Tentar criar a página
+
+        # Tentar criar a página; os blocos que não cabem na primeira requisição seguem em lotes
         try:
-            response = await notion.pages.create(
+            response = await create_page_with_blocks(
                 parent={"page_id": page_id},
                 properties={
                     "title": {
@@ -97,14 +158,14 @@ async def create_page(title: str, formatted_blocks: list, page_id_override=None)
                         ]
                     }
                 },
-                children=formatted_blocks[:max_blocks_per_request]
+                blocks=formatted_blocks
             )
         except Exception as api_error:
             logger.error(f"Erro na API do Notion: {str(api_error)}")
             # Tentar verificar o status da API
             try:
                 # Teste simples para verificar se a API está funcionando
-                user = await notion.users.me()
+                user = await get_client().users.me()
                 logger.info(f"API do Notion está funcionando, usuário: {user.get('name')}")
             except Exception as user_error:
                 logger.error(f"Erro ao verificar usuário Notion: {str(user_error)}")
@@ -112,69 +173,57 @@ async def create_page(title: str, formatted_blocks: list, page_id_override=None)
             # Propagar o erro original
             raise api_error
 
-        # Se houver mais blocos, append em lotes menores com pequeno intervalo entre requests
-        if len(formatted_blocks) > max_blocks_per_request:
-            remaining_blocks = formatted_blocks[max_blocks_per_request:]
-            
-            for i in range(0, len(remaining_blocks), max_blocks_per_request):
-                chunk = remaining_blocks[i:i + max_blocks_per_request]
-                
-                try:
-                    await notion.blocks.children.append(
-                        block_id=response["id"],
-                        children=chunk
-                    )
-                    # Pequena pausa para não sobrecarregar a API
-                    await asyncio.sleep(1)
-                except Exception as e:
-                    logger.error(f"Error appending blocks {i} to {i+max_blocks_per_request}: {str(e)}")
-                    # Continua mesmo com erro para tentar salvar o máximo possível de conteúdo
-                    continue
-
         logger.info(f"Created new Notion page with ID: {response['id']}")
         return response['id']
     except Exception as e:
         logger.error(f"Error creating Notion page: {str(e)}")
         raise Exception(f"Error creating Notion page: {str(e)}")
 
+def build_blocks(content: str) -> list:
+    """Converte markdown em blocos do Notion, descartando links inválidos"""
+    # Split content into manageable chunks
+    content_chunks = split_content(content, max_length=4000)  # Aumentando tamanho máximo
+    formatted_blocks = []
+
+    # Format each chunk and combine blocks
+    for chunk in content_chunks:
+        try:
+            blocks = format_for_notion(chunk)
+            formatted_blocks.extend(blocks)
+        except Exception as block_error:
+            logger.warning(f"Error formatting chunk, skipping: {str(block_error)}")
+            # Continue com outros chunks mesmo se um falhar
+            continue
+
+    # Validar todos os blocos antes de enviar para o Notion
+    # Especialmente útil para identificar URLs inválidas
+    sanitized_blocks = []
+    for block in formatted_blocks:
+        try:
+            # Verificar se é um link com URL inválida
+            if block.get("type") == "paragraph":
+                rich_text_list = block["paragraph"].get("rich_text", [])
+                for rt in rich_text_list:
+                    if "link" in rt.get("text", {}):
+                        url = rt["text"]["link"].get("url", "")
+                        # Verificar se a URL é válida
+                        if not url or not isinstance(url, str) or ' ' in url:
+                            # Remover o link, manter apenas o texto
+                            rt["text"].pop("link", None)
+                            logger.warning(f"Removed invalid URL: '{url}'")
+            
+            # Textos longos, listas de rich_text e tabelas ajustados aos limites da API
+            sanitized_blocks.extend(fit_block(block))
+        except Exception as block_error:
+            logger.warning(f"Error validating block, skipping: {str(block_error)}")
+            continue
+
+    return sanitized_blocks
+
 async def write_to_notion(content: str, page_id_override=None) -> dict:
     """Write content to Notion page with proper formatting and chunking"""
     try:
-        # Split content into manageable chunks
-        content_chunks = split_content(content, max_length=4000)  # Aumentando tamanho máximo
-        formatted_blocks = []
-
-        # Format each chunk and combine blocks
-        for chunk in content_chunks:
-            try:
-                blocks = format_for_notion(chunk)
-                formatted_blocks.extend(blocks)
-            except Exception as block_error:
-                logger.warning(f"Error formatting chunk, skipping: {str(block_error)}")
-                # Continue com outros chunks mesmo se um falhar
-                continue
-
-        # Validar todos os blocos antes de enviar para o Notion
-        # Especialmente útil para identificar URLs inválidas
-        sanitized_blocks = []
-        for block in formatted_blocks:
-            try:
-                # Verificar se é um link com URL inválida
-                if block.get("type") == "paragraph":
-                    rich_text_list = block["paragraph"].get("rich_text", [])
-                    for rt in rich_text_list:
-                        if "link" in rt.get("text", {}):
-                            url = rt["text"]["link"].get("url", "")
-                            # Verificar se a URL é válida
-                            if not url or not isinstance(url, str) or ' ' in url:
-                                # Remover o link, manter apenas o texto
-                                rt["text"].pop("link", None)
-                                logger.warning(f"Removed invalid URL: '{url}'")
-                
-                sanitized_blocks.append(block)
-            except Exception as block_error:
-                logger.warning(f"Error validating block, skipping: {str(block_error)}")
-                continue
+        sanitized_blocks = build_blocks(content)
 
         # Se não tiver blocos válidos após a sanitização, lançar erro
         if not sanitized_blocks:
@@ -190,4 +239,176 @@ async def write_to_notion(content: str, page_id_override=None) -> dict:
         }
     except Exception as e:
         logger.error(f"Error writing to Notion: {str(e)}")
-        raise Exception(f"Error writing to Notion: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error writing to Notion: {str(e)}")
+
+async def _append_deferred(batch: BlockBatch, created: list) -> int:
+    """Anexa os filhos adiados de um lote aos blocos recém-criados; retorna o número de requisições"""
+    requests = 0
+    for index, children in batch.deferred.items():
+        requests += await append_blocks(created[index]["id"], children)
+    return requests
+
+async def _append_batch(block_id: str, batch: BlockBatch, after: str = None) -> tuple:
+    """Envia um lote e seus filhos adiados; retorna os blocos criados e o número de requisições"""
+    options = {"block_id": block_id, "children": batch.blocks}
+    if after is not None:
+        options["after"] = after
+    response = await get_request_policy("notion").run(
+        lambda: get_client().blocks.children.append(**options),
+        "Notion blocks.children.append",
+        idempotent=False
+    )
+    created = response["results"]
+    return created, 1 + await _append_deferred(batch, created)
+
+async def append_blocks(block_id: str, blocks: list, after: str = None) -> int:
+    """
+    Anexa os blocos a `block_id` (depois de `after`, se informado) no menor número de
+    requisições válidas, incluindo os filhos que não cabem junto com o pai.
+
+    O envio vai até o fim mesmo se a requisição for cancelada (resources.protect).
+
+    Returns:
+        Número de requisições feitas
+    """
+    return await resources.protect(_append_blocks(block_id, blocks, after))
+
+async def _append_blocks(block_id: str, blocks: list, after: str = None) -> int:
+    requests = 0
+    for batch in pack_blocks(blocks):
+        created, sent = await _append_batch(block_id, batch, after)
+        requests += sent
+        if after is not None:
+            # O lote seguinte continua depois do último bloco inserido
+            after = created[-1]["id"]
+    return requests
+
+async def create_page_with_blocks(parent: dict, properties: dict, blocks: list) -> dict:
+    """
+    Cria a página com o primeiro lote de blocos e anexa o restante; retorna a página criada.
+
+    O envio vai até o fim mesmo se a requisição for cancelada (resources.protect).
+    """
+    return await resources.protect(_create_page_with_blocks(parent, properties, blocks))
+
+async def _create_page_with_blocks(parent: dict, properties: dict, blocks: list) -> dict:
+    policy = get_request_policy("notion")
+    batches = pack_blocks(blocks)
+    first = batches[0] if batches else BlockBatch()
+    response = await policy.run(
+        lambda: get_client().pages.create(parent=parent, properties=properties, children=first.blocks),
+        "Notion pages.create",
+        idempotent=False
+    )
+    requests = 1
+    if first.deferred:
+        # A criação da página não retorna os blocos; os ids vêm da listagem (o lote tem até 100 blocos)
+        listing = await policy.run(
+            lambda: get_client().blocks.children.list(block_id=response["id"], page_size=NOTION_MAX_CHILDREN),
+            "Notion blocks.children.list"
+        )
+        requests += 1 + await _append_deferred(first, listing["results"])
+    for batch in batches[1:]:
+        _, sent = await _append_batch(response["id"], batch)
+        requests += sent
+    logger.info(f"Created Notion page {response['id']}: {count_blocks(blocks)} blocks in {requests} requests")
+    return response
+
+async def start_page(title: str, page_id_override=None) -> dict:
+    """Cria uma página vazia para receber conteúdo incrementalmente (append_content)"""
+    if not get_api_key():
+        raise ValueError("Notion API key está vazia")
+
+    parent_id = _parent_page_id(page_id_override)
+    policy = get_request_policy("notion")
+    response = await policy.run(
+        lambda: get_client().pages.create(
+            parent={"page_id": parent_id},
+            properties={"title": {"title": [{"text": {"content": title}}]}},
+            children=[]
+        ),
+        "Notion pages.create",
+        idempotent=False
+    )
+    page_id = response["id"]
+    logger.info(f"Started Notion page {page_id} for streamed content")
+    return {
+        "id": page_id,
+        "url": f"https://notion.so/{page_id.replace('-', '')}"
+    }
+
+async def append_content(page_id: str, content: str) -> int:
+    """Formata o markdown e anexa os blocos ao final da página, em ordem; retorna o número de blocos"""
+    blocks = build_blocks(content)
+    await append_blocks(page_id, blocks)
+    return len(blocks)
+
+def _safe_flush_point(buffer: str) -> int:
+    """
+    Posição da última linha em branco fora de blocos de código.
+
+    Tudo antes dela pode ser formatado sem depender do texto que ainda vai chegar
+    (blocos de código, tabelas e citações terminam em linhas em branco).
+    """
+    point = -1
+    in_code_block = False
+    position = 0
+    for line in buffer.split("\n")[:-1]:
+        if line.strip().startswith("```"):
+            in_code_block = not in_code_block
+        elif not line.strip() and not in_code_block and position > 0:
+            point = position - 1
+        position += len(line) + 1
+    return point
+
+class NotionStreamWriter:
+    """
+    Publica markdown no Notion à medida que ele é gerado.
+
+    O texto é acumulado e enviado em pontos seguros (linhas em branco fora de
+    blocos de código). A página é criada no primeiro envio, já com os primeiros
+    blocos, e os seguintes são anexados em ordem.
+    """
+
+    def __init__(self, title: str = "AI Generated Content", page_id_override=None):
+        self.title = title
+        self.page_id_override = page_id_override
+        self.page = None
+        self.blocks_written = 0
+        self._buffer = ""
+
+    async def write(self, text: str) -> None:
+        self._buffer += text
+        point = _safe_flush_point(self._buffer)
+        if point > 0:
+            ready, self._buffer = self._buffer[:point], self._buffer[point + 1:]
+            await self._publish(ready)
+
+    async def close(self) -> dict:
+        """Envia o restante do texto e retorna a página criada ({"id", "url"})"""
+        if self._buffer.strip() or self.page is None:
+            await self._publish(self._buffer)
+        self._buffer = ""
+        return self.page
+
+    async def _publish(self, markdown: str) -> None:
+        blocks = build_blocks(markdown)
+        if self.page is None:
+            if not blocks:
+                raise ValueError("No valid blocks after sanitization")
+            if not get_api_key():
+                raise ValueError("Notion API key está vazia")
+            parent_id = _parent_page_id(self.page_id_override)
+            response = await create_page_with_blocks(
+                parent={"page_id": parent_id},
+                properties={"title": {"title": [{"text": {"content": self.title}}]}},
+                blocks=blocks
+            )
+            self.page = {
+                "id": response["id"],
+                "url": f"https://notion.so/{response['id'].replace('-', '')}"
+            }
+            logger.info(f"Created new Notion page with ID: {response['id']}")
+        else:
+            await append_blocks(self.page["id"], blocks)
+        self.blocks_written += len(blocks)
@@ -0,0 +1,238 @@
+"""
+Atualização de uma página existente do Notion por diferença de blocos.
+
+Em vez de criar uma nova página a cada regeneração, a página alvo tem seus
+blocos atuais lidos e comparados com os blocos recém-formatados. A comparação
+usa o hash do JSON normalizado de cada bloco (sem ids, datas e campos que a API
+acrescenta), alinhado com `difflib.SequenceMatcher`. Só são enviados:
+
+- updates in-place para blocos alterados que mantêm o tipo (1 PATCH por bloco)
+- inserções agrupadas, posicionadas com `after` (1 PATCH por trecho contíguo de até 100 blocos)
+- remoções dos blocos que deixaram de existir (1 DELETE por bloco)
+
+A API não permite inserir antes do primeiro bloco da página; se a revisão
+exigir isso, a página é reescrita por completo (remoção + anexação).
+"""
+import difflib
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from notion_client import APIErrorCode, APIResponseError
+
+from . import notion_service
+from .notion_service import build_blocks
+from .request_policy import get_request_policy
+from .resources import resources
+
+logger = logging.getLogger(__name__)
+
+
+class TargetPageNotFoundError(ValueError):
+    """A página a atualizar não existe ou não foi compartilhada com a integração."""
+
+
+def _normalize_rich_text(item: Dict[str, Any]) -> Dict[str, Any]:
+    text = item.get("text") or {}
+    normalized = {"content": text.get("content", item.get("plain_text", ""))}
+    link = (text.get("link") or {}).get("url")
+    if link:
+        normalized["link"] = link
+    annotations = {
+        name: value for name, value in (item.get("annotations") or {}).items()
+        if value and value != "default"
+    }
+    if annotations:
+        normalized["annotations"] = annotations
+    return normalized
+
+
+def normalize_block(block: Dict[str, Any]) -> Dict[str, Any]:
+    """Forma canônica do conteúdo de um bloco, igual para blocos enviados e lidos da API."""
+    block_type = block.get("type", "")
+    body = {}
+    for name, value in (block.get(block_type) or {}).items():
+        if name == "rich_text":
+            value = [_normalize_rich_text(item) for item in value]
+        elif name == "children":
+            value = [normalize_block(child) for child in value]
+        # Valores padrão omitidos no envio e preenchidos pela API (color, caption, checked...)
+        if value in (None, False, "default", [], {}):
+            continue
+        body[name] = value
+    return {"type": block_type, block_type: body}
+
+
+def block_hash(block: Dict[str, Any]) -> str:
+    payload = json.dumps(normalize_block(block), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _has_children(block: Dict[str, Any]) -> bool:
+    return bool(block.get("has_children") or (block.get(block.get("type", "")) or {}).get("children"))
+
+
+def _content_body(block: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        name: value for name, value in (block.get(block["type"]) or {}).items()
+        if name != "children"
+    }
+
+
+@dataclass
+class SyncPlan:
+    """Operações necessárias para transformar os blocos atuais nos novos."""
+    updates: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+    deletes: List[str] = field(default_factory=list)
+    # (id do bloco anterior, blocos a inserir depois dele)
+    inserts: List[Tuple[str, List[Dict[str, Any]]]] = field(default_factory=list)
+    unchanged: int = 0
+    rewrite: bool = False
+
+    @property
+    def inserted_blocks(self) -> int:
+        return sum(len(blocks) for _, blocks in self.inserts)
+
+
+def plan_sync(existing: List[Dict[str, Any]], blocks: List[Dict[str, Any]]) -> SyncPlan:
+    """
+    Calcula a diferença entre os blocos da página (`existing`) e os novos (`blocks`).
+
+    Blocos iguais são mantidos; trechos substituídos viram updates in-place quando
+    o tipo é o mesmo e nenhum dos lados tem filhos, e remoção + inserção nos demais.
+    """
+    plan = SyncPlan()
+    matcher = difflib.SequenceMatcher(
+        None, [block_hash(block) for block in existing], [block_hash(block) for block in blocks], autojunk=False
+    )
+    anchor: Optional[str] = None
+    pending: List[Dict[str, Any]] = []
+
+    def flush(next_id: Optional[str]) -> None:
+        nonlocal pending
+        if pending:
+            # Sem âncora, os blocos só podem ir para o fim da página
+            if anchor is None and next_id is not None:
+                plan.rewrite = True
+            plan.inserts.append((anchor, pending))
+            pending = []
+
+    def keep(block_id: str) -> None:
+        nonlocal anchor
+        flush(block_id)
+        anchor = block_id
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            plan.unchanged += i2 - i1
+            for old in existing[i1:i2]:
+                keep(old["id"])
+            continue
+        old_blocks, new_blocks = existing[i1:i2], blocks[j1:j2]
+        for offset in range(max(len(old_blocks), len(new_blocks))):
+            old = old_blocks[offset] if offset < len(old_blocks) else None
+            new = new_blocks[offset] if offset < len(new_blocks) else None
+            if (old is not None and new is not None and old["type"] == new["type"]
+                    and not _has_children(old) and not _has_children(new)):
+                keep(old["id"])
+                plan.updates.append((old["id"], new))
+                continue
+            if old is not None:
+                plan.deletes.append(old["id"])
+            if new is not None:
+                pending.append(new)
+    flush(None)
+
+    if plan.rewrite:
+        # Inserção no topo da página: a API só posiciona blocos depois de outro bloco
+        return SyncPlan(deletes=[block["id"] for block in existing], inserts=[(None, list(blocks))], rewrite=True)
+    return plan
+
+
+async def fetch_blocks(block_id: str, with_children: bool = True) -> List[Dict[str, Any]]:
+    """Lê todos os blocos filhos (paginados); filhos de um nível são anexados ao corpo do bloco."""
+    policy = get_request_policy("notion")
+    blocks: List[Dict[str, Any]] = []
+    cursor = None
+    while True:
+        options = {"block_id": block_id, "page_size": 100}
+        if cursor:
+            options["start_cursor"] = cursor
+        response = await policy.run(
+            lambda: notion_service.get_client().blocks.children.list(**options),
+            "Notion blocks.children.list"
+        )
+        blocks.extend(response["results"])
+        if not response.get("has_more"):
+            break
+        cursor = response["next_cursor"]
+
+    if with_children:
+        for block in blocks:
+            if block.get("has_children"):
+                children = await fetch_blocks(block["id"], with_children=False)
+                block[block["type"]] = dict(block.get(block["type"]) or {}, children=children)
+    return blocks
+
+
+async def apply_plan(page_id: str, plan: SyncPlan) -> int:
+    """Executa o plano na página e retorna o número de requisições de escrita feitas."""
+    policy = get_request_policy("notion")
+    requests = 0
+    for block_id, block in plan.updates:
+        await policy.run(
+            lambda: notion_service.get_client().blocks.update(block_id=block_id, **{block["type"]: _content_body(block)}),
+            "Notion blocks.update"
+        )
+        requests += 1
+    for block_id in plan.deletes:
+        await policy.run(
+            lambda: notion_service.get_client().blocks.delete(block_id=block_id),
+            "Notion blocks.delete",
+            idempotent=False
+        )
+        requests += 1
+    for anchor, blocks in plan.inserts:
+        requests += await notion_service.append_blocks(page_id, blocks, after=anchor)
+    return requests
+
+
+async def sync_page(page_id: str, content: str) -> Dict[str, Any]:
+    """
+    Atualiza a página `page_id` para refletir `content`, enviando só a diferença.
+
+    Returns:
+        {"id", "url", "sync"} com as contagens de blocos mantidos, alterados,
+        inseridos e removidos e o número de requisições feitas
+    """
+    if not notion_service.get_api_key():
+        raise ValueError("Notion API key está vazia")
+    blocks = build_blocks(content)
+    if not blocks:
+        raise ValueError("No valid blocks after sanitization")
+
+    try:
+        existing = await fetch_blocks(page_id)
+    except APIResponseError as e:
+        if e.code == APIErrorCode.ObjectNotFound:
+            raise TargetPageNotFoundError(f"Notion page {page_id} not found") from e
+        raise
+    plan = plan_sync(existing, blocks)
+    # As alterações são aplicadas até o fim mesmo se a requisição for cancelada
+    writes = await resources.protect(apply_plan(page_id, plan))
+    stats = {
+        "unchanged": plan.unchanged,
+        "updated": len(plan.updates),
+        "inserted": plan.inserted_blocks,
+        "deleted": len(plan.deletes),
+        "rewrite": plan.rewrite,
+        "write_requests": writes,
+    }
+    logger.info(f"Synced Notion page {page_id}: {stats}")
+    return {
+        "id": page_id,
+        "url": f"https://notion.so/{page_id.replace('-', '')}",
+        "sync": stats,
+    }
@@ -0,0 +1,225 @@
+from .provider_interface import (
+    AIProvider, CONTINUATION_PROMPT, GenerationResult, ProviderError, TokenUsage,
+    is_retryable_status, parse_retry_after
+)
+from .request_policy import get_request_policy
+from .resources import resources
+from backend.config import get_settings
+import httpx
+from typing import Dict, Any, List, Optional
+from .prompts import ENHANCED_SYSTEM_PROMPT
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class OpenAICompatibleProvider(AIProvider):
+    """
+    Provedor para qualquer servidor com o endpoint de chat completions da OpenAI
+    (vLLM, llama.cpp server, DeepSeek), chamado via HTTP sem SDK.
+
+    A URL base vem de OPENAI_COMPATIBLE_BASE_URL (configuração do servidor, não do
+    usuário) e o modelo das configurações do usuário ou de OPENAI_COMPATIBLE_MODEL.
+    Subclasses para APIs específicas definem PROVIDER, DISPLAY_NAME e API_BASE_URL.
+    """
+
+    PROVIDER = "openai_compatible"
+    DISPLAY_NAME = "OpenAI-compatible"
+    API_BASE_URL: Optional[str] = None
+    REQUIRES_API_KEY = False
+    SUPPORTS_CONTINUATION = True
+
+    def __init__(self):
+        self.client = None
+        self.api_key = None
+        self.settings = None
+        self.request_policy = None
+        self.api_base_url = self.API_BASE_URL
+
+    def base_url(self) -> Optional[str]:
+        """URL base da API (sem /chat/completions)."""
+        return get_settings().openai_compatible_base_url or self.API_BASE_URL
+
+    async def initialize(self, api_key: Optional[str], settings: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Inicializa o cliente com a chave API e configurações.
+
+        Args:
+            api_key: Chave de API (opcional para servidores sem autenticação)
+            settings: Configurações específicas para este provedor
+        """
+        self.api_base_url = (self.base_url() or "").rstrip("/")
+        if not self.api_base_url:
+            raise ValueError(f"{self.DISPLAY_NAME}: OPENAI_COMPATIBLE_BASE_URL não configurada")
+        self.settings = settings or self.get_default_settings()
+        if not self.model:
+            # Um "model" vazio seria rejeitado (ou interpretado de forma imprevisível) pelo servidor
+            raise ValueError(f"{self.DISPLAY_NAME}: modelo não configurado (OPENAI_COMPATIBLE_MODEL)")
+        self.api_key = api_key
+        self.request_policy = get_request_policy("provider")
+        # Conexões do pool compartilhado entre provedores e requisições
+        self.client = httpx.AsyncClient(
+            timeout=self.request_policy.httpx_timeout(),
+            transport=resources.transport("providers")
+        )
+        logger.info(f"{self.DISPLAY_NAME} provider initialized with model: {self.model}")
+
+    @property
+    def model(self) -> str:
+        return self.settings.get("model") or self.get_default_settings()["model"]
+
+    async def generate_content(self, prompt: str) -> str:
+        """
+        Gera conteúdo com base no prompt fornecido.
+
+        Args:
+            prompt: O prompt do usuário
+
+        Returns:
+            Conteúdo gerado pelo modelo
+        """
+        return (await self.generate(prompt)).content
+
+    async def complete(self, prompt: str, partial: Optional[str] = None) -> GenerationResult:
+        """
+        Executa uma chamada aplicando a política de timeout e retry dos provedores.
+
+        Args:
+            prompt: O prompt do usuário
+            partial: Texto já gerado, quando a chamada continua uma resposta truncada
+
+        Returns:
+            Conteúdo gerado junto com uso de tokens e motivo de parada
+        """
+        if not self.client or (self.REQUIRES_API_KEY and not self.api_key):
+            raise ValueError("Provider não inicializado. Chame initialize() primeiro.")
+
+        return await self.request_policy.run(
+            lambda: self._create_completion(prompt, partial),
+            f"{self.DISPLAY_NAME} chat completion"
+        )
+
+    def build_payload(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Corpo da requisição de chat completions (subclasses acrescentam parâmetros próprios)."""
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": float(self.settings.get("temperature", 0.7)),
+            "max_tokens": int(self.settings.get("max_tokens", 1500)),
+        }
+
+    def parse_usage(self, usage: Dict[str, Any]) -> TokenUsage:
+        """Uso de tokens da resposta; tokens em cache no formato da OpenAI (prompt_tokens_details)."""
+        details = usage.get("prompt_tokens_details") or {}
+        return TokenUsage(
+            input_tokens=usage.get("prompt_tokens", 0),
+            output_tokens=usage.get("completion_tokens", 0),
+            cache_read_tokens=details.get("cached_tokens") or 0
+        )
+
+    async def _create_completion(self, prompt: str, partial: Optional[str] = None) -> GenerationResult:
+        """Executa uma única chamada ao endpoint de chat completions."""
+        try:
+            # Caches de contexto por prefixo (DeepSeek, prefix caching do vLLM): o system prompt fixo vem primeiro
+            messages = [
+                {"role": "system", "content": self.settings.get("system_prompt", ENHANCED_SYSTEM_PROMPT)},
+                {"role": "user", "content": prompt}
+            ]
+            if partial is not None:
+                # Continuação de uma resposta truncada pelo max_tokens
+                messages += [
+                    {"role": "assistant", "content": partial},
+                    {"role": "user", "content": CONTINUATION_PROMPT}
+                ]
+
+            payload = self.build_payload(messages)
+            logger.debug(f"{self.DISPLAY_NAME} API request payload: {json.dumps(payload)}")
+
+            headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            response = await self.client.post(
+                f"{self.api_base_url}/chat/completions",
+                headers=headers,
+                json=payload
+            )
+
+            response_text = response.text
+            logger.debug(f"{self.DISPLAY_NAME} API raw response: {response_text}")
+
+            if response.status_code != 200:
+                try:
+                    error_body = response.json()
+                    error_detail = error_body.get("error", {}).get("message", "Unknown error")
+                except Exception:
+                    error_detail = response_text
+
+                logger.error(f"{self.DISPLAY_NAME} API error: {response.status_code} - {error_detail}")
+                raise ProviderError(
+                    f"{self.DISPLAY_NAME} API error: {error_detail}",
+                    provider=self.PROVIDER,
+                    retryable=is_retryable_status(response.status_code),
+                    status_code=response.status_code,
+                    retry_after=parse_retry_after(response.headers)
+                )
+
+            try:
+                response_data = response.json()
+                choice = response_data["choices"][0]
+                return GenerationResult(
+                    content=choice["message"]["content"],
+                    provider=self.PROVIDER,
+                    model=response_data.get("model") or payload["model"],
+                    usage=self.parse_usage(response_data.get("usage") or {}),
+                    finish_reason=choice.get("finish_reason")
+                )
+            except KeyError as ke:
+                logger.error(f"Invalid {self.DISPLAY_NAME} API response structure: {ke}")
+                logger.error(f"Response data: {response_data}")
+                raise ProviderError(
+                    f"Invalid {self.DISPLAY_NAME} API response structure: {ke}", provider=self.PROVIDER
+                )
+
+        except httpx.RequestError as e:
+            logger.error(f"{self.DISPLAY_NAME} API request error: {str(e)}")
+            raise ProviderError(
+                f"Erro ao comunicar com a API {self.DISPLAY_NAME}: {str(e)}",
+                provider=self.PROVIDER,
+                retryable=True
+            ) from e
+
+        except Exception as e:
+            logger.error(f"Unexpected error with {self.DISPLAY_NAME} API: {str(e)}")
+            raise
+
+    def get_provider_name(self) -> str:
+        """
+        Retorna o nome do provedor.
+
+        Returns:
+            Nome do provedor para exibição
+        """
+        return self.DISPLAY_NAME
+
+    def get_default_settings(self) -> Dict[str, Any]:
+        """
+        Retorna as configurações padrão para este provedor.
+
+        Returns:
+            Configurações padrão (modelo servido definido em OPENAI_COMPATIBLE_MODEL)
+        """
+        return {
+            "model": get_settings().openai_compatible_model or self.DEFAULT_MODEL,
+            "system_prompt": ENHANCED_SYSTEM_PROMPT,
+            "temperature": 0.7,
+            "max_tokens": 2000,
+        }
+
+    async def close(self) -> None:
+        """
+        Libera o cliente HTTP quando não for mais necessário.
+
+        As conexões pertencem ao pool compartilhado, fechado no encerramento da
+        aplicação (resources); fechar o cliente aqui fecharia o pool de todos.
+        """
+        self.client = None
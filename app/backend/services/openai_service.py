@@ -1,38 +1,123 @@
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError
 from typing import Dict, Any, Optional
-from .provider_interface import AIProvider
+from .provider_interface import (
+    AIProvider, CONTINUATION_PROMPT, GenerationResult, ProviderError, TokenUsage,
+    is_retryable_status, parse_retry_after
+)
+from .request_policy import get_request_policy
+from .resources import resources
+from backend.config import get_settings
 from .prompts import ENHANCED_SYSTEM_PROMPT
+import hashlib
+import httpx
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def prompt_cache_key(system_prompt: str) -> str:
+    """
+    Chave de roteamento do cache de prompt da OpenAI.
+
+    Requisições com o mesmo prefixo (o system prompt) vão para as mesmas
+    máquinas, aumentando a chance de acerto no cache automático.
+    """
+    return "notion-ai-" + hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+
+
 class OpenAIProvider(AIProvider):
+    SUPPORTS_CONTINUATION = True
+
     def __init__(self):
         self.client = None
         self.settings = None
+        self.request_policy = None
         
     async def initialize(self, api_key: str, settings: Optional[Dict[str, Any]] = None) -> None:
         """Inicializa o cliente OpenAI"""
-        self.client = AsyncOpenAI(api_key=api_key)
+        # Retries ficam a cargo da política unificada, não do SDK
+        self.request_policy = get_request_policy("provider")
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=get_settings().openai_base_url,
+            timeout=self.request_policy.httpx_timeout(),
+            max_retries=0,
+            # Conexões do pool compartilhado entre provedores e requisições
+            http_client=httpx.AsyncClient(transport=resources.transport("providers"))
+        )
         self.settings = settings or self.get_default_settings()
         logger.info(f"OpenAI provider initialized with model: {self.settings.get('model')}")
         
     async def generate_content(self, prompt: str) -> str:
         """Gera conteúdo usando o modelo GPT da OpenAI"""
+        return (await self.generate(prompt)).content
+
+    async def complete(self, prompt: str, partial: Optional[str] = None) -> GenerationResult:
+        """Executa uma chamada aplicando a política de timeout e retry dos provedores"""
+        return await self.request_policy.run(
+            lambda: self._create_completion(prompt, partial),
+            "OpenAI chat completion"
+        )
+
+    async def _create_completion(self, prompt: str, partial: Optional[str] = None) -> GenerationResult:
+        """Executa uma única chamada de chat completion na OpenAI"""
+        model = self.settings.get("model", "gpt-4o")
+        system_prompt = self.settings.get("system_prompt", ENHANCED_SYSTEM_PROMPT)
+        # O cache da OpenAI é por prefixo: o system prompt fixo vem sempre primeiro
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        if partial is not None:
+            # Continuação de uma resposta truncada pelo max_tokens
+            messages += [
+                {"role": "assistant", "content": partial},
+                {"role": "user", "content": CONTINUATION_PROMPT}
+            ]
+        extra = {}
+        if get_settings().provider_prompt_cache_enabled:
+            # No corpo da requisição: versões do SDK anteriores ao parâmetro recusariam o argumento
+            extra["extra_body"] = {"prompt_cache_key": prompt_cache_key(system_prompt)}
         try:
             response = await self.client.chat.completions.create(
-                model=self.settings.get("model", "gpt-4o"),
-                messages=[
-                    {"role": "system", "content": self.settings.get("system_prompt", ENHANCED_SYSTEM_PROMPT)},
-                    {"role": "user", "content": prompt}
-                ],
+                model=model,
+                messages=messages,
                 temperature=self.settings.get("temperature", 0.7),
-                max_tokens=self.settings.get("max_tokens", 1500)
+                max_tokens=self.settings.get("max_tokens", 1500),
+                **extra
+            )
+            usage = response.usage
+            details = getattr(usage, "prompt_tokens_details", None)
+            return GenerationResult(
+                content=response.choices[0].message.content,
+                provider="openai",
+                model=response.model or model,
+                usage=TokenUsage(
+                    input_tokens=usage.prompt_tokens if usage else 0,
+                    output_tokens=usage.completion_tokens if usage else 0,
+                    cache_read_tokens=(getattr(details, "cached_tokens", None) or 0)
+                ),
+                finish_reason=response.choices[0].finish_reason
             )
-            return response.choices[0].message.content
+        except APIStatusError as e:
+            logger.error(f"Error generating content with OpenAI: {str(e)}")
+            raise ProviderError(
+                f"Error generating content with OpenAI: {str(e)}",
+                provider="openai",
+                retryable=is_retryable_status(e.status_code),
+                status_code=e.status_code,
+                retry_after=parse_retry_after(e.response.headers)
+            ) from e
+        except APIConnectionError as e:
+            logger.error(f"Error generating content with OpenAI: {str(e)}")
+            raise ProviderError(
+                f"Error generating content with OpenAI: {str(e)}",
+                provider="openai",
+                retryable=True
+            ) from e
         except Exception as e:
             logger.error(f"Error generating content with OpenAI: {str(e)}")
-            raise Exception(f"Error generating content with OpenAI: {str(e)}")
+            raise ProviderError(f"Error generating content with OpenAI: {str(e)}", provider="openai") from e
         
     def get_provider_name(self) -> str:
         """Retorna o nome do provedor"""
@@ -82,3 +82,24 @@ Suas respostas devem seguir as seguintes regras de formatação:
 
 Mantenha seu conteúdo organizado, com uma estrutura clara e hierárquica, usando estas regras de formatação para garantir que o Notion renderize o conteúdo corretamente. Lembre-se que seu público-alvo são desenvolvedores e documentadores profissionais que precisam de informações técnicas precisas e bem estruturadas.
 """
+
+# Modo de documento longo: primeiro o sumário, depois cada seção em paralelo
+OUTLINE_PROMPT_TEMPLATE = """Planeje um documento longo para o pedido abaixo. Responda APENAS com o sumário:
+- a primeira linha é o título do documento, no formato "# Título"
+- em seguida, uma linha por seção, no formato "1. Título da seção — o que a seção deve cobrir"
+- use no máximo {max_sections} seções, sem subitens e sem texto adicional
+
+Pedido:
+{prompt}
+"""
+
+SECTION_PROMPT_TEMPLATE = """Você está escrevendo o documento "{title}" em partes. Pedido original:
+{prompt}
+
+Sumário completo do documento:
+{outline}
+
+Escreva SOMENTE a seção {number}: "{section_title}".
+{section_summary}
+Comece com o título "## {section_title}", use ### para subseções e não repita o conteúdo das outras seções nem escreva introdução ou conclusão do documento inteiro.
+"""
@@ -0,0 +1,185 @@
+"""
+Catálogo de provedores e modelos com suas capacidades.
+
+Montado uma única vez por processo (no startup da API) a partir de dados estáticos e
+dos preços de usage_accounting, sem instanciar os provedores. O servidor compatível
+com a OpenAI entra quando OPENAI_COMPATIBLE_BASE_URL está definida; os plugins, com
+os modelos que declaram (AIProvider.MODELS). O JSON e o ETag são pré-calculados:
+/api/providers só compara o If-None-Match e devolve sempre os mesmos bytes. O mesmo
+catálogo alimenta os seletores do frontend e a validação das configurações salvas
+pelo usuário.
+"""
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from backend.config import get_settings
+from backend.responses import FastJSONResponse
+from .ai_provider_factory import AIProviderFactory
+from .usage_accounting import model_price
+
+logger = logging.getLogger(__name__)
+
+
+# "auto" escolhe entre o modelo rápido do provedor e o modelo configurado a cada prompt
+ROUTING_MODES = ("fixed", "auto")
+
+
+class InvalidSettingsError(ValueError):
+    """Configuração de provedor incompatível com o catálogo (provedor, modelo ou limites)."""
+
+
+@dataclass(frozen=True)
+class ModelInfo:
+    """Modelo oferecido por um provedor e os limites que a API aplica a ele (None = desconhecido)."""
+    id: str
+    name: str
+    context_window: Optional[int] = None
+    max_output_tokens: Optional[int] = None
+    streaming: bool = True
+    prompt_caching: bool = False
+
+
+@dataclass(frozen=True)
+class ProviderInfo:
+    name: str
+    default_model: str
+    models: Tuple[ModelInfo, ...]
+    # Servidores locais e plugins sem modelos declarados aceitam qualquer nome de modelo
+    accepts_any_model: bool = False
+    # Modelo barato e rápido usado pelo roteamento automático para prompts simples
+    fast_model: Optional[str] = None
+
+
+# Modelos na ordem exibida no frontend; o padrão é o mesmo de get_default_settings de cada provedor
+PROVIDERS: Tuple[ProviderInfo, ...] = (
+    ProviderInfo("openai", "gpt-4o", (
+        ModelInfo("gpt-4o", "GPT-4o", 128_000, 16_384, prompt_caching=True),
+        ModelInfo("gpt-4o-mini", "GPT-4o mini", 128_000, 16_384, prompt_caching=True),
+        ModelInfo("gpt-4-turbo", "GPT-4 Turbo", 128_000, 4_096),
+        ModelInfo("gpt-3.5-turbo", "GPT-3.5 Turbo", 16_385, 4_096),
+    ), fast_model="gpt-4o-mini"),
+    ProviderInfo("anthropic", "claude-3-opus-20240229", (
+        ModelInfo("claude-3-opus-20240229", "Claude 3 Opus", 200_000, 4_096, prompt_caching=True),
+        ModelInfo("claude-3-5-sonnet-20241022", "Claude 3.5 Sonnet", 200_000, 8_192, prompt_caching=True),
+        ModelInfo("claude-3-5-haiku-20241022", "Claude 3.5 Haiku", 200_000, 8_192, prompt_caching=True),
+        ModelInfo("claude-3-sonnet-20240229", "Claude 3 Sonnet", 200_000, 4_096),
+        ModelInfo("claude-3-haiku-20240307", "Claude 3 Haiku", 200_000, 4_096, prompt_caching=True),
+    ), fast_model="claude-3-5-haiku-20241022"),
+    ProviderInfo("deepseek", "deepseek-chat", (
+        ModelInfo("deepseek-chat", "DeepSeek Chat", 64_000, 8_192, prompt_caching=True),
+        ModelInfo("deepseek-coder", "DeepSeek Coder", 64_000, 8_192, prompt_caching=True),
+    )),
+)
+
+
+def available_providers() -> Tuple[ProviderInfo, ...]:
+    """Provedores embutidos, o servidor compatível com a OpenAI (se configurado) e os plugins."""
+    settings = get_settings()
+    providers = list(PROVIDERS)
+    if settings.openai_compatible_base_url:
+        model = settings.openai_compatible_model
+        providers.append(ProviderInfo(
+            "openai_compatible", model, (ModelInfo(model, model),) if model else (), accepts_any_model=True
+        ))
+    known = {provider.name for provider in providers} | {"openai_compatible"}
+    for name in AIProviderFactory.list_available_providers():
+        if name in known:
+            continue
+        provider_class = AIProviderFactory.get_provider_class(name)
+        models = tuple(provider_class.MODELS)
+        default_model = provider_class.DEFAULT_MODEL or (models[0].id if models else "")
+        providers.append(ProviderInfo(name, default_model, models, accepts_any_model=not models))
+    return tuple(providers)
+
+
+def model_document(provider: str, model: ModelInfo) -> Dict[str, Any]:
+    price = model_price(provider, model.id)
+    return {
+        "id": model.id,
+        "name": model.name,
+        "context_window": model.context_window,
+        "max_output_tokens": model.max_output_tokens,
+        "streaming": model.streaming,
+        "prompt_caching": model.prompt_caching,
+        # USD por milhão de tokens (None quando o preço não é conhecido)
+        "pricing": dict(zip(("input", "output", "cache_read", "cache_write"), price)) if price else None,
+    }
+
+
+class ProviderCatalog:
+    """Provedores e modelos suportados, com o documento JSON e o ETag já calculados."""
+
+    def __init__(self, providers: Optional[Tuple[ProviderInfo, ...]] = None):
+        providers = providers if providers is not None else available_providers()
+        display_names = AIProviderFactory.list_available_providers()
+        self._providers = {provider.name: provider for provider in providers}
+        self._models = {
+            (provider.name, model.id): model for provider in providers for model in provider.models
+        }
+        self.document = {
+            "providers": {
+                provider.name: {
+                    "display_name": display_names.get(provider.name, provider.name),
+                    "default_model": provider.default_model,
+                    "accepts_any_model": provider.accepts_any_model,
+                    "fast_model": provider.fast_model,
+                    "models": [model_document(provider.name, model) for model in provider.models],
+                }
+                for provider in providers
+            }
+        }
+        self.body = FastJSONResponse(self.document).body
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        logger.info(f"Provider catalog built: {len(self._providers)} providers, {len(self._models)} models")
+
+    def provider(self, name: str) -> Optional[ProviderInfo]:
+        return self._providers.get((name or "").lower())
+
+    def resolve_model(self, provider_name: str, settings: Dict[str, Any]) -> Optional[str]:
+        """Modelo que será usado: o das configurações ou o padrão do provedor (None se nenhum)."""
+        provider = self.provider(provider_name)
+        return (settings or {}).get("model") or (provider.default_model if provider else None) or None
+
+    def model(self, provider: str, model: str) -> Optional[ModelInfo]:
+        return self._models.get(((provider or "").lower(), model))
+
+    def validate_provider(self, name: str) -> None:
+        if self.provider(name) is None:
+            raise InvalidSettingsError(
+                f"Unknown provider '{name}'. Available: {', '.join(self._providers)}"
+            )
+
+    def validate_settings(self, provider_name: str, settings: Dict[str, Any]) -> None:
+        """Confere o modelo escolhido e o max_tokens contra os limites do catálogo."""
+        self.validate_provider(provider_name)
+        provider = self.provider(provider_name)
+        if settings.get("routing", "fixed") not in ROUTING_MODES:
+            raise InvalidSettingsError(f"routing must be one of: {', '.join(ROUTING_MODES)}")
+        model_id = settings.get("model") or provider.default_model
+        if not model_id:
+            raise InvalidSettingsError(f"A model is required for {provider.name}")
+        model = self.model(provider.name, model_id)
+        if model is None and provider.accepts_any_model:
+            return
+        if model is None:
+            available = ", ".join(model.id for model in provider.models)
+            raise InvalidSettingsError(
+                f"Unknown model '{model_id}' for {provider.name}. Available: {available}"
+            )
+        max_tokens = settings.get("max_tokens")
+        if max_tokens is None or model.max_output_tokens is None:
+            return
+        try:
+            max_tokens = int(max_tokens)
+        except (TypeError, ValueError):
+            raise InvalidSettingsError(f"max_tokens must be an integer, got '{settings['max_tokens']}'")
+        if not 1 <= max_tokens <= model.max_output_tokens:
+            raise InvalidSettingsError(
+                f"max_tokens for {model.id} must be between 1 and {model.max_output_tokens}"
+            )
+
+
+# Instância global do serviço
+provider_catalog = ProviderCatalog()
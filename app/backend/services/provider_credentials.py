@@ -0,0 +1,126 @@
+"""
+Chaves e configurações dos provedores de cada usuário.
+
+Os provedores embutidos (OpenAI, Anthropic, DeepSeek) continuam nas colunas de
+`users`; os demais (plugins e o servidor compatível com a OpenAI) ficam na tabela
+`provider_credentials`, uma linha por usuário e provedor. `merge_credentials` junta
+as duas fontes no formato usado pela geração: nome do provedor -> Credential.
+"""
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import ProviderCredential
+
+logger = logging.getLogger(__name__)
+
+# Colunas do usuário com a chave e as configurações de cada provedor embutido, em ordem de fallback
+USER_COLUMNS = {
+    "openai": ("openai_api_key", "openai_settings"),
+    "anthropic": ("anthropic_api_key", "anthropic_settings"),
+    "deepseek": ("deepseek_api_key", "deepseek_settings"),
+}
+
+FLOAT_SETTINGS = ("temperature", "top_p", "presence_penalty", "frequency_penalty")
+INT_SETTINGS = ("max_tokens",)
+
+
+@dataclass
+class Credential:
+    """Chave (opcional para servidores locais) e configurações de um provedor."""
+    api_key: Optional[str] = None
+    settings: Dict[str, Any] = field(default_factory=dict)
+
+
+def parse_settings(raw_settings: Any) -> Dict[str, Any]:
+    """Converte as configurações salvas em JSON para dicionário, com tipos numéricos consistentes."""
+    if not raw_settings:
+        return {}
+    if isinstance(raw_settings, dict):
+        return raw_settings
+    try:
+        settings = json.loads(raw_settings)
+    except (json.JSONDecodeError, TypeError) as e:
+        logger.error(f"Error parsing settings JSON: {str(e)}")
+        return {}
+    if not isinstance(settings, dict):
+        return {}
+    for key, value in settings.items():
+        if value is None:
+            continue
+        try:
+            if key in FLOAT_SETTINGS:
+                settings[key] = float(value)
+            elif key in INT_SETTINGS:
+                settings[key] = int(value)
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid value for setting '{key}': {value}")
+    return settings
+
+
+def merge_credentials(user: Any, stored: Optional[Dict[str, Credential]] = None) -> Dict[str, Credential]:
+    """Credenciais de todos os provedores do usuário: colunas de `users` e, para os demais, a tabela."""
+    credentials = {}
+    for name, (key_field, settings_field) in USER_COLUMNS.items():
+        api_key = getattr(user, key_field, None)
+        if api_key:
+            credentials[name] = Credential(api_key, parse_settings(getattr(user, settings_field, None)))
+    for name, credential in (stored or {}).items():
+        credentials.setdefault(name, credential)
+    return credentials
+
+
+class CredentialStore:
+    """Lê e grava a tabela provider_credentials."""
+
+    def __init__(self, engine=None):
+        self._engine = engine
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from backend.models import get_engine
+            self._engine = get_engine()
+        return self._engine
+
+    async def load(self, user_id: int, session: Optional[AsyncSession] = None) -> Dict[str, Credential]:
+        """Credenciais salvas na tabela para o usuário (uma única consulta pela chave primária)."""
+        statement = select(ProviderCredential).where(ProviderCredential.user_id == user_id)
+        if session is None:
+            async with AsyncSession(self.engine) as own_session:
+                rows = (await own_session.execute(statement)).scalars().all()
+        else:
+            rows = (await session.execute(statement)).scalars().all()
+        return {row.provider: Credential(row.api_key, parse_settings(row.settings)) for row in rows}
+
+    async def save(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        provider: str,
+        api_key: Optional[str] = None,
+        settings: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Cria ou atualiza as credenciais de um provedor na sessão (o commit fica com quem chamou).
+
+        Campos None mantêm o valor salvo; uma chave vazia remove a chave.
+        """
+        row = await session.get(ProviderCredential, (user_id, provider))
+        if row is None:
+            row = ProviderCredential(user_id=user_id, provider=provider)
+            session.add(row)
+        if api_key is not None:
+            row.api_key = api_key or None
+        if settings is not None:
+            row.settings = json.dumps(settings)
+        row.updated_at = datetime.utcnow()
+
+
+# Instância global do serviço
+credential_store = CredentialStore()
@@ -0,0 +1,397 @@
+"""
+Placar de saúde compartilhado dos provedores de IA.
+
+Cada par (provedor, modelo) mantém uma janela móvel de resultados, a taxa de erro,
+uma média móvel exponencial (EWMA) da latência e o estado do circuit breaker:
+
+- closed: chamadas liberadas normalmente
+- open: chamadas rejeitadas imediatamente até o fim do cooldown
+- half_open: uma única chamada de sonda é liberada; sucesso fecha o circuito,
+  falha o reabre
+
+Somente falhas transitórias do upstream (`ProviderError.retryable`) contam como
+erro; chaves inválidas ou requisições malformadas não derrubam o provedor para
+os demais usuários.
+
+Métricas (latência, taxa de erro) são do processo. O estado dos circuitos é
+propagado pelo backend de estado compartilhado (STATE_BACKEND=postgres): um
+circuito aberto em um processo passa a valer para os demais na próxima leitura
+(no máximo a cada PROVIDER_BREAKER_SYNC_INTERVAL segundos), assim como o
+fechamento depois de uma sonda bem-sucedida.
+"""
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from backend.config import get_settings
+from .provider_interface import ProviderError, TokenUsage
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Peso da amostra mais recente na EWMA de latência
+LATENCY_EWMA_ALPHA = 0.2
+
+# Número mínimo de amostras antes de confiar no p95 para decisões de hedging
+MIN_LATENCY_SAMPLES = 10
+
+
+class ProviderUnavailableError(ProviderError):
+    """Chamada rejeitada porque o circuit breaker do provedor está aberto."""
+
+    def __init__(self, provider: str, model: str, retry_after: float):
+        super().__init__(
+            f"Provedor {provider} ({model}) temporariamente indisponível após falhas consecutivas. "
+            f"Tente novamente em {int(retry_after) + 1}s ou use outro provedor.",
+            provider=provider
+        )
+        self.model = model
+        self.retry_after = retry_after
+
+
+class ProviderHealth:
+    """Estado de saúde e circuit breaker de um par (provedor, modelo)."""
+
+    def __init__(self, provider: str, model: str):
+        self.provider = provider
+        self.model = model
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.consecutive_failures = 0
+        self.latency_ewma: Optional[float] = None
+        self.latencies: Deque[float] = deque(maxlen=100)
+        self.outcomes: Deque[Tuple[float, bool]] = deque()
+        self.total_successes = 0
+        self.total_failures = 0
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[float] = None
+        # Tokens de entrada acumulados, para a taxa de acerto do cache de prompt
+        self.input_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        # Última versão do estado compartilhado aplicada e quando foi lida
+        self.shared_version = 0
+        self.synced_at: Optional[float] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+    def _prune(self, now: float, window: float) -> None:
+        while self.outcomes and now - self.outcomes[0][0] > window:
+            self.outcomes.popleft()
+
+    def error_rate(self, now: Optional[float] = None) -> float:
+        now = now or time.monotonic()
+        self._prune(now, get_settings().provider_health_window)
+        if not self.outcomes:
+            return 0.0
+        failures = sum(1 for _, ok in self.outcomes if not ok)
+        return failures / len(self.outcomes)
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def retry_after(self, now: Optional[float] = None) -> float:
+        now = now or time.monotonic()
+        return max(0.0, self.opened_at + get_settings().provider_breaker_cooldown - now)
+
+    def current_state(self, now: Optional[float] = None) -> str:
+        """Estado efetivo, promovendo open -> half_open quando o cooldown expira."""
+        now = now or time.monotonic()
+        if self.state == OPEN and self.retry_after(now) == 0:
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+        return self.state
+
+    def acquire(self) -> None:
+        """Libera uma chamada ou levanta ProviderUnavailableError se o circuito estiver aberto."""
+        now = time.monotonic()
+        state = self.current_state(now)
+        if state == OPEN:
+            raise ProviderUnavailableError(self.provider, self.model, self.retry_after(now))
+        if state == HALF_OPEN:
+            if self.probe_in_flight:
+                raise ProviderUnavailableError(self.provider, self.model, 1.0)
+            self.probe_in_flight = True
+
+    def release(self) -> None:
+        """Libera a vaga de sonda sem registrar resultado (ex.: chamada cancelada)."""
+        self.probe_in_flight = False
+
+    def record_success(self, latency: float) -> None:
+        now = time.monotonic()
+        self.outcomes.append((now, True))
+        self.latencies.append(latency)
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * self.latency_ewma
+        self.total_successes += 1
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            logger.info(f"Circuit for {self.provider}/{self.model} closed after successful probe")
+            self.outcomes.clear()
+        self.state = CLOSED
+        self.probe_in_flight = False
+
+    def record_usage(self, usage: TokenUsage) -> None:
+        self.input_tokens += usage.input_tokens
+        self.cache_read_tokens += usage.cache_read_tokens
+        self.cache_write_tokens += usage.cache_write_tokens
+
+    def cache_hit_ratio(self) -> Optional[float]:
+        if not self.input_tokens:
+            return None
+        return self.cache_read_tokens / self.input_tokens
+
+    def record_failure(self, error: BaseException) -> None:
+        settings = get_settings()
+        now = time.monotonic()
+        self.outcomes.append((now, False))
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        self.last_error = str(error)
+        self.last_error_at = time.time()
+        self.probe_in_flight = False
+
+        should_open = self.state == HALF_OPEN
+        if self.consecutive_failures >= settings.provider_breaker_failure_threshold:
+            should_open = True
+        elif (len(self.outcomes) >= settings.provider_breaker_min_requests
+              and self.error_rate(now) >= settings.provider_breaker_error_rate):
+            should_open = True
+
+        if should_open:
+            if self.state != OPEN:
+                logger.warning(f"Circuit for {self.provider}/{self.model} opened: {self.last_error}")
+            self.state = OPEN
+            self.opened_at = now
+
+    def apply_shared(self, state: str, open_until: float, version: int) -> None:
+        """Aplica uma mudança de estado feita por outro processo (versões já vistas são ignoradas)."""
+        if version <= self.shared_version:
+            return
+        self.shared_version = version
+        remaining = open_until - time.time()
+        if state == OPEN and remaining > 0:
+            if self.state != OPEN:
+                logger.warning(f"Circuit for {self.provider}/{self.model} opened by another worker")
+            self.state = OPEN
+            self.opened_at = time.monotonic() + remaining - get_settings().provider_breaker_cooldown
+            self.probe_in_flight = False
+        elif state == CLOSED and self.state != CLOSED:
+            logger.info(f"Circuit for {self.provider}/{self.model} closed by another worker")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.outcomes.clear()
+            self.probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        state = self.current_state(now)
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "state": state,
+            "error_rate": round(self.error_rate(now), 4),
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "latency_p95_ms": round(self.p95() * 1000, 1) if self.p95() is not None else None,
+            "requests_in_window": len(self.outcomes),
+            "consecutive_failures": self.consecutive_failures,
+            "total_successes": self.total_successes,
+            "total_failures": self.total_failures,
+            "retry_after_seconds": round(self.retry_after(now), 1) if state == OPEN else 0,
+            "last_error": self.last_error,
+            "prompt_cache": {
+                "input_tokens": self.input_tokens,
+                "cache_read_tokens": self.cache_read_tokens,
+                "cache_write_tokens": self.cache_write_tokens,
+                "hit_ratio": round(self.cache_hit_ratio(), 4) if self.cache_hit_ratio() is not None else None,
+            },
+        }
+
+
+class CircuitStateBackend(ABC):
+    """Armazenamento do estado dos circuitos compartilhado entre processos."""
+
+    @abstractmethod
+    async def publish(self, key: str, state: str, open_until: float) -> int:
+        """Grava o novo estado; retorna a versão gravada."""
+
+    @abstractmethod
+    async def fetch(self, keys: List[str]) -> Dict[str, Tuple[str, float, int]]:
+        """Estado, fim do cooldown (epoch) e versão de cada chave conhecida."""
+
+
+class InMemoryCircuitStateBackend(CircuitStateBackend):
+    """Um único processo: o estado local já é o estado de todos, nada é propagado."""
+
+    async def publish(self, key: str, state: str, open_until: float) -> int:
+        return 0
+
+    async def fetch(self, keys: List[str]) -> Dict[str, Tuple[str, float, int]]:
+        return {}
+
+
+class PostgresCircuitStateBackend(CircuitStateBackend):
+    """Backend compartilhado entre processos e réplicas usando a tabela provider_circuits."""
+
+    def __init__(self, engine=None):
+        self._engine = engine
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from backend.models import engine
+            self._engine = engine
+        return self._engine
+
+    async def publish(self, key: str, state: str, open_until: float) -> int:
+        async with self.engine.begin() as conn:
+            return (await conn.execute(
+                text(
+                    "INSERT INTO provider_circuits (key, state, open_until, version) "
+                    "VALUES (:key, :state, :open_until, 1) "
+                    "ON CONFLICT (key) DO UPDATE SET state = :state, open_until = :open_until, "
+                    "version = provider_circuits.version + 1 "
+                    "RETURNING version"
+                ),
+                {"key": key, "state": state, "open_until": float(open_until)}
+            )).scalar_one()
+
+    async def fetch(self, keys: List[str]) -> Dict[str, Tuple[str, float, int]]:
+        if not keys:
+            return {}
+        params = {f"key{index}": key for index, key in enumerate(keys)}
+        placeholders = ", ".join(f":{name}" for name in params)
+        async with self.engine.connect() as conn:
+            rows = (await conn.execute(
+                text(f"SELECT key, state, open_until, version FROM provider_circuits WHERE key IN ({placeholders})"),
+                params
+            )).all()
+        return {row[0]: (row[1], float(row[2]), int(row[3])) for row in rows}
+
+
+class ProviderHealthRegistry:
+    """Registro da saúde de todos os provedores e modelos, com o estado dos circuitos compartilhado."""
+
+    def __init__(self, backend: Optional[CircuitStateBackend] = None):
+        self._entries: Dict[Tuple[str, str], ProviderHealth] = {}
+        self._backend = backend
+
+    @property
+    def backend(self) -> CircuitStateBackend:
+        if self._backend is None:
+            backend_name = get_settings().state_backend.lower()
+            if backend_name == "postgres":
+                self._backend = PostgresCircuitStateBackend()
+            else:
+                self._backend = InMemoryCircuitStateBackend()
+            logger.info(f"Provider circuits using '{backend_name}' state backend")
+        return self._backend
+
+    async def sync(self, health: ProviderHealth) -> None:
+        """Lê o estado compartilhado do circuito, no máximo a cada PROVIDER_BREAKER_SYNC_INTERVAL."""
+        now = time.monotonic()
+        if health.synced_at is not None and now - health.synced_at < get_settings().provider_breaker_sync_interval:
+            return
+        health.synced_at = now
+        try:
+            shared = await self.backend.fetch([health.key])
+        except Exception as e:
+            # O estado compartilhado é auxiliar: sem ele cada processo decide sozinho
+            logger.warning(f"Failed to read shared circuit state for {health.key}: {str(e)}")
+            return
+        if health.key in shared:
+            health.apply_shared(*shared[health.key])
+
+    async def _publish(self, health: ProviderHealth) -> None:
+        open_until = time.time() + health.retry_after() if health.state == OPEN else 0.0
+        try:
+            health.shared_version = max(
+                health.shared_version, await self.backend.publish(health.key, health.state, open_until)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to publish circuit state for {health.key}: {str(e)}")
+
+    def get(self, provider: str, model: Optional[str] = None) -> ProviderHealth:
+        key = (provider, model or "default")
+        if key not in self._entries:
+            self._entries[key] = ProviderHealth(*key)
+        return self._entries[key]
+
+    @asynccontextmanager
+    async def track(self, provider: str, model: Optional[str] = None,
+                    excluded: Optional[Callable[[], float]] = None):
+        """
+        Protege uma chamada ao provedor: falha rápido com o circuito aberto e
+        registra latência e resultado ao final.
+
+        `excluded` devolve os segundos gastos fora do provedor durante a chamada
+        (publicação dos trechos no Notion), descontados da latência registrada.
+        """
+        health = self.get(provider, model)
+        await self.sync(health)
+        health.acquire()
+        state = health.state
+        start = time.monotonic()
+        try:
+            yield health
+        except ProviderError as e:
+            if e.retryable:
+                health.record_failure(e)
+            else:
+                health.release()
+            raise
+        except BaseException:
+            health.release()
+            raise
+        else:
+            health.record_success(time.monotonic() - start - (excluded() if excluded else 0.0))
+        finally:
+            # Aberturas e fechamentos valem para os demais processos
+            if health.state != state and health.state in (OPEN, CLOSED):
+                await self._publish(health)
+
+    def latency_p95(self, provider: str) -> Optional[float]:
+        """p95 combinado de todos os modelos de um provedor."""
+        samples = [
+            latency for (name, _), health in self._entries.items() if name == provider
+            for latency in health.latencies
+        ]
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        samples.sort()
+        return samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+    def provider_state(self, provider: str) -> str:
+        """Pior estado entre os modelos do provedor (open > half_open > closed)."""
+        states = [health.current_state() for (name, _), health in self._entries.items() if name == provider]
+        if OPEN in states:
+            return OPEN
+        if HALF_OPEN in states:
+            return HALF_OPEN
+        return CLOSED
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [health.snapshot() for health in self._entries.values()]
+
+    def reset(self) -> None:
+        self._entries.clear()
+
+
+# Instância global do serviço
+provider_health = ProviderHealthRegistry()
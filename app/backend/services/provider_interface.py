@@ -1,7 +1,149 @@
+import logging
+import re
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Motivos de parada que indicam resposta cortada pelo max_tokens (OpenAI/DeepSeek e Anthropic)
+TRUNCATION_FINISH_REASONS = ("length", "max_tokens")
+
+# Recebe cada trecho novo do texto gerado, já costurado ao anterior
+SegmentCallback = Callable[[str], Awaitable[None]]
+
+# Pedido enviado às APIs de chat para continuar uma resposta truncada
+CONTINUATION_PROMPT = (
+    "Continue exatamente de onde a resposta anterior parou, sem repetir nenhum trecho "
+    "e sem comentários sobre a continuação."
+)
+
+_FENCE_RE = re.compile(r"^\s*```", re.MULTILINE)
+
+
+@dataclass
+class TokenUsage:
+    """
+    Uso de tokens reportado pelo provedor em uma resposta.
+
+    `input_tokens` é o total de entrada, incluindo os tokens servidos pelo cache
+    de prompt (`cache_read_tokens`) e os gravados nele (`cache_write_tokens`).
+    """
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    @property
+    def cache_hit_ratio(self) -> Optional[float]:
+        """Fração da entrada servida pelo cache de prompt (None sem tokens de entrada)."""
+        if not self.input_tokens:
+            return None
+        return self.cache_read_tokens / self.input_tokens
+
+    def add(self, other: "TokenUsage") -> None:
+        """Soma o uso de outra resposta (ex.: várias chamadas de uma mesma geração)."""
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cache_read_tokens += other.cache_read_tokens
+        self.cache_write_tokens += other.cache_write_tokens
+
+
+@dataclass
+class GenerationResult:
+    """Conteúdo gerado junto com os metadados da resposta do provedor."""
+    content: str
+    provider: str = ""
+    model: str = ""
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    finish_reason: Optional[str] = None
+    continuations: int = 0
+    # Decisão do roteamento automático de modelos, quando aplicado (model_routing)
+    routing: Optional[Dict[str, Any]] = None
+
+    @property
+    def truncated(self) -> bool:
+        """True se a resposta foi cortada pelo limite de tokens de saída."""
+        return self.finish_reason in TRUNCATION_FINISH_REASONS
+
+
+class ProviderError(Exception):
+    """
+    Erro de comunicação com um provedor de IA.
+
+    `retryable` indica falhas transitórias do upstream (timeouts, 429, 5xx),
+    que justificam failover, retry ou contagem no circuit breaker. Erros de
+    configuração (chave inválida, requisição malformada) não são retryable.
+    """
+
+    def __init__(self, message: str, provider: str = "", retryable: bool = False,
+                 status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.retryable = retryable
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def parse_retry_after(headers: Any) -> Optional[float]:
+    """Lê o cabeçalho Retry-After (em segundos) de uma resposta HTTP, se presente."""
+    if headers is None:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable_status(status_code: Optional[int]) -> bool:
+    """Retorna True para status HTTP que indicam falha transitória do upstream."""
+    return status_code is not None and (status_code in (408, 409, 429) or status_code >= 500)
+
+def stitch_continuation(content: str, segment: str, max_overlap: int = 300) -> str:
+    """
+    Ajusta o início de um trecho de continuação para ser anexado a `content`.
+
+    Remove espaços duplicados na junção e o texto que o modelo eventualmente
+    repete do final da resposta anterior. Retorna apenas o que deve ser anexado,
+    para que o texto já entregue nunca precise ser alterado.
+    """
+    head = content.rstrip()
+    trailing = content[len(head):]
+    body = segment.lstrip()
+    leading = segment[:len(segment) - len(body)]
+
+    # Mantém a maior das quebras (ex.: "\n" + "\n\n" -> "\n\n")
+    if trailing:
+        leading = leading[len(trailing):] if len(leading) > len(trailing) else ""
+
+    # Remove a sobreposição quando o modelo repete o final do texto anterior
+    for size in range(min(len(head), len(body), max_overlap), 19, -1):
+        if head.endswith(body[:size]):
+            return body[size:]
+    return leading + body
+
+
+def close_open_code_fence(content: str) -> str:
+    """Retorna o fechamento (```) necessário se o texto terminar com um bloco de código aberto."""
+    if len(_FENCE_RE.findall(content)) % 2 == 1:
+        return "\n```\n" if not content.endswith("\n") else "```\n"
+    return ""
+
 
 class AIProvider(ABC):
+    # Lidos sem instanciar o provedor (catálogo e verificação de credenciais). Plugins declaram
+    # os modelos oferecidos (provider_catalog.ModelInfo); sem modelos, qualquer nome é aceito
+    MODELS: Tuple[Any, ...] = ()
+    DEFAULT_MODEL: str = ""
+    # Servidores de inferência locais costumam dispensar a chave de API
+    REQUIRES_API_KEY: bool = True
+    # Provedores cujo complete() aceita `partial` e continua uma resposta truncada
+    SUPPORTS_CONTINUATION: bool = False
+
     @abstractmethod
     async def initialize(self, api_key: str, settings: Optional[Dict[str, Any]] = None) -> None:
         """Inicializa o cliente com a chave API e configurações opcionais."""
@@ -11,6 +153,72 @@ class AIProvider(ABC):
     async def generate_content(self, prompt: str) -> str:
         """Gera conteúdo com base no prompt fornecido."""
         pass
+
+    async def complete(self, prompt: str) -> GenerationResult:
+        """
+        Executa uma única requisição ao provedor.
+
+        Provedores com SUPPORTS_CONTINUATION sobrescrevem este método com o parâmetro
+        `partial` e, quando ele é informado, retornam apenas o texto que continua `partial`.
+        """
+        content = await self.generate_content(prompt)
+        return GenerationResult(content=content, provider=self.get_provider_name())
+
+    async def generate(self, prompt: str, on_segment: Optional[SegmentCallback] = None) -> GenerationResult:
+        """
+        Gera conteúdo e retorna os metadados da resposta (uso de tokens, motivo de parada).
+
+        Se a resposta for truncada pelo max_tokens, novas requisições (no mesmo
+        cliente) continuam o texto até completá-lo ou esgotar o orçamento de
+        continuações. Cada trecho é entregue a `on_segment` assim que chega.
+        """
+        from backend.config import get_settings
+
+        settings = get_settings()
+        result = await self.complete(prompt)
+        content = result.content or ""
+        usage = TokenUsage()
+        usage.add(result.usage)
+        if on_segment and content:
+            await on_segment(content)
+
+        continuations = 0
+        while (
+            result.truncated
+            and self.SUPPORTS_CONTINUATION
+            and continuations < settings.provider_max_continuations
+            and usage.output_tokens < settings.provider_continuation_token_budget
+        ):
+            continuations += 1
+            logger.info(
+                f"{self.get_provider_name()} response truncated ({result.finish_reason}), "
+                f"requesting continuation {continuations}/{settings.provider_max_continuations}"
+            )
+            result = await self.complete(prompt, partial=content)
+            usage.add(result.usage)
+            segment = stitch_continuation(content, result.content or "")
+            content += segment
+            if on_segment and segment:
+                await on_segment(segment)
+
+        if result.truncated:
+            logger.warning(
+                f"{self.get_provider_name()} response still truncated after {continuations} continuations"
+            )
+            closing = close_open_code_fence(content)
+            if closing:
+                content += closing
+                if on_segment:
+                    await on_segment(closing)
+
+        return GenerationResult(
+            content=content,
+            provider=result.provider,
+            model=result.model,
+            usage=usage,
+            finish_reason=result.finish_reason,
+            continuations=continuations,
+        )
         
     @abstractmethod
     def get_provider_name(self) -> str:
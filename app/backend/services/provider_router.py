@@ -0,0 +1,208 @@
+"""
+Roteamento de requisições de geração entre os provedores configurados pelo usuário.
+
+O provedor preferido (`user.ai_provider`) é sempre tentado primeiro. Se ele falhar,
+o próximo provedor com chave configurada assume (failover). Com hedging habilitado,
+um segundo provedor é disparado quando o primeiro não responde dentro de um prazo
+derivado do p95 de latência recente; a primeira resposta bem-sucedida vence e as
+demais tentativas são canceladas.
+
+Quando o chamador consome o texto em trechos (`on_segment`), a primeira tentativa
+a produzir texto passa a ser a dona do stream: as demais são canceladas e, como
+parte do conteúdo já foi entregue, uma falha posterior não aciona failover. O
+tempo e as falhas de quem consome os trechos (publicação no Notion) ficam fora
+do placar de saúde do provedor: não entram no p95, no prazo de hedge nem no
+circuit breaker.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from backend.config import get_settings
+from .provider_interface import AIProvider, GenerationResult, ProviderError, SegmentCallback
+from .provider_health import provider_health
+
+logger = logging.getLogger(__name__)
+
+ProviderBuilder = Callable[[Any, str], Awaitable[AIProvider]]
+
+
+class _SegmentStream:
+    """Encaminha os trechos de uma única tentativa (a primeira que produzir texto)."""
+
+    def __init__(self, on_segment: SegmentCallback, on_claim: Callable[[str], None]):
+        self.on_segment = on_segment
+        self.on_claim = on_claim
+        self.owner: Optional[str] = None
+
+    def writer(self, provider_name: str) -> SegmentCallback:
+        async def write(segment: str) -> None:
+            if self.owner is None:
+                self.owner = provider_name
+                self.on_claim(provider_name)
+            if self.owner != provider_name:
+                raise asyncio.CancelledError()
+            await self.on_segment(segment)
+        return write
+
+
+class _DeliveryError(Exception):
+    """Falha ao entregar um trecho (a causa original fica em __cause__)."""
+
+
+class _SegmentDelivery:
+    """Entrega os trechos de uma tentativa medindo o tempo gasto por quem os consome."""
+
+    def __init__(self, on_segment: SegmentCallback):
+        self.on_segment = on_segment
+        self.seconds = 0.0
+
+    async def write(self, segment: str) -> None:
+        started = time.monotonic()
+        try:
+            await self.on_segment(segment)
+        except Exception as e:
+            raise _DeliveryError(str(e)) from e
+        finally:
+            self.seconds += time.monotonic() - started
+
+    def elapsed(self) -> float:
+        return self.seconds
+
+
+class ProviderRouter:
+    """Executa gerações com failover ordenado e hedging opcional entre provedores."""
+
+    def __init__(self, build_provider: ProviderBuilder, health=provider_health):
+        self._build_provider = build_provider
+        self.health = health
+
+    def plan(self, primary: str, configured: List[str]) -> List[str]:
+        """Define a ordem de tentativa: primário primeiro, depois os demais configurados."""
+        settings = get_settings()
+        order = [primary]
+        if settings.provider_failover_enabled:
+            order += [name for name in configured if name != primary]
+        return order
+
+    def hedge_delay(self, provider_name: str) -> float:
+        """Prazo antes de disparar uma requisição de hedge contra o próximo provedor."""
+        settings = get_settings()
+        p95 = self.health.latency_p95(provider_name)
+        if p95 is None:
+            return settings.provider_hedge_max_delay
+        return min(max(p95, settings.provider_hedge_min_delay), settings.provider_hedge_max_delay)
+
+    async def generate(self, user: Any, prompt: str, configured: List[str],
+                       on_segment: Optional[SegmentCallback] = None) -> GenerationResult:
+        """
+        Gera conteúdo usando o primeiro provedor saudável que responder.
+
+        Args:
+            user: Usuário dono das chaves e configurações dos provedores
+            prompt: O prompt do usuário
+            configured: Provedores com chave configurada, em ordem de preferência
+            on_segment: Recebe o texto em trechos (resposta inicial e continuações)
+
+        Returns:
+            Resultado (conteúdo e uso de tokens) do provedor vencedor
+
+        Raises:
+            Exception: O último erro observado se todos os provedores falharem
+        """
+        settings = get_settings()
+        remaining = self.plan(user.ai_provider, configured)
+        hedging = settings.provider_hedging_enabled
+        pending: Dict[asyncio.Task, str] = {}
+        last_error: Optional[BaseException] = None
+
+        def cancel_others(owner: str) -> None:
+            remaining.clear()
+            for task, provider_name in pending.items():
+                if provider_name != owner:
+                    task.cancel()
+
+        stream = _SegmentStream(on_segment, cancel_others) if on_segment else None
+
+        def launch() -> Optional[float]:
+            provider_name = remaining.pop(0)
+            logger.info(f"Dispatching generation to provider '{provider_name}'")
+            writer = stream.writer(provider_name) if stream else None
+            task = asyncio.create_task(self._attempt(user, provider_name, prompt, writer))
+            pending[task] = provider_name
+            if hedging and remaining:
+                return time.monotonic() + self.hedge_delay(provider_name)
+            return None
+
+        hedge_deadline = launch()
+        try:
+            while pending:
+                timeout = None
+                if hedge_deadline is not None:
+                    timeout = max(0.0, hedge_deadline - time.monotonic())
+
+                done, _ = await asyncio.wait(
+                    pending.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    if not remaining:
+                        hedge_deadline = None
+                        continue
+                    logger.info(f"Hedging: no answer within deadline, launching {remaining[0]}")
+                    hedge_deadline = launch()
+                    continue
+
+                for task in done:
+                    provider_name = pending.pop(task)
+                    if task.cancelled():
+                        continue
+                    error = task.exception()
+                    if error is None:
+                        logger.info(f"Provider '{provider_name}' answered first")
+                        return task.result()
+                    last_error = error
+                    logger.warning(f"Provider '{provider_name}' failed: {str(error)}")
+                    if stream and stream.owner == provider_name:
+                        # Parte do texto já foi entregue; outro provedor duplicaria o conteúdo
+                        raise error
+
+                # Failover imediato quando uma tentativa falha
+                if remaining and len(pending) == 0:
+                    hedge_deadline = launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if last_error is None:
+            raise ProviderError("No AI provider available for this request")
+        raise last_error
+
+    async def _attempt(self, user: Any, provider_name: str, prompt: str,
+                       on_segment: Optional[SegmentCallback] = None) -> GenerationResult:
+        """Executa uma tentativa isolada contra um provedor, protegida pelo circuit breaker."""
+        provider = None
+        delivery = _SegmentDelivery(on_segment) if on_segment else None
+        try:
+            provider = await self._build_provider(user, provider_name)
+            model = (getattr(provider, "settings", None) or {}).get("model")
+            async with self.health.track(
+                provider_name, model, excluded=delivery.elapsed if delivery else None
+            ) as health:
+                if delivery is None:
+                    result = await provider.generate(prompt)
+                else:
+                    result = await provider.generate(prompt, on_segment=delivery.write)
+                health.record_usage(result.usage)
+                return result
+        except _DeliveryError as e:
+            # O provedor respondeu; quem falhou foi a publicação (o circuito não conta a falha)
+            raise e.__cause__
+        finally:
+            close = getattr(provider, "close", None)
+            if close is not None:
+                try:
+                    await close()
+                except Exception as e:
+                    logger.debug(f"Error closing provider '{provider_name}': {str(e)}")
@@ -0,0 +1,370 @@
+"""
+Rate limiting por usuário para o endpoint de geração.
+
+Três limites são aplicados a cada usuário:
+
+- concorrência: número máximo de gerações simultâneas (leases renovados enquanto a
+  geração está em andamento; a expiração só libera a vaga de um processo que caiu)
+- requisições por minuto: token bucket com uma ficha por requisição
+- tokens por minuto: token bucket debitado com o uso real reportado pelo provedor
+  ao final da geração (pode ficar negativo e bloqueia até ser reposto)
+
+O estado fica em memória (uma única instância) ou no Postgres, para que várias
+réplicas compartilhem os mesmos limites. Requisições bloqueadas recebem
+`RateLimitExceeded` com o tempo sugerido para o Retry-After.
+
+O mesmo backend guarda o bucket de requisições ao Notion por integração
+(`NotionRateLimiter`), que faz as chamadas esperarem a vez em vez de rejeitá-las.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import text
+
+from backend.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Janela dos buckets de requisições e tokens (em segundos)
+MINUTE = 60.0
+
+
+class RateLimitExceeded(Exception):
+    """Requisição rejeitada por exceder um dos limites do usuário."""
+
+    def __init__(self, message: str, retry_after: float, limit: str):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.limit = limit
+
+
+class RateLimitBackend(ABC):
+    """Armazenamento do estado dos limites (buckets e leases de concorrência)."""
+
+    @abstractmethod
+    async def acquire_lease(self, key: str, limit: int, ttl: float) -> Optional[str]:
+        """Ocupa uma vaga de concorrência; retorna o id do lease ou None se não houver vaga."""
+
+    @abstractmethod
+    async def renew_lease(self, key: str, lease_id: str, ttl: float) -> bool:
+        """Adia a expiração de um lease; retorna False se ele já expirou."""
+
+    @abstractmethod
+    async def release_lease(self, key: str, lease_id: str) -> None:
+        """Libera uma vaga de concorrência."""
+
+    @abstractmethod
+    async def take(self, key: str, amount: float, capacity: float, per_seconds: float,
+                   allow_debt: bool = False) -> float:
+        """Debita `amount` fichas; retorna 0 se concedido ou os segundos até haver saldo."""
+
+    @abstractmethod
+    async def available(self, key: str, capacity: float, per_seconds: float) -> float:
+        """Saldo atual do bucket (pode ser negativo após débitos com allow_debt)."""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Backend em processo, adequado para implantações com uma única instância."""
+
+    def __init__(self):
+        self._leases: Dict[str, Dict[str, float]] = {}
+        # Saldo, última atualização e instante em que o bucket estará cheio
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._next_sweep = 0.0
+
+    async def acquire_lease(self, key: str, limit: int, ttl: float) -> Optional[str]:
+        now = time.monotonic()
+        leases = self._leases.setdefault(key, {})
+        for lease_id, expires_at in list(leases.items()):
+            if expires_at < now:
+                del leases[lease_id]
+        if len(leases) >= limit:
+            return None
+        lease_id = uuid.uuid4().hex
+        leases[lease_id] = now + ttl
+        return lease_id
+
+    async def renew_lease(self, key: str, lease_id: str, ttl: float) -> bool:
+        leases = self._leases.get(key, {})
+        if lease_id not in leases:
+            return False
+        leases[lease_id] = time.monotonic() + ttl
+        return True
+
+    async def release_lease(self, key: str, lease_id: str) -> None:
+        leases = self._leases.get(key)
+        if leases is None:
+            return
+        leases.pop(lease_id, None)
+        if not leases:
+            del self._leases[key]
+
+    def _refill(self, key: str, capacity: float, per_seconds: float, now: float) -> float:
+        tokens, updated_at, _ = self._buckets.get(key, (capacity, now, now))
+        return min(capacity, tokens + (now - updated_at) * capacity / per_seconds)
+
+    def _store(self, key: str, tokens: float, capacity: float, per_seconds: float, now: float) -> None:
+        self._buckets[key] = (tokens, now, now + (capacity - tokens) * per_seconds / capacity)
+
+    def _sweep(self, now: float) -> None:
+        """Remove, no máximo uma vez por minuto, buckets cheios e leases expirados."""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + MINUTE
+        # Um bucket cheio equivale a um bucket que não existe
+        for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+        for key, leases in list(self._leases.items()):
+            for lease_id in [lease_id for lease_id, expires_at in leases.items() if expires_at < now]:
+                del leases[lease_id]
+            if not leases:
+                del self._leases[key]
+
+    async def take(self, key: str, amount: float, capacity: float, per_seconds: float,
+                   allow_debt: bool = False) -> float:
+        now = time.monotonic()
+        self._sweep(now)
+        tokens = self._refill(key, capacity, per_seconds, now)
+        if tokens >= amount or allow_debt:
+            self._store(key, tokens - amount, capacity, per_seconds, now)
+            return 0.0
+        self._store(key, tokens, capacity, per_seconds, now)
+        return (amount - tokens) * per_seconds / capacity
+
+    async def available(self, key: str, capacity: float, per_seconds: float) -> float:
+        return self._refill(key, capacity, per_seconds, time.monotonic())
+
+
+class PostgresRateLimitBackend(RateLimitBackend):
+    """Backend compartilhado entre réplicas usando as tabelas rate_limit_*."""
+
+    def __init__(self, engine=None):
+        self._engine = engine
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from backend.models import engine
+            self._engine = engine
+        return self._engine
+
+    async def acquire_lease(self, key: str, limit: int, ttl: float) -> Optional[str]:
+        lease_id = uuid.uuid4().hex
+        async with self.engine.begin() as conn:
+            # Serializa as aquisições do mesmo usuário entre réplicas
+            await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": key})
+            await conn.execute(
+                text("DELETE FROM rate_limit_leases WHERE key = :key AND expires_at < now()"),
+                {"key": key}
+            )
+            in_use = (await conn.execute(
+                text("SELECT count(*) FROM rate_limit_leases WHERE key = :key"), {"key": key}
+            )).scalar_one()
+            if in_use >= limit:
+                return None
+            await conn.execute(
+                text(
+                    "INSERT INTO rate_limit_leases (lease_id, key, expires_at) "
+                    "VALUES (:lease_id, :key, now() + make_interval(secs => :ttl))"
+                ),
+                {"lease_id": lease_id, "key": key, "ttl": float(ttl)}
+            )
+        return lease_id
+
+    async def renew_lease(self, key: str, lease_id: str, ttl: float) -> bool:
+        async with self.engine.begin() as conn:
+            renewed = await conn.execute(
+                text(
+                    "UPDATE rate_limit_leases SET expires_at = now() + make_interval(secs => :ttl) "
+                    "WHERE lease_id = :lease_id"
+                ),
+                {"lease_id": lease_id, "ttl": float(ttl)}
+            )
+        return renewed.rowcount > 0
+
+    async def release_lease(self, key: str, lease_id: str) -> None:
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                text("DELETE FROM rate_limit_leases WHERE lease_id = :lease_id"), {"lease_id": lease_id}
+            )
+
+    _REFILLED = (
+        "LEAST(CAST(:capacity AS double precision), rate_limit_buckets.tokens + "
+        "EXTRACT(EPOCH FROM (now() - rate_limit_buckets.updated_at)) * CAST(:rate AS double precision))"
+    )
+
+    async def take(self, key: str, amount: float, capacity: float, per_seconds: float,
+                   allow_debt: bool = False) -> float:
+        params = {
+            "key": key,
+            "amount": float(amount),
+            "capacity": float(capacity),
+            "rate": capacity / per_seconds,
+            "allow_debt": allow_debt,
+        }
+        async with self.engine.begin() as conn:
+            granted = (await conn.execute(
+                text(
+                    "INSERT INTO rate_limit_buckets (key, tokens, updated_at) "
+                    "VALUES (:key, CAST(:capacity AS double precision) - CAST(:amount AS double precision), now()) "
+                    "ON CONFLICT (key) DO UPDATE SET "
+                    f"tokens = {self._REFILLED} - CAST(:amount AS double precision), updated_at = now() "
+                    f"WHERE CAST(:allow_debt AS boolean) OR {self._REFILLED} >= CAST(:amount AS double precision) "
+                    "RETURNING tokens"
+                ),
+                params
+            )).first()
+        if granted is not None:
+            return 0.0
+        tokens = await self.available(key, capacity, per_seconds)
+        return max(0.0, (amount - tokens) * per_seconds / capacity)
+
+    async def available(self, key: str, capacity: float, per_seconds: float) -> float:
+        async with self.engine.connect() as conn:
+            tokens = (await conn.execute(
+                text(f"SELECT {self._REFILLED} FROM rate_limit_buckets WHERE key = :key"),
+                {"key": key, "capacity": float(capacity), "rate": capacity / per_seconds}
+            )).scalar()
+        return capacity if tokens is None else float(tokens)
+
+
+class UsageCharge:
+    """Acumula os tokens consumidos por uma requisição para débito ao final."""
+
+    def __init__(self):
+        self.tokens = 0
+
+    def add_tokens(self, tokens: int) -> None:
+        self.tokens += max(0, int(tokens or 0))
+
+
+class RateLimiter:
+    """Aplica os limites de concorrência, requisições e tokens por usuário."""
+
+    def __init__(self, backend: Optional[RateLimitBackend] = None):
+        self._backend = backend
+
+    @property
+    def backend(self) -> RateLimitBackend:
+        if self._backend is None:
+            backend_name = get_settings().rate_limit_backend.lower()
+            if backend_name == "postgres":
+                self._backend = PostgresRateLimitBackend()
+            else:
+                self._backend = InMemoryRateLimitBackend()
+            logger.info(f"Rate limiter using '{backend_name}' backend")
+        return self._backend
+
+    @asynccontextmanager
+    async def limit(self, user_id: int):
+        """
+        Reserva capacidade para uma geração do usuário.
+
+        Yields:
+            UsageCharge onde o chamador registra os tokens usados pelo provedor
+
+        Raises:
+            RateLimitExceeded: Se algum limite do usuário estiver esgotado
+        """
+        settings = get_settings()
+        charge = UsageCharge()
+        if not settings.rate_limit_enabled:
+            yield charge
+            return
+
+        key = f"user:{user_id}"
+        backend = self.backend
+        lease_key = f"{key}:concurrency"
+        lease_ttl = settings.rate_limit_lease_ttl
+        lease_id = await backend.acquire_lease(lease_key, settings.rate_limit_max_concurrent, lease_ttl)
+        if lease_id is None:
+            raise RateLimitExceeded(
+                f"Limite de {settings.rate_limit_max_concurrent} gerações simultâneas atingido",
+                retry_after=1.0,
+                limit="concurrency"
+            )
+        renewal = asyncio.create_task(self._keep_lease(backend, lease_key, lease_id, lease_ttl))
+
+        try:
+            wait = await backend.take(f"{key}:requests", 1, settings.rate_limit_requests_per_minute, MINUTE)
+            if wait > 0:
+                raise RateLimitExceeded(
+                    f"Limite de {settings.rate_limit_requests_per_minute} requisições por minuto atingido",
+                    retry_after=wait,
+                    limit="requests"
+                )
+
+            tokens_per_minute = settings.rate_limit_tokens_per_minute
+            balance = await backend.available(f"{key}:tokens", tokens_per_minute, MINUTE)
+            if balance <= 0:
+                raise RateLimitExceeded(
+                    f"Limite de {tokens_per_minute} tokens por minuto atingido",
+                    retry_after=(1 - balance) * MINUTE / tokens_per_minute,
+                    limit="tokens"
+                )
+
+            yield charge
+        finally:
+            try:
+                if charge.tokens:
+                    await backend.take(
+                        f"{key}:tokens", charge.tokens, settings.rate_limit_tokens_per_minute,
+                        MINUTE, allow_debt=True
+                    )
+            finally:
+                renewal.cancel()
+                await backend.release_lease(lease_key, lease_id)
+
+    @staticmethod
+    async def _keep_lease(backend: RateLimitBackend, key: str, lease_id: str, ttl: float) -> None:
+        """Renova o lease enquanto a geração está em andamento (gerações longas passam do TTL)."""
+        while True:
+            await asyncio.sleep(ttl / 3)
+            try:
+                if not await backend.renew_lease(key, lease_id, ttl):
+                    logger.warning(f"Rate limit lease for {key} expired before renewal")
+                    return
+            except Exception as e:
+                logger.warning(f"Failed to renew rate limit lease for {key}: {str(e)}")
+
+
+class NotionRateLimiter:
+    """
+    Limita a taxa de requisições ao Notion por integração (token de API).
+
+    O Notion aceita em média 3 requisições por segundo por integração e responde
+    429 acima disso. Todas as chamadas (gerações, sincronização e publicação em
+    lote) passam pelo mesmo bucket, e quem excede espera a reposição.
+    """
+
+    def __init__(self, limiter: RateLimiter):
+        self._limiter = limiter
+
+    async def acquire(self, api_key: str) -> float:
+        """Aguarda uma vaga para uma requisição; retorna os segundos esperados."""
+        rate = get_settings().notion_requests_per_second
+        if rate <= 0:
+            return 0.0
+        # Permite rajadas de até um segundo de requisições
+        capacity = max(1.0, rate)
+        key = f"notion:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]}"
+        waited = 0.0
+        while True:
+            wait = await self._limiter.backend.take(key, 1, capacity, capacity / rate)
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+
+# Instância global do serviço
+rate_limiter = RateLimiter()
+
+# Bucket de requisições ao Notion, no mesmo backend dos limites por usuário
+notion_rate_limiter = NotionRateLimiter(rate_limiter)
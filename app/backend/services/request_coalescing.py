@@ -0,0 +1,143 @@
+"""
+Coalescência (single-flight) de gerações idênticas em andamento.
+
+Requisições simultâneas com a mesma chave (prompt, provedores na ordem de tentativa,
+configurações de cada um e as chaves de API, comparadas por hash) compartilham uma
+única chamada ao provedor: a primeira dispara a geração e as demais aguardam o mesmo
+resultado. A publicação no Notion continua sendo de cada requisição.
+
+Os trechos do stream ficam guardados na chamada compartilhada e cada requisição os
+repassa ao próprio `on_segment`, inclusive as que chegam depois do início; uma falha
+ao publicar afeta só a requisição dona do callback. A chamada só é cancelada quando
+a última requisição que a aguarda desiste (desconexão do cliente). Nada é mantido
+depois que a geração termina: não é um cache de respostas.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field, replace
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .provider_interface import GenerationResult, SegmentCallback
+
+logger = logging.getLogger(__name__)
+
+SharedGeneration = Callable[[Optional[SegmentCallback]], Awaitable[GenerationResult]]
+
+
+def coalescing_key(prompt: str, providers: List[str], credentials: Dict[str, Any], streaming: bool) -> str:
+    """
+    Chave de uma geração: prompt, ordem de tentativa, configurações e chaves de cada provedor.
+
+    O stream entra na chave porque muda o failover (texto já entregue não troca de provedor).
+    """
+    document = {
+        "prompt": hashlib.sha256(prompt.encode()).hexdigest(),
+        "streaming": streaming,
+        "providers": [
+            [
+                name,
+                credentials[name].settings,
+                hashlib.sha256((credentials[name].api_key or "").encode()).hexdigest(),
+            ]
+            for name in providers if name in credentials
+        ],
+    }
+    return hashlib.sha256(json.dumps(document, sort_keys=True, default=str).encode()).hexdigest()
+
+
+@dataclass
+class _Flight:
+    task: "asyncio.Future[GenerationResult]"
+    segments: List[str] = field(default_factory=list)
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+    waiters: int = 0
+
+    def notify(self) -> None:
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class GenerationCoalescer:
+    """Gerações em andamento por chave; requisições iguais aguardam a mesma tarefa."""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"in_flight": len(self._flights), "started": self.started, "coalesced": self.coalesced}
+
+    async def run(self, key: str, generate: SharedGeneration,
+                  on_segment: Optional[SegmentCallback] = None) -> GenerationResult:
+        """
+        Executa `generate` ou aguarda a execução idêntica já em andamento.
+
+        Com `on_segment`, `generate` recebe o callback que guarda os trechos compartilhados;
+        sem ele, recebe None (a chave deve distinguir os dois casos).
+        """
+        flight = self._flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = self._start(key, generate, streaming=on_segment is not None)
+        else:
+            self.coalesced += 1
+            logger.info(f"Coalescing generation {key[:12]} with an in-flight request ({flight.waiters} waiting)")
+
+        flight.waiters += 1
+        try:
+            result = await self._follow(flight, on_segment)
+        except BaseException:
+            # Desconexão ou falha ao publicar os trechos: sem ninguém aguardando, a chamada é cancelada
+            if flight.waiters == 1 and not flight.task.done():
+                logger.info(f"Cancelling generation {key[:12]}: no requests waiting")
+                # Um pedido idêntico que chegue agora inicia outra chamada em vez de aguardar esta
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+        # Cada requisição recebe a própria cópia (o histórico e a resposta não compartilham estado)
+        return result if leader else replace(result)
+
+    def _start(self, key: str, generate: SharedGeneration, streaming: bool) -> _Flight:
+        self.started += 1
+
+        async def on_segment(segment: str) -> None:
+            flight.segments.append(segment)
+            flight.notify()
+
+        def finished(task) -> None:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.notify()
+            # Evita o aviso de exceção não recuperada quando todas as requisições desistiram
+            if not task.cancelled():
+                task.exception()
+
+        flight = _Flight(task=None)
+        flight.task = asyncio.ensure_future(generate(on_segment if streaming else None))
+        flight.task.add_done_callback(finished)
+        self._flights[key] = flight
+        return flight
+
+    async def _follow(self, flight: _Flight, on_segment: Optional[SegmentCallback]) -> GenerationResult:
+        if on_segment is None:
+            return await asyncio.shield(flight.task)
+        sent = 0
+        while True:
+            changed = flight.changed
+            while sent < len(flight.segments):
+                sent += 1
+                await on_segment(flight.segments[sent - 1])
+            if flight.task.done():
+                return flight.task.result()
+            if changed is flight.changed:
+                await changed.wait()
+
+
+# Instância global do serviço
+generation_coalescer = GenerationCoalescer()
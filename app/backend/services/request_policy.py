@@ -0,0 +1,174 @@
+"""
+Política unificada para chamadas de saída (provedores de IA e Notion).
+
+Cada `RequestPolicy` define prazos de conexão, leitura e total, além de retry com
+backoff exponencial e jitter para falhas transitórias. Operações não idempotentes
+(ex.: criar página ou anexar blocos no Notion) só são repetidas quando o upstream
+garante que a requisição não foi processada (429 ou falha ao conectar).
+
+O cancelamento é propagado: se a requisição do cliente for abandonada, a task que
+executa a operação é cancelada e as conexões de saída são encerradas.
+"""
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import httpx
+
+from backend.config import get_settings
+from .provider_interface import ProviderError, is_retryable_status, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class RequestPolicy:
+    name: str
+    connect_timeout: float = 10.0
+    read_timeout: float = 90.0
+    total_timeout: float = 120.0
+    max_retries: int = 2
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+
+    def httpx_timeout(self) -> httpx.Timeout:
+        """Timeout equivalente para clientes httpx (e SDKs baseados em httpx)."""
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Atraso antes da próxima tentativa (full jitter, respeitando Retry-After)."""
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def run(self, operation: Callable[[], Awaitable[T]], description: str,
+                  idempotent: bool = True) -> T:
+        """
+        Executa a operação respeitando o prazo total e a política de retry.
+
+        Args:
+            operation: Função sem argumentos que cria uma nova corrotina a cada tentativa
+            description: Descrição usada em logs e mensagens de erro
+            idempotent: Se False, só repete falhas em que o upstream não processou a requisição
+
+        Returns:
+            O resultado da operação
+
+        Raises:
+            ProviderError: Se o prazo total for excedido
+            Exception: O último erro se não for transitório ou se as tentativas acabarem
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.total_timeout
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            try:
+                return await asyncio.wait_for(operation(), timeout=remaining)
+            except asyncio.TimeoutError as e:
+                logger.error(f"{description} exceeded total deadline of {self.total_timeout}s")
+                raise ProviderError(
+                    f"{description} excedeu o prazo total de {self.total_timeout:.0f}s",
+                    retryable=True
+                ) from e
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient_error(e, idempotent):
+                    raise
+                delay = self.backoff(attempt, retry_after_from_error(e))
+                if loop.time() + delay >= deadline:
+                    raise
+                attempt += 1
+                logger.warning(
+                    f"{description} failed with transient error ({str(e)}), "
+                    f"retry {attempt}/{self.max_retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+
+
+def _error_status(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(error, "status", None)
+    return status if isinstance(status, int) else None
+
+
+def is_transient_error(error: BaseException, idempotent: bool = True) -> bool:
+    """Classifica se o erro justifica uma nova tentativa."""
+    status = _error_status(error)
+
+    # Requisições que comprovadamente não chegaram a ser processadas
+    if status == 429 or isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)):
+        return True
+    if not idempotent:
+        return False
+
+    if isinstance(error, ProviderError):
+        return error.retryable
+    if isinstance(error, httpx.TransportError):
+        return True
+    if type(error).__name__ == "RequestTimeoutError":
+        # notion_client.errors.RequestTimeoutError
+        return True
+    return is_retryable_status(status)
+
+
+def retry_after_from_error(error: BaseException) -> Optional[float]:
+    """Extrai o Retry-After (em segundos) do erro, se o upstream informou um."""
+    retry_after = getattr(error, "retry_after", None)
+    if isinstance(retry_after, (int, float)):
+        return float(retry_after)
+    headers = getattr(error, "headers", None)
+    if headers is None:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+    return parse_retry_after(headers)
+
+
+def get_request_policy(name: str) -> RequestPolicy:
+    """Retorna a política configurada para o destino ("provider" ou "notion")."""
+    settings = get_settings()
+    if name == "notion":
+        return RequestPolicy(
+            name="notion",
+            connect_timeout=settings.notion_connect_timeout,
+            read_timeout=settings.notion_read_timeout,
+            total_timeout=settings.notion_total_timeout,
+            max_retries=settings.notion_max_retries,
+        )
+    return RequestPolicy(
+        name="provider",
+        connect_timeout=settings.provider_connect_timeout,
+        read_timeout=settings.provider_read_timeout,
+        total_timeout=settings.provider_total_timeout,
+        max_retries=settings.provider_max_retries,
+    )
+
+
+async def cancel_on_disconnect(request: Any, awaitable: Awaitable[T], poll_interval: float = 1.0) -> T:
+    """
+    Executa `awaitable` e cancela a execução se o cliente HTTP desconectar.
+
+    O cancelamento chega às chamadas de provedor e do Notion em andamento, que
+    encerram suas conexões em vez de continuar consumindo capacidade do upstream.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.warning("Client disconnected, cancelling in-flight upstream calls")
+                task.cancel()
+                raise ClientDisconnectedError("Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+class ClientDisconnectedError(Exception):
+    """O cliente abandonou a requisição antes do término do processamento."""
@@ -0,0 +1,169 @@
+"""
+Recursos de longa duração da API e encerramento gracioso.
+
+O registro é dono dos pools de conexão compartilhados (um transporte HTTP por
+destino: provedores de IA e Notion) e das funções que fecham os demais recursos
+(engine do banco, gravação do uso), chamadas em ordem inversa à do registro.
+
+Encerramento (SIGTERM/SIGINT e fim do lifespan):
+1. novas gerações passam a ser recusadas (ShuttingDownError -> 503)
+2. os envios ao Notion em andamento têm até SERVER_DRAIN_TIMEOUT segundos para
+   terminar. Eles rodam protegidos do cancelamento da requisição (protect): se o
+   cliente desconectar ou o prazo do servidor acabar, a página não fica pela metade
+3. os recursos registrados e os pools são fechados
+"""
+import asyncio
+import logging
+import signal
+import threading
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Set, Tuple, TypeVar
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Verdadeiro dentro de um envio protegido: os envios internos não criam outra tarefa
+_protected: ContextVar[bool] = ContextVar("resources_protected", default=False)
+
+
+class ShuttingDownError(Exception):
+    """A aplicação está encerrando e não aceita novas gerações."""
+
+
+class ResourceRegistry:
+    """Pools de conexão, recursos a fechar e envios ao Notion em andamento."""
+
+    def __init__(self):
+        self._transports: Dict[str, Tuple[Optional[asyncio.AbstractEventLoop], httpx.AsyncHTTPTransport]] = {}
+        self._closers: List[Tuple[str, Callable[[], Awaitable[Any]]]] = []
+        self._tasks: Set[asyncio.Task] = set()
+        self.draining = False
+
+    @property
+    def in_flight(self) -> int:
+        """Envios protegidos ainda em andamento."""
+        return len(self._tasks)
+
+    def transport(self, name: str) -> httpx.AsyncHTTPTransport:
+        """
+        Pool de conexões compartilhado com o nome dado, criado no primeiro uso.
+
+        Cada cliente (um por chave de API) usa seu próprio httpx.AsyncClient, com
+        cabeçalhos e timeouts próprios, sobre o mesmo transporte. As conexões
+        pertencem ao event loop em que foram abertas: em outro loop o pool é recriado.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        entry = self._transports.get(name)
+        if entry is None or entry[0] is not loop:
+            entry = (loop, httpx.AsyncHTTPTransport())
+            self._transports[name] = entry
+        return entry[1]
+
+    def register(self, name: str, close: Callable[[], Awaitable[Any]]) -> None:
+        """Registra a função que fecha um recurso no encerramento (ordem inversa à do registro)."""
+        self._closers.append((name, close))
+
+    def check_accepting(self) -> None:
+        """Recusa uma nova geração se a aplicação estiver encerrando."""
+        if self.draining:
+            raise ShuttingDownError("Server is shutting down")
+
+    async def protect(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """
+        Executa o envio até o fim mesmo se quem espera for cancelado.
+
+        O resultado (ou o erro) chega normalmente a quem chamou; se ele for
+        cancelado, o envio continua e o encerramento espera por ele (drain).
+        """
+        if _protected.get():
+            return await coroutine
+
+        async def run() -> T:
+            _protected.set(True)
+            return await coroutine
+
+        task = asyncio.ensure_future(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._finished)
+        return await asyncio.shield(task)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        # Marca o erro como lido; quem esperava (se ainda espera) já o recebe pelo shield
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Protected upload failed: {task.exception()}")
+
+    def begin_drain(self) -> None:
+        """Passa a recusar novas gerações."""
+        if not self.draining:
+            self.draining = True
+            logger.info(f"Draining: refusing new generations, {self.in_flight} Notion uploads in flight")
+
+    async def drain(self, timeout: float) -> bool:
+        """Espera os envios em andamento por até `timeout` segundos; retorna se todos terminaram."""
+        self.begin_drain()
+        if not self._tasks:
+            return True
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        if pending:
+            logger.warning(f"Cancelling {len(pending)} Notion uploads still running after {timeout}s")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return not pending
+
+    async def close(self) -> None:
+        """Fecha os recursos registrados (ordem inversa) e os pools de conexão."""
+        while self._closers:
+            name, close = self._closers.pop()
+            try:
+                await close()
+            except Exception as e:
+                logger.warning(f"Error closing {name}: {str(e)}")
+        transports, self._transports = self._transports, {}
+        loop = asyncio.get_running_loop()
+        for name, (owner, transport) in transports.items():
+            # Pools de um loop já encerrado não têm conexões utilizáveis para fechar
+            if owner is loop:
+                await transport.aclose()
+        logger.info("Closed shared resources")
+
+    async def shutdown(self, timeout: float) -> None:
+        """Recusa novas gerações, espera os envios em andamento e fecha os recursos."""
+        await self.drain(timeout)
+        await self.close()
+
+    def reset(self) -> None:
+        """Volta a aceitar gerações (início de um novo ciclo de vida da aplicação)."""
+        self.draining = False
+
+    def install_signal_handlers(self) -> None:
+        """
+        Começa a recusar gerações assim que o processo recebe SIGTERM/SIGINT, antes
+        de o servidor esperar as requisições em andamento. Os handlers anteriores
+        (os do uvicorn) continuam sendo chamados.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            previous = signal.getsignal(sig)
+
+            def handler(signum, frame, previous=previous):
+                self.begin_drain()
+                if callable(previous):
+                    previous(signum, frame)
+                elif previous == signal.SIG_DFL:
+                    signal.signal(signum, signal.SIG_DFL)
+                    signal.raise_signal(signum)
+
+            signal.signal(sig, handler)
+
+
+# Instância global do serviço
+resources = ResourceRegistry()
@@ -0,0 +1,35 @@
+"""
+Medição do tempo gasto em cada etapa de uma requisição.
+
+Os tempos são expostos no cabeçalho `Server-Timing` (formato W3C), o que permite
+ao harness de carga e às ferramentas do navegador separar a latência do provedor
+de IA, da formatação e da publicação no Notion.
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class StageTimings:
+    """Acumula a duração (em ms) de cada etapa nomeada."""
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.durations[name] = self.durations.get(name, 0.0) + elapsed
+
+    def record(self, name: str, duration_ms: float) -> None:
+        """Registra uma duração medida externamente (ex.: etapa sem a parte sobreposta)."""
+        self.durations[name] = self.durations.get(name, 0.0) + max(0.0, duration_ms)
+
+    def header(self) -> str:
+        """Valor do cabeçalho Server-Timing (ex.: `provider;dur=812.4, notion;dur=95.1`)."""
+        return ", ".join(f"{name};dur={duration:.1f}" for name, duration in self.durations.items())
+
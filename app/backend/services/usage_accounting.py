@@ -0,0 +1,240 @@
+"""
+Contabilização de uso de tokens e custo por usuário, provedor e modelo.
+
+Cada resposta de provedor registra seu `usage` em um buffer em memória, agregado
+por (dia, usuário, provedor, modelo). O buffer é gravado em lotes na tabela
+`usage_daily` — periodicamente ou quando acumula muitas chaves — com um upsert
+que soma aos totais do dia. Assim cada requisição custa apenas uma soma em
+memória, e /api/usage lê agregados diários já prontos.
+
+Com várias réplicas, cada processo mantém o próprio buffer; como o upsert soma,
+os totais continuam corretos. Os números em /api/usage podem ficar até um
+intervalo de flush atrás do uso real.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config import get_settings
+from backend.models import UsageDaily
+from .provider_interface import TokenUsage
+
+logger = logging.getLogger(__name__)
+
+# Preço de tabela em USD por milhão de tokens: entrada, saída, leitura e gravação de cache.
+# Modelos são casados pelo prefixo mais longo (ex.: "gpt-4o-2024-08-06" -> "gpt-4o").
+MODEL_PRICES: Dict[Tuple[str, str], Tuple[float, float, float, float]] = {
+    ("openai", "gpt-4o-mini"): (0.15, 0.60, 0.075, 0.15),
+    ("openai", "gpt-4o"): (2.50, 10.00, 1.25, 2.50),
+    ("openai", "gpt-4-turbo"): (10.00, 30.00, 10.00, 10.00),
+    ("openai", "gpt-4"): (30.00, 60.00, 30.00, 30.00),
+    ("openai", "gpt-3.5-turbo"): (0.50, 1.50, 0.50, 0.50),
+    ("anthropic", "claude-3-opus"): (15.00, 75.00, 1.50, 18.75),
+    ("anthropic", "claude-3-5-sonnet"): (3.00, 15.00, 0.30, 3.75),
+    ("anthropic", "claude-3-sonnet"): (3.00, 15.00, 0.30, 3.75),
+    ("anthropic", "claude-3-5-haiku"): (0.80, 4.00, 0.08, 1.00),
+    ("anthropic", "claude-3-haiku"): (0.25, 1.25, 0.03, 0.30),
+    ("deepseek", "deepseek-chat"): (0.27, 1.10, 0.07, 0.27),
+    ("deepseek", "deepseek-coder"): (0.27, 1.10, 0.07, 0.27),
+}
+
+UsageKey = Tuple[date, int, str, str]
+
+
+def model_price(provider: str, model: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    """Preço do modelo (prefixo mais longo que casar) ou None se desconhecido."""
+    model = (model or "").lower()
+    matches = [
+        (len(prefix), price) for (name, prefix), price in MODEL_PRICES.items()
+        if name == provider and model.startswith(prefix)
+    ]
+    return max(matches)[1] if matches else None
+
+
+def estimate_cost(provider: str, model: Optional[str], usage: TokenUsage) -> float:
+    """Custo estimado em USD de uma resposta (0 para modelos sem preço conhecido)."""
+    price = model_price(provider, model)
+    if price is None:
+        return 0.0
+    input_price, output_price, cache_read_price, cache_write_price = price
+    uncached = max(0, usage.input_tokens - usage.cache_read_tokens - usage.cache_write_tokens)
+    return (
+        uncached * input_price
+        + usage.output_tokens * output_price
+        + usage.cache_read_tokens * cache_read_price
+        + usage.cache_write_tokens * cache_write_price
+    ) / 1_000_000
+
+
+@dataclass
+class UsageTotals:
+    """Totais acumulados de uma chave (dia, usuário, provedor, modelo)."""
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    cost_usd: float = 0.0
+
+    def merge(self, other: "UsageTotals") -> None:
+        self.requests += other.requests
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cache_read_tokens += other.cache_read_tokens
+        self.cache_write_tokens += other.cache_write_tokens
+        self.cost_usd += other.cost_usd
+
+
+class UsageRecorder:
+    """Buffer de uso em memória com gravação periódica em lote na tabela usage_daily."""
+
+    def __init__(self, engine=None):
+        self._engine = engine
+        self._pending: Dict[UsageKey, UsageTotals] = {}
+        self._task: Optional[asyncio.Task] = None
+        # Gravações disparadas pelo tamanho do buffer; o loop guarda só referências fracas às tarefas
+        self._flushes: Set[asyncio.Task] = set()
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from backend.models import engine
+            self._engine = engine
+        return self._engine
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def record(self, user_id: int, provider: str, model: Optional[str], usage: TokenUsage,
+               day: Optional[date] = None) -> None:
+        """Acumula o uso de uma resposta (apenas memória; a gravação é feita em lote)."""
+        settings = get_settings()
+        if not settings.usage_accounting_enabled:
+            return
+        key = (day or datetime.utcnow().date(), user_id, provider, model or "default")
+        totals = self._pending.setdefault(key, UsageTotals())
+        totals.merge(UsageTotals(
+            requests=1,
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cache_read_tokens=usage.cache_read_tokens,
+            cache_write_tokens=usage.cache_write_tokens,
+            cost_usd=estimate_cost(provider, model, usage),
+        ))
+        if (len(self._pending) >= settings.usage_flush_max_pending
+                and not self._flushes and not self._flush_lock.locked()):
+            task = asyncio.get_running_loop().create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task) -> None:
+        self._flushes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Usage flush failed: {task.exception()!r}")
+
+    async def flush(self) -> int:
+        """Grava o buffer acumulado e retorna quantas linhas foram atualizadas."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            try:
+                async with self.engine.begin() as conn:
+                    await conn.execute(self._upsert_statement(conn.dialect.name), [
+                        {
+                            "day": day, "user_id": user_id, "provider": provider, "model": model,
+                            "requests": totals.requests,
+                            "input_tokens": totals.input_tokens,
+                            "output_tokens": totals.output_tokens,
+                            "cache_read_tokens": totals.cache_read_tokens,
+                            "cache_write_tokens": totals.cache_write_tokens,
+                            "cost_usd": totals.cost_usd,
+                            "updated_at": datetime.utcnow(),
+                        }
+                        for (day, user_id, provider, model), totals in batch.items()
+                    ])
+            except Exception as e:
+                # Devolve o lote ao buffer para a próxima tentativa
+                for key, totals in batch.items():
+                    self._pending.setdefault(key, UsageTotals()).merge(totals)
+                logger.warning(f"Failed to flush {len(batch)} usage rows: {str(e)}")
+                return 0
+            logger.debug(f"Flushed {len(batch)} usage rows")
+            return len(batch)
+
+    @staticmethod
+    def _upsert_statement(dialect: str):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(UsageDaily)
+        counters = ("requests", "input_tokens", "output_tokens",
+                    "cache_read_tokens", "cache_write_tokens", "cost_usd")
+        return statement.on_conflict_do_update(
+            index_elements=["day", "user_id", "provider", "model"],
+            set_={
+                **{name: getattr(UsageDaily, name) + getattr(statement.excluded, name) for name in counters},
+                "updated_at": statement.excluded.updated_at,
+            }
+        )
+
+    async def _run(self) -> None:
+        interval = get_settings().usage_flush_interval
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Inicia a gravação periódica (chamado no startup da aplicação)."""
+        if self._task is None and get_settings().usage_accounting_enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Interrompe a gravação periódica e grava o que restou no buffer."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+    async def daily_usage(self, start: date, end: date,
+                          user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Agregados diários no intervalo [start, end], de um usuário ou de todos."""
+        query = select(UsageDaily).where(UsageDaily.day >= start, UsageDaily.day <= end)
+        if user_id is not None:
+            query = query.where(UsageDaily.user_id == user_id)
+        query = query.order_by(UsageDaily.day, UsageDaily.user_id, UsageDaily.provider, UsageDaily.model)
+        async with AsyncSession(self.engine) as session:
+            rows = (await session.execute(query)).scalars().all()
+        return [
+            {
+                "day": row.day.isoformat(),
+                "user_id": row.user_id,
+                "provider": row.provider,
+                "model": row.model,
+                "requests": row.requests,
+                "input_tokens": row.input_tokens,
+                "output_tokens": row.output_tokens,
+                "cache_read_tokens": row.cache_read_tokens,
+                "cache_write_tokens": row.cache_write_tokens,
+                "cost_usd": round(row.cost_usd, 6),
+            }
+            for row in rows
+        ]
+
+
+# Instância global do serviço
+usage_recorder = UsageRecorder()
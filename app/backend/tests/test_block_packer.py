@@ -0,0 +1,115 @@
+import httpx
+import pytest
+from notion_client import AsyncClient
+
+from backend.loadtest.stubs import StubProfile, StubState, create_stub_app
+from backend.services import notion_service
+from backend.services.block_packer import (
+    NOTION_MAX_TEXT_LENGTH, count_blocks, fit_block, fit_rich_text, pack_blocks, split_text,
+)
+from backend.services.formatter import split_content
+from backend.services.notion_service import build_blocks
+
+
+def _text(items):
+    return "".join(item["text"]["content"] for item in items)
+
+
+def _table(rows):
+    return {"type": "table", "table": {
+        "table_width": 1, "has_column_header": True, "has_row_header": False,
+        "children": [{"type": "table_row", "table_row": {"cells": [[{"text": {"content": str(i)}}]]}}
+                     for i in range(rows)],
+    }}
+
+
+def test_split_text_prefers_line_breaks():
+    text = ("linha de código\n" * 300) + ("x" * 4500)
+    pieces = split_text(text)
+    assert "".join(pieces) == text
+    assert all(len(piece) <= NOTION_MAX_TEXT_LENGTH for piece in pieces)
+    assert pieces[0].endswith("\n")
+
+
+def test_fit_rich_text_merges_lines_and_keeps_formatting():
+    items = [{"text": {"content": f"linha {i}\n"}} for i in range(400)]
+    items.insert(200, {"text": {"content": "negrito"}, "annotations": {"bold": True}})
+    fitted = fit_rich_text(items)
+    assert len(fitted) < 10
+    assert _text(fitted) == _text(items)
+    assert {"text": {"content": "negrito"}, "annotations": {"bold": True}} in fitted
+
+
+def test_fit_block_splits_oversized_blocks():
+    huge = "palavra " * 30000  # 240 mil caracteres: mais de 100 itens de 2000
+    parts = fit_block({"type": "heading_2", "heading_2": {"rich_text": [{"text": {"content": huge}}]}})
+    assert [part["type"] for part in parts] == ["heading_2", "paragraph"]
+    assert all(len(part[part["type"]]["rich_text"]) <= 100 for part in parts)
+    assert "".join(_text(part[part["type"]]["rich_text"]) for part in parts) == huge
+
+
+def test_pack_blocks_batches_and_defers_children():
+    paragraphs = [{"type": "paragraph", "paragraph": {"rich_text": [{"text": {"content": str(i)}}]}}
+                  for i in range(250)]
+    assert [len(batch.blocks) for batch in pack_blocks(paragraphs)] == [100, 100, 50]
+
+    # Tabela com mais de 100 linhas: 100 seguem com a tabela, o restante depois
+    [batch] = pack_blocks([_table(250)])
+    assert len(batch.blocks[0]["table"]["children"]) == 100
+    assert len(batch.deferred[0]) == 150
+
+    # Tabela dentro de um toggle passaria de 2 níveis: vai em uma requisição própria
+    toggle = {"type": "toggle", "toggle": {"rich_text": [], "children": [_table(3)]}}
+    [batch] = pack_blocks([toggle])
+    assert "children" not in batch.blocks[0]["toggle"]
+    assert batch.deferred[0][0]["type"] == "table"
+
+    # Até 1000 blocos por requisição, contando os filhos
+    batches = pack_blocks([_table(100) for _ in range(15)])
+    assert [len(batch.blocks) for batch in batches] == [9, 6]
+    assert all(count_blocks(batch.blocks) <= 1000 for batch in batches)
+
+
+@pytest.mark.asyncio
+async def test_large_document_is_published_without_losing_content(monkeypatch):
+    state = StubState(notion=StubProfile(latency_ms=0, jitter_ms=0))
+    client = AsyncClient(
+        auth="secret_stub", base_url="http://stub/notion",
+        client=httpx.AsyncClient(transport=httpx.ASGITransport(app=create_stub_app(state)))
+    )
+    monkeypatch.setattr(notion_service, "notion", client)
+    monkeypatch.setattr(notion_service, "notion_api_key", "secret_stub")
+
+    code = "".join(f"print({i})\n" for i in range(300))
+    table = "| n | quadrado |\n|---|---|\n" + "".join(f"| {i} | {i * i} |\n" for i in range(250))
+    long_paragraph = "texto " * 1000
+    content = f"# Relatório\n\n```python\n{code}```\n\n{table}\n{long_paragraph}\n\n" + "\n".join(
+        f"- item {i}" for i in range(150)
+    )
+
+    page = await notion_service.write_to_notion(content, page_id_override="parent-page")
+
+    stored = state.blocks[page["id"]]
+    code_block = next(block for block in stored if block["type"] == "code")
+    assert _text(code_block["code"]["rich_text"]) == code
+    table_block = next(block for block in stored if block["type"] == "table")
+    rows = state.blocks[table_block["id"]]
+    assert len(rows) == 251 and rows[-1]["table_row"]["cells"][1][0]["text"]["content"] == str(249 * 249)
+    assert sum(block["type"] == "bulleted_list_item" for block in stored) == 150
+    assert any(_text(block["paragraph"]["rich_text"]) == long_paragraph.rstrip()
+               for block in stored if block["type"] == "paragraph")
+    assert len(stored) == len(build_blocks(content))
+    # Criação + listagem dos ids + linhas restantes da tabela + blocos além dos 100 primeiros
+    assert state.requests["notion.pages.create"] == 1
+    assert state.requests["notion.blocks.children.append"] == 3
+
+
+def test_split_content_keeps_sections_and_code_blocks_whole():
+    code = "```python\n" + "".join(f"# passo {i}\nx = {i}\n" for i in range(200)) + "```\n"
+    text = "Introdução\n# Parte A\n\n" + code + "## Parte B\n\n" + "- item\n" * 400
+    chunks = split_content(text, max_length=4000)
+    # Nenhuma seção é repetida e o bloco de código não é dividido nos comentários
+    assert sum(chunk.count("# passo") for chunk in chunks) == 200
+    assert sum(chunk.count("- item") for chunk in chunks) == 400
+    assert sum(chunk.count("```") for chunk in chunks) == 2
+    assert any("# Parte A\n" in chunk and chunk.rstrip().endswith("```") for chunk in chunks)
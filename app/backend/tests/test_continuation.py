@@ -0,0 +1,149 @@
+import httpx
+import pytest
+from notion_client import AsyncClient
+
+from backend.config import get_settings
+from backend.loadtest.stubs import StubProfile, StubState, create_stub_app
+from backend.services import notion_service
+from backend.services.provider_interface import (
+    AIProvider, GenerationResult, TokenUsage, close_open_code_fence, stitch_continuation
+)
+
+
+class TruncatingProvider(AIProvider):
+    """Devolve os trechos em sequência; todos menos o último terminam por max_tokens."""
+
+    SUPPORTS_CONTINUATION = True
+
+    def __init__(self, segments, finish_reason="length"):
+        self.segments = list(segments)
+        self.finish_reason = finish_reason
+        self.partials = []
+
+    async def initialize(self, api_key, settings=None):
+        pass
+
+    async def generate_content(self, prompt):
+        return (await self.generate(prompt)).content
+
+    async def complete(self, prompt, partial=None):
+        self.partials.append(partial)
+        segment = self.segments.pop(0)
+        return GenerationResult(
+            content=segment, provider="fake", model="fake-model",
+            usage=TokenUsage(input_tokens=10, output_tokens=100),
+            finish_reason=self.finish_reason if self.segments else "stop"
+        )
+
+    def get_provider_name(self):
+        return "Fake"
+
+    def get_default_settings(self):
+        return {}
+
+
+@pytest.fixture
+def continuation_settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "provider_max_continuations", 3)
+    monkeypatch.setattr(settings, "provider_continuation_token_budget", 10000)
+    return settings
+
+
+def test_stitch_removes_repeated_tail_and_duplicate_whitespace():
+    content = "Primeiro parágrafo completo com bastante texto.\n"
+    assert stitch_continuation(content, "\n\n## Seção") == "\n## Seção"
+    assert stitch_continuation(content, "parágrafo completo com bastante texto.\nSegundo") == "\nSegundo"
+    assert stitch_continuation("abc", "def") == "def"
+
+
+def test_close_open_code_fence():
+    assert close_open_code_fence("texto\n```python\nx = 1\n") == "```\n"
+    assert close_open_code_fence("```\nx\n```\n") == ""
+
+
+@pytest.mark.asyncio
+async def test_truncated_response_is_continued_and_streamed(continuation_settings):
+    provider = TruncatingProvider(["# Guia\n\n```python\nx = 1\n", "y = 2\n```\n", "\n\nFim."])
+    segments = []
+
+    async def on_segment(segment):
+        segments.append(segment)
+
+    result = await provider.generate("prompt", on_segment=on_segment)
+
+    assert result.content == "# Guia\n\n```python\nx = 1\ny = 2\n```\n\nFim."
+    assert segments == ["# Guia\n\n```python\nx = 1\n", "y = 2\n```\n", "\nFim."]
+    assert provider.partials == [None, "# Guia\n\n```python\nx = 1\n", "# Guia\n\n```python\nx = 1\ny = 2\n```\n"]
+    assert result.continuations == 2
+    assert result.usage.output_tokens == 300
+    assert not result.truncated
+
+
+@pytest.mark.asyncio
+async def test_continuation_budget_closes_open_code_fence(continuation_settings):
+    continuation_settings.provider_max_continuations = 1
+    provider = TruncatingProvider(["```bash\necho 1\n", "echo 2\n", "echo 3\n"], finish_reason="max_tokens")
+
+    result = await provider.generate("prompt")
+
+    assert result.continuations == 1
+    assert result.truncated
+    assert result.content == "```bash\necho 1\necho 2\n```\n"
+
+
+class SingleRequestProvider(TruncatingProvider):
+    """Provedor sem continuação: só implementa complete(prompt)."""
+
+    SUPPORTS_CONTINUATION = False
+
+    async def complete(self, prompt):
+        return await super().complete(prompt)
+
+
+@pytest.mark.asyncio
+async def test_provider_without_continuation_returns_truncated_response(continuation_settings):
+    provider = SingleRequestProvider(["```bash\necho 1\n", "echo 2\n"])
+
+    result = await provider.generate("prompt")
+
+    assert provider.partials == [None]
+    assert result.continuations == 0
+    assert result.truncated
+    assert result.content == "```bash\necho 1\n```\n"
+
+
+@pytest.mark.asyncio
+async def test_not_implemented_error_inside_complete_is_not_swallowed(continuation_settings):
+    class BrokenProvider(TruncatingProvider):
+        async def complete(self, prompt, partial=None):
+            if partial is not None:
+                raise NotImplementedError("bug no provedor")
+            return await super().complete(prompt, partial)
+
+    with pytest.raises(NotImplementedError, match="bug no provedor"):
+        await BrokenProvider(["a", "b"]).generate("prompt")
+
+
+@pytest.mark.asyncio
+async def test_stream_writer_flushes_only_complete_blocks(monkeypatch):
+    state = StubState(notion=StubProfile(latency_ms=0, jitter_ms=0))
+    client = AsyncClient(
+        auth="secret_stub", base_url="http://stub/notion",
+        client=httpx.AsyncClient(transport=httpx.ASGITransport(app=create_stub_app(state)))
+    )
+    monkeypatch.setattr(notion_service, "notion", client)
+    monkeypatch.setattr(notion_service, "notion_api_key", "secret_stub")
+
+    writer = notion_service.NotionStreamWriter(page_id_override="parent-page")
+    await writer.write("# Título\n\n```python\nx = 1\n")
+    assert writer.page["id"] and writer.blocks_written == 1
+
+    await writer.write("y = 2\n```\n\nParágrafo")
+    assert writer.blocks_written == 3
+
+    page = await writer.close()
+    assert page["url"].endswith(page["id"].replace("-", ""))
+    stored = state.blocks[page["id"]]
+    assert [block["type"] for block in stored] == ["heading_1", "paragraph", "code", "paragraph", "paragraph"]
+    assert stored[2]["code"]["rich_text"][0]["text"]["content"] == "x = 1\ny = 2\n"
@@ -62,6 +62,28 @@ async def test_generate_content_success(deepseek_provider, mock_httpx_client):
     assert result == "Este é um conteúdo de teste gerado pelo DeepSeek."
     mock_httpx_client.post.assert_called_once()
 
+@pytest.mark.asyncio
+async def test_generate_reports_token_usage(deepseek_provider, mock_httpx_client):
+    # Configurar mock de resposta com campo usage
+    mock_httpx_client.post.return_value = Response(
+        200,
+        json={
+            "model": "deepseek-chat",
+            "choices": [{"message": {"content": "ok"}, "index": 0, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 50, "completion_tokens": 20, "total_tokens": 70,
+                      "prompt_cache_hit_tokens": 32, "prompt_cache_miss_tokens": 18}
+        }
+    )
+    await deepseek_provider.initialize("test-api-key")
+
+    result = await deepseek_provider.generate("Teste de prompt")
+
+    assert result.content == "ok"
+    assert result.usage.input_tokens == 50
+    assert result.usage.output_tokens == 20
+    assert result.usage.cache_read_tokens == 32
+    assert result.finish_reason == "stop"
+
 @pytest.mark.asyncio
 async def test_generate_content_error(deepseek_provider, mock_httpx_client):
     # Configurar mock de resposta de erro
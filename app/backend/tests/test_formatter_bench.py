@@ -0,0 +1,39 @@
+from backend.benchmarks import formatter_bench
+
+
+def test_corpus_covers_representative_documents():
+    corpus = formatter_bench.load_corpus()
+
+    assert {"code_heavy", "table_heavy", "long_prose", "pathological", "mixed_llm"} <= set(corpus)
+    scaled = formatter_bench.scale(corpus["mixed_llm"], formatter_bench.SIZES["64kb"])
+    assert len(scaled) == 64 * 1024
+
+
+def test_run_benchmarks_reports_throughput_and_allocations():
+    results = formatter_bench.run_benchmarks(
+        ["1kb"], functions=["format_for_notion", "get_valid_notion_language"],
+        corpora=["table_heavy"], min_time=0.01
+    )
+
+    assert set(results) == {"format_for_notion/table_heavy/1kb", "get_valid_notion_language/tags/-"}
+    metrics = results["format_for_notion/table_heavy/1kb"]
+    assert metrics["ops_per_sec"] > 0
+    assert metrics["peak_kb"] > 0
+
+
+def test_compare_flags_slowdowns_and_allocation_growth():
+    baseline = {
+        "split_content/long_prose/1mb": {"ops_per_sec": 100.0, "peak_kb": 1000.0, "retained_kb": 500.0},
+        "format_for_notion/long_prose/1mb": {"ops_per_sec": 10.0, "peak_kb": 1000.0, "retained_kb": 500.0},
+    }
+    results = {
+        "split_content/long_prose/1mb": {"ops_per_sec": 60.0, "peak_kb": 1000.0, "retained_kb": 500.0},
+        "format_for_notion/long_prose/1mb": {"ops_per_sec": 9.0, "peak_kb": 1400.0, "retained_kb": 500.0},
+        "format_for_notion/new_doc/1mb": {"ops_per_sec": 1.0, "peak_kb": 1.0, "retained_kb": 1.0},
+    }
+
+    regressions = formatter_bench.compare(results, baseline, tolerance=0.25)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("split_content/long_prose/1mb")
+    assert "pico" in regressions[1]
@@ -0,0 +1,124 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import create_async_engine
+
+pytest.importorskip("aiosqlite")
+
+from backend.auth import current_active_user
+from backend.main import app
+from backend.models import Base, Generation
+from backend.services import generation_history
+from backend.services.generation_history import (
+    GenerationStore, InvalidCursorError, decode_cursor, encode_cursor
+)
+from backend.services.provider_interface import GenerationResult, TokenUsage
+
+
+@pytest.fixture
+async def store(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'history.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield GenerationStore(engine)
+    await engine.dispose()
+
+
+def make_result(content="# Título\n\nConteúdo", provider="openai"):
+    return GenerationResult(
+        content=content, provider=provider, model="gpt-4o",
+        usage=TokenUsage(input_tokens=100, output_tokens=50, cache_read_tokens=80)
+    )
+
+
+@pytest.mark.asyncio
+async def test_keyset_pagination_walks_history_newest_first(store):
+    ids = [await store.record(1, f"prompt {n}", make_result()) for n in range(5)]
+    await store.record(2, "outro usuário", make_result())
+    # Gerações no mesmo instante: o id desempata a ordem entre páginas
+    async with store.engine.begin() as conn:
+        await conn.execute(
+            update(Generation).where(Generation.id.in_(ids[1:4])).values(created_at=datetime(2030, 1, 1))
+        )
+    ids = [ids[0], ids[4], ids[1], ids[2], ids[3]]
+
+    seen, cursor = [], None
+    for _ in range(3):
+        items, cursor = await store.list_generations(1, limit=2, cursor=cursor)
+        seen += [item["id"] for item in items]
+    assert seen == list(reversed(ids))
+    assert cursor is None
+    assert "content" not in items[0]
+    assert items[0]["usage"]["cache_read_tokens"] == 80
+
+
+@pytest.mark.asyncio
+async def test_generation_content_is_compressed_and_scoped_to_user(store):
+    content = "## Seção\n\n" + "Parágrafo repetido de Markdown. " * 500
+    generation_id = await store.record(
+        1, "Escreva um guia", make_result(content),
+        notion_page={"id": "page-1", "url": "https://notion.so/page1"}, timings={"provider": 812.4}
+    )
+
+    generation = await store.get_generation(1, generation_id)
+    assert generation["content"] == content
+    assert generation["prompt"] == "Escreva um guia"
+    assert generation["notion_url"] == "https://notion.so/page1"
+    assert generation["timings"] == {"provider": 812.4}
+    assert await store.get_generation(2, generation_id) is None
+
+    compressed = generation_history.compress_text(content)
+    assert len(compressed) < len(content) / 10
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_generations_api(store, monkeypatch):
+    monkeypatch.setattr(generation_history, "generation_store", store)
+    generation_id = await store.record(1, "Escreva um guia", make_result())
+    app.dependency_overrides[current_active_user] = lambda: SimpleNamespace(id=1)
+    try:
+        client = TestClient(app)
+        listing = client.get("/api/generations", params={"limit": 10}).json()
+        assert [item["id"] for item in listing["items"]] == [generation_id]
+        assert listing["next_cursor"] is None
+
+        assert client.get(f"/api/generations/{generation_id}").json()["content"] == "# Título\n\nConteúdo"
+        assert client.get("/api/generations/999").status_code == 404
+        assert client.get("/api/generations", params={"cursor": "garbage"}).status_code == 400
+        assert client.get("/api/generations", params={"limit": 1000}).status_code == 422
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_content_handle_serves_stored_deflate_bytes(store, monkeypatch):
+    monkeypatch.setattr(generation_history, "generation_store", store)
+    content = "## Seção\n\n" + "Parágrafo repetido de Markdown. " * 500
+    generation_id = await store.record(1, "Escreva um guia", make_result(content))
+    app.dependency_overrides[current_active_user] = lambda: SimpleNamespace(id=1)
+    try:
+        client = TestClient(app)
+        url = f"/api/generations/{generation_id}/content"
+        response = client.get(url, headers={"Accept-Encoding": "deflate"})
+        assert response.headers["content-encoding"] == "deflate"
+        assert response.headers["content-type"].startswith("text/markdown")
+        # Os bytes gravados vão direto para o cliente
+        assert int(response.headers["content-length"]) == len(generation_history.compress_text(content))
+        assert response.text == content
+
+        plain = client.get(url, headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.text == content
+        assert client.get("/api/generations/999/content").status_code == 404
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+pytest.importorskip("aiosqlite")
+
+from backend.main import app
+from backend.models import Base
+from backend.services import health
+from backend.services.health import ReadinessProbe
+from backend.services.provider_health import provider_health
+from backend.services.resources import resources
+
+
+@pytest.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'health.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_probes_share_one_cached_check(engine, monkeypatch):
+    probe = ReadinessProbe(engine)
+    runs = []
+    check_database = probe.check_database
+
+    async def counting_check():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return await check_database()
+
+    monkeypatch.setattr(probe, "check_database", counting_check)
+
+    results = await asyncio.gather(*(probe.check() for _ in range(10)))
+    again = await probe.check()
+
+    assert len(runs) == 1
+    assert all(result["status"] == "ready" for result in results)
+    assert again["checks"]["database"]["status"] == "ok"
+    assert again["checks"]["schema"] == {"status": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_pending_migration_and_unreachable_database_are_not_ready(engine, tmp_path, monkeypatch):
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP TABLE usage_daily"))
+    result = await ReadinessProbe(engine).check()
+    assert result["status"] == "not_ready"
+    assert "usage_daily" in result["checks"]["schema"]["missing"]
+
+    unreachable = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'x.db'}")
+    result = await ReadinessProbe(unreachable).check()
+    await unreachable.dispose()
+    assert result["checks"]["database"]["status"] == "fail"
+    assert result["checks"]["schema"]["status"] == "fail"
+
+
+def test_livez_and_readyz_endpoints(engine, monkeypatch):
+    probe = ReadinessProbe(engine)
+    monkeypatch.setattr(health, "readiness_probe", probe)
+    circuit = provider_health.get("openai", "gpt-4o")
+    circuit.state, circuit.opened_at = "open", time.monotonic()
+    client = TestClient(app)
+    try:
+        assert client.get("/livez").json() == {"status": "ok"}
+
+        # Circuito aberto degrada sem tirar a réplica do balanceamento
+        response = client.get("/readyz")
+        assert response.status_code == 200
+        assert response.headers["Cache-Control"] == "no-store"
+        assert response.json()["checks"]["circuits"]["open"] == ["openai/gpt-4o"]
+
+        resources.begin_drain()
+        assert client.get("/readyz").status_code == 503
+    finally:
+        provider_health.reset()
+        resources.reset()
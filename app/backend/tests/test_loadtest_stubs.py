@@ -0,0 +1,79 @@
+import httpx
+import pytest
+from notion_client import AsyncClient
+from openai import AsyncOpenAI
+
+from backend.loadtest.harness import Sample, percentile, summarize
+from backend.loadtest.stubs import StubProfile, StubState, create_stub_app
+
+
+@pytest.fixture
+def stub():
+    state = StubState(
+        llm=StubProfile(latency_ms=0, jitter_ms=0, output_tokens=200),
+        notion=StubProfile(latency_ms=0, jitter_ms=0),
+    )
+    transport = httpx.ASGITransport(app=create_stub_app(state))
+    return state, transport
+
+
+@pytest.mark.asyncio
+async def test_openai_sdk_against_stub_reports_truncation(stub):
+    state, transport = stub
+    client = AsyncOpenAI(
+        api_key="stub", base_url="http://stub/openai/v1",
+        http_client=httpx.AsyncClient(transport=transport), max_retries=0
+    )
+    response = await client.chat.completions.create(
+        model="gpt-4", messages=[{"role": "user", "content": "oi"}], max_tokens=50
+    )
+    assert response.choices[0].finish_reason == "length"
+    assert response.usage.completion_tokens == 50
+    assert state.requests["openai.chat"] == 1
+
+
+@pytest.mark.asyncio
+async def test_anthropic_stub_and_injected_rate_limit(stub):
+    state, transport = stub
+    payload = {"model": "claude-3-haiku", "max_tokens": 1000, "messages": [{"role": "user", "content": "oi"}]}
+    async with httpx.AsyncClient(transport=transport, base_url="http://stub/anthropic") as client:
+        message = (await client.post("/v1/messages", json=payload)).json()
+        assert message["stop_reason"] == "end_turn"
+        assert message["usage"]["output_tokens"] == 200
+
+        state.llm.update({"rate_limit_ratio": 1.0})
+        response = await client.post("/v1/messages", json=payload)
+    assert response.status_code == 429
+    assert response.json()["error"]["type"] == "rate_limit_error"
+    assert response.headers["retry-after"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_notion_stub_enforces_api_limits(stub):
+    _, transport = stub
+    notion = AsyncClient(
+        auth="secret_stub", base_url="http://stub/notion",
+        client=httpx.AsyncClient(transport=transport)
+    )
+    paragraph = {"type": "paragraph", "paragraph": {"rich_text": [{"type": "text", "text": {"content": "x"}}]}}
+
+    page = await notion.pages.create(parent={"page_id": "p"}, properties={}, children=[paragraph] * 100)
+    await notion.blocks.children.append(block_id=page["id"], children=[paragraph] * 10)
+    listed = await notion.blocks.children.list(block_id=page["id"])
+    assert len(listed["results"]) == 100 and listed["has_more"]
+
+    with pytest.raises(Exception, match="100"):
+        await notion.pages.create(parent={"page_id": "p"}, properties={}, children=[paragraph] * 101)
+
+
+def test_summary_percentiles_and_stage_overhead():
+    samples = [Sample(200, float(ms), {"provider": ms * 0.8}) for ms in range(1, 101)]
+    samples.append(Sample(429, 5.0))
+    report = summarize(samples, elapsed=2.0)
+
+    assert percentile([3.0, 1.0, 2.0], 50) == 2.0
+    assert report["throughput_rps"] == 50.0
+    assert report["status_codes"] == {200: 100, 429: 1}
+    assert report["latency_ms"]["p99"] == 99.0
+    assert report["stages_ms"]["provider"]["p50"] == 40.0
+    assert report["stages_ms"]["overhead"]["p95"] == 19.0
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from backend.services.long_document import LongDocumentGenerator, parse_outline
+from backend.services.provider_interface import GenerationResult, TokenUsage
+
+OUTLINE = """# Guia de Observabilidade
+
+1. Introdução — por que medir
+2. **Métricas** — contadores e histogramas
+3. Tracing: propagação de contexto
+4. Conclusão
+"""
+
+
+def test_parse_outline_extracts_title_sections_and_summaries():
+    title, sections = parse_outline(OUTLINE, max_sections=3)
+
+    assert title == "Guia de Observabilidade"
+    assert [section.title for section in sections] == ["Introdução", "Métricas", "Tracing"]
+    assert sections[1].summary == "contadores e histogramas"
+
+
+class FakeGenerate:
+    """Sumário fixo; cada seção demora mais quanto menor o índice."""
+
+    def __init__(self, outline=OUTLINE):
+        self.outline = outline
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, prompt):
+        if "Responda APENAS com o sumário" in prompt:
+            return GenerationResult(self.outline, "openai", "gpt-4", TokenUsage(10, 20))
+        if "Escreva SOMENTE a seção" not in prompt:
+            return GenerationResult("# Documento único", "openai", "gpt-4", TokenUsage(5, 5))
+
+        number = int(prompt.split("Escreva SOMENTE a seção ")[1].split(":")[0])
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.05 / number)
+        self.active -= 1
+        body = f"Conteúdo {number}" if number != 2 else f"## Seção {number}\n\nConteúdo {number}"
+        return GenerationResult(body, "openai", "gpt-4", TokenUsage(100, 200))
+
+
+@pytest.mark.asyncio
+async def test_sections_are_generated_concurrently_and_delivered_in_order():
+    generate = FakeGenerate()
+    delivered = []
+
+    async def on_section(index, section, content):
+        delivered.append((index, content.splitlines()[0]))
+
+    result = await LongDocumentGenerator(generate, concurrency=2).run("observabilidade", on_section=on_section)
+
+    assert [index for index, _ in delivered] == [0, 1, 2, 3]
+    assert delivered[0][1] == "## Introdução"
+    assert delivered[1][1] == "## Seção 2"
+    assert generate.max_active == 2
+    assert result.content.startswith("# Guia de Observabilidade\n\n## Introdução")
+    assert result.usage.input_tokens == 10 + 4 * 100
+    assert result.usage.output_tokens == 20 + 4 * 200
+
+
+@pytest.mark.asyncio
+async def test_unparseable_outline_falls_back_to_single_completion():
+    generate = FakeGenerate(outline="Não sei fazer um sumário.")
+    delivered = []
+
+    async def on_section(index, section, content):
+        delivered.append(content)
+
+    result = await LongDocumentGenerator(generate).run("qualquer coisa", on_section=on_section)
+
+    assert delivered == ["# Documento único"]
+    assert result.content == "# Documento único"
+    assert result.usage.total_tokens == 30 + 10
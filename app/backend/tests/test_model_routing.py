@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+pytest.importorskip("aiosqlite")
+
+from backend.models import Base
+from backend.services.content_generation_service import ContentGenerationService
+from backend.services.generation_history import GenerationStore
+from backend.services.model_routing import FAST, STRONG, classify, model_router
+from backend.services.provider_credentials import Credential
+from backend.services.provider_interface import GenerationResult, TokenUsage
+
+
+@pytest.fixture(autouse=True)
+def reset_router():
+    model_router.reset()
+    yield
+    model_router.reset()
+
+
+@pytest.mark.parametrize("prompt, tier", [
+    ("Corrija este erro de digitação: 'obrigdao'", FAST),
+    ("Resuma em uma frase o que é Notion", FAST),
+    ("Escreva um guia completo de arquitetura de microsserviços, passo a passo", STRONG),
+    ("Write a detailed 2000 words comparison of Postgres and MySQL", STRONG),
+    ("Resuma: " + "texto longo " * 300, STRONG),
+])
+def test_classifier_separates_simple_from_complex_prompts(prompt, tier):
+    decision = classify(prompt)
+    assert decision.tier == tier
+    assert decision.estimated_tokens == len(prompt) // 4
+    assert bool(decision.reasons) == (tier == STRONG)
+
+
+def test_router_overrides_model_only_for_auto_providers():
+    credentials = {
+        "openai": Credential("sk-openai", {"model": "gpt-4o", "temperature": 0.3, "routing": "auto"}),
+        "anthropic": Credential("sk-ant", {"model": "claude-3-opus-20240229", "routing": "fixed"}),
+    }
+
+    routed, decision = model_router.route("Corrija a vírgula desta frase", credentials)
+    assert decision.tier == FAST
+    assert decision.models == {"openai": "gpt-4o-mini"}
+    assert routed["openai"].settings == {"model": "gpt-4o-mini", "temperature": 0.3, "routing": "auto"}
+    assert routed["anthropic"] is credentials["anthropic"]
+    # As credenciais carregadas do usuário não mudam
+    assert credentials["openai"].settings["model"] == "gpt-4o"
+
+    routed, decision = model_router.route("Escreva um guia completo e detalhado de arquitetura", credentials)
+    assert (decision.tier, routed["openai"].settings["model"]) == (STRONG, "gpt-4o")
+
+    fixed = {"anthropic": credentials["anthropic"]}
+    assert model_router.route("Corrija a vírgula", fixed) == (fixed, None)
+
+
+@pytest.mark.asyncio
+async def test_routed_generation_records_decision_latency_and_cost(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'history.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    store = GenerationStore(engine)
+
+    models = []
+
+    class FakeProvider:
+        def __init__(self, settings):
+            self.settings = settings
+
+        async def generate(self, prompt, on_segment=None):
+            models.append(self.settings["model"])
+            return GenerationResult(
+                "ok", "openai", self.settings["model"], TokenUsage(input_tokens=1_000, output_tokens=500)
+            )
+
+    service = ContentGenerationService()
+
+    async def create_provider(user, provider_name=None, credentials=None):
+        return FakeProvider(credentials[provider_name].settings)
+
+    service.create_provider_for_user = create_provider
+    user = SimpleNamespace(id=7, ai_provider="openai", openai_api_key="sk-openai")
+    credentials = {"openai": Credential("sk-openai", {"model": "gpt-4o", "routing": "auto"})}
+
+    result = await service.generate_content_for_user(user, "Traduza 'olá' para o inglês", credentials=credentials)
+
+    assert models == ["gpt-4o-mini"]
+    assert result.routing["tier"] == FAST
+    assert result.routing["cost_usd"] > 0
+    assert result.routing["latency_ms"] >= 0
+    assert model_router.snapshot()[0]["tier"] == FAST
+    assert model_router.snapshot()[0]["model"] == "gpt-4o-mini"
+
+    generation_id = await store.record(user.id, "Traduza 'olá' para o inglês", result)
+    assert (await store.get_generation(user.id, generation_id))["routing"] == result.routing
+    await engine.dispose()
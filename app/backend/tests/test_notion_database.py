@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from notion_client import AsyncClient
+
+from backend.config import get_settings
+from backend.loadtest.stubs import (
+    STUB_DATA_SOURCE_ID, STUB_DATABASE_ID, STUB_DATA_SOURCE_PROPERTIES, StubProfile, StubState, create_stub_app,
+)
+from backend.services import notion_database, notion_service
+from backend.services.notion_database import (
+    NOTION_API_VERSION, DatabaseRow, DatabaseSchema, build_properties, create_row, create_rows, derive_title,
+)
+from backend.services.rate_limiter import InMemoryRateLimitBackend, NotionRateLimiter, RateLimiter
+
+
+@pytest.fixture
+def stub_notion(monkeypatch):
+    state = StubState(notion=StubProfile(latency_ms=0, jitter_ms=0))
+    client = AsyncClient(
+        auth="secret_stub", base_url="http://stub/notion",
+        client=httpx.AsyncClient(transport=httpx.ASGITransport(app=create_stub_app(state)))
+    )
+    monkeypatch.setattr(notion_service, "notion", client)
+    monkeypatch.setattr(notion_service, "notion_api_key", "secret_stub")
+    monkeypatch.setattr(notion_database, "_schema_cache", {})
+    return state
+
+
+def test_notion_client_speaks_data_source_api_version():
+    # data_sources.retrieve e o parent data_source_id só existem a partir dessa versão (notion-client >= 2.5)
+    client = notion_service.create_notion_client("secret_stub")
+    assert client.options.notion_version >= NOTION_API_VERSION
+    assert hasattr(client, "data_sources")
+
+
+def test_derive_title_and_properties():
+    assert derive_title("Intro\n\n# **Guia** de [Python](https://python.org)\n\ntexto") == "Guia de Python"
+    assert derive_title("- Primeira linha\n\nSegunda") == "Primeira linha"
+
+    schema = DatabaseSchema(STUB_DATA_SOURCE_ID, dict(STUB_DATA_SOURCE_PROPERTIES))
+    row = DatabaseRow(content="# Guia", tags=["python", "a,b", "python"], provider="openai",
+                      model="gpt-4o", tokens=1234)
+    assert build_properties(schema, row) == {
+        "Name": {"title": [{"type": "text", "text": {"content": "Guia"}}]},
+        "Tags": {"multi_select": [{"name": "python"}, {"name": "a b"}]},
+        "Provider": {"select": {"name": "openai"}},
+        "Model": {"rich_text": [{"type": "text", "text": {"content": "gpt-4o"}}]},
+        "Tokens": {"number": 1234},
+    }
+
+    # Propriedades ausentes ou de tipo incompatível são ignoradas
+    schema = DatabaseSchema("ds", {"Título": "title", "Tokens": "rich_text"})
+    assert list(build_properties(schema, row)) == ["Título"]
+
+
+@pytest.mark.asyncio
+async def test_create_row_with_properties_and_long_content(stub_notion):
+    content = "\n".join(f"- item {i}" for i in range(250))
+    page = await create_row(STUB_DATABASE_ID, DatabaseRow(
+        content=content, title="Lista", tags=["backfill"], provider="anthropic", tokens=42
+    ))
+
+    assert page["title"] == "Lista"
+    stored = stub_notion.pages[page["id"]]
+    assert stored["parent"] == {"type": "data_source_id", "data_source_id": STUB_DATA_SOURCE_ID}
+    assert stored["properties"]["Tokens"] == {"number": 42}
+    assert len(stub_notion.blocks[page["id"]]) == 250
+    assert stub_notion.requests["notion.blocks.children.append"] == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_rows_are_created_concurrently(stub_notion, monkeypatch):
+    stub_notion.notion.latency_ms = 100
+    monkeypatch.setattr(get_settings(), "notion_bulk_concurrency", 6)
+    rows = [DatabaseRow(content=f"# Documento {i}\n\nTexto {i}") for i in range(12)]
+    rows.insert(3, DatabaseRow(content="   "))
+
+    started = time.monotonic()
+    results = await create_rows(STUB_DATABASE_ID, rows)
+    elapsed = time.monotonic() - started
+
+    assert [result.get("title") for result in results[:3]] == ["Documento 0", "Documento 1", "Documento 2"]
+    assert "error" in results[3] and sum("error" in result for result in results) == 1
+    assert stub_notion.requests["notion.pages.create"] == 12
+    # O esquema é lido uma única vez para o lote
+    assert stub_notion.requests["notion.data_sources.retrieve"] == 1
+    # Sequencialmente seriam ~1.4s (esquema + 12 criações de 100ms)
+    assert elapsed < 0.8
+
+
+@pytest.mark.asyncio
+async def test_notion_rate_limiter_paces_requests(monkeypatch):
+    settings = get_settings()
+    limiter = NotionRateLimiter(RateLimiter(InMemoryRateLimitBackend()))
+
+    monkeypatch.setattr(settings, "notion_requests_per_second", 20.0)
+    started = time.monotonic()
+    await asyncio.gather(*(limiter.acquire("Bearer secret") for _ in range(30)))
+    # 20 de rajada e as 10 restantes a 20 por segundo
+    assert time.monotonic() - started >= 0.45
+    # Integrações diferentes têm buckets separados
+    assert await limiter.acquire("Bearer other") == 0.0
+
+    monkeypatch.setattr(settings, "notion_requests_per_second", 0.0)
+    assert await limiter.acquire("Bearer secret") == 0.0
@@ -0,0 +1,95 @@
+import httpx
+import pytest
+from notion_client import AsyncClient
+
+from backend.config import get_settings
+from backend.loadtest.stubs import StubProfile, StubState, create_stub_app
+from backend.services import notion_service
+from backend.services.notion_sections import publish_document, shard_blocks
+from backend.services.notion_service import build_blocks
+
+
+@pytest.fixture
+def stub_notion(monkeypatch):
+    state = StubState(notion=StubProfile(latency_ms=0, jitter_ms=0))
+    client = AsyncClient(
+        auth="secret_stub", base_url="http://stub/notion",
+        client=httpx.AsyncClient(transport=httpx.ASGITransport(app=create_stub_app(state)))
+    )
+    monkeypatch.setattr(notion_service, "notion", client)
+    monkeypatch.setattr(notion_service, "notion_api_key", "secret_stub")
+    settings = get_settings()
+    monkeypatch.setattr(settings, "notion_section_min_blocks", 50)
+    monkeypatch.setattr(settings, "notion_section_concurrency", 4)
+    return state
+
+
+def _document(sections: int, items: int) -> str:
+    parts = ["Resumo do documento.", "### Observação inicial"]
+    for section in range(sections):
+        parts.append(f"# Parte {section}\n\n" + "\n".join(f"- item {section}.{i}" for i in range(items)))
+    return "\n\n".join(parts)
+
+
+def _title(block):
+    return "".join(item["text"]["content"] for item in block[block["type"]]["rich_text"])
+
+
+def test_shard_blocks_by_top_level_headings():
+    head, sections = shard_blocks(build_blocks("Intro\n\n## A\n\ntexto\n\n### A.1\n\nmais\n\n## B\n\n- x"))
+    assert [block["type"] for block in head] == ["paragraph", "paragraph"]
+    assert [section.title for section in sections] == ["A", "B"]
+    # Cabeçalhos de nível inferior ficam dentro da seção
+    assert "heading_3" in [block["type"] for block in sections[0].blocks]
+
+    # Um título único no início fica fora das seções
+    head, sections = shard_blocks(build_blocks("# Título\n\n## A\n\ntexto\n\n## B\n\ntexto"))
+    assert head[0]["type"] == "heading_1" and [section.title for section in sections] == ["A", "B"]
+
+    head, sections = shard_blocks(build_blocks("sem cabeçalhos"))
+    assert sections == [] and len(head) == 1
+
+
+@pytest.mark.asyncio
+async def test_toggle_sections_are_uploaded_in_parallel_and_in_order(stub_notion):
+    stub_notion.notion.latency_ms = 20
+    content = _document(sections=8, items=150)
+
+    flat = await publish_document(content, "parent-page", layout="flat")
+    # O layout flat anexa os lotes em sequência
+    assert stub_notion.notion_max_in_flight == 1
+    stub_notion.notion_max_in_flight = 0
+    stub_notion.appends.clear()
+    page = await publish_document(content, "parent-page", layout="toggle")
+
+    top = stub_notion.blocks[page["id"]]
+    headings = [block for block in top if block["type"] == "heading_1"]
+    assert [_title(block) for block in headings] == [f"Parte {i}" for i in range(8)]
+    # Os blocos anteriores ao primeiro cabeçalho continuam no início da página
+    assert top[len(top) - 8:] == headings
+    for index, heading in enumerate(headings):
+        assert heading["heading_1"]["is_toggleable"] and heading["has_children"]
+        items = [_title(block) for block in stub_notion.blocks[heading["id"]] if block["type"] == "bulleted_list_item"]
+        assert items == [f"item {index}.{i}" for i in range(150)]
+    # Mesmo conteúdo do layout flat, só reorganizado nas seções
+    assert sum(len(stub_notion.blocks[block["id"]]) for block in headings) + len(top) == \
+        len(stub_notion.blocks[flat["id"]])
+    # Seções sobem em paralelo, limitadas por NOTION_SECTION_CONCURRENCY, com o mesmo número de
+    # requisições cada (150 itens: dois lotes de até 100 filhos anexados ao cabeçalho)
+    assert 1 < stub_notion.notion_max_in_flight <= 4
+    assert [stub_notion.appends[heading["id"]] for heading in headings] == [2] * 8
+
+
+@pytest.mark.asyncio
+async def test_child_page_sections_and_small_documents(stub_notion):
+    page = await publish_document(_document(sections=3, items=30), "parent-page", layout="child_page")
+
+    top = stub_notion.blocks[page["id"]]
+    assert "heading_3" in [block["type"] for block in top[:-3]]
+    assert [block["child_page"]["title"] for block in top[-3:]] == ["Parte 0", "Parte 1", "Parte 2"]
+    for block in top[-3:]:
+        assert sum(child["type"] == "bulleted_list_item" for child in stub_notion.blocks[block["id"]]) == 30
+
+    # Abaixo de NOTION_SECTION_MIN_BLOCKS o documento fica em uma página só
+    small = await publish_document(_document(sections=2, items=5), "parent-page", layout="child_page")
+    assert "child_page" not in [block["type"] for block in stub_notion.blocks[small["id"]]]
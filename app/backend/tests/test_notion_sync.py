@@ -0,0 +1,108 @@
+import httpx
+import pytest
+from notion_client import AsyncClient
+
+from backend.loadtest.stubs import StubProfile, StubState, create_stub_app
+from backend.services import notion_service
+from backend.services.notion_service import build_blocks
+from backend.services.notion_sync import TargetPageNotFoundError, block_hash, plan_sync, sync_page
+
+
+@pytest.fixture
+def stub_notion(monkeypatch):
+    state = StubState(notion=StubProfile(latency_ms=0, jitter_ms=0))
+    client = AsyncClient(
+        auth="secret_stub", base_url="http://stub/notion",
+        client=httpx.AsyncClient(transport=httpx.ASGITransport(app=create_stub_app(state)))
+    )
+    monkeypatch.setattr(notion_service, "notion", client)
+    monkeypatch.setattr(notion_service, "notion_api_key", "secret_stub")
+    return state, client
+
+
+def _existing(content: str):
+    """Blocos formatados com ids, como se tivessem sido lidos da página."""
+    return [dict(block, id=f"b{index}") for index, block in enumerate(build_blocks(content))]
+
+
+def test_block_hash_ignores_api_defaults():
+    sent = build_blocks("Texto **forte**")[0]
+    read = {
+        "id": "abc", "object": "block", "has_children": False, "created_time": "2024-01-01T00:00:00Z",
+        "type": "paragraph",
+        "paragraph": {
+            "color": "default",
+            "rich_text": [
+                {"type": "text", "text": {"content": item["text"]["content"], "link": None},
+                 "plain_text": item["text"]["content"], "href": None,
+                 "annotations": dict({"bold": False, "italic": False, "code": False, "color": "default"},
+                                     **item.get("annotations", {}))}
+                for item in sent["paragraph"]["rich_text"]
+            ],
+        },
+    }
+    assert block_hash(sent) == block_hash(read)
+    assert block_hash(sent) != block_hash(build_blocks("Texto forte")[0])
+
+
+def test_plan_sync_updates_inserts_and_deletes():
+    # Linhas em branco também viram blocos: b0 título, b2 "Um", b4 "Dois", b6 "Três"
+    existing = _existing("# Título\n\nUm\n\nDois\n\nTrês")
+
+    assert plan_sync(existing, build_blocks("# Título\n\nUm\n\nDois\n\nTrês")).unchanged == 7
+
+    plan = plan_sync(existing, build_blocks("# Título\n\nUm revisado\n\nDois\n\nTrês"))
+    assert [block_id for block_id, _ in plan.updates] == ["b2"]
+    assert not plan.deletes and not plan.inserts and plan.unchanged == 6
+
+    plan = plan_sync(existing, build_blocks("# Título\n\nUm\n\n## Novo\n\nDois\n\nTrês"))
+    assert len(plan.inserts) == 1 and plan.inserted_blocks == 2
+    assert not plan.updates and not plan.deletes
+
+    plan = plan_sync(existing, build_blocks("# Título\n\nUm\n\nTrês"))
+    assert len(plan.deletes) == 2 and "b4" in plan.deletes
+    assert not plan.updates and not plan.inserts
+
+
+def test_plan_sync_rewrites_when_inserting_before_first_block():
+    existing = _existing("Um\n\nDois")
+    plan = plan_sync(existing, build_blocks("# Título\n\nUm\n\nDois"))
+    assert plan.rewrite
+    assert plan.deletes == ["b0", "b1", "b2"]
+    assert plan.inserts == [(None, build_blocks("# Título\n\nUm\n\nDois"))]
+
+
+@pytest.mark.asyncio
+async def test_sync_page_sends_only_changed_blocks(stub_notion):
+    state, client = stub_notion
+    original = "# Guia\n\nIntrodução\n\n- item 1\n- item 2\n\n```python\nx = 1\n```\n\nConclusão"
+    page = await client.pages.create(
+        parent={"page_id": "parent-page"},
+        properties={"title": {"title": [{"text": {"content": "Guia"}}]}},
+        children=build_blocks(original),
+    )
+    state.requests.clear()
+
+    revised = "# Guia\n\nIntrodução revisada\n\n- item 1\n- item 2\n\nNovo parágrafo\n\n```python\nx = 1\n```"
+    result = await sync_page(page["id"], revised)
+
+    assert result["sync"] == {
+        "unchanged": 7, "updated": 1, "inserted": 2, "deleted": 2, "rewrite": False, "write_requests": 4,
+    }
+    assert state.requests["notion.blocks.update"] == 1
+    assert state.requests["notion.blocks.delete"] == 2
+    assert state.requests["notion.blocks.children.append"] == 1
+    assert [block_hash(block) for block in state.blocks[page["id"]]] == [
+        block_hash(block) for block in build_blocks(revised)
+    ]
+
+    # Nada mudou: só leitura
+    state.requests.clear()
+    result = await sync_page(page["id"], revised)
+    assert result["sync"]["write_requests"] == 0 and result["sync"]["unchanged"] == 10
+
+
+@pytest.mark.asyncio
+async def test_sync_page_missing_target(stub_notion):
+    with pytest.raises(TargetPageNotFoundError):
+        await sync_page("0d1f5f6687da4e3b8db3e0d5bf6da03b", "Texto")
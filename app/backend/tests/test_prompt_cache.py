@@ -0,0 +1,127 @@
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from backend.config import get_settings
+from backend.loadtest.stubs import StubProfile, StubState, create_stub_app
+from backend.services.anthropic_service import AnthropicProvider
+from backend.services.openai_service import OpenAIProvider, prompt_cache_key
+from backend.services.provider_health import ProviderHealthRegistry
+from backend.services.provider_interface import GenerationResult, TokenUsage
+from backend.services.provider_router import ProviderRouter
+from backend.services.request_policy import get_request_policy
+
+
+@pytest.fixture
+def cache_enabled(monkeypatch):
+    monkeypatch.setattr(get_settings(), "provider_prompt_cache_enabled", True)
+
+
+def anthropic_provider(messages):
+    provider = AnthropicProvider()
+    provider.settings = provider.get_default_settings()
+    provider.request_policy = get_request_policy("provider")
+    provider.client = SimpleNamespace(messages=messages)
+    return provider
+
+
+class RecordingMessages:
+    """Substitui client.messages da Anthropic, registrando os argumentos de cada chamada."""
+
+    def __init__(self, usage):
+        self.usage = usage
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(
+            content=[SimpleNamespace(text="texto")], model=kwargs["model"],
+            stop_reason="end_turn", usage=SimpleNamespace(**self.usage)
+        )
+
+
+@pytest.mark.asyncio
+async def test_openai_reports_cached_prefix_on_second_request(cache_enabled):
+    state = StubState(llm=StubProfile(latency_ms=0, jitter_ms=0, output_tokens=20))
+    provider = OpenAIProvider()
+    await provider.initialize("sk-test")
+    bodies = []
+
+    async def record_body(request):
+        bodies.append(json.loads(request.content))
+
+    provider.client = AsyncOpenAI(
+        api_key="stub", base_url="http://stub/openai/v1", max_retries=0,
+        http_client=httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=create_stub_app(state)), event_hooks={"request": [record_body]}
+        )
+    )
+
+    cold = await provider.generate("Primeiro pedido")
+    warm = await provider.generate("Segundo pedido, com outro texto")
+
+    # A chave de cache vai no corpo JSON, sem depender do SDK conhecer o parâmetro
+    assert {body["prompt_cache_key"] for body in bodies} == {prompt_cache_key(bodies[0]["messages"][0]["content"])}
+
+    assert cold.usage.cache_read_tokens == 0
+    assert warm.usage.cache_read_tokens > 0
+    assert 0 < warm.usage.cache_hit_ratio < 1
+    assert prompt_cache_key("a") == prompt_cache_key("a") != prompt_cache_key("b")
+
+
+@pytest.mark.asyncio
+async def test_anthropic_marks_cache_breakpoints_and_normalizes_usage(cache_enabled):
+    messages = RecordingMessages({
+        "input_tokens": 10, "output_tokens": 5,
+        "cache_read_input_tokens": 900, "cache_creation_input_tokens": 0,
+    })
+    provider = anthropic_provider(messages)
+
+    result = await provider.complete("Pedido")
+    await provider.complete("Pedido", partial="Texto parcial ")
+
+    first, continuation = messages.calls
+    assert first["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert first["messages"] == [{"role": "user", "content": "Pedido"}]
+    assert continuation["messages"][0]["content"][0]["cache_control"] == {"type": "ephemeral"}
+    assert continuation["messages"][1] == {"role": "assistant", "content": "Texto parcial"}
+    assert result.usage.input_tokens == 910
+    assert result.usage.cache_read_tokens == 900
+
+
+@pytest.mark.asyncio
+async def test_anthropic_sends_plain_system_prompt_when_cache_disabled(monkeypatch):
+    monkeypatch.setattr(get_settings(), "provider_prompt_cache_enabled", False)
+    messages = RecordingMessages({"input_tokens": 10, "output_tokens": 5})
+    provider = anthropic_provider(messages)
+
+    result = await provider.complete("Pedido")
+
+    assert isinstance(messages.calls[0]["system"], str)
+    assert result.usage.cache_read_tokens == 0 and result.usage.input_tokens == 10
+
+
+@pytest.mark.asyncio
+async def test_router_exposes_cache_hit_ratio_in_health_snapshot():
+    class CachedProvider:
+        settings = {"model": "m"}
+
+        async def generate(self, prompt):
+            return GenerationResult(
+                content="ok", provider="openai",
+                usage=TokenUsage(input_tokens=1000, output_tokens=10, cache_read_tokens=750)
+            )
+
+    async def build(user, name):
+        return CachedProvider()
+
+    health = ProviderHealthRegistry()
+    router = ProviderRouter(build, health=health)
+    await router.generate(SimpleNamespace(ai_provider="openai"), "oi", ["openai"])
+
+    snapshot = health.snapshot()[0]
+    assert snapshot["prompt_cache"]["cache_read_tokens"] == 750
+    assert snapshot["prompt_cache"]["hit_ratio"] == 0.75
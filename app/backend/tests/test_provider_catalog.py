@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from backend.auth import current_active_user
+from backend.main import app
+from backend.services.ai_provider_factory import AIProviderFactory
+from backend.services.provider_catalog import ProviderCatalog, provider_catalog
+
+
+def test_catalog_covers_factory_providers_with_prices_and_limits():
+    document = ProviderCatalog().document["providers"]
+
+    # O servidor compatível com a OpenAI só entra no catálogo com OPENAI_COMPATIBLE_BASE_URL
+    assert set(document) == set(AIProviderFactory.list_available_providers()) - {"openai_compatible"}
+    gpt4o = next(model for model in document["openai"]["models"] if model["id"] == "gpt-4o")
+    assert gpt4o["max_output_tokens"] == 16_384
+    assert gpt4o["prompt_caching"] is True
+    assert gpt4o["pricing"] == {"input": 2.5, "output": 10.0, "cache_read": 1.25, "cache_write": 2.5}
+    for provider in document.values():
+        assert provider["default_model"] in [model["id"] for model in provider["models"]]
+
+
+def test_providers_endpoint_serves_precomputed_catalog_with_etag():
+    app.dependency_overrides[current_active_user] = lambda: SimpleNamespace(id=1)
+    try:
+        client = TestClient(app)
+        response = client.get("/api/providers")
+        cached = client.get("/api/providers", headers={"If-None-Match": response.headers["ETag"]})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.content == provider_catalog.body
+    assert response.json()["providers"]["anthropic"]["display_name"] == "Anthropic Claude"
+    assert cached.status_code == 304
+    assert cached.content == b""
@@ -0,0 +1,132 @@
+import importlib
+from importlib.metadata import EntryPoint
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import Response
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+pytest.importorskip("aiosqlite")
+
+from backend.config import get_settings
+from backend.models import Base, User
+from backend.services import ai_provider_factory
+from backend.services.ai_provider_factory import ENTRY_POINT_GROUP, AIProviderFactory
+from backend.services.content_generation_service import ContentGenerationService, ProviderNotConfiguredError
+from backend.services.openai_compatible_service import OpenAICompatibleProvider
+from backend.services.provider_catalog import InvalidSettingsError, ModelInfo, ProviderCatalog
+from backend.services.provider_credentials import Credential, CredentialStore
+from backend.services.provider_interface import AIProvider, GenerationResult
+
+# O pacote exporta a instância do serviço com o mesmo nome do módulo
+generation_module = importlib.import_module("backend.services.content_generation_service")
+
+
+class EchoProvider(AIProvider):
+    """Provedor de plugin usado nos testes: devolve o prompt."""
+    DISPLAY_NAME = "Echo"
+    MODELS = (ModelInfo("echo-1", "Echo 1", 8_000, 1_000),)
+
+    async def initialize(self, api_key, settings=None):
+        self.api_key = api_key
+        self.settings = settings or self.get_default_settings()
+
+    async def generate_content(self, prompt):
+        return prompt
+
+    async def complete(self, prompt):
+        return GenerationResult(content=f"echo: {prompt}", provider="echo", model=self.settings["model"])
+
+    def get_provider_name(self):
+        return "Echo"
+
+    def get_default_settings(self):
+        return {"model": "echo-1"}
+
+
+@pytest.fixture
+def echo_plugin(monkeypatch):
+    entry_point = EntryPoint("echo", f"{__name__}:EchoProvider", ENTRY_POINT_GROUP)
+    monkeypatch.setattr(ai_provider_factory, "entry_points", lambda group: [entry_point])
+    monkeypatch.setattr(AIProviderFactory, "_plugins", {})
+    monkeypatch.setattr(AIProviderFactory, "_plugins_discovered", False)
+    yield
+
+
+@pytest.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'credentials.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        session.add(User(id=1, email="a@example.com", hashed_password="x", ai_provider="echo"))
+        await session.commit()
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_entry_point_provider_generates_with_stored_credentials(echo_plugin, engine):
+    assert AIProviderFactory.list_available_providers()["echo"] == "Echo"
+    catalog = ProviderCatalog()
+    assert catalog.document["providers"]["echo"]["models"][0]["max_output_tokens"] == 1_000
+
+    store = CredentialStore(engine)
+    async with AsyncSession(engine) as session:
+        await store.save(session, 1, "echo", api_key="echo-key", settings={"model": "echo-1"})
+        await session.commit()
+
+    service = ContentGenerationService(store)
+    user = SimpleNamespace(id=1, ai_provider="echo", openai_api_key="sk-test")
+    credentials = await service.load_credentials(user)
+    service.check_configured(user, credentials)
+
+    assert service.get_configured_providers(user, credentials) == ["echo", "openai"]
+    result = await service.generate_content_for_user(user, "olá", credentials=credentials)
+    assert (result.provider, result.model, result.content) == ("echo", "echo-1", "echo: olá")
+
+
+@pytest.mark.asyncio
+async def test_openai_compatible_provider_calls_local_server_without_key(monkeypatch):
+    monkeypatch.setattr(get_settings(), "openai_compatible_base_url", "http://inference.local:8000/v1/")
+    monkeypatch.setattr(get_settings(), "openai_compatible_model", "llama-3.1-8b")
+    with patch("httpx.AsyncClient") as client_class:
+        client = AsyncMock()
+        client_class.return_value = client
+        client.post.return_value = Response(200, json={
+            "model": "llama-3.1-8b",
+            "choices": [{"message": {"content": "rascunho"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 40, "completion_tokens": 5, "prompt_tokens_details": {"cached_tokens": 32}},
+        })
+        provider = OpenAICompatibleProvider()
+        await provider.initialize(None)
+        result = await provider.generate("rascunho curto")
+
+    url = client.post.call_args.args[0]
+    kwargs = client.post.call_args.kwargs
+    assert url == "http://inference.local:8000/v1/chat/completions"
+    assert "Authorization" not in kwargs["headers"]
+    assert kwargs["json"]["model"] == "llama-3.1-8b"
+    assert (result.provider, result.content, result.usage.cache_read_tokens) == ("openai_compatible", "rascunho", 32)
+
+
+@pytest.mark.asyncio
+async def test_openai_compatible_without_model_is_rejected_before_any_request(monkeypatch):
+    monkeypatch.setattr(get_settings(), "openai_compatible_base_url", "http://inference.local:8000/v1")
+    monkeypatch.setattr(get_settings(), "openai_compatible_model", "")
+    catalog = ProviderCatalog()
+    monkeypatch.setattr(generation_module, "provider_catalog", catalog)
+
+    with pytest.raises(InvalidSettingsError, match="model is required"):
+        catalog.validate_settings("openai_compatible", {"temperature": 0.2})
+    catalog.validate_settings("openai_compatible", {"model": "llama-3.1-8b"})
+
+    service = ContentGenerationService()
+    user = SimpleNamespace(id=1, ai_provider="openai_compatible")
+    with pytest.raises(ProviderNotConfiguredError, match="modelo"):
+        service.check_configured(user, {"openai_compatible": Credential(None, {})})
+    assert service.get_configured_providers(user, {"openai_compatible": Credential(None, {})}) == []
+
+    with pytest.raises(ValueError, match="modelo"):
+        await OpenAICompatibleProvider().initialize(None, {"temperature": 0.2})
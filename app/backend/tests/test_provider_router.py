@@ -0,0 +1,209 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from backend.config import get_settings
+from backend.services.provider_interface import GenerationResult, ProviderError, TokenUsage
+from backend.services.provider_health import ProviderHealthRegistry, ProviderUnavailableError, OPEN
+from backend.services.provider_router import ProviderRouter
+
+
+class FakeProvider:
+    def __init__(self, name, delay=0.0, error=None):
+        self.name = name
+        self.settings = {"model": f"{name}-model"}
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def generate(self, prompt, on_segment=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if on_segment:
+            await on_segment(f"{self.name}: ")
+        if self.error:
+            raise self.error
+        if on_segment:
+            await on_segment(prompt)
+        return GenerationResult(content=f"{self.name}: {prompt}", provider=self.name,
+                                usage=TokenUsage(input_tokens=10, output_tokens=5))
+
+
+def make_router(providers):
+    async def build_provider(user, provider_name):
+        return providers[provider_name]
+    return ProviderRouter(build_provider, health=ProviderHealthRegistry())
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "provider_failover_enabled", True)
+    monkeypatch.setattr(settings, "provider_hedging_enabled", False)
+    monkeypatch.setattr(settings, "provider_hedge_min_delay", 0.01)
+    monkeypatch.setattr(settings, "provider_hedge_max_delay", 0.05)
+    monkeypatch.setattr(settings, "provider_breaker_failure_threshold", 2)
+    monkeypatch.setattr(settings, "provider_breaker_cooldown", 60.0)
+    monkeypatch.setattr(settings, "provider_breaker_min_requests", 10)
+    monkeypatch.setattr(settings, "provider_breaker_error_rate", 0.5)
+    return settings
+
+
+@pytest.mark.asyncio
+async def test_failover_to_next_configured_provider(settings):
+    providers = {
+        "openai": FakeProvider("openai", error=ProviderError("503", retryable=True)),
+        "anthropic": FakeProvider("anthropic"),
+    }
+    router = make_router(providers)
+    user = SimpleNamespace(ai_provider="openai")
+
+    result = await router.generate(user, "hello", ["openai", "anthropic"])
+
+    assert result.content == "anthropic: hello"
+    assert result.usage.total_tokens == 15
+    assert providers["openai"].calls == 1
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_returns_fastest_provider(settings):
+    settings.provider_hedging_enabled = True
+    providers = {
+        "openai": FakeProvider("openai", delay=1.0),
+        "deepseek": FakeProvider("deepseek", delay=0.01),
+    }
+    router = make_router(providers)
+    user = SimpleNamespace(ai_provider="openai")
+
+    result = await asyncio.wait_for(router.generate(user, "hi", ["openai", "deepseek"]), timeout=0.5)
+
+    assert result.content == "deepseek: hi"
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_and_falls_back(settings):
+    providers = {
+        "openai": FakeProvider("openai", error=ProviderError("429", retryable=True)),
+        "anthropic": FakeProvider("anthropic"),
+    }
+    router = make_router(providers)
+    user = SimpleNamespace(ai_provider="openai")
+
+    for _ in range(2):
+        await router.generate(user, "x", ["openai", "anthropic"])
+
+    assert router.health.provider_state("openai") == OPEN
+    assert (await router.generate(user, "x", ["openai", "anthropic"])).content == "anthropic: x"
+    assert providers["openai"].calls == 2
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_raises_provider_unavailable(settings):
+    providers = {"openai": FakeProvider("openai", error=ProviderError("503", retryable=True))}
+    router = make_router(providers)
+    user = SimpleNamespace(ai_provider="openai")
+
+    for _ in range(2):
+        with pytest.raises(ProviderError):
+            await router.generate(user, "x", ["openai"])
+
+    with pytest.raises(ProviderUnavailableError) as excinfo:
+        await router.generate(user, "x", ["openai"])
+    assert excinfo.value.retry_after > 0
+    assert providers["openai"].calls == 2
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_closes_circuit(settings):
+    settings.provider_breaker_cooldown = 0.0
+    provider = FakeProvider("openai", error=ProviderError("503", retryable=True))
+    router = make_router({"openai": provider})
+    user = SimpleNamespace(ai_provider="openai")
+
+    for _ in range(2):
+        with pytest.raises(ProviderError):
+            await router.generate(user, "x", ["openai"])
+
+    provider.error = None
+    assert (await router.generate(user, "x", ["openai"])).content == "openai: x"
+    snapshot = router.health.snapshot()[0]
+    assert snapshot["state"] == "closed"
+    assert snapshot["total_failures"] == 2
+    assert snapshot["latency_ewma_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_error_raised_when_no_fallback(settings):
+    providers = {"openai": FakeProvider("openai", error=ProviderError("invalid key"))}
+    router = make_router(providers)
+    user = SimpleNamespace(ai_provider="openai")
+
+    with pytest.raises(ProviderError, match="invalid key"):
+        await router.generate(user, "x", ["openai"])
+
+    assert router.health.get("openai", "openai-model").consecutive_failures == 0
+
+
+@pytest.mark.asyncio
+async def test_streamed_generation_is_owned_by_first_provider_to_emit(settings):
+    settings.provider_hedging_enabled = True
+    providers = {
+        "openai": FakeProvider("openai", delay=1.0),
+        "deepseek": FakeProvider("deepseek", delay=0.01),
+    }
+    router = make_router(providers)
+    user = SimpleNamespace(ai_provider="openai")
+    segments = []
+
+    async def on_segment(segment):
+        segments.append(segment)
+
+    result = await asyncio.wait_for(
+        router.generate(user, "hi", ["openai", "deepseek"], on_segment=on_segment), timeout=0.5
+    )
+
+    assert result.content == "deepseek: hi"
+    assert segments == ["deepseek: ", "hi"]
+
+
+@pytest.mark.asyncio
+async def test_no_failover_after_partial_content_was_streamed(settings):
+    providers = {
+        "openai": FakeProvider("openai", error=ProviderError("503", retryable=True)),
+        "anthropic": FakeProvider("anthropic"),
+    }
+    router = make_router(providers)
+    user = SimpleNamespace(ai_provider="openai")
+    segments = []
+
+    async def on_segment(segment):
+        segments.append(segment)
+
+    with pytest.raises(ProviderError):
+        await router.generate(user, "hello", ["openai", "anthropic"], on_segment=on_segment)
+
+    assert segments == ["openai: "]
+    assert providers["anthropic"].calls == 0
+
+
+@pytest.mark.asyncio
+async def test_segment_publishing_is_not_counted_against_the_provider(settings):
+    router = make_router({"openai": FakeProvider("openai")})
+    user = SimpleNamespace(ai_provider="openai")
+
+    async def slow_notion(segment):
+        await asyncio.sleep(0.05)
+
+    await router.generate(user, "hi", ["openai"], on_segment=slow_notion)
+    health = router.health.get("openai", "openai-model")
+    # A latência do provedor não inclui o tempo de publicação no Notion
+    assert max(health.latencies) < 0.05
+
+    async def notion_timeout(segment):
+        raise ProviderError("Notion timed out", provider="notion", retryable=True)
+
+    for _ in range(settings.provider_breaker_failure_threshold + 1):
+        with pytest.raises(ProviderError, match="Notion timed out"):
+            await router.generate(user, "hi", ["openai"], on_segment=notion_timeout)
+    assert health.current_state() != OPEN
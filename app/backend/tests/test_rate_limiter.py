@@ -0,0 +1,93 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from backend.config import get_settings
+from backend.services import rate_limiter
+from backend.services.rate_limiter import InMemoryRateLimitBackend, RateLimiter, RateLimitExceeded
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_max_concurrent", 1)
+    monkeypatch.setattr(settings, "rate_limit_requests_per_minute", 2)
+    monkeypatch.setattr(settings, "rate_limit_tokens_per_minute", 1000)
+    return RateLimiter(InMemoryRateLimitBackend())
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_per_user(limiter):
+    async with limiter.limit(1):
+        with pytest.raises(RateLimitExceeded) as excinfo:
+            async with limiter.limit(1):
+                pass
+        assert excinfo.value.limit == "concurrency"
+
+        # Outros usuários não são afetados
+        async with limiter.limit(2):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_requests_per_minute(limiter):
+    for _ in range(2):
+        async with limiter.limit(1):
+            pass
+
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        async with limiter.limit(1):
+            pass
+    assert excinfo.value.limit == "requests"
+    assert 0 < excinfo.value.retry_after <= 30
+
+
+@pytest.mark.asyncio
+async def test_tokens_per_minute_charged_after_generation(limiter):
+    async with limiter.limit(1) as charge:
+        charge.add_tokens(1500)
+
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        async with limiter.limit(1):
+            pass
+    assert excinfo.value.limit == "tokens"
+    assert excinfo.value.retry_after > 30
+
+
+@pytest.mark.asyncio
+async def test_lease_is_renewed_while_the_generation_runs(limiter, monkeypatch):
+    monkeypatch.setattr(get_settings(), "rate_limit_lease_ttl", 0.3)
+    backend = limiter.backend
+
+    async with limiter.limit(1):
+        # Bem depois do TTL original a vaga continua ocupada
+        await asyncio.sleep(0.5)
+        with pytest.raises(RateLimitExceeded) as excinfo:
+            async with limiter.limit(1):
+                pass
+        assert excinfo.value.limit == "concurrency"
+
+    assert backend._leases == {}
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_drops_released_leases_and_full_buckets(monkeypatch):
+    backend = InMemoryRateLimitBackend()
+    clock = [1000.0]
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+
+    lease_id = await backend.acquire_lease("user:1:concurrency", 1, ttl=600)
+    await backend.release_lease("user:1:concurrency", lease_id)
+    assert backend._leases == {}
+
+    assert await backend.take("user:1:requests", 1, capacity=2, per_seconds=60) == 0
+    assert await backend.take("user:2:requests", 1, capacity=2, per_seconds=60) == 0
+    assert set(backend._buckets) == {"user:1:requests", "user:2:requests"}
+
+    # Um minuto depois os dois estão cheios: só o usado agora fica em memória
+    clock[0] += 61
+    assert await backend.take("user:1:requests", 1, capacity=2, per_seconds=60) == 0
+    assert set(backend._buckets) == {"user:1:requests"}
+    assert await backend.available("user:2:requests", capacity=2, per_seconds=60) == 2
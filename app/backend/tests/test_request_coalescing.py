@@ -0,0 +1,168 @@
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services import notion_service
+from backend.services.content_generation_service import ContentGenerationService
+from backend.services.provider_credentials import Credential
+from backend.services.provider_interface import GenerationResult, TokenUsage
+from backend.services.request_coalescing import GenerationCoalescer, coalescing_key
+
+
+class GatedProvider:
+    """Provedor falso que entrega dois trechos e só termina quando `release` é sinalizado."""
+
+    def __init__(self, calls, release):
+        self.calls = calls
+        self.release = release
+
+    async def generate(self, prompt, on_segment=None):
+        self.calls.append(prompt)
+        if on_segment:
+            await on_segment("# Título\n\n")
+        await self.release.wait()
+        if on_segment:
+            await on_segment("Corpo")
+        return GenerationResult("# Título\n\nCorpo", "openai", "gpt-4o", TokenUsage(input_tokens=10, output_tokens=5))
+
+
+@pytest.fixture
+def service(monkeypatch):
+    # O pacote exporta a instância do serviço com o mesmo nome do módulo
+    content_generation_service = importlib.import_module("backend.services.content_generation_service")
+
+    coalescer = GenerationCoalescer()
+    monkeypatch.setattr(content_generation_service, "generation_coalescer", coalescer)
+    recorded = []
+    monkeypatch.setattr(content_generation_service.usage_recorder, "record", lambda *args: recorded.append(args))
+
+    service = ContentGenerationService()
+    service.calls, service.release, service.coalescer, service.recorded = [], asyncio.Event(), coalescer, recorded
+
+    async def create_provider(user, provider_name=None, credentials=None):
+        return GatedProvider(service.calls, service.release)
+
+    service.create_provider_for_user = create_provider
+    return service
+
+
+def make_user(user_id):
+    return SimpleNamespace(id=user_id, ai_provider="openai", openai_api_key="sk-shared")
+
+
+def credentials(api_key="sk-shared", model="gpt-4o"):
+    return {"openai": Credential(api_key, {"model": model, "temperature": 0.7})}
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_share_one_upstream_call(service):
+    tasks = [
+        asyncio.ensure_future(service.generate_content_for_user(make_user(n), "guia", credentials=credentials()))
+        for n in range(3)
+    ]
+    await asyncio.sleep(0)
+    service.release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert service.calls == ["guia"]
+    assert {result.content for result in results} == {"# Título\n\nCorpo"}
+    assert len({id(result) for result in results}) == 3
+    # O uso do provedor é contabilizado uma vez, para quem disparou a chamada
+    assert [args[0] for args in service.recorded] == [0]
+    assert service.coalescer.snapshot() == {"in_flight": 0, "started": 1, "coalesced": 2}
+
+
+@pytest.mark.asyncio
+async def test_each_request_streams_all_segments_to_its_own_callback(service):
+    received = {"leader": [], "late": []}
+
+    def collector(name):
+        async def on_segment(segment):
+            received[name].append(segment)
+        return on_segment
+
+    leader = asyncio.ensure_future(service.generate_content_for_user(
+        make_user(1), "guia", on_segment=collector("leader"), credentials=credentials()
+    ))
+    await asyncio.sleep(0.01)
+    # Chega depois do primeiro trecho: recebe o que já foi gerado e o restante
+    late = asyncio.ensure_future(service.generate_content_for_user(
+        make_user(2), "guia", on_segment=collector("late"), credentials=credentials()
+    ))
+    await asyncio.sleep(0.01)
+    service.release.set()
+    await asyncio.gather(leader, late)
+
+    assert service.calls == ["guia"]
+    assert received["leader"] == received["late"] == ["# Título\n\n", "Corpo"]
+
+
+@pytest.mark.asyncio
+async def test_coalesced_requests_publish_with_their_own_notion_client(service):
+    seen = {}
+
+    async def request(user_id, notion_key):
+        async def on_segment(segment):
+            seen.setdefault(user_id, set()).add(notion_service.get_api_key())
+
+        with notion_service.user_client(notion_key) as client:
+            await service.generate_content_for_user(
+                make_user(user_id), "guia", on_segment=on_segment, credentials=credentials()
+            )
+            assert notion_service.get_client() is client
+
+    tasks = [asyncio.ensure_future(request(1, "secret_one")), asyncio.ensure_future(request(2, "secret_two"))]
+    await asyncio.sleep(0.01)
+    service.release.set()
+    await asyncio.gather(*tasks)
+
+    assert service.calls == ["guia"]
+    assert seen == {1: {"secret_one"}, 2: {"secret_two"}}
+    # Fora das requisições volta a valer o cliente global
+    assert notion_service._request_client.get() is None
+
+
+@pytest.mark.asyncio
+async def test_different_keys_or_settings_are_not_coalesced(service):
+    service.release.set()
+    await asyncio.gather(
+        service.generate_content_for_user(make_user(1), "guia", credentials=credentials()),
+        service.generate_content_for_user(make_user(2), "guia", credentials=credentials(api_key="sk-other")),
+        service.generate_content_for_user(make_user(3), "guia", credentials=credentials(model="gpt-4o-mini")),
+        service.generate_content_for_user(make_user(4), "outro guia", credentials=credentials()),
+    )
+    assert len(service.calls) == 4
+
+    key = coalescing_key("guia", ["openai"], credentials(), streaming=False)
+    assert key != coalescing_key("guia", ["openai"], credentials(), streaming=True)
+    assert "sk-shared" not in key
+
+
+@pytest.mark.asyncio
+async def test_shared_call_survives_until_the_last_request_leaves():
+    coalescer = GenerationCoalescer()
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def generate(on_segment):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    first = asyncio.ensure_future(coalescer.run("k", generate))
+    second = asyncio.ensure_future(coalescer.run("k", generate))
+    await started.wait()
+
+    first.cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+
+    second.cancel()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert cancelled.is_set()
+    assert coalescer.snapshot()["in_flight"] == 0
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from backend.services.provider_interface import ProviderError
+from backend.services.request_policy import RequestPolicy, cancel_on_disconnect, ClientDisconnectedError
+
+
+class StatusError(Exception):
+    def __init__(self, status):
+        super().__init__(f"status {status}")
+        self.status = status
+
+
+def flaky(errors, result="ok"):
+    calls = {"count": 0}
+
+    async def operation():
+        calls["count"] += 1
+        if errors:
+            raise errors.pop(0)
+        return result
+    return operation, calls
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors_with_backoff():
+    policy = RequestPolicy(name="test", max_retries=2, backoff_base=0.001)
+    operation, calls = flaky([ProviderError("503", retryable=True), ProviderError("429", retryable=True)])
+
+    assert await policy.run(operation, "test call") == "ok"
+    assert calls["count"] == 3
+
+
+@pytest.mark.asyncio
+async def test_does_not_retry_permanent_errors():
+    policy = RequestPolicy(name="test", max_retries=3, backoff_base=0.001)
+    operation, calls = flaky([ProviderError("invalid key", retryable=False)])
+
+    with pytest.raises(ProviderError, match="invalid key"):
+        await policy.run(operation, "test call")
+    assert calls["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_non_idempotent_operations_only_retry_rate_limits():
+    policy = RequestPolicy(name="test", max_retries=3, backoff_base=0.001)
+
+    operation, calls = flaky([StatusError(429)])
+    assert await policy.run(operation, "append", idempotent=False) == "ok"
+    assert calls["count"] == 2
+
+    operation, calls = flaky([StatusError(502)])
+    with pytest.raises(StatusError):
+        await policy.run(operation, "append", idempotent=False)
+    assert calls["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_total_deadline_is_enforced():
+    policy = RequestPolicy(name="test", total_timeout=0.05)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(ProviderError, match="prazo total"):
+        await policy.run(slow, "slow call")
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_cancels_upstream_work():
+    cancelled = asyncio.Event()
+
+    class DisconnectedRequest:
+        async def is_disconnected(self):
+            return True
+
+    async def upstream_call():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(ClientDisconnectedError):
+        await cancel_on_disconnect(DisconnectedRequest(), upstream_call(), poll_interval=0.01)
+    await asyncio.sleep(0)
+    assert cancelled.is_set()
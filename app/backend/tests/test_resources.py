@@ -0,0 +1,92 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.auth import current_active_user
+from backend.config import get_settings
+from backend.main import app
+from backend.services.resources import ResourceRegistry, ShuttingDownError, resources
+
+
+@pytest.fixture
+def accepting():
+    yield
+    resources.reset()
+
+
+@pytest.mark.asyncio
+async def test_protected_upload_survives_cancellation_and_is_drained():
+    registry = ResourceRegistry()
+    finished = []
+
+    async def upload():
+        await asyncio.sleep(0.05)
+        finished.append("page")
+        return "page"
+
+    caller = asyncio.ensure_future(registry.protect(upload()))
+    await asyncio.sleep(0.01)
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+
+    # A requisição foi cancelada, mas o envio continua até o fim
+    assert registry.in_flight == 1
+    assert await registry.drain(timeout=1)
+    assert finished == ["page"]
+    with pytest.raises(ShuttingDownError):
+        registry.check_accepting()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_cancels_late_uploads_and_closes_in_reverse_order():
+    registry = ResourceRegistry()
+    closed = []
+
+    async def close(name):
+        closed.append(name)
+
+    registry.register("database", lambda: close("database"))
+    registry.register("usage recorder", lambda: close("usage recorder"))
+    transport = registry.transport("notion")
+    assert registry.transport("notion") is transport
+
+    slow = asyncio.ensure_future(registry.protect(asyncio.sleep(10)))
+    await asyncio.sleep(0)
+    await registry.shutdown(timeout=0.05)
+
+    with pytest.raises(asyncio.CancelledError):
+        await slow
+    assert registry.in_flight == 0
+    assert closed == ["usage recorder", "database"]
+    # Os pools foram fechados; um novo uso cria outro
+    assert registry.transport("notion") is not transport
+
+
+def test_generation_refused_while_draining(accepting):
+    user = SimpleNamespace(
+        id=1, notion_api_key="secret_notion", notion_page_id="page-123",
+        ai_provider="openai", openai_api_key="sk-test",
+    )
+    app.dependency_overrides[current_active_user] = lambda: user
+    try:
+        resources.begin_drain()
+        response = TestClient(app).post("/api/generate", json={"prompt": "guia"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_lifespan_drains_and_closes_resources(accepting, monkeypatch):
+    monkeypatch.setattr(get_settings(), "skip_db_init", True)
+    monkeypatch.setattr(get_settings(), "usage_accounting_enabled", False)
+
+    with TestClient(app):
+        assert not resources.draining
+
+    assert resources.draining
+    assert resources.in_flight == 0
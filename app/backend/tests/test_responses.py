@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend import responses
+from backend.responses import CompressionMiddleware, FastJSONResponse, choose_encoding
+
+
+def make_app(minimum_size=1024):
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
+
+    @app.get("/document")
+    async def document(size: int = 20000):
+        return {"content": "Parágrafo de Markdown. " * (size // 23), "notion_url": "https://notion.so/x"}
+
+    @app.get("/stream")
+    async def stream():
+        async def parts():
+            for _ in range(3):
+                yield b"x" * 2000
+        return StreamingResponse(parts(), media_type="text/plain")
+
+    return app
+
+
+def test_choose_encoding_follows_client_weights(monkeypatch):
+    monkeypatch.setattr(responses, "SUPPORTED_ENCODINGS", ("br", "gzip"))
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("br;q=0.5, gzip") == "gzip"
+    assert choose_encoding("br;q=0, gzip;q=0.2") == "gzip"
+    assert choose_encoding("*") == "br"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("") is None
+
+
+def test_large_json_is_compressed_and_small_or_streamed_bodies_pass_through():
+    client = TestClient(make_app())
+
+    raw = client.get("/document", headers={"Accept-Encoding": "gzip"}, params={"size": 20000})
+    assert raw.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in raw.headers["vary"]
+    assert int(raw.headers["content-length"]) < 2000
+    assert raw.json()["content"].startswith("Parágrafo de Markdown.")
+
+    small = client.get("/document", headers={"Accept-Encoding": "gzip"}, params={"size": 100})
+    assert "content-encoding" not in small.headers
+
+    streamed = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in streamed.headers
+    assert len(streamed.content) == 6000
+
+
+def test_brotli_is_preferred_when_installed():
+    pytest.importorskip("brotli")
+    client = TestClient(make_app())
+
+    response = client.get("/document", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.json()["notion_url"] == "https://notion.so/x"
+
+
+def test_fast_json_response_matches_standard_json():
+    body = {"content": "Ação ✅ \"aspas\"\n", "n": [1, 2.5, None, True]}
+    rendered = FastJSONResponse(body).body
+
+    assert json.loads(rendered) == body
+    # Compacto e em UTF-8, sem escapes \uXXXX
+    assert b", " not in rendered and "Ação ✅".encode("utf-8") in rendered
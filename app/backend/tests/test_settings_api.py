@@ -0,0 +1,84 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.auth import current_active_user
+from backend.services.provider_credentials import credential_store
+
+
+def make_user(**overrides):
+    data = {
+        "id": 1,
+        "openai_api_key": "sk-test",
+        "anthropic_api_key": None,
+        "deepseek_api_key": None,
+        "notion_api_key": "secret_notion",
+        "notion_page_id": "page-123",
+        "ai_provider": "openai",
+        "openai_settings": json.dumps({"model": "gpt-4o", "temperature": "0.5", "max_tokens": "2000"}),
+        "anthropic_settings": None,
+        "deepseek_settings": "{invalid json",
+    }
+    data.update(overrides)
+    return SimpleNamespace(**data)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def no_stored_credentials(user_id, session=None):
+        return {}
+
+    monkeypatch.setattr(credential_store, "load", no_stored_credentials)
+    user = make_user()
+    app.dependency_overrides[current_active_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_get_settings_returns_normalized_document_with_etag(client):
+    response = client.get("/api/settings")
+
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+    data = response.json()
+    assert data["openai_settings"] == {"model": "gpt-4o", "temperature": 0.5, "max_tokens": 2000}
+    assert data["deepseek_settings"] is None
+    assert data["providers"] == {}
+
+
+def test_get_settings_conditional_request_returns_304(client):
+    etag = client.get("/api/settings").headers["ETag"]
+
+    response = client.get("/api/settings", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+def test_get_settings_stale_etag_returns_full_document(client):
+    response = client.get("/api/settings", headers={"If-None-Match": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.json()["notion_page_id"] == "page-123"
+
+
+@pytest.mark.parametrize("payload, message", [
+    ({"openai_settings": {"model": "gpt-9"}}, "Unknown model 'gpt-9'"),
+    ({"deepseek_settings": {"model": "deepseek-chat", "max_tokens": 20000}}, "between 1 and 8192"),
+    ({"ai_provider": "mistral"}, "Unknown provider"),
+])
+def test_update_settings_rejects_values_outside_catalog(client, payload, message):
+    from backend.models import get_async_session
+
+    async def no_session():
+        yield None
+
+    app.dependency_overrides[get_async_session] = no_session
+    response = client.post("/api/settings/update", json=payload)
+
+    assert response.status_code == 422
+    assert message in response.json()["detail"]
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from backend import server
+from backend.config import get_settings
+from backend.models import Base
+from backend.services.provider_health import (
+    CLOSED, OPEN, PostgresCircuitStateBackend, ProviderHealthRegistry, ProviderUnavailableError,
+)
+from backend.services.provider_interface import ProviderError
+
+
+@pytest.fixture
+async def shared_backend(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'state.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield PostgresCircuitStateBackend(engine)
+    await engine.dispose()
+
+
+async def _fail(registry):
+    with pytest.raises(ProviderError):
+        async with registry.track("openai", "gpt-4o"):
+            raise ProviderError("503", retryable=True)
+
+
+@pytest.mark.asyncio
+async def test_circuit_state_is_shared_between_workers(shared_backend, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "provider_breaker_failure_threshold", 2)
+    monkeypatch.setattr(settings, "provider_breaker_cooldown", 0.2)
+    monkeypatch.setattr(settings, "provider_breaker_sync_interval", 0.0)
+    # Dois processos: registros separados sobre o mesmo backend
+    first, second = ProviderHealthRegistry(shared_backend), ProviderHealthRegistry(shared_backend)
+
+    async with second.track("openai", "gpt-4o"):
+        pass
+    await _fail(first)
+    await _fail(first)
+    assert first.get("openai", "gpt-4o").state == OPEN
+
+    # O outro processo recusa a chamada sem chegar a falhar no upstream
+    with pytest.raises(ProviderUnavailableError):
+        async with second.track("openai", "gpt-4o"):
+            pass
+
+    # Depois do cooldown, a sonda bem-sucedida em um processo fecha o circuito nos dois
+    await asyncio.sleep(0.25)
+    async with second.track("openai", "gpt-4o"):
+        pass
+    assert second.get("openai", "gpt-4o").state == CLOSED
+    async with first.track("openai", "gpt-4o"):
+        pass
+    assert first.get("openai", "gpt-4o").current_state() == CLOSED
+
+
+def test_server_profile(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "server_workers", 0)
+    monkeypatch.setattr(settings, "server_max_requests", 1000)
+    options = server.server_options(settings)
+    assert options["workers"] >= 1
+    assert options["limit_max_requests"] == 1000 and options["limit_max_requests_jitter"] == 100
+
+    monkeypatch.setattr(settings, "state_backend", "memory")
+    monkeypatch.setattr(settings, "rate_limit_backend", "memory")
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    assert server.shared_state_warnings(settings, 1) == []
+    assert len(server.shared_state_warnings(settings, 4)) == 2
+    monkeypatch.setattr(settings, "state_backend", "postgres")
+    monkeypatch.setattr(settings, "rate_limit_backend", "postgres")
+    assert server.shared_state_warnings(settings, 4) == []
+
+
+def test_single_worker_runs_under_the_supervisor(monkeypatch):
+    # Com um processo, uvicorn.run não trataria o SIGHUP (make reload-api) nem reciclaria o processo
+    started = []
+
+    class FakeMultiprocess:
+        def __init__(self, config, sockets):
+            started.append((config.workers, config.limit_max_requests))
+
+        def run(self):
+            pass
+
+    monkeypatch.setattr(server, "Multiprocess", FakeMultiprocess)
+    settings = get_settings()
+    monkeypatch.setattr(settings, "server_workers", 1)
+    monkeypatch.setattr(settings, "server_port", 0)
+    monkeypatch.setattr(settings, "server_max_requests", 500)
+    server.run_supervised(server.server_options(settings))
+    assert started == [(1, 500)]
+
+
+@pytest.mark.asyncio
+async def test_database_initialization_keeps_existing_data(tmp_path, monkeypatch):
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy import func, select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from backend import models
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'init.db'}")
+    monkeypatch.setattr(models, "_engine", engine)
+    await models.create_db_and_tables()
+    async with AsyncSession(engine) as session:
+        session.add(models.User(id=1, email="a@example.com", hashed_password="x"))
+        await session.commit()
+    # Reinício do processo: a inicialização roda de novo sem apagar os usuários
+    await models.create_db_and_tables()
+    async with AsyncSession(engine) as session:
+        assert await session.scalar(select(func.count()).select_from(models.User)) == 1
+    await engine.dispose()
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from backend.services.ai_provider_factory import AIProviderFactory
+
+APP_DIR = Path(__file__).resolve().parents[2]
+
+# Tempo próprio (self) somado dos módulos backend.* ao importar backend.main, em microssegundos.
+# FastAPI, SQLAlchemy e fastapi-users ficam fora da conta: são o piso de qualquer processo da API
+BACKEND_IMPORT_BUDGET_US = 300_000
+
+# Carregados só na primeira requisição que precisa deles
+LAZY_MODULES = ("openai", "anthropic", "notion_client", "tiktoken", "asyncpg")
+
+PROBE = """
+import sys
+import backend.main
+print(",".join(m for m in {lazy!r} if m in sys.modules))
+from backend import models
+from backend.services import notion_service
+print(models._engine is None, notion_service.notion is None, notion_service.notion_api_key is None)
+"""
+
+
+def _import_backend():
+    env = {**os.environ, "ENVIRONMENT": "development", "PYTHONDONTWRITEBYTECODE": "1"}
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(lazy=LAZY_MODULES)],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+
+
+def _backend_self_time(importtime_log: str) -> int:
+    total = 0
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = line[len("import time:"):].split("|")
+        if module.strip().split(".")[0] == "backend":
+            total += int(self_us)
+    return total
+
+
+def test_import_is_fast_and_side_effect_free():
+    result = _import_backend()
+    loaded, state = result.stdout.splitlines()[-2:]
+
+    # Nem SDKs de provedores, nem cliente do Notion, nem driver do banco
+    assert loaded == ""
+    # Engine, cliente e chave do Notion só são criados no primeiro uso
+    assert state == "True True True"
+    assert _backend_self_time(result.stderr) < BACKEND_IMPORT_BUDGET_US
+
+
+def test_provider_factory_lists_providers_without_importing_sdks():
+    providers = AIProviderFactory.list_available_providers()
+
+    assert providers == {
+        "openai": "OpenAI", "anthropic": "Anthropic Claude", "deepseek": "DeepSeek",
+        "openai_compatible": "OpenAI-compatible",
+    }
+    # Uma classe só é importada quando pedida
+    assert AIProviderFactory.get_provider_class("deepseek").__name__ == "DeepSeekProvider"
+
+
+def test_package_exports_match_the_eager_imports():
+    import backend.services as services
+    from backend.config import get_settings
+    from backend.services import content_generation_service, notion, notion_service, settings
+    from backend.services.content_generation_service import ContentGenerationService
+
+    # O submódulo já foi importado: o nome no pacote continua sendo a instância do serviço
+    assert isinstance(content_generation_service, ContentGenerationService)
+    assert services.content_generation_service is content_generation_service
+    assert notion is notion_service.get_client()
+    assert settings is get_settings()
+    assert set(services.__all__) >= {"content_generation_service", "notion", "settings", "write_to_notion"}
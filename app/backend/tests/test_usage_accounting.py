@@ -0,0 +1,107 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+
+pytest.importorskip("aiosqlite")
+
+from backend.auth import current_active_user
+from backend.main import app
+from backend.models import Base
+from backend.services import usage_accounting
+from backend.services.provider_interface import TokenUsage
+from backend.services.usage_accounting import UsageRecorder, estimate_cost
+
+
+@pytest.fixture
+async def recorder(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'usage.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield UsageRecorder(engine)
+    await engine.dispose()
+
+
+def test_cost_uses_longest_model_prefix_and_cache_prices():
+    usage = TokenUsage(input_tokens=1_000_000, output_tokens=1_000_000)
+    assert estimate_cost("openai", "gpt-4o-2024-08-06", usage) == pytest.approx(12.50)
+    assert estimate_cost("openai", "gpt-4o-mini", usage) == pytest.approx(0.75)
+
+    cached = TokenUsage(input_tokens=1_000_000, cache_read_tokens=800_000, cache_write_tokens=100_000)
+    # 100k sem cache a $3, 800k lidos a $0.30 e 100k gravados a $3.75 por milhão
+    assert estimate_cost("anthropic", "claude-3-5-sonnet-20241022", cached) == pytest.approx(0.3 + 0.24 + 0.375)
+    assert estimate_cost("openai", "modelo-desconhecido", usage) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_usage_is_buffered_and_upserted_into_daily_rollup(recorder):
+    day = date(2024, 6, 1)
+    for _ in range(3):
+        recorder.record(1, "openai", "gpt-4o", TokenUsage(input_tokens=100, output_tokens=50), day=day)
+    recorder.record(1, "deepseek", "deepseek-chat", TokenUsage(input_tokens=10, output_tokens=5), day=day)
+    assert recorder.pending == 2
+
+    assert await recorder.flush() == 2
+    recorder.record(1, "openai", "gpt-4o", TokenUsage(input_tokens=100, output_tokens=50), day=day)
+    recorder.record(2, "openai", "gpt-4o", TokenUsage(input_tokens=1, output_tokens=1), day=day)
+    await recorder.flush()
+    assert recorder.pending == 0
+
+    rows = await recorder.daily_usage(day, day, user_id=1)
+    openai_row = next(row for row in rows if row["provider"] == "openai")
+    assert openai_row["requests"] == 4
+    assert openai_row["input_tokens"] == 400 and openai_row["output_tokens"] == 200
+    assert openai_row["cost_usd"] == pytest.approx(4 * (100 * 2.5 + 50 * 10) / 1_000_000)
+    assert len(await recorder.daily_usage(day, day)) == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_usage_for_next_attempt(recorder):
+    recorder.record(1, "openai", "gpt-4o", TokenUsage(input_tokens=100, output_tokens=50))
+    engine = recorder.engine
+    recorder._engine = create_async_engine("sqlite+aiosqlite:////nonexistent/dir/usage.db")
+
+    assert await recorder.flush() == 0
+    assert recorder.pending == 1
+
+    recorder._engine = engine
+    assert await recorder.flush() == 1
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_flush_is_tracked_until_it_finishes(recorder, monkeypatch):
+    monkeypatch.setattr(usage_accounting.get_settings(), "usage_flush_max_pending", 2)
+    recorder.record(1, "openai", "gpt-4o", TokenUsage(input_tokens=1, output_tokens=1))
+    recorder.record(2, "openai", "gpt-4o", TokenUsage(input_tokens=1, output_tokens=1))
+    recorder.record(3, "openai", "gpt-4o", TokenUsage(input_tokens=1, output_tokens=1))
+
+    # Uma única gravação em andamento, com referência forte até terminar
+    assert len(recorder._flushes) == 1
+    await recorder.stop()
+    assert not recorder._flushes and recorder.pending == 0
+    today = datetime.utcnow().date()
+    assert len(await recorder.daily_usage(today, today)) == 3
+
+
+@pytest.mark.asyncio
+async def test_usage_api_restricts_all_users_to_admins(recorder, monkeypatch):
+    monkeypatch.setattr(usage_accounting, "usage_recorder", recorder)
+    recorder.record(1, "openai", "gpt-4o", TokenUsage(input_tokens=100, output_tokens=50))
+    recorder.record(2, "openai", "gpt-4o", TokenUsage(input_tokens=100, output_tokens=50))
+    await recorder.flush()
+
+    user = SimpleNamespace(id=1, is_superuser=False)
+    app.dependency_overrides[current_active_user] = lambda: user
+    try:
+        client = TestClient(app)
+        usage = client.get("/api/usage", params={"days": 7}).json()
+        assert usage["totals"]["requests"] == 1
+        assert usage["days"][0]["model"] == "gpt-4o"
+        assert client.get("/api/usage", params={"all_users": True}).status_code == 403
+
+        user.is_superuser = True
+        assert client.get("/api/usage", params={"all_users": True}).json()["totals"]["requests"] == 2
+    finally:
+        app.dependency_overrides.clear()
@@ -240,14 +240,24 @@ async def test_backend_connection():
         return False, str(e)
 
 async def get_user_settings():
-    """Obtém as configurações atuais do usuário"""
+    """Obtém as configurações atuais do usuário (GET condicional com If-None-Match)"""
     try:
+        headers = {"Authorization": f"Bearer {st.session_state.access_token}"}
+        cached_settings = st.session_state.get("user_settings")
+        cached_etag = st.session_state.get("user_settings_etag")
+        if cached_settings and cached_etag:
+            headers["If-None-Match"] = cached_etag
+
         async with httpx.AsyncClient(timeout=httpx.Timeout(60.0)) as client:
             response = await client.get(
                 f"{API_BASE_URL}/api/settings",
-                headers={"Authorization": f"Bearer {st.session_state.access_token}"}
+                headers=headers
             )
+            if response.status_code == 304:
+                # Nada mudou desde a última leitura, reutilizar o documento em cache
+                return cached_settings
             if response.status_code == 200:
+                st.session_state.user_settings_etag = response.headers.get("ETag")
                 return response.json()
             else:
                 st.error(f"Failed to get user settings: {response.status_code}")
@@ -256,6 +266,88 @@ async def get_user_settings():
         st.error(f"Error getting user settings: {str(e)}")
         return None
 
+async def get_provider_catalog() -> dict:
+    """Catálogo de provedores e modelos do backend (GET condicional com If-None-Match)"""
+    cached_catalog = st.session_state.get("provider_catalog")
+    try:
+        headers = {"Authorization": f"Bearer {st.session_state.access_token}"}
+        cached_etag = st.session_state.get("provider_catalog_etag")
+        if cached_catalog and cached_etag:
+            headers["If-None-Match"] = cached_etag
+
+        async with httpx.AsyncClient(timeout=httpx.Timeout(60.0)) as client:
+            response = await client.get(f"{API_BASE_URL}/api/providers", headers=headers)
+            if response.status_code == 304:
+                return cached_catalog
+            if response.status_code == 200:
+                st.session_state.provider_catalog_etag = response.headers.get("ETag")
+                return response.json()["providers"]
+            st.error(f"Failed to get providers: {response.status_code}")
+    except Exception as e:
+        st.error(f"Error getting providers: {str(e)}")
+    return cached_catalog or {}
+
+def select_model(catalog: dict, provider: str, saved_settings: dict, key: str) -> str:
+    """Seletor de modelo com as opções do catálogo (o modelo salvo ou o padrão do provedor vem selecionado)"""
+    entry = catalog.get(provider) or {}
+    models = entry.get("models") or []
+    ids = [model["id"] for model in models]
+    names = {model["id"]: model["name"] for model in models}
+    selected = saved_settings.get("model") or entry.get("default_model")
+    return st.selectbox(
+        "Model",
+        ids,
+        index=ids.index(selected) if selected in ids else 0,
+        format_func=lambda model_id: names.get(model_id, model_id),
+        key=key
+    )
+
+def max_output_tokens(catalog: dict, provider: str, model_id: str, fallback: int = 4000) -> int:
+    """Limite de tokens de saída do modelo segundo o catálogo"""
+    for model in (catalog.get(provider) or {}).get("models", []):
+        if model["id"] == model_id:
+            return model["max_output_tokens"]
+    return fallback
+
+def select_routing(catalog: dict, provider: str, saved_settings: dict, key: str) -> str:
+    """Opção de roteamento automático para provedores com modelo rápido no catálogo"""
+    fast_model = (catalog.get(provider) or {}).get("fast_model")
+    if not fast_model:
+        return "fixed"
+    auto = st.checkbox(
+        "Automatic model routing",
+        value=saved_settings.get("routing") == "auto",
+        help=f"Simple prompts use {fast_model}; longer or complex ones use the model above",
+        key=key
+    )
+    return "auto" if auto else "fixed"
+
+async def save_user_settings(settings_data: dict, success_message: str) -> bool:
+    """Salva as configurações e atualiza o estado da sessão com a resposta (um único round trip)"""
+    try:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(120.0)) as client:
+            response = await client.post(
+                f"{API_BASE_URL}/api/settings/update",
+                json=settings_data,
+                headers={"Authorization": f"Bearer {st.session_state.access_token}"}
+            )
+            if response.status_code == 200:
+                st.success(success_message)
+                data = response.json()
+                if "settings" in data:
+                    # O backend já retorna o documento normalizado, sem precisar de um novo GET
+                    st.session_state.user_settings = data["settings"]
+                    st.session_state.user_settings_etag = response.headers.get("ETag")
+                else:
+                    st.session_state.user_settings = await get_user_settings()
+                return True
+            st.error(f"Failed to save settings: {response.text}")
+            return False
+    except Exception as e:
+        st.error(f"Error: {str(e)}")
+        st.error(traceback.format_exc())
+        return False
+
 async def register(email: str, password: str) -> bool:
     try:
         async with httpx.AsyncClient(timeout=httpx.Timeout(60.0)) as client:
@@ -302,26 +394,100 @@ async def login(email: str, password: str) -> bool:
         st.error(traceback.format_exc())
         return False
 
-async def generate_content(prompt: str) -> tuple[str, str]:
-    async with httpx.AsyncClient(timeout=httpx.Timeout(300.0)) as client:  # Aumentando timeout para 5 minutos
+async def generate_content(prompt: str, mode: str = "standard", target_page_id: str = None,
+                           target_database_id: str = None, tags: list = None,
+                           layout: str = "flat") -> tuple[str, str]:
+    async with httpx.AsyncClient(timeout=httpx.Timeout(300.0, connect=10.0)) as client:  # Prazo acima do total do backend (provedor + Notion)
         try:
             response = await client.post(
                 f"{API_BASE_URL}/api/generate",
-                json={"prompt": prompt},
+                json={
+                    "prompt": prompt,
+                    "mode": mode,
+                    "target_page_id": target_page_id or None,
+                    "target_database_id": target_database_id or None,
+                    "tags": tags or [],
+                    "layout": layout,
+                    # O documento é lido do histórico (comprimido) em vez de vir escapado no JSON
+                    "include_content": False,
+                },
                 headers={"Authorization": f"Bearer {st.session_state.access_token}"}
             )
             response.raise_for_status()
             data = response.json()
-            return data["content"], data["notion_url"]
+            content = data.get("content")
+            if content is None:
+                content_response = await client.get(
+                    f"{API_BASE_URL}{data['content_url']}",
+                    headers={"Authorization": f"Bearer {st.session_state.access_token}"}
+                )
+                content_response.raise_for_status()
+                content = content_response.text
+            return content, data["notion_url"]
         except Exception as e:
             st.error(f"Error generating content: {str(e)}")
             st.error(traceback.format_exc())
             return None, None
 
+async def get_generation_history(cursor: str = None) -> dict:
+    """Obtém uma página do histórico de gerações (somente metadados)"""
+    params = {"limit": 20}
+    if cursor:
+        params["cursor"] = cursor
+    try:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(30.0)) as client:
+            response = await client.get(
+                f"{API_BASE_URL}/api/generations",
+                params=params,
+                headers={"Authorization": f"Bearer {st.session_state.access_token}"}
+            )
+            response.raise_for_status()
+            return response.json()
+    except Exception as e:
+        st.error(f"Error loading history: {str(e)}")
+        return {"items": [], "next_cursor": None}
+
+async def get_generation(generation_id: int) -> dict:
+    """Carrega o conteúdo completo de uma geração do histórico"""
+    try:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(30.0)) as client:
+            response = await client.get(
+                f"{API_BASE_URL}/api/generations/{generation_id}",
+                headers={"Authorization": f"Bearer {st.session_state.access_token}"}
+            )
+            response.raise_for_status()
+            return response.json()
+    except Exception as e:
+        st.error(f"Error loading generation: {str(e)}")
+        return None
+
+async def publish_generations(database_id: str, generation_ids: list, tags: list = None) -> dict:
+    """Publica gerações do histórico como linhas de um banco de dados do Notion"""
+    try:
+        # Lotes grandes seguem o limite de requisições do Notion (~3 por segundo)
+        async with httpx.AsyncClient(timeout=httpx.Timeout(600.0, connect=10.0)) as client:
+            response = await client.post(
+                f"{API_BASE_URL}/api/generations/publish",
+                json={"database_id": database_id, "generation_ids": generation_ids, "tags": tags or []},
+                headers={"Authorization": f"Bearer {st.session_state.access_token}"}
+            )
+            response.raise_for_status()
+            return response.json()
+    except Exception as e:
+        st.error(f"Error publishing generations: {str(e)}")
+        return None
+
+def _parse_tags(value: str) -> list:
+    return [tag.strip() for tag in value.split(",") if tag.strip()]
+
 def logout():
     st.session_state.access_token = None
     st.session_state.user_email = None
     st.session_state.messages = []
+    st.session_state.pop("user_settings", None)
+    st.session_state.pop("user_settings_etag", None)
+    st.session_state.pop("history", None)
+    st.session_state.pop("history_cursor", None)
     st.rerun()
 
 if not st.session_state.access_token:
@@ -597,6 +763,10 @@ else:
         anthropic_settings = settings.get("anthropic_settings", {}) or {}
         deepseek_settings = settings.get("deepseek_settings", {}) or {}
         
+        # Modelos e limites vêm do catálogo do backend (reaproveitado enquanto o ETag não mudar)
+        st.session_state.provider_catalog = asyncio.run(get_provider_catalog())
+        catalog = st.session_state.provider_catalog
+        
         # Grupo de configurações do Notion (fora das abas)
         with st.form(key="notion_settings_form_" + str(id(st.session_state.access_token))):
             st.subheader(t["notion_settings"])
@@ -609,27 +779,11 @@ else:
             
             if notion_submit:
                 async def save_notion_settings():
-                    try:
-                        settings_data = {
-                            "notion_api_key": notion_key,
-                            "notion_page_id": notion_id
-                        }
-                        
-                        async with httpx.AsyncClient(timeout=httpx.Timeout(120.0)) as client:
-                            response = await client.post(
-                                f"{API_BASE_URL}/api/settings/update",
-                                json=settings_data,
-                                headers={"Authorization": f"Bearer {st.session_state.access_token}"}
-                            )
-                            if response.status_code == 200:
-                                st.success("Notion settings saved!")
-                                # Atualizar as configurações armazenadas
-                                st.session_state.user_settings = await get_user_settings()
-                            else:
-                                st.error(f"Failed to save settings: {response.text}")
-                    except Exception as e:
-                        st.error(f"Error: {str(e)}")
-                        st.error(traceback.format_exc())
+                    settings_data = {
+                        "notion_api_key": notion_key,
+                        "notion_page_id": notion_id
+                    }
+                    await save_user_settings(settings_data, "Notion settings saved!")
                 
                 asyncio.run(save_notion_settings())
         
@@ -641,13 +795,7 @@ else:
         with ai_tab1:
             with st.form("openai_settings_form"):
                 openai_key = st.text_input("OpenAI API Key", value=openai_key_value, type="password")
-                openai_model = st.selectbox(
-                    "Model", 
-                    ["gpt-4o", "gpt-4-turbo", "gpt-3.5-turbo"],
-                    index=0 if not openai_settings.get("model") else 
-                           ["gpt-4o", "gpt-4-turbo", "gpt-3.5-turbo"].index(openai_settings.get("model", "gpt-4o")),
-                    key="openai_model"
-                )
+                openai_model = select_model(catalog, "openai", openai_settings, "openai_model")
                 openai_temp = st.slider(
                     "Temperature", 
                     0.0, 1.0, 
@@ -655,10 +803,12 @@ else:
                     step=0.1, 
                     key="openai_temp"
                 )
+                openai_routing = select_routing(catalog, "openai", openai_settings, "openai_routing")
                 
                 openai_settings_data = {
                     "model": openai_model,
-                    "temperature": openai_temp
+                    "temperature": openai_temp,
+                    "routing": openai_routing
                 }
                 
                 openai_use = st.checkbox("Use OpenAI for generation", 
@@ -669,31 +819,15 @@ else:
                 
                 if openai_submit:
                     async def save_openai_settings():
-                        try:
-                            settings_data = {
-                                "openai_api_key": openai_key,
-                                "openai_settings": openai_settings_data
-                            }
-                            
-                            # Se o checkbox estiver marcado, define como provedor padrão
-                            if openai_use:
-                                settings_data["ai_provider"] = "openai"
-                            
-                            async with httpx.AsyncClient(timeout=httpx.Timeout(120.0)) as client:
-                                response = await client.post(
-                                    f"{API_BASE_URL}/api/settings/update",
-                                    json=settings_data,
-                                    headers={"Authorization": f"Bearer {st.session_state.access_token}"}
-                                )
-                                if response.status_code == 200:
-                                    st.success("OpenAI settings saved!")
-                                    # Atualizar as configurações armazenadas
-                                    st.session_state.user_settings = await get_user_settings()
-                                else:
-                                    st.error(f"Failed to save settings: {response.text}")
-                        except Exception as e:
-                            st.error(f"Error: {str(e)}")
-                            st.error(traceback.format_exc())
+                        settings_data = {
+                            "openai_api_key": openai_key,
+                            "openai_settings": openai_settings_data
+                        }
+                        
+                        # Se o checkbox estiver marcado, define como provedor padrão
+                        if openai_use:
+                            settings_data["ai_provider"] = "openai"
+                        await save_user_settings(settings_data, "OpenAI settings saved!")
                     
                     asyncio.run(save_openai_settings())
         
@@ -702,15 +836,7 @@ else:
             with st.form("claude_settings_form"):
                 claude_key = st.text_input("Anthropic API Key", value=anthropic_key_value, type="password")
                 
-                claude_models = ["claude-3-opus-20240229", "claude-3-sonnet-20240229", "claude-3-haiku-20240307"]
-                
-                claude_model = st.selectbox(
-                    "Model", 
-                    claude_models,
-                    index=0 if not anthropic_settings.get("model") else 
-                           claude_models.index(anthropic_settings.get("model", "claude-3-opus-20240229")),
-                    key="claude_model"
-                )
+                claude_model = select_model(catalog, "anthropic", anthropic_settings, "claude_model")
                 
                 claude_temp = st.slider(
                     "Temperature", 
@@ -719,10 +845,12 @@ else:
                     step=0.1, 
                     key="claude_temp"
                 )
+                claude_routing = select_routing(catalog, "anthropic", anthropic_settings, "claude_routing")
                 
                 claude_settings_data = {
                     "model": claude_model,
-                    "temperature": claude_temp
+                    "temperature": claude_temp,
+                    "routing": claude_routing
                 }
                 
                 claude_use = st.checkbox("Use Claude for generation", 
@@ -733,31 +861,15 @@ else:
                 
                 if claude_submit:
                     async def save_claude_settings():
-                        try:
-                            settings_data = {
-                                "anthropic_api_key": claude_key,
-                                "anthropic_settings": claude_settings_data
-                            }
-                            
-                            # Se o checkbox estiver marcado, define como provedor padrão
-                            if claude_use:
-                                settings_data["ai_provider"] = "anthropic"
-                            
-                            async with httpx.AsyncClient(timeout=httpx.Timeout(120.0)) as client:
-                                response = await client.post(
-                                    f"{API_BASE_URL}/api/settings/update",
-                                    json=settings_data,
-                                    headers={"Authorization": f"Bearer {st.session_state.access_token}"}
-                                )
-                                if response.status_code == 200:
-                                    st.success("Claude settings saved!")
-                                    # Atualizar as configurações armazenadas
-                                    st.session_state.user_settings = await get_user_settings()
-                                else:
-                                    st.error(f"Failed to save settings: {response.text}")
-                        except Exception as e:
-                            st.error(f"Error: {str(e)}")
-                            st.error(traceback.format_exc())
+                        settings_data = {
+                            "anthropic_api_key": claude_key,
+                            "anthropic_settings": claude_settings_data
+                        }
+                        
+                        # Se o checkbox estiver marcado, define como provedor padrão
+                        if claude_use:
+                            settings_data["ai_provider"] = "anthropic"
+                        await save_user_settings(settings_data, "Claude settings saved!")
                     
                     asyncio.run(save_claude_settings())
                     
@@ -766,15 +878,7 @@ else:
             with st.form("deepseek_settings_form"):
                 deepseek_key = st.text_input("DeepSeek API Key", value=deepseek_key_value, type="password")
                 
-                deepseek_models = ["deepseek-chat", "deepseek-coder", "deepseek-chat-v2"]
-                
-                deepseek_model = st.selectbox(
-                    "Model", 
-                    deepseek_models,
-                    index=0 if not deepseek_settings.get("model") else 
-                           deepseek_models.index(deepseek_settings.get("model", "deepseek-chat")),
-                    key="deepseek_model"
-                )
+                deepseek_model = select_model(catalog, "deepseek", deepseek_settings, "deepseek_model")
                 
                 deepseek_temp = st.slider(
                     "Temperature", 
@@ -787,8 +891,8 @@ else:
                 deepseek_max_tokens = st.number_input(
                     "Max Tokens",
                     min_value=100,
-                    max_value=4000,
-                    value=deepseek_settings.get("max_tokens", 1500),
+                    max_value=max_output_tokens(catalog, "deepseek", deepseek_model),
+                    value=min(deepseek_settings.get("max_tokens", 1500), max_output_tokens(catalog, "deepseek", deepseek_model)),
                     step=100,
                     key="deepseek_max_tokens"
                 )
@@ -842,34 +946,89 @@ else:
                 
                 if deepseek_submit:
                     async def save_deepseek_settings():
-                        try:
-                            settings_data = {
-                                "deepseek_api_key": deepseek_key,
-                                "deepseek_settings": deepseek_settings_data
-                            }
-                            
-                            # Se o checkbox estiver marcado, define como provedor padrão
-                            if deepseek_use:
-                                settings_data["ai_provider"] = "deepseek"
-                            
-                            async with httpx.AsyncClient(timeout=httpx.Timeout(120.0)) as client:
-                                response = await client.post(
-                                    f"{API_BASE_URL}/api/settings/update",
-                                    json=settings_data,
-                                    headers={"Authorization": f"Bearer {st.session_state.access_token}"}
-                                )
-                                if response.status_code == 200:
-                                    st.success("DeepSeek settings saved!")
-                                    # Atualizar as configurações armazenadas
-                                    st.session_state.user_settings = await get_user_settings()
-                                else:
-                                    st.error(f"Failed to save settings: {response.text}")
-                        except Exception as e:
-                            st.error(f"Error: {str(e)}")
-                            st.error(traceback.format_exc())
+                        settings_data = {
+                            "deepseek_api_key": deepseek_key,
+                            "deepseek_settings": deepseek_settings_data
+                        }
+                        
+                        # Se o checkbox estiver marcado, define como provedor padrão
+                        if deepseek_use:
+                            settings_data["ai_provider"] = "deepseek"
+                        await save_user_settings(settings_data, "DeepSeek settings saved!")
                     
                     asyncio.run(save_deepseek_settings())
 
+        # Demais provedores do catálogo (servidor compatível com a OpenAI e plugins)
+        extra_providers = [name for name in catalog if name not in ("openai", "anthropic", "deepseek")]
+        stored_providers = settings.get("providers") or {}
+        extra_tabs = st.tabs([catalog[name]["display_name"] for name in extra_providers]) if extra_providers else []
+        for provider_name, extra_tab in zip(extra_providers, extra_tabs):
+            entry = catalog[provider_name]
+            stored = stored_providers.get(provider_name) or {}
+            stored_settings = stored.get("settings") or {}
+            with extra_tab:
+                with st.form(f"{provider_name}_settings_form"):
+                    extra_key = st.text_input("API Key (optional)", value=stored.get("api_key") or "",
+                                              type="password", key=f"{provider_name}_key")
+                    if entry.get("accepts_any_model"):
+                        extra_model = st.text_input(
+                            "Model",
+                            value=stored_settings.get("model") or entry.get("default_model", ""),
+                            key=f"{provider_name}_model"
+                        )
+                    else:
+                        extra_model = select_model(catalog, provider_name, stored_settings, f"{provider_name}_model")
+                    extra_temp = st.slider("Temperature", 0.0, 1.0, value=stored_settings.get("temperature", 0.7),
+                                           step=0.1, key=f"{provider_name}_temp")
+                    extra_use = st.checkbox(f"Use {entry['display_name']} for generation",
+                                            value=settings.get("ai_provider") == provider_name,
+                                            key=f"use_{provider_name}")
+
+                    if st.form_submit_button(f"Save {entry['display_name']} Settings"):
+                        settings_data = {"providers": {provider_name: {
+                            "api_key": extra_key,
+                            "settings": {"model": extra_model, "temperature": extra_temp},
+                        }}}
+                        if extra_use:
+                            settings_data["ai_provider"] = provider_name
+                        asyncio.run(save_user_settings(settings_data, f"{entry['display_name']} settings saved!"))
+
+        # Histórico de gerações salvo no backend (sobrevive a logout e recarregamentos)
+        with st.expander("Histórico"):
+            if "history" not in st.session_state:
+                page = asyncio.run(get_generation_history())
+                st.session_state.history = page["items"]
+                st.session_state.history_cursor = page["next_cursor"]
+            for item in st.session_state.history:
+                label = item.get("title") or item["prompt_preview"]
+                st.caption(f"{item['created_at'][:16].replace('T', ' ')} · {item['provider']}")
+                if st.button(label[:60], key=f"history_{item['id']}"):
+                    generation = asyncio.run(get_generation(item["id"]))
+                    if generation:
+                        # Uma nova geração a partir deste item atualiza a mesma página
+                        st.session_state.target_page_id = generation["notion_page_id"] or ""
+                        st.session_state.messages += [
+                            {"role": "user", "content": generation["prompt"]},
+                            {"role": "assistant", "content": generation["content"],
+                             "notion_url": generation["notion_url"]},
+                        ]
+                        st.rerun()
+            if st.session_state.history_cursor and st.button("Carregar mais", key="history_more"):
+                page = asyncio.run(get_generation_history(st.session_state.history_cursor))
+                st.session_state.history += page["items"]
+                st.session_state.history_cursor = page["next_cursor"]
+                st.rerun()
+            if st.session_state.history and st.session_state.get("target_database_id", "").strip():
+                if st.button("Publicar itens carregados no banco de dados", key="history_publish"):
+                    with st.spinner("Publicando no Notion..."):
+                        result = asyncio.run(publish_generations(
+                            st.session_state.target_database_id.strip(),
+                            [item["id"] for item in st.session_state.history],
+                            _parse_tags(st.session_state.get("tags", ""))
+                        ))
+                    if result:
+                        st.success(f"{result['created']} linhas criadas, {result['failed']} falharam")
+
     # Chat interface
     # Mostrar qual provedor está sendo usado
     active_provider = settings.get("ai_provider", "openai")
@@ -880,6 +1039,27 @@ else:
         provider_display_name = "DeepSeek"
     
     st.info(f"**Provedor ativo:** {provider_display_name}")
+    long_document = st.toggle(
+        "Documento longo",
+        help="Gera um sumário e escreve as seções em paralelo, publicando no Notion conforme ficam prontas"
+    )
+    target_page_id = st.text_input(
+        "Atualizar página existente (ID, opcional)",
+        key="target_page_id",
+        help="Reescreve a página indicada enviando apenas os blocos que mudaram, em vez de criar uma nova"
+    )
+    target_database_id = st.text_input(
+        "Publicar em banco de dados (ID, opcional)",
+        key="target_database_id",
+        help="Cria uma linha no banco com título, tags, provedor, modelo e tokens preenchidos"
+    )
+    tags = st.text_input("Tags (separadas por vírgula)", key="tags")
+    layout = st.selectbox(
+        "Layout da página",
+        options=["flat", "toggle", "child_page"],
+        format_func={"flat": "Página única", "toggle": "Seções recolhíveis", "child_page": "Subpáginas"}.get,
+        help="Documentos grandes podem ser divididos pelos cabeçalhos principais, com as seções enviadas em paralelo"
+    )
     
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
@@ -908,7 +1088,10 @@ else:
                     message_placeholder.info(f"Enviando para o Notion...")
                 time.sleep(0.1)
                 
-            content, notion_url = asyncio.run(generate_content(prompt))
+            content, notion_url = asyncio.run(generate_content(
+                prompt, "long" if long_document else "standard", target_page_id.strip(),
+                target_database_id.strip(), _parse_tags(tags), layout
+            ))
             progress_bar.progress(100)
             
             if content and notion_url:
@@ -921,6 +1104,8 @@ else:
                     "content": content,
                     "notion_url": notion_url
                 })
+                # Recarregar o histórico com a nova geração
+                st.session_state.pop("history", None)
             else:
                 message_placeholder.error("Ocorreu um erro na geração do conteúdo. Por favor, tente novamente ou verifique os logs.")
             
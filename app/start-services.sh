@@ -46,7 +46,7 @@ log "API iniciada (PID: $API_PID)"
 sleep 3
 
 # Verificar se o backend está em execução
-if curl -s http://localhost:8080/api/health >/dev/null 2>&1; then
+if curl -s -f http://localhost:8080/livez >/dev/null 2>&1; then
   log "Backend está respondendo corretamente"
 else
   log "AVISO: Backend pode não estar respondendo. Verificar logs em /app/logs/api.log"
@@ -26,10 +26,12 @@ wait_for_postgres() {
 # Aguardar o banco de dados estar pronto
 wait_for_postgres
 
-# Iniciar o backend em segundo plano
+# Iniciar o backend em segundo plano (SERVER_WORKERS processos; veja backend/server.py).
+# Para recarregar sem derrubar o serviço: kill -HUP $(cat /tmp/backend.pid)
 cd /app
 echo "Iniciando servidor backend..."
-PYTHONPATH=/app uvicorn backend.main:app --host 0.0.0.0 --port 8080 &
+PYTHONPATH=/app python -m backend.server &
+echo $! > /tmp/backend.pid
 
 # Aguardar o backend iniciar
 echo "Aguardando o backend iniciar..."
@@ -38,7 +40,7 @@ sleep 5
 # Verificar se o backend está rodando
 curl_check() {
     for i in {1..30}; do
-        if curl -s -f http://localhost:8080/api/health > /dev/null; then
+        if curl -s -f http://localhost:8080/livez > /dev/null; then
             echo "Backend está pronto!"
             return 0
         fi
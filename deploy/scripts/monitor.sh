@@ -50,8 +50,8 @@ check_resources() {
 
 # Verificar saúde da aplicação
 check_health() {
-    # Verificar endpoint de saúde
-    HEALTH_STATUS=$(curl -s -o /dev/null -w "%{http_code}" http://localhost:8085/api/health)
+    # Verificar readiness (banco, esquema e circuit breakers); 503 quando a API não pode atender
+    HEALTH_STATUS=$(curl -s -o /dev/null -w "%{http_code}" http://localhost:8085/readyz)
     
     if [ "$HEALTH_STATUS" != "200" ]; then
         send_alert "API não está respondendo corretamente. Status: $HEALTH_STATUS"
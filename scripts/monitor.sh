@@ -38,7 +38,8 @@ fi
 
 # Verificar API
 echo -n "API: "
-if curl -s http://localhost:8080/api/health | grep -q "ok"; then
+# /readyz responde 200 só com banco e esquema em dia (503 caso contrário)
+if [ "$(curl -s -o /dev/null -w "%{http_code}" http://localhost:8080/readyz)" = "200" ]; then
     echo -e "${GREEN}Operacional✅${NC}"
 else
     echo -e "${RED}Falha❌${NC}"